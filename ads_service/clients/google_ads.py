@@ -7,6 +7,7 @@ Handles Performance Max campaign creation, management, and metrics fetching.
 
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from functools import partial
@@ -22,6 +23,47 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# SDK calls run on a dedicated pool so they don't starve the default executor
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared Google Ads SDK thread pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_ads_settings().google_sdk_threads,
+            thread_name_prefix="google-ads",
+        )
+    return _executor
+
+
+def _row_to_snapshot(row) -> MetricsSnapshot:
+    """Convert one daily GAQL metrics row into a MetricsSnapshot."""
+    impressions = row.metrics.impressions
+    clicks = row.metrics.clicks
+    conversions = int(row.metrics.conversions)
+    spend_cents = row.metrics.cost_micros // 10000  # Convert micros to cents
+    revenue_cents = int(row.metrics.conversions_value * 100)
+
+    ctr = (clicks / impressions * 100) if impressions > 0 else None
+    cpc_cents = (spend_cents // clicks) if clicks > 0 else None
+    cpa_cents = (spend_cents // conversions) if conversions > 0 else None
+    roas = (revenue_cents / spend_cents) if spend_cents > 0 else None
+
+    return MetricsSnapshot(
+        date=datetime.strptime(row.segments.date, "%Y-%m-%d").date(),
+        impressions=impressions,
+        clicks=clicks,
+        conversions=conversions,
+        spend_cents=spend_cents,
+        revenue_cents=revenue_cents,
+        ctr=ctr,
+        cpc_cents=cpc_cents,
+        cpa_cents=cpa_cents,
+        roas=roas,
+    )
+
 
 class GoogleAdsClient:
     """
@@ -82,9 +124,9 @@ class GoogleAdsClient:
             raise
 
     async def _run_sync(self, func, *args, **kwargs):
-        """Run a synchronous SDK function in a thread pool."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+        """Run a synchronous SDK function in the Google Ads SDK thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
 
     # =========================================================================
     # Account Management
@@ -390,35 +432,56 @@ class GoogleAdsClient:
             """
 
             response = ga_service.search(customer_id=self.customer_id, query=query)
+            return [_row_to_snapshot(row) for row in response]
 
-            results = []
-            for row in response:
-                impressions = row.metrics.impressions
-                clicks = row.metrics.clicks
-                conversions = int(row.metrics.conversions)
-                spend_cents = row.metrics.cost_micros // 10000  # Convert micros to cents
-                revenue_cents = int(row.metrics.conversions_value * 100)
-
-                ctr = (clicks / impressions * 100) if impressions > 0 else None
-                cpc_cents = (spend_cents // clicks) if clicks > 0 else None
-                cpa_cents = (spend_cents // conversions) if conversions > 0 else None
-                roas = (revenue_cents / spend_cents) if spend_cents > 0 else None
-
-                results.append(
-                    MetricsSnapshot(
-                        date=datetime.strptime(row.segments.date, "%Y-%m-%d").date(),
-                        impressions=impressions,
-                        clicks=clicks,
-                        conversions=conversions,
-                        spend_cents=spend_cents,
-                        revenue_cents=revenue_cents,
-                        ctr=ctr,
-                        cpc_cents=cpc_cents,
-                        cpa_cents=cpa_cents,
-                        roas=roas,
-                    )
-                )
+        return await self._run_sync(_get_metrics)
+
+    async def get_account_campaign_metrics(
+        self,
+        start_date: str,
+        end_date: str,
+    ) -> Dict[str, List[MetricsSnapshot]]:
+        """
+        Get daily metrics for every campaign in the account in one query.
+
+        A single GAQL report segmented by campaign and date, streamed with
+        search_stream, replaces one query per campaign.
+
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            Daily metrics snapshots keyed by campaign ID
+        """
+        await self._ensure_initialized()
 
+        def _get_metrics():
+            ga_service = self._client.get_service("GoogleAdsService")
+
+            query = f"""
+                SELECT
+                    campaign.id,
+                    segments.date,
+                    metrics.impressions,
+                    metrics.clicks,
+                    metrics.conversions,
+                    metrics.cost_micros,
+                    metrics.conversions_value
+                FROM campaign
+                WHERE campaign.status != 'REMOVED'
+                    AND segments.date >= '{start_date}'
+                    AND segments.date <= '{end_date}'
+            """
+
+            stream = ga_service.search_stream(customer_id=self.customer_id, query=query)
+
+            results: Dict[str, List[MetricsSnapshot]] = {}
+            for batch in stream:
+                for row in batch.results:
+                    results.setdefault(str(row.campaign.id), []).append(
+                        _row_to_snapshot(row)
+                    )
             return results
 
         return await self._run_sync(_get_metrics)
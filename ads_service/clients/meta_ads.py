@@ -7,6 +7,7 @@ Handles campaign creation, management, and metrics fetching.
 
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from functools import partial
@@ -22,6 +23,76 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# Conversion action types counted as purchases
+PURCHASE_ACTION_TYPES = [
+    "purchase",
+    "omni_purchase",
+    "offsite_conversion.fb_pixel_purchase",
+]
+
+INSIGHT_FIELDS = [
+    "date_start",
+    "date_stop",
+    "impressions",
+    "clicks",
+    "spend",
+    "actions",  # Contains conversions
+    "action_values",  # Contains conversion value
+    "cost_per_action_type",
+]
+
+# SDK calls run on a dedicated pool so they don't starve the default executor
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared Meta SDK thread pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_ads_settings().meta_sdk_threads,
+            thread_name_prefix="meta-ads",
+        )
+    return _executor
+
+
+def _insight_to_snapshot(data: Dict[str, Any]) -> MetricsSnapshot:
+    """Convert one daily insight row into a MetricsSnapshot."""
+    # Extract conversions and revenue from actions
+    conversions = 0
+    revenue = 0
+    for action in data.get("actions") or []:
+        if action["action_type"] in PURCHASE_ACTION_TYPES:
+            conversions += int(float(action.get("value", 0)))
+    for action in data.get("action_values") or []:
+        if action["action_type"] in PURCHASE_ACTION_TYPES:
+            revenue += int(float(action.get("value", 0)) * 100)
+
+    # Calculate metrics
+    impressions = int(data.get("impressions", 0))
+    clicks = int(data.get("clicks", 0))
+    spend_cents = int(float(data.get("spend", 0)) * 100)
+
+    ctr = (clicks / impressions * 100) if impressions > 0 else None
+    cpc_cents = (spend_cents // clicks) if clicks > 0 else None
+    cpa_cents = (spend_cents // conversions) if conversions > 0 else None
+    roas = (revenue / spend_cents) if spend_cents > 0 else None
+
+    return MetricsSnapshot(
+        date=datetime.strptime(
+            data.get("date_start", data.get("date_stop")), "%Y-%m-%d"
+        ).date(),
+        impressions=impressions,
+        clicks=clicks,
+        conversions=conversions,
+        spend_cents=spend_cents,
+        revenue_cents=revenue,
+        ctr=ctr,
+        cpc_cents=cpc_cents,
+        cpa_cents=cpa_cents,
+        roas=roas,
+    )
+
 
 class MetaAdsClient:
     """
@@ -80,9 +151,9 @@ class MetaAdsClient:
             raise
 
     async def _run_sync(self, func, *args, **kwargs):
-        """Run a synchronous SDK function in a thread pool."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+        """Run a synchronous SDK function in the Meta SDK thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
 
     # =========================================================================
     # Account Management
@@ -395,66 +466,68 @@ class MetaAdsClient:
 
             campaign = Campaign(campaign_id)
 
-            fields = [
-                "date_start",
-                "date_stop",
-                "impressions",
-                "clicks",
-                "spend",
-                "actions",  # Contains conversions
-                "cost_per_action_type",
-            ]
-
             params = {
                 "date_preset": date_preset,
                 "time_increment": time_increment,
             }
 
-            insights = campaign.get_insights(fields=fields, params=params)
+            insights = campaign.get_insights(fields=INSIGHT_FIELDS, params=params)
+            return [_insight_to_snapshot(dict(insight)) for insight in insights]
+
+        return await self._run_sync(_get_insights)
+
+    async def get_account_campaign_insights(
+        self,
+        date_preset: str = "last_7d",
+        time_increment: int = 1,
+        campaign_ids: Optional[List[str]] = None,
+        time_range: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, List[MetricsSnapshot]]:
+        """
+        Get daily insights for every campaign in the account in one request.
+
+        Uses account-level insights with level=campaign, so a whole account
+        syncs with a single (paginated) API call instead of one per campaign.
+
+        Args:
+            date_preset: Date range (last_7d, last_30d, this_month, etc.)
+            time_increment: Days per data point (1 for daily)
+            campaign_ids: Optional campaign IDs to restrict the report to
+            time_range: Optional {"since", "until"} dates (overrides date_preset)
+
+        Returns:
+            Daily metrics snapshots keyed by campaign ID
+        """
+        await self._ensure_initialized()
+
+        def _get_insights():
+            params = {
+                "level": "campaign",
+                "time_increment": time_increment,
+                "limit": 500,
+            }
+            if time_range:
+                params["time_range"] = time_range
+            else:
+                params["date_preset"] = date_preset
+            if campaign_ids:
+                params["filtering"] = [{
+                    "field": "campaign.id",
+                    "operator": "IN",
+                    "value": list(campaign_ids),
+                }]
+
+            insights = self._ad_account.get_insights(
+                fields=["campaign_id"] + INSIGHT_FIELDS, params=params
+            )
 
-            results = []
+            # Iterating the cursor follows pagination
+            results: Dict[str, List[MetricsSnapshot]] = {}
             for insight in insights:
                 data = dict(insight)
-
-                # Extract conversions from actions
-                conversions = 0
-                revenue = 0
-                if "actions" in data:
-                    for action in data["actions"]:
-                        if action["action_type"] in [
-                            "purchase",
-                            "omni_purchase",
-                            "offsite_conversion.fb_pixel_purchase",
-                        ]:
-                            conversions += int(action.get("value", 0))
-
-                # Calculate metrics
-                impressions = int(data.get("impressions", 0))
-                clicks = int(data.get("clicks", 0))
-                spend_cents = int(float(data.get("spend", 0)) * 100)
-
-                ctr = (clicks / impressions * 100) if impressions > 0 else None
-                cpc_cents = (spend_cents // clicks) if clicks > 0 else None
-                cpa_cents = (spend_cents // conversions) if conversions > 0 else None
-                roas = (revenue / spend_cents) if spend_cents > 0 else None
-
-                results.append(
-                    MetricsSnapshot(
-                        date=datetime.strptime(
-                            data.get("date_start", data.get("date_stop")), "%Y-%m-%d"
-                        ).date(),
-                        impressions=impressions,
-                        clicks=clicks,
-                        conversions=conversions,
-                        spend_cents=spend_cents,
-                        revenue_cents=revenue,
-                        ctr=ctr,
-                        cpc_cents=cpc_cents,
-                        cpa_cents=cpa_cents,
-                        roas=roas,
-                    )
+                results.setdefault(str(data["campaign_id"]), []).append(
+                    _insight_to_snapshot(data)
                 )
-
             return results
 
         return await self._run_sync(_get_insights)
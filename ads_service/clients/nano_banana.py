@@ -15,8 +15,53 @@ from datetime import datetime
 
 import httpx
 
+from services.task_poller import TaskProvider, get_task_poller, PENDING, SUCCESS, FAILED
+
 logger = logging.getLogger(__name__)
 
+# Task IDs per getTaskResultBatch request
+STATUS_BATCH_SIZE = 50
+
+
+class NanoBananaTaskProvider(TaskProvider):
+    """
+    Checks Nano Banana tasks for the shared task poller (batched).
+
+    One provider (with its own HTTP client) is shared per API key, so tasks
+    started from different NanoBananaClient instances are checked together.
+    """
+
+    name = "nano-banana"
+    batch_size = STATUS_BATCH_SIZE
+    expected_seconds = 20.0
+
+    def __init__(self, client: "NanoBananaClient"):
+        self.client = client
+
+    async def fetch(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        try:
+            return await self.client.get_task_results_batch(task_ids)
+        except httpx.HTTPError as e:
+            # Batch endpoint unavailable: fall back to one request per task
+            logger.debug(f"Batch status failed ({e}), checking tasks individually")
+            results = await asyncio.gather(
+                *(self.client.get_task_result(task_id) for task_id in task_ids),
+                return_exceptions=True,
+            )
+            return {
+                task_id: result
+                for task_id, result in zip(task_ids, results)
+                if not isinstance(result, Exception)
+            }
+
+    def classify(self, status: Dict[str, Any]) -> str:
+        state = (status.get("status") or "").lower()
+        if state == "completed":
+            return SUCCESS
+        if state == "failed":
+            return FAILED
+        return PENDING
+
 
 class NanoBananaClient:
     """
@@ -52,6 +97,16 @@ class NanoBananaClient:
 
         self._client: Optional[httpx.AsyncClient] = None
 
+    @property
+    def task_provider(self) -> NanoBananaTaskProvider:
+        """Shared status provider for this API key."""
+        provider = _task_providers.get(self.api_key)
+        if provider is None:
+            provider = _task_providers[self.api_key] = NanoBananaTaskProvider(
+                NanoBananaClient(self.api_key)
+            )
+        return provider
+
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create the HTTP client."""
         if self._client is None or self._client.is_closed:
@@ -196,14 +251,14 @@ class NanoBananaClient:
         aspect_ratio: str = "1:1",
         resolution: str = "1k",
         max_wait_seconds: int = 120,
-        poll_interval: float = 3.0,
+        poll_interval: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Create a task and wait for completion.
 
         This is a convenience method that handles the full workflow:
         1. Create the task
-        2. Poll for results
+        2. Wait on the shared task poller (batched, adaptive status checks)
         3. Return the completed result or raise on failure
 
         Args:
@@ -212,7 +267,7 @@ class NanoBananaClient:
             aspect_ratio: Output aspect ratio
             resolution: Output resolution
             max_wait_seconds: Maximum time to wait for completion
-            poll_interval: Seconds between status checks
+            poll_interval: Deprecated; the task poller schedules checks
 
         Returns:
             Dict with completed task result including image URL
@@ -233,28 +288,29 @@ class NanoBananaClient:
         if not task_id:
             raise RuntimeError(f"No taskId in response: {create_result}")
 
-        # Poll for completion
-        start_time = datetime.utcnow()
-        while True:
-            elapsed = (datetime.utcnow() - start_time).total_seconds()
-            if elapsed > max_wait_seconds:
-                raise TimeoutError(
-                    f"Task {task_id} did not complete within {max_wait_seconds}s"
-                )
+        return await self.wait_for_task(task_id, max_wait_seconds)
 
-            result = await self.get_task_result(task_id)
-            status = result.get("status", "").lower()
+    async def wait_for_task(self, task_id: str, max_wait_seconds: int = 120) -> Dict[str, Any]:
+        """
+        Wait for an existing task via the shared task poller.
 
-            if status == "completed":
-                logger.info(f"Task {task_id} completed in {elapsed:.1f}s")
-                return result
+        Raises:
+            TimeoutError: If task doesn't complete in time
+            RuntimeError: If task fails
+        """
+        start_time = datetime.utcnow()
+        result = await get_task_poller().wait(
+            self.task_provider, task_id, timeout=max_wait_seconds
+        )
+        elapsed = (datetime.utcnow() - start_time).total_seconds()
 
-            if status == "failed":
-                error_msg = result.get("error", "Unknown error")
-                raise RuntimeError(f"Task {task_id} failed: {error_msg}")
+        if self.task_provider.classify(result) == FAILED:
+            error_msg = result.get("error", "Unknown error")
+            raise RuntimeError(f"Task {task_id} failed: {error_msg}")
 
-            logger.debug(f"Task {task_id} status: {status}, waiting...")
-            await asyncio.sleep(poll_interval)
+        logger.info(f"Task {task_id} completed in {elapsed:.1f}s")
+        result.setdefault("taskId", task_id)
+        return result
 
     async def generate_ad_image(
         self,
@@ -309,6 +365,10 @@ Use vibrant, engaging colors that attract attention."""
         )
 
 
+# Status providers shared per API key
+_task_providers: Dict[str, NanoBananaTaskProvider] = {}
+
+
 # =============================================================================
 # Convenience Functions
 # =============================================================================
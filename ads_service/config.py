@@ -65,6 +65,25 @@ class AdsSettings(BaseSettings):
     # Encryption key (reuse from cookie encryption)
     encryption_key: Optional[str] = None
 
+    # ==========================================================================
+    # Metrics Sync
+    # ==========================================================================
+
+    # Background sync of daily metrics for all active campaigns
+    metrics_sync_enabled: bool = True
+    metrics_sync_interval_minutes: int = 60
+
+    # Days of history re-pulled each run (platforms restate recent days)
+    metrics_sync_lookback_days: int = 7
+
+    # Accounts synced concurrently per platform (API rate limits)
+    meta_sync_concurrency: int = 4
+    google_sync_concurrency: int = 4
+
+    # Threads for blocking SDK calls (per platform)
+    meta_sdk_threads: int = 8
+    google_sdk_threads: int = 8
+
     class Config:
         env_prefix = ""
         case_sensitive = False
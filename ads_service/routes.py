@@ -10,6 +10,7 @@ from typing import Optional, List
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import RedirectResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from database.database import get_db
@@ -41,6 +42,12 @@ from .models import (
     AdsErrorResponse,
 )
 from .services.oauth_manager import get_oauth_manager
+from .services.metrics_sync import (
+    get_metrics_sync_engine,
+    upsert_metrics,
+    refresh_campaign_totals,
+    snapshots_to_rows,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -1045,7 +1052,9 @@ async def sync_campaign_metrics(
     """
     Sync metrics from the ad platform for a campaign.
 
-    Fetches the latest performance data and stores it locally.
+    Fetches the latest performance data and stores it locally. Metrics for
+    active campaigns are also synced in the background (see
+    services/metrics_sync.py), so this is only needed for an immediate refresh.
     """
     campaign = (
         db.query(AdsCampaign)
@@ -1101,51 +1110,11 @@ async def sync_campaign_metrics(
         else:
             metrics = []
 
-        # Store metrics in database
-        for m in metrics:
-            existing = (
-                db.query(AdsMetrics)
-                .filter(
-                    AdsMetrics.campaign_id == campaign_id,
-                    AdsMetrics.date == m.date,
-                )
-                .first()
-            )
-
-            if existing:
-                # Update existing record
-                existing.impressions = m.impressions
-                existing.clicks = m.clicks
-                existing.conversions = m.conversions
-                existing.spend_cents = m.spend_cents
-                existing.revenue_cents = m.revenue_cents
-                existing.ctr = m.ctr
-                existing.cpc_cents = m.cpc_cents
-                existing.cpa_cents = m.cpa_cents
-                existing.roas = m.roas
-            else:
-                # Create new record
-                new_metric = AdsMetrics(
-                    campaign_id=campaign_id,
-                    date=m.date,
-                    impressions=m.impressions,
-                    clicks=m.clicks,
-                    conversions=m.conversions,
-                    spend_cents=m.spend_cents,
-                    revenue_cents=m.revenue_cents,
-                    ctr=m.ctr,
-                    cpc_cents=m.cpc_cents,
-                    cpa_cents=m.cpa_cents,
-                    roas=m.roas,
-                )
-                db.add(new_metric)
-
-        # Update total spend on campaign
-        total_spend = sum(m.spend_cents for m in metrics)
-        campaign.total_spend_cents = (campaign.total_spend_cents or 0) + total_spend
-        campaign.last_synced_at = datetime.utcnow()
-
+        # Store metrics in database (one bulk upsert)
+        upsert_metrics(db, snapshots_to_rows(campaign_id, metrics))
+        refresh_campaign_totals(db, [campaign_id])
         db.commit()
+        db.refresh(campaign)
 
         return {
             "success": True,
@@ -1160,6 +1129,45 @@ async def sync_campaign_metrics(
         raise HTTPException(status_code=500, detail=f"Failed to sync metrics: {e}")
 
 
+@router.post("/metrics/sync")
+async def sync_all_metrics(
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Sync metrics for all active campaigns on the user's connected accounts.
+
+    Each account is pulled with one batched report.
+    """
+    platform_ids = [
+        p.id
+        for p in db.query(AdsPlatform.id).filter(
+            AdsPlatform.user_id == user_id,
+            AdsPlatform.is_connected == True,
+        )
+    ]
+    if not platform_ids:
+        return {"success": True, "accounts": 0, "rows": 0, "failed": []}
+
+    summary = await get_metrics_sync_engine().sync_all(platform_ids)
+    return {"success": not summary["failed"], **summary}
+
+
+@router.get("/metrics/sync/status")
+async def get_metrics_sync_status(user_id: str = Depends(get_current_user)):
+    """Get the result of the last scheduled metrics sync run."""
+    settings = get_ads_settings()
+    return {
+        "enabled": settings.metrics_sync_enabled,
+        "interval_minutes": settings.metrics_sync_interval_minutes,
+        "last_run": {
+            key: value
+            for key, value in get_metrics_sync_engine().last_run.items()
+            if key != "failed"
+        },
+    }
+
+
 @router.get("/reports/weekly", response_model=WeeklyReportResponse)
 async def get_weekly_report(
     user_id: str = Depends(get_current_user),
@@ -1174,36 +1182,40 @@ async def get_weekly_report(
     end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=7)
 
-    # Get all metrics for this user's campaigns in the date range
-    metrics = (
-        db.query(AdsMetrics)
-        .join(AdsCampaign)
-        .join(AdsPlatform)
+    # Aggregate this user's metrics per platform in the database
+    per_platform = (
+        db.query(
+            AdsPlatform.platform,
+            func.coalesce(func.sum(AdsMetrics.spend_cents), 0),
+            func.coalesce(func.sum(AdsMetrics.revenue_cents), 0),
+            func.coalesce(func.sum(AdsMetrics.impressions), 0),
+            func.coalesce(func.sum(AdsMetrics.conversions), 0),
+        )
+        .select_from(AdsMetrics)
+        .join(AdsCampaign, AdsMetrics.campaign_id == AdsCampaign.id)
+        .join(AdsPlatform, AdsCampaign.platform_id == AdsPlatform.id)
         .filter(
             AdsPlatform.user_id == user_id,
             AdsMetrics.date >= start_date,
             AdsMetrics.date <= end_date,
         )
+        .group_by(AdsPlatform.platform)
         .all()
     )
 
     # Aggregate metrics
-    total_spend_cents = sum(m.spend_cents for m in metrics)
-    total_revenue_cents = sum(m.revenue_cents for m in metrics)
-    total_impressions = sum(m.impressions for m in metrics)
-    total_conversions = sum(m.conversions for m in metrics)
+    total_spend_cents = sum(row[1] for row in per_platform)
+    total_revenue_cents = sum(row[2] for row in per_platform)
+    total_impressions = sum(row[3] for row in per_platform)
+    total_conversions = sum(row[4] for row in per_platform)
 
     total_spend = total_spend_cents / 100
     total_revenue = total_revenue_cents / 100
     roas = (total_revenue / total_spend) if total_spend > 0 else None
 
     # Find best performing platform
-    platform_spend = {}
-    platform_revenue = {}
-    for m in metrics:
-        platform = m.campaign.platform.platform
-        platform_spend[platform] = platform_spend.get(platform, 0) + m.spend_cents
-        platform_revenue[platform] = platform_revenue.get(platform, 0) + m.revenue_cents
+    platform_spend = {row[0]: row[1] for row in per_platform}
+    platform_revenue = {row[0]: row[2] for row in per_platform}
 
     best_platform = None
     best_roas = 0
@@ -1,9 +1,16 @@
 """
 Ads Service Business Logic
 
-Contains OAuth management, campaign operations, and image generation.
+Contains OAuth management, campaign operations, image generation,
+and scheduled metrics sync.
 """
 
 from .image_generation import ImageGenerationService, get_image_generation_service
+from .metrics_sync import MetricsSyncEngine, get_metrics_sync_engine
 
-__all__ = ["ImageGenerationService", "get_image_generation_service"]
+__all__ = [
+    "ImageGenerationService",
+    "get_image_generation_service",
+    "MetricsSyncEngine",
+    "get_metrics_sync_engine",
+]
@@ -3,9 +3,14 @@ Image Generation Service
 
 High-level service for AI image generation using Nano Banana Pro.
 Handles database tracking, asset management, and campaign linking.
+
+Jobs that aren't awaited are tracked by the shared task poller; finished jobs
+are written back to image_generation_jobs in bulk by _JobResultWriter.
 """
 
+import asyncio
 import logging
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -13,10 +18,67 @@ from sqlalchemy.orm import Session
 
 from database.database import SessionLocal
 from database.models import UserAsset, ImageGenerationJob, AdsCampaign
+from services.task_poller import get_task_poller, FAILED
 from ..clients.nano_banana import NanoBananaClient, get_nano_banana_client
 
 logger = logging.getLogger(__name__)
 
+# Seconds finished jobs are collected before one bulk write
+JOB_WRITE_DELAY_SECONDS = 0.5
+
+
+def _result_url(result: Dict[str, Any]) -> Optional[str]:
+    return result.get("result") or result.get("imageUrl")
+
+
+class _JobResultWriter:
+    """Collects finished generation jobs and writes them in one transaction."""
+
+    def __init__(self, delay: float = JOB_WRITE_DELAY_SECONDS):
+        self.delay = delay
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, update: Dict[str, Any]):
+        self._pending[update["id"]] = update
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_soon())
+
+    async def _flush_soon(self):
+        await asyncio.sleep(self.delay)
+        updates, self._pending = list(self._pending.values()), {}
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write, updates)
+        except Exception as e:
+            logger.error(f"Failed to write {len(updates)} image generation jobs: {e}")
+
+    @staticmethod
+    def _write(updates: List[Dict[str, Any]]):
+        campaigns = [
+            {"id": u.pop("campaign_id"), "media_url": u["result_url"]}
+            for u in updates
+            if u.get("campaign_id") and u.get("result_url")
+        ]
+        for u in updates:
+            u.pop("campaign_id", None)
+
+        db = SessionLocal()
+        try:
+            db.bulk_update_mappings(ImageGenerationJob, updates)
+            if campaigns:
+                db.bulk_update_mappings(AdsCampaign, campaigns)
+            db.commit()
+            logger.info(f"Updated {len(updates)} image generation jobs")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+_job_writer = _JobResultWriter()
+
 
 class ImageGenerationService:
     """
@@ -259,19 +321,28 @@ class ImageGenerationService:
             client = self._get_client()
 
             try:
+                create_result = await client.create_task(
+                    prompt=prompt,
+                    image_inputs=image_inputs if image_inputs else None,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution,
+                )
+
+                task_id = create_result.get("taskId")
+                if not task_id:
+                    raise RuntimeError(f"No taskId in response: {create_result}")
+
+                job.external_task_id = task_id
+                job.status = "processing"
+                db.commit()
+
                 if wait_for_completion:
                     # Wait for full result
-                    result = await client.generate_and_wait(
-                        prompt=prompt,
-                        image_inputs=image_inputs if image_inputs else None,
-                        aspect_ratio=aspect_ratio,
-                        resolution=resolution,
-                    )
+                    result = await client.wait_for_task(task_id)
 
                     # Update job with result
-                    job.external_task_id = result.get("taskId")
                     job.status = "completed"
-                    job.result_url = result.get("result") or result.get("imageUrl")
+                    job.result_url = _result_url(result)
                     job.completed_at = datetime.utcnow()
 
                     # Update campaign if linked
@@ -284,16 +355,8 @@ class ImageGenerationService:
                             logger.info(f"Updated campaign {campaign_id} with generated image")
 
                 else:
-                    # Just create the task, don't wait
-                    create_result = await client.create_task(
-                        prompt=prompt,
-                        image_inputs=image_inputs if image_inputs else None,
-                        aspect_ratio=aspect_ratio,
-                        resolution=resolution,
-                    )
-
-                    job.external_task_id = create_result.get("taskId")
-                    job.status = "processing"
+                    # Don't wait: the task poller writes the result back
+                    self.track_job(job)
 
                 db.commit()
                 db.refresh(job)
@@ -315,14 +378,18 @@ class ImageGenerationService:
 
     async def check_job_status(self, job_id: int, user_id: str) -> Optional[ImageGenerationJob]:
         """
-        Check and update the status of a generation job.
+        Check the status of a generation job.
+
+        Status checks are batched by the shared task poller, which writes the
+        result back when the task finishes; this only ensures the job is
+        tracked and returns the current row.
 
         Args:
             job_id: Job ID to check
             user_id: User ID for verification
 
         Returns:
-            Updated ImageGenerationJob or None if not found
+            Current ImageGenerationJob or None if not found
         """
         db = self._get_db()
         try:
@@ -342,40 +409,66 @@ class ImageGenerationService:
             if job.status in ["completed", "failed"]:
                 return job
 
-            # Check with the API
+            # Results are written back by the task poller; make sure this
+            # job is tracked (e.g. after a restart)
             if job.external_task_id:
-                client = self._get_client()
-                result = await client.get_task_result(job.external_task_id)
-
-                status = result.get("status", "").lower()
-
-                if status == "completed":
-                    job.status = "completed"
-                    job.result_url = result.get("result") or result.get("imageUrl")
-                    job.completed_at = datetime.utcnow()
+                self.track_job(job)
 
-                    # Update campaign if linked
-                    if job.campaign_id and job.result_url:
-                        campaign = db.query(AdsCampaign).filter(
-                            AdsCampaign.id == job.campaign_id
-                        ).first()
-                        if campaign:
-                            campaign.media_url = job.result_url
+            return job
 
-                elif status == "failed":
-                    job.status = "failed"
-                    job.error_message = result.get("error", "Unknown error")
+        finally:
+            self._close_db(db)
 
-                else:
-                    job.status = "processing"
+    def track_job(self, job: ImageGenerationJob) -> asyncio.Future:
+        """
+        Track a job's task on the shared poller and write its result back.
 
-                db.commit()
-                db.refresh(job)
+        Args:
+            job: Job with an external_task_id
 
-            return job
+        Returns:
+            Future resolving to the raw task result
+        """
+        provider = self._get_client().task_provider
+        poller = get_task_poller()
+        if poller.is_tracking(provider, job.external_task_id):
+            return poller.track(provider, job.external_task_id)
+
+        # Account for time already spent so the first check isn't delayed
+        age = (datetime.utcnow() - job.created_at).total_seconds() if job.created_at else 0
+        future = poller.track(
+            provider,
+            job.external_task_id,
+            timeout=max(120.0, age + 60.0),
+            started_at=time.monotonic() - max(0.0, age),
+        )
 
-        finally:
-            self._close_db(db)
+        job_id, campaign_id = job.id, job.campaign_id
+
+        def _on_done(fut: asyncio.Future):
+            if fut.cancelled():
+                return
+            error = fut.exception()
+            if error is not None:
+                update = {"id": job_id, "status": "failed", "error_message": str(error)}
+            elif provider.classify(fut.result()) == FAILED:
+                update = {
+                    "id": job_id,
+                    "status": "failed",
+                    "error_message": fut.result().get("error", "Unknown error"),
+                }
+            else:
+                update = {
+                    "id": job_id,
+                    "status": "completed",
+                    "result_url": _result_url(fut.result()),
+                    "completed_at": datetime.utcnow(),
+                    "campaign_id": campaign_id,
+                }
+            _job_writer.add(update)
+
+        future.add_done_callback(_on_done)
+        return future
 
     def get_user_jobs(
         self,
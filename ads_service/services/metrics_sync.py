@@ -0,0 +1,387 @@
+"""
+Ads Metrics Sync Engine
+
+Keeps ads_metrics fresh for every active campaign without users triggering
+syncs by hand.
+
+Each run groups active campaigns by connected ad account and pulls the whole
+account's daily metrics in one report (Meta account insights at
+level=campaign, one GAQL query segmented by campaign for Google). Rows are
+written with a single INSERT ... ON CONFLICT (campaign_id, date) DO UPDATE
+per account. Accounts are synced concurrently, bounded per platform to stay
+under API rate limits.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..config import get_ads_settings
+from ..models import AdsPlatformType, MetricsSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Columns overwritten when a (campaign_id, date) row already exists
+METRIC_COLUMNS = [
+    "impressions",
+    "clicks",
+    "conversions",
+    "spend_cents",
+    "revenue_cents",
+    "ctr",
+    "cpc_cents",
+    "cpa_cents",
+    "roas",
+]
+
+
+def upsert_metrics(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk upsert daily metrics rows.
+
+    Args:
+        db: Database session (caller commits)
+        rows: Dicts with campaign_id, date and METRIC_COLUMNS
+
+    Returns:
+        Number of rows written
+    """
+    from database.models import AdsMetrics
+
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    stmt = pg_insert(AdsMetrics).values([{**row, "synced_at": now} for row in rows])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["campaign_id", "date"],
+        set_={
+            **{column: stmt.excluded[column] for column in METRIC_COLUMNS},
+            "synced_at": stmt.excluded.synced_at,
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def refresh_campaign_totals(db: Session, campaign_ids: List[int]):
+    """
+    Recompute total_spend_cents from stored metrics and mark campaigns synced.
+
+    Args:
+        db: Database session (caller commits)
+        campaign_ids: Campaigns to refresh
+    """
+    from database.models import AdsCampaign, AdsMetrics
+
+    if not campaign_ids:
+        return
+
+    total_spend = (
+        select(func.coalesce(func.sum(AdsMetrics.spend_cents), 0))
+        .where(AdsMetrics.campaign_id == AdsCampaign.id)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(AdsCampaign)
+        .where(AdsCampaign.id.in_(campaign_ids))
+        .values(total_spend_cents=total_spend, last_synced_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def snapshots_to_rows(campaign_id: int, snapshots: List[MetricsSnapshot]) -> List[Dict[str, Any]]:
+    """Convert client snapshots into ads_metrics rows for one campaign."""
+    return [
+        {
+            "campaign_id": campaign_id,
+            "date": m.date,
+            **{column: getattr(m, column) for column in METRIC_COLUMNS},
+        }
+        for m in snapshots
+    ]
+
+
+class MetricsSyncEngine:
+    """
+    Background sync of campaign metrics for all connected ad accounts.
+
+    Usage:
+        engine = get_metrics_sync_engine()
+        summary = await engine.sync_all()      # one pass over every account
+        engine.start()                         # at app startup
+    """
+
+    def __init__(self):
+        self.settings = get_ads_settings()
+        self._limits = {
+            AdsPlatformType.META.value: asyncio.Semaphore(self.settings.meta_sync_concurrency),
+            AdsPlatformType.GOOGLE.value: asyncio.Semaphore(self.settings.google_sync_concurrency),
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.last_run: Dict[str, Any] = {}
+
+    def _get_db(self) -> Session:
+        from database.database import SessionLocal
+        return SessionLocal()
+
+    # =========================================================================
+    # Accounts
+    # =========================================================================
+
+    def load_accounts(self, platform_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Load connected accounts that have active, published campaigns.
+
+        Args:
+            platform_ids: Optional AdsPlatform IDs to restrict to
+
+        Returns:
+            One dict per account with decrypted-on-demand credentials and a
+            map of external campaign ID -> local campaign ID
+        """
+        from database.models import AdsPlatform, AdsCampaign
+
+        db = self._get_db()
+        try:
+            query = (
+                db.query(AdsPlatform, AdsCampaign.id, AdsCampaign.external_campaign_id)
+                .join(AdsCampaign, AdsCampaign.platform_id == AdsPlatform.id)
+                .filter(
+                    AdsPlatform.is_connected == True,
+                    AdsCampaign.status == "active",
+                    AdsCampaign.external_campaign_id.isnot(None),
+                )
+            )
+            if platform_ids:
+                query = query.filter(AdsPlatform.id.in_(platform_ids))
+
+            accounts: Dict[int, Dict[str, Any]] = {}
+            for platform, campaign_id, external_id in query.all():
+                account = accounts.get(platform.id)
+                if account is None:
+                    credentials = platform.credentials
+                    account = accounts[platform.id] = {
+                        "platform_id": platform.id,
+                        "platform": platform.platform,
+                        "account_id": platform.account_id,
+                        "encrypted_access_token": credentials.encrypted_access_token if credentials else None,
+                        "encrypted_refresh_token": credentials.encrypted_refresh_token if credentials else None,
+                        "campaigns": {},
+                    }
+                account["campaigns"][str(external_id)] = campaign_id
+
+            return list(accounts.values())
+
+        finally:
+            db.close()
+
+    # =========================================================================
+    # Fetch & Store
+    # =========================================================================
+
+    async def fetch_account_metrics(self, account: Dict[str, Any]) -> Dict[str, List[MetricsSnapshot]]:
+        """
+        Pull daily metrics for all campaigns of one account in one report.
+
+        Returns:
+            Snapshots keyed by external campaign ID
+        """
+        from ..routes import get_encryption_service
+
+        encryption = get_encryption_service()
+        lookback = self.settings.metrics_sync_lookback_days
+        end_date = datetime.utcnow().date()
+        start_date = end_date - timedelta(days=lookback)
+
+        if account["platform"] == AdsPlatformType.META.value:
+            access_token = encryption.decrypt_cookies(account["encrypted_access_token"])[0]["token"]
+
+            from ..clients.meta_ads import create_meta_client
+            client = create_meta_client(access_token, account["account_id"])
+
+            return await client.get_account_campaign_insights(
+                time_range={"since": start_date.isoformat(), "until": end_date.isoformat()},
+                campaign_ids=list(account["campaigns"]),
+            )
+
+        if account["platform"] == AdsPlatformType.GOOGLE.value:
+            refresh_token = encryption.decrypt_cookies(account["encrypted_refresh_token"])[0]["token"]
+
+            from ..clients.google_ads import create_google_client
+            client = create_google_client(refresh_token, account["account_id"])
+
+            return await client.get_account_campaign_metrics(
+                start_date.isoformat(),
+                end_date.isoformat(),
+            )
+
+        return {}
+
+    def store_account_metrics(
+        self,
+        account: Dict[str, Any],
+        metrics: Dict[str, List[MetricsSnapshot]],
+    ) -> int:
+        """
+        Upsert one account's metrics and refresh campaign totals.
+
+        Returns:
+            Number of metric rows written
+        """
+        from database.models import AdsPlatform
+
+        rows = []
+        synced = []
+        for external_id, snapshots in metrics.items():
+            campaign_id = account["campaigns"].get(external_id)
+            if campaign_id is None:
+                continue  # Not tracked locally (or not active)
+            rows.extend(snapshots_to_rows(campaign_id, snapshots))
+            synced.append(campaign_id)
+
+        db = self._get_db()
+        try:
+            written = upsert_metrics(db, rows)
+            refresh_campaign_totals(db, synced)
+            db.query(AdsPlatform).filter(AdsPlatform.id == account["platform_id"]).update(
+                {"last_synced_at": datetime.utcnow(), "connection_error": None},
+                synchronize_session=False,
+            )
+            db.commit()
+            return written
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    def _record_error(self, platform_id: int, error: str):
+        from database.models import AdsPlatform
+
+        db = self._get_db()
+        try:
+            db.query(AdsPlatform).filter(AdsPlatform.id == platform_id).update(
+                {"connection_error": error[:1000]},
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record sync error for platform {platform_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    async def sync_account(self, account: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch and store one account under its platform's concurrency limit."""
+        loop = asyncio.get_running_loop()
+        limit = self._limits.get(account["platform"])
+        if limit is None:
+            return {"platform_id": account["platform_id"], "rows": 0, "error": "Unsupported platform"}
+
+        async with limit:
+            try:
+                metrics = await self.fetch_account_metrics(account)
+                rows = await loop.run_in_executor(None, self.store_account_metrics, account, metrics)
+                return {"platform_id": account["platform_id"], "rows": rows, "error": None}
+
+            except Exception as e:
+                logger.error(f"Metrics sync failed for platform {account['platform_id']}: {e}")
+                await loop.run_in_executor(None, self._record_error, account["platform_id"], str(e))
+                return {"platform_id": account["platform_id"], "rows": 0, "error": str(e)}
+
+    async def sync_all(self, platform_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Sync every connected account with active campaigns.
+
+        Args:
+            platform_ids: Optional AdsPlatform IDs to restrict to
+
+        Returns:
+            Run summary (accounts, rows written, failures, duration)
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        accounts = await loop.run_in_executor(None, self.load_accounts, platform_ids)
+
+        results = await asyncio.gather(*(self.sync_account(a) for a in accounts))
+
+        summary = {
+            "accounts": len(accounts),
+            "rows": sum(r["rows"] for r in results),
+            "failed": [r for r in results if r["error"]],
+            "duration_seconds": round(time.monotonic() - started, 2),
+            "finished_at": datetime.utcnow().isoformat(),
+        }
+        if platform_ids is None:
+            self.last_run = summary
+        logger.info(
+            f"Ads metrics sync: {summary['accounts']} accounts, {summary['rows']} rows, "
+            f"{len(summary['failed'])} failed in {summary['duration_seconds']}s"
+        )
+        return summary
+
+    # =========================================================================
+    # Scheduler
+    # =========================================================================
+
+    async def run_loop(self):
+        """Sync all accounts every metrics_sync_interval_minutes until stopped."""
+        interval = self.settings.metrics_sync_interval_minutes * 60
+        while not self._stopping:
+            try:
+                await self.sync_all()
+            except Exception as e:
+                logger.error(f"Ads metrics sync run failed: {e}")
+
+            try:
+                await asyncio.sleep(interval)
+            except asyncio.CancelledError:
+                break
+
+    def start(self):
+        """Start the scheduler on the running event loop."""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self.run_loop())
+
+    async def stop(self):
+        """Stop the scheduler."""
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+# Singleton instance
+_metrics_sync_engine: Optional[MetricsSyncEngine] = None
+
+
+def get_metrics_sync_engine() -> MetricsSyncEngine:
+    """Get or create the metrics sync engine singleton."""
+    global _metrics_sync_engine
+    if _metrics_sync_engine is None:
+        _metrics_sync_engine = MetricsSyncEngine()
+    return _metrics_sync_engine
+
+
+def start_metrics_sync():
+    """Start scheduled metrics sync (call from app startup)."""
+    get_metrics_sync_engine().start()
+
+
+async def stop_metrics_sync():
+    """Stop scheduled metrics sync (call from app shutdown)."""
+    if _metrics_sync_engine is not None:
+        await _metrics_sync_engine.stop()
@@ -40,11 +40,11 @@ def _get_cua_url_from_runtime(runtime) -> str:
     return ''
 
 
-async def _get_client_for_url(url: str):
-    """Get or create AsyncPlaywrightClient for the given URL."""
+async def _get_client_for_url(url: str, runtime=None):
+    """Get or create AsyncPlaywrightClient for the given URL (and the runtime's user session)."""
     # Import here to avoid circular imports
-    from async_playwright_client import AsyncPlaywrightClient, get_client_for_url
-    return get_client_for_url(url)
+    from async_playwright_tools import get_client_for_url, _get_user_id_from_runtime
+    return get_client_for_url(url, session_key=_get_user_id_from_runtime(runtime))
 
 
 # =============================================================================
@@ -75,7 +75,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available", "logged_in": False})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # Get page info
@@ -151,7 +151,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             result = await client.navigate("https://www.linkedin.com/feed/")
@@ -179,7 +179,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         # Normalize URL
         if not profile_url.startswith('http'):
@@ -215,7 +215,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # JavaScript to extract posts
@@ -288,7 +288,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # JavaScript to find and extract post
@@ -375,7 +375,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # JavaScript to find post and click like button
@@ -465,7 +465,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # Step 1: Find post and click comment button
@@ -584,7 +584,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # Navigate if URL provided
@@ -668,7 +668,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # Navigate to profile
@@ -784,7 +784,7 @@ def create_async_linkedin_tools():
         if not cua_url:
             return json.dumps({"error": "No CUA URL available"})
 
-        client = await _get_client_for_url(cua_url)
+        client = await _get_client_for_url(cua_url, runtime)
 
         try:
             # Navigate to feed if not already there
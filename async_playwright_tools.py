@@ -25,6 +25,9 @@ from langchain.tools import ToolRuntime
 # Import AsyncExtensionClient for premium status checks
 from async_extension_tools import AsyncExtensionClient
 
+# Session tokens are signed with the CUA server's CUA_SESSION_SECRET
+from browser_tenants import SESSION_HEADER as CUA_SESSION_HEADER, sign_session
+
 
 @dataclass
 class CUAContext:
@@ -33,8 +36,8 @@ class CUAContext:
     user_id: str  # User ID (REQUIRED)
 
 
-# Cache clients per URL to avoid creating new sessions each call
-_client_cache: Dict[str, "AsyncPlaywrightClient"] = {}
+# Cache clients per (URL, session key) to avoid creating new sessions each call
+_client_cache: Dict[tuple, "AsyncPlaywrightClient"] = {}
 
 
 def _get_default_cua_url() -> str:
@@ -76,24 +79,33 @@ class _GlobalClientProxy:
 _global_client = _GlobalClientProxy()
 
 
-def get_client_for_url(url: str) -> "AsyncPlaywrightClient":
-    """Get or create a client for a specific URL. URL is required."""
+def get_client_for_url(url: str, session_key: Optional[str] = None) -> "AsyncPlaywrightClient":
+    """Get or create a client for a specific URL (and session key). URL is required."""
     if not url:
         raise ValueError("CUA URL is required - each user must have their own VNC session")
 
-    if url not in _client_cache:
-        _client_cache[url] = AsyncPlaywrightClient(base_url=url)
-    return _client_cache[url]
+    cache_key = (url, session_key)
+    if cache_key not in _client_cache:
+        _client_cache[cache_key] = AsyncPlaywrightClient(base_url=url, session_key=session_key)
+    return _client_cache[cache_key]
 
 
 class AsyncPlaywrightClient:
     """Async HTTP client for Playwright CUA server - ASGI compatible"""
 
-    def __init__(self, base_url: str):
-        """Initialize client with a specific base URL. URL is required."""
+    def __init__(self, base_url: str, session_key: Optional[str] = None):
+        """
+        Initialize client with a specific base URL. URL is required.
+
+        Args:
+            base_url: CUA server URL
+            session_key: User/session key selecting the browser context on a
+                multi-tenant server (sent as the X-CUA-Session header)
+        """
         if not base_url:
             raise ValueError("base_url is required for AsyncPlaywrightClient")
         self.base_url = base_url.rstrip('/')
+        self.session_key = session_key
         self._session = None
     
     async def get_session(self):
@@ -103,6 +115,10 @@ class AsyncPlaywrightClient:
                 timeout=aiohttp.ClientTimeout(total=60)  # Increased for navigation operations
             )
         return self._session
+
+    def _headers(self) -> Optional[Dict[str, str]]:
+        """Session header routing to the user's context on a multi-tenant server (signed per request: tokens expire)"""
+        return {CUA_SESSION_HEADER: sign_session(self.session_key)} if self.session_key else None
     
     async def _request(self, method: str, endpoint: str, data: dict = None, timeout: int = 60) -> Dict[str, Any]:
         """Make async HTTP request to the Playwright CUA server"""
@@ -113,14 +129,86 @@ class AsyncPlaywrightClient:
             session = await self.get_session()
             
             if method.upper() == "GET":
-                async with session.get(url, timeout=timeout_obj) as response:
+                async with session.get(url, headers=self._headers(), timeout=timeout_obj) as response:
                     return await response.json()
             elif method.upper() == "POST":
-                async with session.post(url, json=data, timeout=timeout_obj) as response:
+                async with session.post(url, json=data, headers=self._headers(), timeout=timeout_obj) as response:
                     return await response.json()
         except Exception as e:
             print(f"Async Playwright Client Request Error: {e}")
             return {"error": str(e), "success": False}
+
+    async def batch(self, steps: List[Dict[str, Any]], screenshot: bool = False, timeout: int = 120) -> Dict[str, Any]:
+        """
+        Run a list of actions server-side in one request (/batch).
+
+        Each step is a dict with an "action" (navigate, click, type, key,
+        scroll, evaluate, wait) and its arguments, plus optional "wait"
+        conditions ({"selector", "state", "text", "network_idle", "timeout"}),
+        an "expect" JS assertion over the step's `result`, and "optional".
+        The batch stops at the first failed non-optional step.
+
+        Returns:
+            The server response: success, failed_step, failed_phase
+            ("action", "wait" or "expect"), error and per-step results under
+            "steps" (plus "image" if screenshot is set)
+        """
+        return await self._request("POST", "/batch", {"steps": steps, "screenshot": screenshot}, timeout=timeout)
+
+    async def collect(
+        self,
+        kind: str = "tweets",
+        target: int = 50,
+        author: Optional[str] = None,
+        max_scrolls: int = 30,
+        stall_scrolls: int = 3,
+        timeout: int = 300,
+    ):
+        """
+        Scroll the current page and stream newly rendered items.
+
+        Async generator over the server's /dom/collect NDJSON stream: yields
+        one list of raw item dicts per scroll pass (already deduped), until
+        the target is reached, the feed stalls or max_scrolls is hit.
+
+        Args:
+            kind: "tweets" (records like /dom/tweets) or "users" (UserCell rows)
+            target: Stop after this many unique items
+            author: For tweets, only this handle's own tweets
+            max_scrolls: Hard cap on scroll passes
+            stall_scrolls: Stop after this many passes with nothing new
+            timeout: Seconds for the whole collection
+        """
+        url = f"{self.base_url}/dom/collect"
+        payload = {
+            "kind": kind,
+            "target": target,
+            "author": author,
+            "max_scrolls": max_scrolls,
+            "stall_scrolls": stall_scrolls,
+        }
+        try:
+            session = await self.get_session()
+            async with session.post(
+                url, json=payload, headers=self._headers(), timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if "ndjson" not in response.headers.get("Content-Type", ""):
+                    result = await response.json()
+                    print(f"   ⚠️ Collect failed: {result.get('error') or result.get('detail')}")
+                    return
+
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        print(f"   ⚠️ Collect stopped: {chunk['error']}")
+                    if chunk.get("items"):
+                        yield chunk["items"]
+                    if chunk.get("done"):
+                        return
+        except Exception as e:
+            print(f"Async Playwright Client Collect Error: {e}")
     
     async def close(self):
         """Close the session"""
@@ -128,6 +216,45 @@ class AsyncPlaywrightClient:
             await self._session.close()
 
 
+# Marks the first post containing a search term (and having the given action
+# button) so later batch steps can target it with TARGET_POST_SELECTOR
+TARGET_POST_SELECTOR = 'article[data-cua-target]'
+FIND_POST_JS = """((term, button) => {
+    document.querySelectorAll('[data-cua-target]').forEach(el => el.removeAttribute('data-cua-target'));
+    const articles = Array.from(document.querySelectorAll('article')).filter(article =>
+        article.querySelector(`[data-testid="${button}"]`) && (article.innerText || '').length > 20
+    );
+    const match = articles.find(article => article.innerText.toLowerCase().includes(term));
+    if (!match) return {count: articles.length, match: null};
+    match.setAttribute('data-cua-target', '1');
+    return {
+        count: articles.length,
+        match: {
+            text: match.innerText,
+            ariaLabel: match.querySelector(`[data-testid="${button}"]`).getAttribute('aria-label') || ''
+        }
+    };
+})(%s, %s)"""
+
+
+def _find_post_step(author_or_content: str, button: str) -> Dict[str, Any]:
+    """Batch step that marks the post matching author_or_content (fails if none)."""
+    return {
+        "action": "evaluate",
+        "label": "find_post",
+        "script": FIND_POST_JS % (json.dumps(author_or_content.lower()), json.dumps(button)),
+        "expect": "result && result.match",
+    }
+
+
+def _found_post(batch_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Result of the find_post step ({count, match}) from a batch response."""
+    for step in batch_result.get("steps", []):
+        if step.get("label") == "find_post":
+            return step.get("result") or {}
+    return {}
+
+
 async def _lookup_vnc_url_from_redis(user_id: str) -> str:
     """Look up VNC URL from Redis using user_id. Returns None if not found."""
     try:
@@ -248,10 +375,27 @@ def _get_cua_url_from_runtime(runtime: ToolRuntime) -> str:
     return cua_url
 
 
+def _get_user_id_from_runtime(runtime: ToolRuntime) -> Optional[str]:
+    """User ID from the runtime context or configurable headers (None if absent)."""
+    if runtime and getattr(runtime, 'context', None):
+        context = runtime.context
+        user_id = context.get('user_id') if isinstance(context, dict) else getattr(context, 'user_id', None)
+        if user_id:
+            return user_id
+    if runtime and getattr(runtime, 'config', None):
+        configurable = runtime.config.get('configurable', {})
+        return (
+            configurable.get('user_id')
+            or configurable.get('x-user-id')
+            or configurable.get('x-clerk-user-id')
+        )
+    return None
+
+
 def _get_client(runtime: ToolRuntime) -> AsyncPlaywrightClient:
     """Get client for user's VNC session from runtime context. No fallback."""
     cua_url = _get_cua_url_from_runtime(runtime)
-    return get_client_for_url(cua_url)
+    return get_client_for_url(cua_url, session_key=_get_user_id_from_runtime(runtime))
 
 
 def create_async_playwright_tools():
@@ -739,26 +883,18 @@ def create_async_playwright_tools():
             x, y = coordinates
             
             if x is not None and y is not None:
-                # Click on the input field first
-                click_result = await client._request("POST", "/click", {"x": x, "y": y})
-                if click_result.get("success"):
-                    print(f"✅ Clicked on input field at ({x}, {y})")
-                    
-                    # Wait a moment for focus
-                    await asyncio.sleep(0.5)
-                    
-                    # Clear any existing content (Ctrl+A, Delete)
-                    await client._request("POST", "/key", {"keys": ["ctrl", "a"]})
-                    await asyncio.sleep(0.2)
-                    
-                    # Type the username
-                    type_result = await client._request("POST", "/type", {"text": username})
-                    if type_result.get("success"):
-                        return f"✅ Successfully entered username '{username}' using coordinates! 🔐"
-                    else:
-                        return f"❌ Clicked field but typing failed: {type_result.get('error')}"
+                # Click the field, clear it (Ctrl+A) and type, in one batch
+                result = await client.batch([
+                    {"action": "click", "label": "click", "x": x, "y": y, "ms": 500},  # Wait for focus
+                    {"action": "key", "keys": ["ctrl", "a"], "ms": 200},
+                    {"action": "type", "label": "type", "text": username, "delay": 50},
+                ])
+                if result.get("success"):
+                    return f"✅ Successfully entered username '{username}' using coordinates! 🔐"
+                elif result.get("failed_step") == 0 or not result.get("steps"):
+                    return f"❌ Failed to click on input field: {result.get('error')}"
                 else:
-                    return f"❌ Failed to click on input field: {click_result.get('error')}"
+                    return f"❌ Clicked field but typing failed: {result.get('error')}"
             else:
                 return f"❌ Invalid coordinates for input field: {coordinates}"
                 
@@ -833,26 +969,18 @@ def create_async_playwright_tools():
             print("🔧 Method 2: Trying coordinate-based approach...")
             
             if x is not None and y is not None:
-                # Click on the password field
-                click_result = await client._request("POST", "/click", {"x": x, "y": y})
-                if click_result.get("success"):
-                    print(f"✅ Clicked on password field at ({x}, {y})")
-                    
-                    # Wait a moment for focus
-                    await asyncio.sleep(0.5)
-                    
-                    # Clear any existing content
-                    await client._request("POST", "/key", {"keys": ["ctrl", "a"]})
-                    await asyncio.sleep(0.2)
-                    
-                    # Type the password
-                    type_result = await client._request("POST", "/type", {"text": password})
-                    if type_result.get("success"):
-                        return f"✅ Successfully entered password using coordinates! 🔐"
-                    else:
-                        return f"❌ Clicked field but typing failed: {type_result.get('error')}"
+                # Click the field, clear it (Ctrl+A) and type, in one batch
+                result = await client.batch([
+                    {"action": "click", "label": "click", "x": x, "y": y, "ms": 500},  # Wait for focus
+                    {"action": "key", "keys": ["ctrl", "a"], "ms": 200},
+                    {"action": "type", "label": "type", "text": password, "delay": 50},
+                ])
+                if result.get("success"):
+                    return f"✅ Successfully entered password using coordinates! 🔐"
+                elif result.get("failed_step") == 0 or not result.get("steps"):
+                    return f"❌ Failed to click on password field: {result.get('error')}"
                 else:
-                    return f"❌ Failed to click on password field: {click_result.get('error')}"
+                    return f"❌ Clicked field but typing failed: {result.get('error')}"
             else:
                 return f"❌ Invalid coordinates for password field: ({x}, {y})"
                 
@@ -1193,88 +1321,32 @@ SCREENSHOT_DATA: {screenshot_b64}
             client = _get_client(runtime)
             print(f"❤️ Looking for post by: '{author_or_content}' to like")
 
-            # Step 1: Find posts that match the search term
-            result = await client._request("POST", "/playwright/evaluate", {
-                "script": """(() => {
-                    const articles = Array.from(document.querySelectorAll('article'));
-                    return articles.map((article, index) => {
-                        const likeButton = article.querySelector('[data-testid="like"]');
-                        if (!likeButton) return null;
-
-                        const text = article.innerText || '';
-
-                        return {
-                            index: index,
-                            text: text,
-                            ariaLabel: likeButton.getAttribute('aria-label') || ''
-                        };
-                    }).filter(article => article && article.text.length > 20);
-                })()"""
-            })
-
+            # Find, mark and click in one batch (a single round trip)
+            result = await client.batch([
+                _find_post_step(author_or_content, "like"),
+                {
+                    "action": "click",
+                    "label": "like",
+                    "selector": f'{TARGET_POST_SELECTOR} [data-testid="like"]',
+                    "ms": 1000,  # Wait for UI to update
+                },
+            ])
+
+            found = _found_post(result)
             if not result.get("success"):
-                return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
-
-            articles = result.get("result", [])
-
-            if not articles:
-                return "❌ No posts found on the page. Make sure you're on X timeline."
-
-            print(f"📊 Found {len(articles)} posts with like buttons")
-
-            # Step 2: Find the post matching the search term
-            search_term = author_or_content.lower()
-            target_article = None
-
-            print(f"🔍 Searching for post matching: '{search_term}'")
-
-            for article in articles:
-                content_text = article.get('text', '').lower()
-                if search_term in content_text:
-                    target_article = article
-                    print(f"✅ Found matching post!")
-                    print(f"📝 Post preview: '{content_text[:150]}...'")
-                    print(f"📌 Button state: {article['ariaLabel']}")
-                    break
-
-            if not target_article:
+                if not found:
+                    return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
+                if result.get("failed_step") != 0:
+                    return f"❌ Failed to click like button: {result.get('error', 'Unknown error')}"
+                if not found.get("count"):
+                    return "❌ No posts found on the page. Make sure you're on X timeline."
                 return f"❌ Could not find a post matching '{author_or_content}'. Try scrolling or being more specific."
 
-            # Step 3: Extract a unique text snippet for the selector
-            # Use first few words from the post to create a unique selector
-            post_lines = target_article['text'].split('\n')
-            # Find a good text snippet (skip empty lines, take something substantial)
-            selector_text = None
-            for line in post_lines:
-                clean_line = line.strip()
-                if len(clean_line) > 5 and not clean_line.startswith('@'):
-                    selector_text = clean_line[:30]  # Use first 30 chars
-                    break
-
-            if not selector_text:
-                # Fallback to search term if we can't find good text
-                selector_text = author_or_content[:30]
-
-            # Escape quotes in selector text
-            selector_text = selector_text.replace('"', '\\"')
-
-            selector = f'article:has-text("{selector_text}") [data-testid="like"]'
-            print(f"🎯 Using selector: {selector}")
-
-            # Step 4: Click using selector-based approach (more reliable)
-            click_result = await client._request("POST", "/click_selector", {
-                "selector": selector,
-                "selector_type": "css"
-            })
-
-            if not click_result.get("success"):
-                return f"❌ Failed to click like button: {click_result.get('error', 'Unknown error')}"
-
+            print(f"✅ Found matching post among {found['count']} posts with like buttons")
+            print(f"📝 Post preview: '{found['match']['text'][:150]}...'")
+            print(f"📌 Button state: {found['match']['ariaLabel']}")
             print("✅ Like button clicked!")
 
-            # Step 5: Wait for UI to update
-            await asyncio.sleep(1)
-
             return f"✅ Successfully liked the post matching '{author_or_content}'! ❤️"
 
         except Exception as e:
@@ -1303,85 +1375,31 @@ SCREENSHOT_DATA: {screenshot_b64}
             client = _get_client(runtime)
             print(f"💔 Looking for LIKED post by: '{author_or_content}' to unlike")
 
-            # Step 1: Find posts that are already liked
-            result = await client._request("POST", "/playwright/evaluate", {
-                "script": """(() => {
-                    const articles = Array.from(document.querySelectorAll('article'));
-                    return articles.map((article, index) => {
-                        const unlikeButton = article.querySelector('[data-testid="unlike"]');
-                        if (!unlikeButton) return null;
-
-                        const text = article.innerText || '';
-
-                        return {
-                            index: index,
-                            text: text,
-                            ariaLabel: unlikeButton.getAttribute('aria-label') || ''
-                        };
-                    }).filter(article => article && article.text.length > 20);
-                })()"""
-            })
-
+            result = await client.batch([
+                _find_post_step(author_or_content, "unlike"),
+                {
+                    "action": "click",
+                    "label": "unlike",
+                    "selector": f'{TARGET_POST_SELECTOR} [data-testid="unlike"]',
+                    "ms": 1000,
+                },
+            ])
+
+            found = _found_post(result)
             if not result.get("success"):
-                return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
-
-            articles = result.get("result", [])
-
-            if not articles:
-                return "❌ No liked posts found to unlike. All posts might already be unliked."
-
-            print(f"📊 Found {len(articles)} liked posts")
-
-            # Step 2: Find the post matching the search term
-            search_term = author_or_content.lower()
-            target_article = None
-
-            print(f"🔍 Searching for liked post matching: '{search_term}'")
-
-            for article in articles:
-                content_text = article.get('text', '').lower()
-                if search_term in content_text:
-                    target_article = article
-                    print(f"✅ Found matching liked post!")
-                    print(f"📝 Post preview: '{content_text[:150]}...'")
-                    print(f"📌 Button state: {article['ariaLabel']}")
-                    break
-
-            if not target_article:
+                if not found:
+                    return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
+                if result.get("failed_step") != 0:
+                    return f"❌ Failed to click unlike button: {result.get('error', 'Unknown error')}"
+                if not found.get("count"):
+                    return "❌ No liked posts found to unlike. All posts might already be unliked."
                 return f"❌ Could not find a liked post matching '{author_or_content}'. Try being more specific or the post might not be liked."
 
-            # Step 3: Extract a unique text snippet for the selector
-            post_lines = target_article['text'].split('\n')
-            selector_text = None
-            for line in post_lines:
-                clean_line = line.strip()
-                if len(clean_line) > 5 and not clean_line.startswith('@'):
-                    selector_text = clean_line[:30]
-                    break
-
-            if not selector_text:
-                selector_text = author_or_content[:30]
-
-            # Escape quotes in selector text
-            selector_text = selector_text.replace('"', '\\"')
-
-            selector = f'article:has-text("{selector_text}") [data-testid="unlike"]'
-            print(f"🎯 Using selector: {selector}")
-
-            # Step 4: Click using selector-based approach
-            click_result = await client._request("POST", "/click_selector", {
-                "selector": selector,
-                "selector_type": "css"
-            })
-
-            if not click_result.get("success"):
-                return f"❌ Failed to click unlike button: {click_result.get('error', 'Unknown error')}"
-
+            print(f"✅ Found matching liked post among {found['count']} liked posts")
+            print(f"📝 Post preview: '{found['match']['text'][:150]}...'")
+            print(f"📌 Button state: {found['match']['ariaLabel']}")
             print("✅ Unlike button clicked!")
 
-            # Step 5: Wait and verify
-            await asyncio.sleep(1)
-
             return f"✅ Successfully unliked the post matching '{author_or_content}'! 💔"
 
         except Exception as e:
@@ -1412,231 +1430,135 @@ SCREENSHOT_DATA: {screenshot_b64}
             client = _get_client(runtime)
             print(f"💬 Looking for post by: '{author_or_content}' to comment: '{comment_text}'")
 
-            # Step 1: Find all article elements with reply buttons
-            result = await client._request("POST", "/playwright/evaluate", {
-                "script": """(() => {
-                    const articles = Array.from(document.querySelectorAll('article'));
-                    return articles.map((article, index) => {
-                        const replyButton = article.querySelector('[data-testid="reply"]');
-                        if (!replyButton) return null;
-
-                        const text = article.innerText || '';
-
-                        return {
-                            index: index,
-                            text: text
-                        };
-                    }).filter(article => article && article.text.length > 20);
-                })()"""
-            })
-
-            if not result.get("success"):
-                return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
-
-            articles = result.get("result", [])
-
-            if not articles:
-                return "❌ No posts found on the page. Make sure you're on X timeline."
-
-            print(f"📊 Found {len(articles)} posts with reply buttons")
-
-            # Step 2: Find the post matching the search term
-            search_term = author_or_content.lower()
-            target_article = None
-
-            print(f"🔍 Searching for post matching: '{search_term}'")
-
-            for article in articles:
-                content_text = article.get('text', '').lower()
-                if search_term in content_text:
-                    target_article = article
-                    print(f"✅ Found matching post!")
-                    print(f"📝 Post preview: '{content_text[:150]}...'")
-                    break
-
-            if not target_article:
-                return f"❌ Could not find a post matching '{author_or_content}'. Try scrolling or being more specific."
-
-            # Step 3: Extract a unique text snippet for the selector
-            post_lines = target_article['text'].split('\n')
-            selector_text = None
-            for line in post_lines:
-                clean_line = line.strip()
-                if len(clean_line) > 5 and not clean_line.startswith('@'):
-                    selector_text = clean_line[:30]
-                    break
-
-            if not selector_text:
-                selector_text = author_or_content[:30]
-
-            # Escape quotes in selector text
-            selector_text = selector_text.replace('"', '\\"')
-
-            selector = f'article:has-text("{selector_text}") [data-testid="reply"]'
-            print(f"🎯 Using selector: {selector}")
-
-            # Step 4: Click reply button using selector-based approach
-            print(f"🎯 Step 1: Clicking reply button...")
-
-            click_result = await client._request("POST", "/click_selector", {
-                "selector": selector,
-                "selector_type": "css"
-            })
-
-            if not click_result.get("success"):
-                return f"❌ Failed to click reply button: {click_result.get('error', 'Unknown error')}"
-
-            print("✅ Reply button clicked!")
-
-            # Step 5: Wait for reply dialog to open (with retry logic)
-            print("⏳ Waiting for reply dialog to open...")
-            dialog_opened = False
-            for attempt in range(5):  # Try 5 times over 5 seconds
-                await asyncio.sleep(1)
-
-                dialog_check = await client._request("POST", "/playwright/evaluate", {
+            # Find the post, open the reply dialog, type and submit in one batch
+            result = await client.batch([
+                _find_post_step(author_or_content, "reply"),
+                {
+                    "action": "click",
+                    "label": "reply",
+                    "selector": f'{TARGET_POST_SELECTOR} [data-testid="reply"]',
+                    "wait": {"selector": '[data-testid="tweetTextarea_0"]', "timeout": 5000},
+                },
+                {
+                    # keyboard.type() triggers React's handlers properly
+                    "action": "type",
+                    "label": "type_comment",
+                    "selector": '[data-testid="tweetTextarea_0"]',
+                    "text": comment_text,
+                    "delay": 50,  # 50ms between keystrokes (human-like)
+                    "ms": 1000,  # Let React update
+                },
+                {
+                    "action": "click",
+                    "label": "submit",
+                    "selector": '[role="dialog"] [data-testid="tweetButton"]',
+                    "wait": {"selector": '[role="dialog"]', "state": "hidden", "timeout": 7000},
+                },
+                {
+                    # Current username and URL, for finding the reply afterwards
+                    "action": "evaluate",
+                    "label": "whoami",
+                    "optional": True,
                     "script": """(() => {
-                        const dialog = document.querySelector('[role="dialog"]');
-                        const textarea = document.querySelector('[data-testid="tweetTextarea_0"]');
-                        return !!dialog || !!textarea;
-                    })()"""
-                })
-
-                if dialog_check.get("result"):
-                    dialog_opened = True
-                    print(f"✅ Reply dialog opened! (attempt {attempt + 1})")
-                    break
-                else:
-                    print(f"⏳ Attempt {attempt + 1}/5: Dialog not yet visible...")
-
-            if not dialog_opened:
-                return f"❌ Reply dialog did not open after 5 seconds. The post might not be interactive or rate limited."
-
-            # Step 6: Type comment using Playwright's .type() method (triggers React properly)
-            print(f"💬 Step 2: Typing comment using Playwright .type()...")
-
-            type_result = await client._request("POST", "/playwright/type", {
-                "selector": '[data-testid="tweetTextarea_0"]',
-                "text": comment_text,
-                "delay": 50,  # 50ms delay between keystrokes (human-like)
-                "timeout": 5000
-            })
-
-            if not type_result.get("success"):
-                return f"❌ Failed to type comment: {type_result.get('error', 'Unknown error')}"
-
-            print("✅ Comment text typed!")
-
-            # Step 7: Wait a moment for React to update
-            await asyncio.sleep(1)
-            
-            # Step 8: Click the submit button (data-testid="tweetButton")
-            print(f"🎯 Step 3: Clicking submit button...")
-
-            submit_result = await client._request("POST", "/playwright/click", {
-                "selector": '[role="dialog"] [data-testid="tweetButton"]',
-                "timeout": 5000
-            })
-
-            if not submit_result.get("success"):
-                return f"❌ Failed to click submit button: {submit_result.get('error', 'Unknown error')}"
-
-            print("✅ Submit button clicked!")
-            
-            # Step 9: Wait for submission and verify dialog closed
-            await asyncio.sleep(2)
-
-            dialog_closed = await client._request("POST", "/playwright/evaluate", {
-                "script": "(() => { return !document.querySelector('[role=\"dialog\"]'); })()"
-            })
-
-            if dialog_closed.get("result"):
-                print("✅ Dialog closed - comment posted successfully!")
-
-                # Step 10: Try to capture the comment URL for engagement tracking
-                comment_url = None
-                try:
-                    # Get the current username
-                    username_result = await client._request("POST", "/playwright/evaluate", {
-                        "script": """(() => {
-                            const profileLink = document.querySelector('a[href*="/"][data-testid="AppTabBar_Profile_Link"]');
-                            if (profileLink) {
-                                const href = profileLink.getAttribute('href');
-                                return href ? href.replace('/', '') : null;
-                            }
+                        let username = null;
+                        const profileLink = document.querySelector('a[href*="/"][data-testid="AppTabBar_Profile_Link"]');
+                        if (profileLink) {
+                            const href = profileLink.getAttribute('href');
+                            username = href ? href.replace('/', '') : null;
+                        } else {
                             // Fallback: look for the Profile text in nav
-                            const navLinks = document.querySelectorAll('nav a');
-                            for (const link of navLinks) {
+                            for (const link of document.querySelectorAll('nav a')) {
                                 const href = link.getAttribute('href');
                                 if (href && href.match(/^\\/[a-zA-Z0-9_]+$/)) {
-                                    return href.replace('/', '');
+                                    username = href.replace('/', '');
+                                    break;
                                 }
                             }
-                            return null;
-                        })()"""
-                    })
-
-                    username = username_result.get("result")
-                    if username:
-                        # Navigate to user's replies page to find the comment
-                        await asyncio.sleep(2)  # Wait for X to process
-
-                        # Store current URL to return later
-                        current_url_result = await client._request("POST", "/playwright/evaluate", {
-                            "script": "window.location.href"
-                        })
-                        original_url = current_url_result.get("result", "https://x.com/home")
-
-                        # Navigate to user's with_replies page
-                        await client._request("POST", "/navigate", {"url": f"https://x.com/{username}/with_replies"})
-                        await asyncio.sleep(3)
-
-                        # Find the most recent reply matching our comment text
-                        # Use first 30 chars of comment to match (avoids special char issues)
-                        search_text = comment_text[:30].replace("\\", "\\\\").replace('"', '\\"').replace("'", "\\'")
-                        find_script = f'''(() => {{
-                            const articles = document.querySelectorAll('article');
-                            for (const article of articles) {{
-                                const tweetText = article.querySelector('[data-testid="tweetText"]');
-                                if (tweetText && tweetText.innerText.includes("{search_text}")) {{
-                                    const timeLink = article.querySelector('a[href*="/status/"]');
-                                    if (timeLink) {{
-                                        const href = timeLink.getAttribute('href');
-                                        if (href && href.includes('/status/')) {{
-                                            return href;
-                                        }}
-                                    }}
-                                }}
-                            }}
-                            return null;
-                        }})()'''
-
-                        find_result = await client._request("POST", "/playwright/evaluate", {"script": find_script})
-                        if find_result.get("result"):
-                            comment_url = f"https://x.com{find_result['result']}"
-                            print(f"🔗 Captured comment URL: {comment_url}")
+                        }
+                        return {username: username, url: window.location.href};
+                    })()""",
+                },
+            ])
 
+            found = _found_post(result)
+            failed = (result.get("steps") or [{}])[result["failed_step"]].get("label") if result.get("failed_step") is not None else None
+            if not result.get("success"):
+                if failed is None:
+                    return f"❌ Comment failed: {result.get('error', 'Unknown error')}"
+                if failed == "find_post":
+                    if not found:
+                        return f"❌ Failed to find posts: {result.get('error', 'Unknown error')}"
+                    if not found.get("count"):
+                        return "❌ No posts found on the page. Make sure you're on X timeline."
+                    return f"❌ Could not find a post matching '{author_or_content}'. Try scrolling or being more specific."
+                phase = result.get("failed_phase")
+                if failed == "reply":
+                    if phase == "wait":
+                        return f"❌ Reply dialog did not open after 5 seconds. The post might not be interactive or rate limited."
+                    return f"❌ Failed to click reply button: {result.get('error', 'Unknown error')}"
+                if failed == "type_comment":
+                    return f"❌ Failed to type comment: {result.get('error', 'Unknown error')}"
+                if failed == "submit" and phase == "action":
+                    return f"❌ Failed to click submit button: {result.get('error', 'Unknown error')}"
+                return f"⚠️ Comment typed but submit failed: {result.get('error')}. Try submitting manually."
+
+            print(f"📝 Post preview: '{found['match']['text'][:150]}...'")
+            print("✅ Dialog closed - comment posted successfully!")
+
+            # Try to capture the comment URL for engagement tracking
+            comment_url = None
+            whoami = result["steps"][-1].get("result") or {}
+            username = whoami.get("username")
+            if username:
+                try:
+                    # Find the most recent reply matching our comment text
+                    # Use first 30 chars of comment to match (avoids special char issues)
+                    find_script = """((text) => {
+                        for (const article of document.querySelectorAll('article')) {
+                            const tweetText = article.querySelector('[data-testid="tweetText"]');
+                            if (tweetText && tweetText.innerText.includes(text)) {
+                                const timeLink = article.querySelector('a[href*="/status/"]');
+                                const href = timeLink && timeLink.getAttribute('href');
+                                if (href && href.includes('/status/')) return href;
+                            }
+                        }
+                        return null;
+                    })(%s)""" % json.dumps(comment_text[:30])
+
+                    url_result = await client.batch([
+                        {"action": "wait", "ms": 2000},  # Wait for X to process
+                        {
+                            "action": "navigate",
+                            "url": f"https://x.com/{username}/with_replies",
+                            "wait": {"selector": "article", "timeout": 8000},
+                            "optional": True,
+                        },
+                        {"action": "evaluate", "label": "find_reply", "script": find_script, "optional": True},
                         # Return to original page
-                        await client._request("POST", "/navigate", {"url": original_url})
-                        await asyncio.sleep(1)
+                        {"action": "navigate", "url": whoami.get("url") or "https://x.com/home", "ms": 1000},
+                    ])
+                    href = next(
+                        (step.get("result") for step in url_result.get("steps", []) if step.get("label") == "find_reply"),
+                        None
+                    )
+                    if href:
+                        comment_url = f"https://x.com{href}"
+                        print(f"🔗 Captured comment URL: {comment_url}")
 
                 except Exception as url_error:
                     print(f"⚠️ Could not capture comment URL (non-fatal): {url_error}")
 
-                # Return enriched result as JSON-parseable string for the wrapper
-                result_data = {
-                    "success": True,
-                    "message": f"Successfully commented on '{author_or_content}' post!",
-                    "comment_text": comment_text,
-                    "comment_url": comment_url,
-                    "target_author": author_or_content,
-                    "target_post_preview": target_article.get('text', '')[:280] if target_article else None
-                }
-
-                import json
-                return f"✅ Successfully commented on '{author_or_content}' post! 💬\nComment: \"{comment_text}\"\n<!-- COMMENT_DATA:{json.dumps(result_data)} -->"
-            else:
-                return f"⚠️ Comment typed but submit failed: {submit_result.get('error')}. Try submitting manually."
+            # Return enriched result as JSON-parseable string for the wrapper
+            result_data = {
+                "success": True,
+                "message": f"Successfully commented on '{author_or_content}' post!",
+                "comment_text": comment_text,
+                "comment_url": comment_url,
+                "target_author": author_or_content,
+                "target_post_preview": found['match'].get('text', '')[:280]
+            }
+
+            return f"✅ Successfully commented on '{author_or_content}' post! 💬\nComment: \"{comment_text}\"\n<!-- COMMENT_DATA:{json.dumps(result_data)} -->"
 
         except Exception as e:
             return f"Comment failed: {str(e)}"
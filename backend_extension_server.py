@@ -8,17 +8,19 @@ Handles bidirectional communication via WebSocket
 import asyncio
 import json
 import os
-from typing import Dict, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 from datetime import datetime
 import httpx
-import uuid
 from sqlalchemy.orm import Session
 from cryptography.fernet import Fernet
 
+from extension_rpc import get_extension_rpc
+
 # Database imports - lazy initialization to avoid startup failures
 import os
 
@@ -44,7 +46,18 @@ else:
 COOKIE_ENCRYPTION_KEY = os.getenv("COOKIE_ENCRYPTION_KEY", Fernet.generate_key().decode())
 fernet = Fernet(COOKIE_ENCRYPTION_KEY.encode() if isinstance(COOKIE_ENCRYPTION_KEY, str) else COOKIE_ENCRYPTION_KEY)
 
-app = FastAPI(title="Extension Backend Server")
+# Routes commands to the replica holding each user's extension socket
+rpc = get_extension_rpc()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await rpc.start()
+    yield
+    await rpc.stop()
+
+
+app = FastAPI(title="Extension Backend Server", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -55,13 +68,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active WebSocket connections
+# WebSocket connections held by this replica (owned by the RPC layer)
 # Key: user_id, Value: WebSocket connection
-active_connections: Dict[str, WebSocket] = {}
+active_connections: Dict[str, WebSocket] = rpc.connections
 
-# Store pending requests waiting for extension response
+# Requests waiting for an extension response (owned by the RPC layer)
 # Key: request_id, Value: asyncio.Future
-pending_requests: Dict[str, asyncio.Future] = {}
+pending_requests: Dict[str, asyncio.Future] = rpc.pending
 
 # In-memory cache for active session cookies (also persisted to DB)
 # Key: user_id, Value: {username, cookies, timestamp}
@@ -71,6 +84,17 @@ user_cookies: Dict[str, dict] = {}
 # Key: user_id, Value: {profile_url, cookies, timestamp}
 linkedin_cookies: Dict[str, dict] = {}
 
+# Cookie persistence/injection running off the WebSocket receive loop
+background_tasks: Set[asyncio.Task] = set()
+
+# Bumped by each disconnect (shared via Redis); a cookie write captured
+# under an older generation is dropped instead of recreating the account
+DISCONNECT_GENERATION_KEY = "ext:disconnects:{platform}:{user_id}"
+
+# Disconnect generations when Redis isn't configured (single replica)
+# Key: (platform, user_id), Value: generation
+disconnect_generations: Dict[Tuple[str, str], int] = {}
+
 
 # ============================================================================
 # Database Helper Functions
@@ -96,8 +120,7 @@ def get_or_create_user(db: Session, user_id: str) -> User:
     if not user:
         user = User(id=user_id, email=f"{user_id}@extension.local")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        db.flush()
     return user
 
 
@@ -118,19 +141,18 @@ def get_or_create_x_account(db: Session, user_id: str, username: str) -> XAccoun
             is_connected=True
         )
         db.add(x_account)
-        db.commit()
-        db.refresh(x_account)
+        db.flush()
     else:
         # Update connection status
         x_account.is_connected = True
         x_account.last_synced_at = datetime.utcnow()
-        db.commit()
+        db.flush()
 
     return x_account
 
 
 def save_cookies_to_db(db: Session, user_id: str, username: str, cookies: list) -> bool:
-    """Save encrypted cookies to database"""
+    """Save encrypted cookies to database (account and cookies in one commit)"""
     try:
         x_account = get_or_create_x_account(db, user_id, username)
 
@@ -221,8 +243,7 @@ def get_or_create_linkedin_account(db: Session, user_id: str, profile_url: str,
             is_connected=True
         )
         db.add(linkedin_account)
-        db.commit()
-        db.refresh(linkedin_account)
+        db.flush()
     else:
         # Update info
         linkedin_account.is_connected = True
@@ -231,13 +252,13 @@ def get_or_create_linkedin_account(db: Session, user_id: str, profile_url: str,
         if display_name:
             linkedin_account.display_name = display_name
         linkedin_account.last_synced_at = datetime.utcnow()
-        db.commit()
+        db.flush()
 
     return linkedin_account
 
 
 def save_linkedin_cookies_to_db(db: Session, user_id: str, profile_url: str, cookies: list, display_name: str = None) -> bool:
-    """Save encrypted LinkedIn cookies to database"""
+    """Save encrypted LinkedIn cookies to database (account and cookies in one commit)"""
     try:
         linkedin_account = get_or_create_linkedin_account(db, user_id, profile_url, display_name)
 
@@ -299,8 +320,10 @@ def load_linkedin_cookies_from_db(db: Session, user_id: str = None) -> Optional[
         return None
 
 
-def get_all_users_with_cookies(db: Session) -> list:
+def get_all_users_with_cookies(db: Session, connected: Optional[Set[str]] = None) -> list:
     """Get all users who have cookies stored in the database"""
+    if connected is None:
+        connected = set(active_connections)
     try:
         results = db.query(XAccount, UserCookies).join(
             UserCookies, XAccount.id == UserCookies.x_account_id
@@ -312,7 +335,7 @@ def get_all_users_with_cookies(db: Session) -> list:
                 "userId": x_account.user_id,
                 "username": x_account.username,
                 "hasCookies": True,
-                "connected": x_account.user_id in active_connections,
+                "connected": x_account.user_id in connected,
                 "capturedAt": user_cookies_record.captured_at.isoformat() if user_cookies_record.captured_at else None
             })
         return users
@@ -325,14 +348,161 @@ def get_all_users_with_cookies(db: Session) -> list:
 # WebSocket Connection Management
 # ============================================================================
 
+def run_in_background(coro):
+    """Run a coroutine without blocking the caller, keeping a reference until done."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def disconnect_generation(platform: str, user_id: str) -> Optional[int]:
+    """Current disconnect generation of a user's account (None if unknown)"""
+    if rpc.redis is None:
+        return disconnect_generations.get((platform, user_id), 0)
+    try:
+        value = await rpc.redis.get(DISCONNECT_GENERATION_KEY.format(platform=platform, user_id=user_id))
+        return int(value or 0)
+    except Exception as e:
+        print(f"⚠️ Failed to read disconnect generation for {user_id}: {e}")
+        return None
+
+
+async def bump_disconnect_generation(platform: str, user_id: str):
+    """Invalidate cookie writes in flight for the user (call before deleting)"""
+    if rpc.redis is None:
+        key = (platform, user_id)
+        disconnect_generations[key] = disconnect_generations.get(key, 0) + 1
+        return
+    await rpc.redis.incr(DISCONNECT_GENERATION_KEY.format(platform=platform, user_id=user_id))
+
+
+def lock_if_still_connected(
+    db: Session,
+    platform: str,
+    user_id: str,
+    generation: Optional[int],
+    loop: asyncio.AbstractEventLoop,
+) -> bool:
+    """
+    Lock the user's row, then check nobody disconnected the account since
+    its cookies were captured (blocking; run in a thread).
+
+    The disconnect endpoints bump the generation before deleting the
+    account under the same row lock, so a cookie write either commits
+    before that delete or sees the new generation and is dropped.
+    """
+    db.query(User).filter(User.id == user_id).with_for_update().first()
+    if generation is None:
+        return True
+    current = asyncio.run_coroutine_threadsafe(
+        disconnect_generation(platform, user_id), loop
+    ).result(timeout=10)
+    return current is None or current == generation
+
+
+def persist_x_cookies(
+    user_id: str,
+    username: str,
+    cookies: list,
+    generation: Optional[int],
+    loop: asyncio.AbstractEventLoop,
+):
+    """Save X cookies to the database (blocking; run in a thread)"""
+    db = SessionLocal()
+    try:
+        init_database()  # Lazy init
+        if not lock_if_still_connected(db, "x", user_id, generation, loop):
+            db.rollback()
+            print(f"⏭️ Not saving cookies for {user_id}: X was disconnected after capture")
+            return
+        save_cookies_to_db(db, user_id, username, cookies)
+    except Exception as e:
+        print(f"⚠️ Failed to save cookies to database: {e}")
+    finally:
+        db.close()
+
+
+def persist_linkedin_cookies(
+    user_id: str,
+    username: str,
+    cookies: list,
+    generation: Optional[int],
+    loop: asyncio.AbstractEventLoop,
+):
+    """Save LinkedIn cookies to the database (blocking; run in a thread)"""
+    db = SessionLocal()
+    try:
+        if not lock_if_still_connected(db, "linkedin", user_id, generation, loop):
+            db.rollback()
+            print(f"⏭️ Not saving LinkedIn cookies for {user_id}: disconnected after capture")
+            return
+        if save_linkedin_cookies_to_db(db, user_id, username, cookies):
+            print(f"✅ LinkedIn cookies saved to database for {user_id}")
+    except Exception as e:
+        print(f"⚠️ Failed to save LinkedIn cookies to database: {e}")
+    finally:
+        db.close()
+
+
+async def inject_cookies_into_vnc(username: str, cookies: list):
+    """Inject cookies into the Docker VNC browser (stealth server)"""
+    try:
+        print(f"💉 Injecting cookies into Docker VNC browser...")
+        async with httpx.AsyncClient() as client:
+            inject_response = await client.post(
+                "http://localhost:8005/inject_cookies",
+                json={
+                    "cookies": cookies,
+                    "username": username
+                },
+                timeout=45.0
+            )
+            inject_result = inject_response.json()
+
+            if inject_result.get("success"):
+                print(f"✅ Cookies injected into VNC browser for @{username}")
+                if inject_result.get("logged_in"):
+                    print(f"✅ VNC browser is now logged in as @{username}")
+                else:
+                    print(f"⚠️ {inject_result.get('warning', 'Login verification pending')}")
+            else:
+                print(f"❌ Failed to inject cookies: {inject_result.get('error')}")
+    except Exception as e:
+        print(f"⚠️ Error injecting cookies to VNC: {e}")
+        # Don't fail the whole flow if injection fails
+
+
+async def handle_cookies_captured(user_id: str, username: str, cookies: list):
+    """Persist and inject captured X cookies"""
+    if DATABASE_ENABLED and SessionLocal:
+        generation = await disconnect_generation("x", user_id)
+        await asyncio.to_thread(
+            persist_x_cookies, user_id, username, cookies, generation, asyncio.get_running_loop()
+        )
+    await inject_cookies_into_vnc(username, cookies)
+
+
+async def handle_linkedin_cookies_captured(user_id: str, username: str, cookies: list):
+    """Persist captured LinkedIn cookies"""
+    generation = await disconnect_generation("linkedin", user_id)
+    await asyncio.to_thread(
+        persist_linkedin_cookies, user_id, username, cookies, generation, asyncio.get_running_loop()
+    )
+
+
 @app.websocket("/ws/extension/{user_id}")
 async def extension_websocket(websocket: WebSocket, user_id: str):
     """
     WebSocket endpoint for Chrome Extension to connect
     Extension connects here and stays connected
+
+    The receive loop only dispatches: responses resolve pending requests
+    and slow work (DB writes, cookie injection) runs in background tasks,
+    so responses are never queued behind it.
     """
     await websocket.accept()
-    active_connections[user_id] = websocket
+    await rpc.register(user_id, websocket)
     print(f"✅ Extension connected: {user_id}")
     
     try:
@@ -342,11 +512,7 @@ async def extension_websocket(websocket: WebSocket, user_id: str):
             
             # Handle response to pending request
             if "request_id" in data:
-                request_id = data["request_id"]
-                if request_id in pending_requests:
-                    # Resolve the pending future
-                    pending_requests[request_id].set_result(data)
-                    del pending_requests[request_id]
+                rpc.resolve(data)
             
             # Handle extension-initiated messages (e.g., rate limit alerts)
             elif data.get("type") == "ALERT":
@@ -365,42 +531,8 @@ async def extension_websocket(websocket: WebSocket, user_id: str):
                     "timestamp": data.get("timestamp")
                 }
 
-                # Persist cookies to database (if enabled)
-                if DATABASE_ENABLED and SessionLocal:
-                    db = SessionLocal()
-                    try:
-                        init_database()  # Lazy init
-                        save_cookies_to_db(db, user_id, username, cookies)
-                    except Exception as e:
-                        print(f"⚠️ Failed to save cookies to database: {e}")
-                    finally:
-                        db.close()
-                
-                # Inject cookies into Docker VNC browser (stealth server)
-                try:
-                    print(f"💉 Injecting cookies into Docker VNC browser...")
-                    async with httpx.AsyncClient() as client:
-                        inject_response = await client.post(
-                            "http://localhost:8005/inject_cookies",
-                            json={
-                                "cookies": cookies,
-                                "username": username
-                            },
-                            timeout=45.0
-                        )
-                        inject_result = inject_response.json()
-                        
-                        if inject_result.get("success"):
-                            print(f"✅ Cookies injected into VNC browser for @{username}")
-                            if inject_result.get("logged_in"):
-                                print(f"✅ VNC browser is now logged in as @{username}")
-                            else:
-                                print(f"⚠️ {inject_result.get('warning', 'Login verification pending')}")
-                        else:
-                            print(f"❌ Failed to inject cookies: {inject_result.get('error')}")
-                except Exception as e:
-                    print(f"⚠️ Error injecting cookies to VNC: {e}")
-                    # Don't fail the whole flow if injection fails
+                # Persist to database and inject into VNC browser
+                run_in_background(handle_cookies_captured(user_id, username, cookies))
                 
                 # Acknowledge receipt
                 await websocket.send_json({
@@ -425,14 +557,7 @@ async def extension_websocket(websocket: WebSocket, user_id: str):
 
                 # Persist cookies to database
                 if DATABASE_ENABLED and SessionLocal:
-                    db = SessionLocal()
-                    try:
-                        save_linkedin_cookies_to_db(db, user_id, username, cookies)
-                        print(f"✅ LinkedIn cookies saved to database for {user_id}")
-                    except Exception as e:
-                        print(f"⚠️ Failed to save LinkedIn cookies to database: {e}")
-                    finally:
-                        db.close()
+                    run_in_background(handle_linkedin_cookies_captured(user_id, username, cookies))
 
                 # Acknowledge receipt
                 await websocket.send_json({
@@ -452,14 +577,18 @@ async def extension_websocket(websocket: WebSocket, user_id: str):
             
     except WebSocketDisconnect:
         print(f"❌ Extension disconnected: {user_id}")
-        if user_id in active_connections:
-            del active_connections[user_id]
+
+    finally:
+        await rpc.unregister(user_id, websocket)
 
 
 async def send_to_extension(user_id: str, command: dict, timeout: int = 30) -> dict:
     """
     Send command to extension and wait for response
     
+    Works from any replica: the RPC layer forwards the command to the
+    replica holding the user's socket.
+
     Args:
         user_id: User ID to send command to
         command: Command dict to send
@@ -468,43 +597,7 @@ async def send_to_extension(user_id: str, command: dict, timeout: int = 30) -> d
     Returns:
         Response from extension
     """
-    if user_id not in active_connections:
-        return {
-            "success": False,
-            "error": "Extension not connected"
-        }
-    
-    # Generate unique request ID
-    request_id = str(uuid.uuid4())
-    command["request_id"] = request_id
-    
-    # Create future for response
-    future = asyncio.Future()
-    pending_requests[request_id] = future
-    
-    try:
-        # Send command to extension
-        websocket = active_connections[user_id]
-        await websocket.send_json(command)
-        
-        # Wait for response with timeout
-        response = await asyncio.wait_for(future, timeout=timeout)
-        return response
-        
-    except asyncio.TimeoutError:
-        if request_id in pending_requests:
-            del pending_requests[request_id]
-        return {
-            "success": False,
-            "error": f"Timeout waiting for extension response ({timeout}s)"
-        }
-    except Exception as e:
-        if request_id in pending_requests:
-            del pending_requests[request_id]
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    return await rpc.send(user_id, command, timeout=timeout)
 
 
 # ============================================================================
@@ -727,10 +820,11 @@ async def comment_on_post(request: CommentRequest):
 @app.get("/")
 async def root():
     """Root endpoint"""
+    connected_users = await rpc.connected_users()
     return {
         "message": "Extension Backend Server",
-        "active_connections": len(active_connections),
-        "connected_users": list(active_connections.keys()),
+        "active_connections": len(connected_users),
+        "connected_users": connected_users,
         "pending_requests": len(pending_requests)
     }
 
@@ -745,12 +839,14 @@ async def status(user_id: Optional[str] = None):
                  If not provided, returns all users (for extension compatibility)
     """
     users_with_info = []
+    connected_users = await rpc.connected_users()
+    connected = set(connected_users)
 
     # Query database for all users with cookies (if database enabled)
     if DATABASE_ENABLED and SessionLocal:
         db = SessionLocal()
         try:
-            all_users = get_all_users_with_cookies(db)
+            all_users = await asyncio.to_thread(get_all_users_with_cookies, db, connected)
             # If user_id specified, filter to only that user
             if user_id:
                 users_with_info = [u for u in all_users if u.get("userId") == user_id]
@@ -769,18 +865,21 @@ async def status(user_id: Optional[str] = None):
         # Skip if filtering by user_id and this isn't the user
         if user_id and uid != user_id:
             continue
+        # With a database, cache entries only count for sockets held here
+        if DATABASE_ENABLED and SessionLocal and uid not in rpc.connections:
+            continue
 
         if uid not in db_user_ids:
             users_with_info.append({
                 "userId": uid,
                 "username": cookie_data.get("username"),
                 "hasCookies": True,
-                "connected": uid in active_connections
+                "connected": uid in connected
             })
             db_user_ids.add(uid)
 
     # Add connected users without cookies
-    for uid in active_connections.keys():
+    for uid in connected_users:
         # Skip if filtering by user_id and this isn't the user
         if user_id and uid != user_id:
             continue
@@ -794,8 +893,8 @@ async def status(user_id: Optional[str] = None):
 
     return {
         "success": True,
-        "active_connections": len(active_connections),
-        "connected_users": list(active_connections.keys()),
+        "active_connections": len(connected_users),
+        "connected_users": connected_users,
         "users_with_info": users_with_info,
         "pending_requests": len(pending_requests),
         "timestamp": datetime.now().isoformat()
@@ -807,39 +906,59 @@ async def health():
     """Health check"""
     return {
         "status": "healthy",
-        "extensions_connected": len(active_connections) > 0
+        "extensions_connected": len(await rpc.connected_users()) > 0,
+        "rpc": rpc.get_stats()
     }
 
 
-@app.get("/get-cookies/{user_id}")
-async def get_cookies(user_id: str):
-    """Get stored cookies for a user (from database or memory)"""
-    # First check in-memory cache
-    if user_id in user_cookies:
-        cookie_data = user_cookies[user_id]
-        return {
-            "success": True,
-            "username": cookie_data.get("username"),
-            "cookies": cookie_data.get("cookies", []),
-            "captured_at": cookie_data.get("timestamp")
-        }
+def _load_cookies_sync(user_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        return load_cookies_from_db(db, user_id=user_id)
+    finally:
+        db.close()
 
-    # Then check database if enabled
+
+async def read_user_cookies(user_id: str) -> Optional[dict]:
+    """
+    Cookies for a user: {"username", "cookies", "captured_at"} or None.
+
+    The database is shared by every replica and is authoritative. The
+    in-memory cache is only used without a database, or for a capture from
+    a socket this replica holds that may not be persisted yet (so another
+    replica's /disconnect can't be undone by a stale cache).
+    """
     if DATABASE_ENABLED and SessionLocal:
-        db = SessionLocal()
         try:
-            cookie_data = load_cookies_from_db(db, user_id=user_id)
+            cookie_data = await asyncio.to_thread(_load_cookies_sync, user_id)
             if cookie_data:
-                return {
-                    "success": True,
-                    "username": cookie_data["username"],
-                    "cookies": cookie_data["cookies"],
-                    "captured_at": cookie_data["captured_at"]
-                }
+                return cookie_data
         except Exception as e:
             print(f"⚠️ Error loading cookies from database: {e}")
-        finally:
-            db.close()
+        if user_id not in rpc.connections:
+            return None
+
+    cookie_data = user_cookies.get(user_id)
+    if not cookie_data:
+        return None
+    return {
+        "username": cookie_data.get("username"),
+        "cookies": cookie_data.get("cookies", []),
+        "captured_at": cookie_data.get("timestamp")
+    }
+
+
+@app.get("/get-cookies/{user_id}")
+async def get_cookies(user_id: str):
+    """Get stored cookies for a user (database first, see read_user_cookies)"""
+    cookie_data = await read_user_cookies(user_id)
+    if cookie_data:
+        return {
+            "success": True,
+            "username": cookie_data["username"],
+            "cookies": cookie_data["cookies"],
+            "captured_at": cookie_data["captured_at"]
+        }
 
     return {
         "success": False,
@@ -855,53 +974,36 @@ async def scrape_posts(data: dict):
     user_id = data.get("user_id")
     target_count = data.get("targetCount", 50)
     
-    if not user_id or user_id not in active_connections:
+    if not user_id:
         return {
             "success": False,
             "error": "Extension not connected"
         }
     
-    try:
-        # Send scrape request to extension
-        request_id = str(uuid.uuid4())
-        websocket = active_connections[user_id]
-        
-        await websocket.send_json({
-            "type": "SCRAPE_POSTS_REQUEST",
-            "request_id": request_id,
-            "targetCount": target_count
-        })
-        
-        # Wait for response
-        future = asyncio.Future()
-        pending_requests[request_id] = future
-        
-        try:
-            result = await asyncio.wait_for(future, timeout=30.0)
-            return {
-                "success": True,
-                "posts": result.get("posts", []),
-                "count": result.get("count", 0)
-            }
-        except asyncio.TimeoutError:
-            if request_id in pending_requests:
-                del pending_requests[request_id]
-            return {
-                "success": False,
-                "error": "Scraping timed out"
-            }
-            
-    except Exception as e:
+    result = await send_to_extension(user_id, {
+        "type": "SCRAPE_POSTS_REQUEST",
+        "targetCount": target_count
+    }, timeout=30)
+
+    if result.get("success") is False:
+        error = result.get("error", "")
         return {
             "success": False,
-            "error": str(e)
+            "error": "Scraping timed out" if error.startswith("Timeout") else error
         }
 
+    return {
+        "success": True,
+        "posts": result.get("posts", []),
+        "count": result.get("count", 0)
+    }
+
 
 @app.get("/cookies/{user_id}")
 async def get_user_cookies(user_id: str):
     """Get cookies for a specific user"""
-    if user_id not in user_cookies:
+    cookie_data = await read_user_cookies(user_id)
+    if not cookie_data:
         return {
             "success": False,
             "error": "No cookies found for this user"
@@ -910,59 +1012,76 @@ async def get_user_cookies(user_id: str):
     return {
         "success": True,
         "user_id": user_id,
-        "username": user_cookies[user_id].get("username"),
-        "cookies": user_cookies[user_id].get("cookies", []),
-        "timestamp": user_cookies[user_id].get("timestamp")
+        "username": cookie_data["username"],
+        "cookies": cookie_data["cookies"],
+        "timestamp": cookie_data["captured_at"]
     }
 
 
+def _delete_x_account_sync(user_id: str) -> Tuple[Optional[str], bool]:
+    """Delete the user's X account and cookies; returns (username, deleted)"""
+    db = SessionLocal()
+    try:
+        # Same lock as cookie writes (see lock_if_still_connected)
+        db.query(User).filter(User.id == user_id).with_for_update().first()
+        x_account = db.query(XAccount).filter(XAccount.user_id == user_id).first()
+        if not x_account:
+            return None, False
+        username = x_account.username
+        db.query(UserCookies).filter(UserCookies.x_account_id == x_account.id).delete()
+        db.delete(x_account)
+        db.commit()
+        return username, True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 @app.delete("/disconnect/{user_id}")
 async def disconnect_user(user_id: str):
     """
     Disconnect a user by clearing their cookies from memory and database.
     This is called when the user clicks "Disconnect" in the frontend.
+
+    The database delete is what disconnects the user on every replica;
+    other replicas' memory caches are ignored once the socket is closed
+    (see read_user_cookies). Cookie writes still in flight are dropped
+    rather than recreating the account (see lock_if_still_connected).
     """
     cleared_memory = False
     cleared_database = False
     username = None
 
-    # Clear from in-memory cache
+    # Clear from database if enabled (shared by all replicas)
+    if DATABASE_ENABLED and SessionLocal:
+        try:
+            await bump_disconnect_generation("x", user_id)
+            username, cleared_database = await asyncio.to_thread(_delete_x_account_sync, user_id)
+            if cleared_database:
+                print(f"🗑️ Cleared database cookies for user {user_id}")
+        except Exception as e:
+            print(f"⚠️ Error clearing database cookies: {e}")
+            return {
+                "success": False,
+                "error": f"Failed to clear stored cookies: {e}",
+                "user_id": user_id
+            }
+
+    # Clear from this replica's in-memory cache
     if user_id in user_cookies:
-        username = user_cookies[user_id].get("username")
+        username = username or user_cookies[user_id].get("username")
         del user_cookies[user_id]
         cleared_memory = True
         print(f"🗑️ Cleared in-memory cookies for user {user_id}")
 
-    # Clear from database if enabled
-    if DATABASE_ENABLED:
-        try:
-            db = SessionLocal()
-            try:
-                # Find and delete the user's cookies from database
-                x_account = db.query(XAccount).filter(XAccount.user_id == user_id).first()
-                if x_account:
-                    username = username or x_account.username
-                    # Delete associated cookies
-                    db.query(UserCookies).filter(UserCookies.x_account_id == x_account.id).delete()
-                    # Delete the X account record
-                    db.delete(x_account)
-                    db.commit()
-                    cleared_database = True
-                    print(f"🗑️ Cleared database cookies for user {user_id}")
-            finally:
-                db.close()
-        except Exception as e:
-            print(f"⚠️ Error clearing database cookies: {e}")
-
-    # Close WebSocket connection if active
-    if user_id in active_connections:
-        try:
-            ws = active_connections[user_id]
-            await ws.close(code=1000, reason="User disconnected")
-            del active_connections[user_id]
+    # Close WebSocket connection if active (on whichever replica holds it)
+    try:
+        if await rpc.close(user_id, reason="User disconnected"):
             print(f"🔌 Closed WebSocket for user {user_id}")
-        except Exception as e:
-            print(f"⚠️ Error closing WebSocket: {e}")
+    except Exception as e:
+        print(f"⚠️ Error closing WebSocket: {e}")
 
     if cleared_memory or cleared_database:
         return {
@@ -1093,8 +1212,11 @@ async def disconnect_linkedin_user(user_id: str):
     # Clear from database if enabled
     if DATABASE_ENABLED and SessionLocal:
         try:
+            await bump_disconnect_generation("linkedin", user_id)
             db = SessionLocal()
             try:
+                # Same lock as cookie writes (see lock_if_still_connected)
+                db.query(User).filter(User.id == user_id).with_for_update().first()
                 linkedin_account = db.query(LinkedInAccount).filter(
                     LinkedInAccount.user_id == user_id
                 ).first()
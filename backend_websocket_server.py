@@ -64,6 +64,7 @@ from crm_service.routes import crm_router
 from billing_routes import router as billing_router
 from services.billing_service import BillingService
 from services.stripe_service import AGENT_SESSION_COSTS, CREDIT_COSTS
+from services.agent_stream_relay import TokenStreamRelay
 from stripe_webhooks import router as stripe_webhook_router
 
 # Work integrations router (Build in Public automation)
@@ -328,6 +329,30 @@ async def lifespan(app: FastAPI):
         import traceback
         traceback.print_exc()
 
+    # Initialize Meta webhook queue workers
+    try:
+        from crm_service.config import get_crm_settings
+        from crm_service.webhooks.ingest_queue import start_webhook_workers
+        if get_crm_settings().meta_webhook_queue_enabled:
+            start_webhook_workers()
+            print("✅ Meta webhook queue workers started")
+    except Exception as e:
+        print(f"⚠️ Failed to start Meta webhook queue workers: {e}")
+        import traceback
+        traceback.print_exc()
+
+    # Initialize scheduled ads metrics sync
+    try:
+        from ads_service.config import get_ads_settings
+        from ads_service.services.metrics_sync import start_metrics_sync
+        if get_ads_settings().metrics_sync_enabled:
+            start_metrics_sync()
+            print("✅ Ads metrics sync scheduler started")
+    except Exception as e:
+        print(f"⚠️ Failed to start ads metrics sync: {e}")
+        import traceback
+        traceback.print_exc()
+
     backend_url = os.getenv('BACKEND_API_URL', 'http://localhost:8000')
     ws_url = backend_url.replace('https://', 'wss://').replace('http://', 'ws://')
     print(f"📡 WebSocket: {ws_url}/ws/extension/{{user_id}}")
@@ -340,6 +365,27 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("🛑 Shutting down...")
 
+    # Stop Meta webhook queue workers
+    try:
+        from crm_service.webhooks.ingest_queue import stop_webhook_workers
+        await stop_webhook_workers()
+    except Exception as e:
+        print(f"⚠️ Error stopping Meta webhook queue workers: {e}")
+
+    # Stop ads metrics sync
+    try:
+        from ads_service.services.metrics_sync import stop_metrics_sync
+        await stop_metrics_sync()
+    except Exception as e:
+        print(f"⚠️ Error stopping ads metrics sync: {e}")
+
+    # Stop style analysis workers
+    try:
+        from style_batch_analyzer import shutdown_style_batch_analyzer
+        shutdown_style_batch_analyzer()
+    except Exception as e:
+        print(f"⚠️ Error stopping style analysis workers: {e}")
+
     # Clean up connection pool
     if _pg_pool is not None:
         try:
@@ -454,7 +500,7 @@ async def get_user_vnc_client(user_id: str):
             vnc_url = session_data.get("https_url") or session_data.get("service_url")
             if vnc_url:
                 print(f"✅ Found VNC session for user {user_id}: {vnc_url}")
-                return get_client_for_url(vnc_url)
+                return get_client_for_url(vnc_url, session_key=user_id)
 
         # No session in Redis - check if service exists and cache it
         print(f"⚠️ No VNC session in Redis for user {user_id}, checking Cloud Run...")
@@ -469,7 +515,7 @@ async def get_user_vnc_client(user_id: str):
             vnc_url = session.get("https_url") or session.get("service_url")
             if vnc_url:
                 print(f"✅ Recovered VNC session from Cloud Run for user {user_id}: {vnc_url}")
-                return get_client_for_url(vnc_url)
+                return get_client_for_url(vnc_url, session_key=user_id)
 
         await vnc_manager.disconnect()
 
@@ -719,8 +765,9 @@ async def get_style_profile(clerk_user_id: str = Depends(get_current_user)):
         deep_profile = style_manager.get_deep_style_profile()
 
         if not deep_profile:
-            # Calculate on demand (may be slow first time)
-            deep_profile = style_manager.deep_analyze_writing_style(use_llm_for_tone=False)
+            # Derive from stored style stats (worker pool rebuild if they're missing)
+            from style_batch_analyzer import get_style_batch_analyzer
+            deep_profile = await get_style_batch_analyzer(store).analyze_user(clerk_user_id)
 
         return {
             "success": True,
@@ -747,13 +794,11 @@ async def recalculate_style_profile(clerk_user_id: str = Depends(get_current_use
         if not clerk_user_id or not store:
             raise HTTPException(status_code=401, detail="Authentication required")
 
-        from x_writing_style_learner import XWritingStyleManager
+        from style_batch_analyzer import get_style_batch_analyzer
         from style_evolution_tracker import StyleEvolutionTracker
 
-        style_manager = XWritingStyleManager(store, clerk_user_id)
-
-        # Recalculate deep profile
-        deep_profile = style_manager.deep_analyze_writing_style(use_llm_for_tone=False)
+        # Re-derive from stored style stats (worker pool rebuild if they're missing)
+        deep_profile = await get_style_batch_analyzer(store).analyze_user(clerk_user_id)
 
         # Create snapshot for versioning
         tracker = StyleEvolutionTracker(store, clerk_user_id)
@@ -3246,7 +3291,9 @@ async def generate_content_insights(user_id: str, auth_user_id: str = Depends(ge
         analyzer = ContentInsightsAnalyzer()
         insights_result = await analyzer.analyze_competitor_content(
             competitors,
-            user_handle
+            user_handle,
+            user_id=user_id,
+            competitor_set_version=graph.get('last_updated')
         )
 
         # Store insights in database
@@ -4629,6 +4676,9 @@ async def debug_delete_all_posts(
             store.delete(posts_namespace, post.key)
             langgraph_deleted += 1
 
+        # Drop the incremental style statistics built from those posts
+        XWritingStyleManager(store, user_id).clear_style_stats()
+
         print(f"🗑️ Deleted {langgraph_deleted} posts from LangGraph store for user_id: {user_id}")
 
     # ============= DELETE FROM POSTGRES DATABASE =============
@@ -6098,6 +6148,9 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
     """
     Stream agent execution to WebSocket with token-by-token streaming
 
+    Tokens are relayed through TokenStreamRelay, which extracts deltas
+    incrementally and coalesces them into AGENT_TOKEN frames.
+
     Args:
         user_id: User identifier
         thread_id: LangGraph thread ID
@@ -6106,6 +6159,7 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
                      (deletes the previous run completely)
     """
     run_id = None
+    relay = None
     try:
         print(f"🔄 Starting agent stream for user {user_id}, thread {thread_id}")
         if use_rollback:
@@ -6123,11 +6177,9 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
         except Exception as e:
             print(f"⚠️ Could not get VNC session for agent: {e}")
 
-        # Track the last sent content to calculate diffs
-        last_content = ""
+        # Extracts new text per chunk and sends it as coalesced AGENT_TOKEN frames
+        relay = TokenStreamRelay(lambda: active_connections.get(user_id))
 
-        # Track LLM message count for credit consumption
-        llm_message_count = 0
         session_start_time = datetime.now()
 
         # Mark this run as active (will be populated with run_id once we get it)
@@ -6224,55 +6276,19 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
                     if node_name and node_name != 'model':
                         continue
 
+                    # chunk.data contains the message chunk from LangGraph
+                    # It's usually a list with message objects
                     message_list = chunk.data
-                    if user_id in active_connections:
-                        try:
-                            # chunk.data contains the message chunk from LangGraph
-                            # It's usually a list with message objects
-                            if isinstance(message_list, list) and len(message_list) > 0:
-                                message_data = message_list[0]  # Get first item
-
-                                # Extract content from the message chunk
-                                # LangGraph returns content as a list of content blocks
-                                if isinstance(message_data, dict):
-                                    content_blocks = message_data.get('content', [])
-
-                                    # Extract text from content blocks
-                                    current_content = ""
-                                    if isinstance(content_blocks, list) and len(content_blocks) > 0:
-                                        for block in content_blocks:
-                                            if isinstance(block, dict) and block.get('type') == 'text':
-                                                current_content += block.get('text', '')
-                                    elif isinstance(content_blocks, str):
-                                        current_content = content_blocks
-
-                                    # Calculate the new token (diff from last content)
-                                    if current_content and current_content != last_content:
-                                        if current_content.startswith(last_content):
-                                            # Send only the new part
-                                            new_token = current_content[len(last_content):]
-                                            if new_token:
-                                                await active_connections[user_id].send_json({
-                                                    "type": "AGENT_TOKEN",
-                                                    "token": new_token
-                                                })
-                                                print(f"📤 Sent new token: {repr(new_token[:30])}...")
-                                        else:
-                                            # Content changed completely (new message), send all
-                                            await active_connections[user_id].send_json({
-                                                "type": "AGENT_TOKEN",
-                                                "token": current_content
-                                            })
-                                            print(f"📤 Sent full content: {current_content[:50]}...")
-                                            # Count as a new LLM message for credit tracking
-                                            llm_message_count += 1
-
-                                        last_content = current_content
-                        except Exception as e:
-                            print(f"⚠️ Failed to send WebSocket update: {e}")
-                            import traceback
-                            traceback.print_exc()
-            
+                    if isinstance(message_list, list) and len(message_list) > 0:
+                        message_data = message_list[0]  # Get first item
+                        if isinstance(message_data, dict):
+                            await relay.feed(message_data)
+
+            # Send remaining tokens
+            await relay.close()
+            print(relay.summary())
+            last_content = relay.text
+
             # Update thread metadata with last message
             if thread_id in thread_metadata and last_content:
                 thread_metadata[thread_id]["last_message"] = last_content[:100] + "..." if len(last_content) > 100 else last_content
@@ -6322,6 +6338,8 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
                     print(f"⚠️ No run_id available, using fallback billing")
                     session_duration_minutes = (datetime.now() - session_start_time).total_seconds() / 60
                     base_cost = AGENT_SESSION_COSTS.get("x_growth", 10)
+                    # Messages after the first (one per restart of the streamed text)
+                    llm_message_count = max(0, relay.message_count - 1)
                     message_cost = llm_message_count * CREDIT_COSTS.get("sonnet_message", 1)
                     computer_use_cost = int(session_duration_minutes * CREDIT_COSTS.get("computer_use_minute", 5)) if vnc_url else 0
                     total_credits = base_cost + message_cost + computer_use_cost
@@ -6342,6 +6360,8 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
             print(f"✅ Agent completed for user {user_id}")
         
         except Exception as stream_error:
+            relay.discard()
+
             # Handle 404 errors (thread not found) by creating a new thread
             if "404" in str(stream_error) or "not found" in str(stream_error).lower():
                 print(f"⚠️  Thread {thread_id} not found, creating new thread...")
@@ -6372,6 +6392,9 @@ async def stream_agent_execution(user_id: str, thread_id: str, task: str, use_ro
         import traceback
         traceback.print_exc()
         
+        if relay is not None:
+            relay.discard()
+
         # Clean up active run
         if user_id in active_runs:
             del active_runs[user_id]
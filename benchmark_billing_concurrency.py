@@ -0,0 +1,202 @@
+"""
+Benchmark: concurrent metering against Postgres
+
+Seeds a bench user with a subscription and credit balance in DATABASE_URL,
+then runs worker threads (one session each) that call
+BillingService.consume_credits and increment_feature_usage at the same
+time, and checks that nothing was lost:
+
+- credits drawn from purchased, then the monthly allocation, then overage
+  add up to every call's charge
+- the feature usage counter equals the number of increments
+- there is one CreditTransaction per consume_credits call
+
+Reports calls/s and latency percentiles for both operations, then deletes
+the bench user.
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmark_billing_concurrency.py --threads 16 --calls 200
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+FEATURE = "bench_feature"
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def seed(user_id: str, allocation: int, purchased: int):
+    from database.database import SessionLocal
+    from database.models import User, Subscription, CreditBalance
+
+    db = SessionLocal()
+    try:
+        db.add(User(id=user_id, email=f"{user_id}@example.com"))
+        db.flush()
+        subscription = Subscription(
+            user_id=user_id,
+            stripe_subscription_id=f"sub_{user_id}",
+            plan="pro",
+            status="active",
+            current_period_start=datetime.utcnow(),
+            current_period_end=datetime.utcnow() + timedelta(days=30),
+        )
+        db.add(subscription)
+        db.flush()
+        db.add(CreditBalance(
+            subscription_id=subscription.id,
+            monthly_allocation=allocation,
+            credits_used=0,
+            credits_purchased=purchased,
+            overage_credits=0,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def worker(user_id: str, calls: int, credits: int, start: threading.Barrier, latencies: dict, errors: list):
+    from database.database import SessionLocal
+    from services.billing_service import BillingService
+
+    db = SessionLocal()
+    service = BillingService(db)
+    start.wait()
+    try:
+        for i in range(calls):
+            started = time.perf_counter()
+            ok, reason = service.consume_credits(user_id, credits, "bench call", agent_type="bench")
+            latencies["consume_credits"].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors.append(reason)
+
+            started = time.perf_counter()
+            service.increment_feature_usage(user_id, FEATURE)
+            latencies["increment_feature_usage"].append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        errors.append(str(e))
+    finally:
+        db.close()
+
+
+def verify(user_id: str, expected_calls: int, credits: int, allocation: int, purchased: int) -> bool:
+    from sqlalchemy import func
+    from database.database import SessionLocal
+    from database.models import Subscription, CreditBalance, CreditTransaction, FeatureUsage
+
+    total = expected_calls * credits
+    expected = {
+        "credits_purchased": max(0, purchased - total),
+        "credits_used": min(allocation, max(0, total - purchased)),
+        "overage_credits": max(0, total - purchased - allocation),
+        "feature_usage": expected_calls,
+        "transactions": expected_calls,
+        "transaction_credits": -total,
+    }
+
+    db = SessionLocal()
+    try:
+        balance = db.query(CreditBalance).join(Subscription).filter(Subscription.user_id == user_id).one()
+        usage = db.query(func.coalesce(func.sum(FeatureUsage.count), 0)).filter(
+            FeatureUsage.user_id == user_id, FeatureUsage.feature == FEATURE
+        ).scalar()
+        transactions, transaction_credits = db.query(
+            func.count(CreditTransaction.id), func.coalesce(func.sum(CreditTransaction.credits), 0)
+        ).filter(CreditTransaction.user_id == user_id).one()
+    finally:
+        db.close()
+
+    actual = {
+        "credits_purchased": balance.credits_purchased,
+        "credits_used": balance.credits_used,
+        "overage_credits": balance.overage_credits,
+        "feature_usage": int(usage),
+        "transactions": transactions,
+        "transaction_credits": int(transaction_credits),
+    }
+    ok = True
+    for key, value in expected.items():
+        match = actual[key] == value
+        ok = ok and match
+        print(f"   {'✅' if match else '❌'} {key:20s} {actual[key]:>10} (expected {value})")
+    return ok
+
+
+def cleanup(user_id: str):
+    from database.database import SessionLocal
+    from database.models import User, Subscription, CreditBalance, CreditTransaction, FeatureUsage
+
+    db = SessionLocal()
+    try:
+        subscription_ids = [s.id for s in db.query(Subscription.id).filter(Subscription.user_id == user_id)]
+        db.query(CreditTransaction).filter(CreditTransaction.user_id == user_id).delete()
+        db.query(FeatureUsage).filter(FeatureUsage.user_id == user_id).delete()
+        db.query(CreditBalance).filter(CreditBalance.subscription_id.in_(subscription_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(Subscription).filter(Subscription.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=200, help="consume_credits + increment calls per thread")
+    parser.add_argument("--credits", type=int, default=3, help="Credits charged per call")
+    parser.add_argument("--allocation", type=int, default=2000, help="Monthly allocation of the bench user")
+    parser.add_argument("--purchased", type=int, default=500, help="Purchased credits of the bench user")
+    args = parser.parse_args()
+
+    user_id = f"bench_billing_{uuid.uuid4().hex[:8]}"
+    seed(user_id, args.allocation, args.purchased)
+
+    latencies = {"consume_credits": [], "increment_feature_usage": []}
+    errors: list = []
+    start = threading.Barrier(args.threads)
+    threads = [
+        threading.Thread(target=worker, args=(user_id, args.calls, args.credits, start, latencies, errors))
+        for _ in range(args.threads)
+    ]
+
+    print("=" * 70)
+    print(f"📊 Billing concurrency benchmark ({args.threads} threads x {args.calls} calls)")
+    print("=" * 70)
+    try:
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        for name, values in latencies.items():
+            if not values:
+                continue
+            print(
+                f"   {name:24s} {len(values) / elapsed:8.0f} calls/s  "
+                f"p50 {statistics.median(values):6.1f} ms  p99 {percentile(values, 0.99):6.1f} ms"
+            )
+        if errors:
+            print(f"   ❌ {len(errors)} errors, first: {errors[0]}")
+
+        print("\n🔎 Totals")
+        ok = verify(user_id, args.threads * args.calls, args.credits, args.allocation, args.purchased)
+        print(f"\n   {'✅ no lost updates' if ok and not errors else '❌ lost or failed updates'}")
+        print("=" * 70)
+    finally:
+        cleanup(user_id)
+
+
+if __name__ == "__main__":
+    main()
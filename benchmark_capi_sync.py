@@ -0,0 +1,247 @@
+"""
+Benchmark: CAPI sync throughput against a local fake Conversions API
+
+Starts a fake CAPI server that behaves like Meta's /{pixel}/events (events
+counted per request, a whole request rejected with a 400 if any event in it
+is invalid, optional latency and transient 503s), then:
+
+- Client: sends the same events one request per event (send_event) and in
+  concurrent batches (send_batch_events) and reports events/s
+- Pipeline (--db): seeds a bench user's pending ConversionEvents in
+  DATABASE_URL, including events CAPI rejects (event_time older than
+  7 days), runs AttributionService.sync_pending_events until nothing is
+  left and checks that every valid event was synced once and the invalid
+  ones were skipped after capi_max_attempts
+
+Usage:
+    python benchmark_capi_sync.py --events 5000 --latency-ms 80
+    DATABASE_URL=postgresql://... python benchmark_capi_sync.py --db --invalid 3
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+PIXEL_ID = "bench_pixel"
+# Meta rejects events older than 7 days
+MAX_EVENT_AGE_SECONDS = 7 * 24 * 3600
+
+
+class FakeCAPI:
+    """Fake /{pixel}/events endpoint that counts what it accepts."""
+
+    def __init__(self, latency_ms: float, error_rate: float):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.requests = 0
+        self.rejected = 0
+        self.transient = 0
+        self.received: dict = {}  # event_id -> times received
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self.transient += 1
+            return web.json_response({"error": {"message": "Service temporarily unavailable"}}, status=503)
+
+        payload = await request.json()
+        events = payload.get("data", [])
+        now = time.time()
+        for index, event in enumerate(events):
+            if not event.get("user_data") or now - event.get("event_time", 0) > MAX_EVENT_AGE_SECONDS:
+                self.rejected += 1
+                return web.json_response({
+                    "error": {
+                        "message": f"Invalid parameter (event {index})",
+                        "type": "OAuthException",
+                        "code": 100,
+                        "fbtrace_id": uuid.uuid4().hex[:12],
+                    }
+                }, status=400)
+
+        for event in events:
+            key = event.get("event_id") or uuid.uuid4().hex
+            self.received[key] = self.received.get(key, 0) + 1
+        return web.json_response({"events_received": len(events), "fbtrace_id": uuid.uuid4().hex[:12]})
+
+
+def synthetic_events(count: int) -> list:
+    return [
+        {
+            "event_id": f"bench-{i}",
+            "event_name": "Purchase",
+            "event_time": datetime.utcnow() - timedelta(minutes=i % 600),
+            "phone": f"+1555{i % 1000:07d}",
+            "email": f"customer{i % 1000}@example.com",
+            "value": 25.0,
+        }
+        for i in range(count)
+    ]
+
+
+async def bench_client(base_url: str, fake: FakeCAPI, count: int, batch_size: int, concurrency: int):
+    from crm_service.clients.meta_capi import MetaCAPIClient
+
+    events = synthetic_events(count)
+    client = MetaCAPIClient(PIXEL_ID, "bench_token", base_url=base_url)
+    try:
+        # One request per event, as the old sync loop did
+        sample = events[:min(count, 200)]
+        started = time.monotonic()
+        for event in sample:
+            await client.send_event(
+                event_name=event["event_name"],
+                event_time=event["event_time"],
+                phone=event["phone"],
+                email=event["email"],
+                value=event["value"],
+            )
+        single_rate = len(sample) / (time.monotonic() - started)
+
+        fake.received.clear()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def send(chunk):
+            async with slots:
+                return await client.send_batch_events(chunk, max_retries=3)
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            send(events[i:i + batch_size]) for i in range(0, count, batch_size)
+        ))
+        batch_rate = count / (time.monotonic() - started)
+    finally:
+        await client.close()
+
+    received = sum(r.get("events_received", 0) for r in results)
+    print(f"   send_event        {single_rate:9.0f} events/s  ({len(sample)} events)")
+    print(f"   send_batch_events {batch_rate:9.0f} events/s  ({received}/{count} received)")
+    print(f"   speedup           {batch_rate / single_rate:9.1f}x")
+
+
+async def bench_pipeline(fake: FakeCAPI, count: int, invalid: int):
+    from database.database import SessionLocal
+    from database.models import User, Customer, ConversionEvent
+    from crm_service.config import get_crm_settings
+    from crm_service.services.attribution_service import AttributionService
+
+    settings = get_crm_settings()
+    user_id = f"bench_capi_{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        db.add(User(id=user_id, email=f"{user_id}@example.com"))
+        db.flush()
+        customers = [
+            Customer(user_id=user_id, phone_number=f"+1555{i:07d}", first_name=f"Bench{i}")
+            for i in range(max(1, count // 10))
+        ]
+        db.add_all(customers)
+        db.flush()
+        stale = datetime.utcnow() - timedelta(days=30)
+        bad_ids = set(random.sample(range(count), min(invalid, count)))
+        db.add_all([
+            ConversionEvent(
+                user_id=user_id,
+                customer_id=customers[i % len(customers)].id,
+                event_name="Purchase",
+                value_cents=2500,
+                event_time=stale if i in bad_ids else datetime.utcnow(),
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    fake.received.clear()
+    requests_before, rejected_before = fake.requests, fake.rejected
+    service = AttributionService()
+    runs, synced, started = 0, 0, time.monotonic()
+    while True:
+        result = await service.sync_pending_events(user_id, batch_size=settings.capi_batch_size)
+        runs += 1
+        synced += result["synced"]
+        if not result["synced"] and not result["failed"]:
+            break
+    elapsed = time.monotonic() - started
+
+    db = SessionLocal()
+    try:
+        rows = db.query(ConversionEvent).filter(ConversionEvent.user_id == user_id).all()
+        unsynced = [row for row in rows if row.capi_synced_at is None]
+        abandoned = [row for row in unsynced if row.capi_attempts >= settings.capi_max_attempts]
+        duplicates = sum(1 for times in fake.received.values() if times > 1)
+
+        print(f"   {synced} synced in {elapsed:.2f}s ({synced / elapsed:.0f} events/s), {runs} sync runs")
+        print(
+            f"   {fake.requests - requests_before} CAPI requests, "
+            f"{fake.rejected - rejected_before} rejected batches"
+        )
+        print(f"   {len(abandoned)}/{len(bad_ids)} invalid events skipped, {duplicates} duplicate deliveries")
+        ok = synced == count - len(bad_ids) and len(unsynced) == len(abandoned) == len(bad_ids)
+        print(f"   {'✅ every valid event synced' if ok else '❌ sync incomplete'}")
+
+        # Clean up the bench user
+        db.query(ConversionEvent).filter(ConversionEvent.user_id == user_id).delete()
+        db.query(Customer).filter(Customer.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Fake CAPI response time")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of requests answered with a 503")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--db", action="store_true", help="Also run sync_pending_events against DATABASE_URL")
+    parser.add_argument("--invalid", type=int, default=3, help="Pipeline: events CAPI rejects")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    # Read by create_capi_client via get_crm_settings
+    os.environ.update({
+        "META_PIXEL_ID": PIXEL_ID,
+        "META_CAPI_ACCESS_TOKEN": "bench_token",
+        "META_CAPI_BASE_URL": base_url,
+        "CAPI_BATCH_SIZE": str(args.batch_size),
+        "CAPI_SYNC_CONCURRENCY": str(args.concurrency),
+    })
+
+    fake = FakeCAPI(args.latency_ms, args.error_rate)
+    app = web.Application()
+    app.router.add_post("/{pixel}/events", fake.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.port).start()
+
+    try:
+        print("=" * 70)
+        print(f"📊 CAPI sync benchmark ({args.events} events, {args.latency_ms:.0f} ms latency, "
+              f"{args.error_rate:.0%} transient errors)")
+        print("=" * 70)
+
+        print("\n📤 Client")
+        await bench_client(base_url, fake, args.events, args.batch_size, args.concurrency)
+
+        if args.db:
+            print("\n🗄️ sync_pending_events")
+            await bench_pipeline(fake, args.events, args.invalid)
+        print("=" * 70)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
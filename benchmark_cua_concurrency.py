@@ -0,0 +1,118 @@
+"""
+Benchmark: read latency under concurrent input on a CUA server
+
+Runs reader tasks (status + screenshot) against a CUA server for a fixed
+time, first alone and then alongside writer tasks sending slow xdotool
+input (/type), and reports read latency and throughput for both phases.
+With blocking subprocess calls in the handlers, reads queue behind every
+type; with the async input backend (x11_input.py) they shouldn't move much.
+
+- cua_server.py: reads /health and /screenshot, writes /type
+- stealth_cua_server.py: reads /status and /screenshot, writes /type; pass
+  --xdotool-mode to switch the server to its xdotool fallback for the run
+
+Usage:
+    python benchmark_cua_concurrency.py --url http://localhost:8000 --server cua
+    python benchmark_cua_concurrency.py --url http://localhost:8005 --server stealth --xdotool-mode
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+READ_ENDPOINTS = {
+    "cua": ["/health", "/screenshot"],
+    "stealth": ["/status", "/screenshot"],
+}
+TYPE_ENDPOINT = "/type"
+TYPE_TEXT = "the quick brown fox jumps over the lazy dog "
+
+
+async def reader(session: aiohttp.ClientSession, url: str, endpoints: list, deadline: float, latencies: dict):
+    i = 0
+    while time.monotonic() < deadline:
+        endpoint = endpoints[i % len(endpoints)]
+        i += 1
+        started = time.monotonic()
+        async with session.get(f"{url}{endpoint}") as resp:
+            await resp.read()
+        latencies.setdefault(endpoint, []).append((time.monotonic() - started) * 1000)
+
+
+async def writer(session: aiohttp.ClientSession, url: str, deadline: float, counts: list):
+    while time.monotonic() < deadline:
+        async with session.post(f"{url}{TYPE_ENDPOINT}", json={"text": TYPE_TEXT}) as resp:
+            result = await resp.json()
+        counts.append(bool(result.get("success")))
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run_phase(session, args, endpoints: list, writers: int) -> dict:
+    deadline = time.monotonic() + args.duration
+    latencies, writes = {}, []
+    await asyncio.gather(
+        *[reader(session, args.url, endpoints, deadline, latencies) for _ in range(args.readers)],
+        *[writer(session, args.url, deadline, writes) for _ in range(writers)],
+    )
+    return {"latencies": latencies, "writes": writes}
+
+
+def report(name: str, phase: dict, duration: float):
+    print(f"\n{name}")
+    for endpoint, values in phase["latencies"].items():
+        print(
+            f"   {endpoint:<12} {len(values) / duration:6.1f} req/s   "
+            f"p50 {statistics.median(values):7.1f} ms   p95 {percentile(values, 0.95):7.1f} ms   "
+            f"max {max(values):7.1f} ms"
+        )
+    if phase["writes"]:
+        ok = sum(phase["writes"])
+        print(f"   {TYPE_ENDPOINT:<12} {len(phase['writes'])} types ({ok} succeeded)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="CUA server")
+    parser.add_argument("--server", choices=sorted(READ_ENDPOINTS), default="cua")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per phase")
+    parser.add_argument("--xdotool-mode", action="store_true", help="Stealth server: use the xdotool fallback")
+    args = parser.parse_args()
+
+    endpoints = READ_ENDPOINTS[args.server]
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+        if args.xdotool_mode:
+            await session.post(f"{args.url}/mode", json={"stealth": False})
+
+        try:
+            print("=" * 70)
+            print(f"📊 CUA concurrency benchmark ({args.url}, {args.readers} readers, {args.duration:.0f}s per phase)")
+            print("=" * 70)
+
+            idle = await run_phase(session, args, endpoints, writers=0)
+            report("📖 Reads only", idle, args.duration)
+
+            mixed = await run_phase(session, args, endpoints, writers=args.writers)
+            report(f"✍️ Reads + {args.writers} concurrent typers", mixed, args.duration)
+
+            print("\n" + "=" * 70)
+            for endpoint in endpoints:
+                before = statistics.median(idle["latencies"][endpoint])
+                after = statistics.median(mixed["latencies"][endpoint])
+                print(f"   {endpoint:<12} p50 {before:.1f} -> {after:.1f} ms under input ({after / max(before, 0.1):.1f}x)")
+            print("=" * 70)
+        finally:
+            if args.xdotool_mode:
+                await session.post(f"{args.url}/mode", json={"stealth": True})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
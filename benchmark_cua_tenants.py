@@ -0,0 +1,127 @@
+"""
+Benchmark: users per GB, multi-tenant vs one container per user
+
+Drives a stealth CUA server with N sessions (each navigates to a page and
+stays open) and reads /tenants for the memory footprint after each step.
+
+- Multi-tenant server (CUA_MULTI_TENANT=1): N contexts in one browser
+- Single-tenant server: one user per container, so cost per user is the
+  container's memory with one session
+
+Usage:
+    # Multi-tenant server on :8005, single-tenant server on :8006
+    python benchmark_cua_tenants.py --url http://localhost:8005 \\
+        --baseline-url http://localhost:8006 --users 1 5 10 20 \\
+        --page https://x.com/explore
+
+Set CUA_MAX_CONTEXTS on the server to at least the largest --users value,
+or LRU eviction will keep memory flat. --secret (default $CUA_SESSION_SECRET)
+must match the multi-tenant server's CUA_SESSION_SECRET.
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from browser_tenants import SESSION_HEADER, ADMIN_HEADER, SESSION_SECRET, sign_session
+
+SECRET = SESSION_SECRET
+
+
+async def post(session: aiohttp.ClientSession, url: str, data: dict, key: str = None) -> dict:
+    headers = {SESSION_HEADER: sign_session(key, SECRET)} if key else {ADMIN_HEADER: SECRET}
+    async with session.post(url, json=data, headers=headers) as resp:
+        return await resp.json()
+
+
+async def get(session: aiohttp.ClientSession, url: str) -> dict:
+    async with session.get(url, headers={ADMIN_HEADER: SECRET}) as resp:
+        return await resp.json()
+
+
+def footprint_mb(stats: dict) -> float:
+    """Container memory if the server can read its cgroup, else process PSS."""
+    return stats.get("container_mb") or stats.get("memory_mb") or 0.0
+
+
+async def measure_baseline(session: aiohttp.ClientSession, base_url: str, page_url: str) -> float:
+    """Memory of a single-tenant server with one user on page_url."""
+    await post(session, f"{base_url}/navigate", {"url": page_url})
+    await asyncio.sleep(5)
+    stats = await get(session, f"{base_url}/tenants")
+    return footprint_mb(stats)
+
+
+async def measure_multi_tenant(session: aiohttp.ClientSession, base_url: str, page_url: str, steps: list, settle: float):
+    """Footprint after opening each step's number of sessions."""
+    idle = await get(session, f"{base_url}/tenants")
+    print(f"   Idle server: {footprint_mb(idle):.0f} MB")
+
+    results = []
+    opened = 0
+    for target in sorted(steps):
+        started = time.monotonic()
+        new_keys = [f"bench_user_{i}" for i in range(opened, target)]
+        # Open in small waves so navigation doesn't dominate the measurement
+        for i in range(0, len(new_keys), 5):
+            await asyncio.gather(*[
+                post(session, f"{base_url}/navigate", {"url": page_url}, key=key)
+                for key in new_keys[i:i + 5]
+            ])
+        opened = target
+        await asyncio.sleep(settle)
+
+        stats = await get(session, f"{base_url}/tenants")
+        total = footprint_mb(stats)
+        per_user = (total - footprint_mb(idle)) / target
+        results.append((target, stats.get("live_contexts"), total, per_user))
+        print(
+            f"   {target:>3} users: {total:7.0f} MB total, {per_user:6.0f} MB/user marginal, "
+            f"{stats.get('live_contexts')} live contexts ({time.monotonic() - started:.1f}s)"
+        )
+    return results, footprint_mb(idle)
+
+
+async def main():
+    global SECRET
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8005", help="Multi-tenant CUA server")
+    parser.add_argument("--baseline-url", help="Single-tenant CUA server (one container per user)")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument("--page", default="https://x.com/explore")
+    parser.add_argument("--settle", type=float, default=5.0, help="Seconds to wait before measuring")
+    parser.add_argument("--secret", default=SECRET, help="Server's CUA_SESSION_SECRET")
+    args = parser.parse_args()
+    SECRET = args.secret
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+        print("=" * 70)
+        print("📊 CUA memory benchmark")
+        print("=" * 70)
+
+        baseline = None
+        if args.baseline_url:
+            print(f"\n🧱 One container per user ({args.baseline_url})")
+            baseline = await measure_baseline(session, args.baseline_url, args.page)
+            print(f"   1 user: {baseline:.0f} MB -> {1024 / baseline:.1f} users/GB")
+
+        print(f"\n🏢 Multi-tenant ({args.url})")
+        results, idle = await measure_multi_tenant(session, args.url, args.page, args.users, args.settle)
+
+        print("\n" + "=" * 70)
+        print(f"{'users':>6} {'total MB':>10} {'users/GB':>10} {'vs containers':>14}")
+        for users, _, total, _ in results:
+            users_per_gb = users * 1024 / total if total else 0
+            ratio = f"{users_per_gb / (1024 / baseline):.1f}x" if baseline else "-"
+            print(f"{users:>6} {total:>10.0f} {users_per_gb:>10.1f} {ratio:>14}")
+        print("=" * 70)
+
+        # Clean up benchmark sessions
+        for i in range(max(args.users)):
+            await post(session, f"{args.url}/tenants/evict", {"session": f"bench_user_{i}"})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
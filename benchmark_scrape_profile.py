@@ -0,0 +1,185 @@
+"""
+Benchmark: page-load time and bandwidth, interactive vs scrape profile
+
+Serves a static X-like fixture (a timeline of articles with avatars, media
+images, an autoplaying video, a web font and third-party tracker scripts),
+then has a stealth CUA server load it with each /navigate profile and
+reports load time and the bytes and requests the fixture actually served.
+
+- Load time: /batch navigate step until network idle (browser-side, so the
+  CUA server's network distance doesn't count)
+- Bandwidth: bytes served by the fixture per load (Cache-Control: no-store)
+
+Third-party assets are served from --third-party-host, a second name for
+this machine, so the browser sees them as another site.
+
+Usage:
+    # CUA server on :8005 running on this machine
+    python benchmark_scrape_profile.py --url http://localhost:8005 --runs 5
+
+    # CUA server in Docker: the browser must reach the fixture
+    python benchmark_scrape_profile.py --fixture-host host.docker.internal \\
+        --third-party-host 172.17.0.1
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+
+import aiohttp
+from aiohttp import web
+
+from browser_tenants import SESSION_HEADER, SESSION_SECRET, sign_session
+
+
+ARTICLE_HTML = """
+<article data-testid="tweet">
+  <img class="avatar" src="/img/avatar_{i}.jpg" alt="">
+  <div data-testid="User-Name"><span>Account {i}</span><span>@account_{i}</span></div>
+  <div data-testid="tweetText">Post {i}: shipping notes on agents, evals and inference costs #{i}</div>
+  {media}
+  <div role="group">
+    <button data-testid="reply" aria-label="{i} Replies. Reply"></button>
+    <button data-testid="retweet" aria-label="{i} reposts. Repost"></button>
+    <button data-testid="like" aria-label="{i} Likes. Like"></button>
+  </div>
+</article>"""
+
+PAGE_HTML = """<!DOCTYPE html>
+<html><head>
+<title>Home / X</title>
+<style>
+@font-face {{ font-family: Chirp; src: url('/fonts/chirp.woff2') format('woff2'); }}
+body {{ font-family: Chirp, sans-serif; }}
+img.avatar {{ width: 40px; height: 40px; }}
+</style>
+<script src="http://{third_party}:{port}/tracker.js"></script>
+<script src="http://{third_party}:{port}/ads.js"></script>
+</head><body>
+<main>{articles}</main>
+</body></html>"""
+
+
+class Fixture:
+    """Static X-like site that counts what it serves."""
+
+    def __init__(self, articles: int, third_party_host: str, port: int):
+        self.articles = articles
+        self.third_party_host = third_party_host
+        self.port = port
+        self.bytes_served = 0
+        self.requests_served = 0
+        self.assets = {
+            "/fonts/chirp.woff2": ("font/woff2", os.urandom(120_000)),
+            "/media/clip.mp4": ("video/mp4", os.urandom(2_000_000)),
+            "/tracker.js": ("application/javascript", b"/*" + b"t" * 60_000 + b"*/"),
+            "/ads.js": ("application/javascript", b"/*" + b"a" * 90_000 + b"*/"),
+        }
+        for i in range(articles):
+            self.assets[f"/img/avatar_{i}.jpg"] = ("image/jpeg", os.urandom(8_000))
+            if i % 3 == 0:
+                self.assets[f"/img/media_{i}.jpg"] = ("image/jpeg", os.urandom(150_000))
+
+    def page(self) -> bytes:
+        articles = []
+        for i in range(self.articles):
+            if i == 1:
+                media = '<video autoplay muted loop src="/media/clip.mp4"></video>'
+            elif i % 3 == 0:
+                media = f'<img src="/img/media_{i}.jpg" alt="">'
+            else:
+                media = ""
+            articles.append(ARTICLE_HTML.format(i=i, media=media))
+        return PAGE_HTML.format(
+            third_party=self.third_party_host, port=self.port, articles="".join(articles)
+        ).encode()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.path in ("/", "/home"):
+            content_type, body = "text/html", self.page()
+        elif request.path in self.assets:
+            content_type, body = self.assets[request.path]
+        else:
+            return web.Response(status=404)
+        self.bytes_served += len(body)
+        self.requests_served += 1
+        return web.Response(body=body, content_type=content_type, headers={"Cache-Control": "no-store"})
+
+    def reset(self):
+        self.bytes_served = 0
+        self.requests_served = 0
+
+
+async def load(session: aiohttp.ClientSession, cua_url: str, page_url: str, profile: str, key: str, secret: str) -> dict:
+    """Load page_url with a profile; browser-side time until network idle."""
+    steps = [
+        {
+            "action": "navigate",
+            "url": page_url,
+            "profile": profile,
+            "wait": {"network_idle": True, "timeout": 30000},
+        },
+        {"action": "evaluate", "script": "document.querySelectorAll('article').length"},
+    ]
+    async with session.post(f"{cua_url}/batch", json={"steps": steps}, headers={SESSION_HEADER: sign_session(key, secret)}) as resp:
+        result = await resp.json()
+    if not result.get("success"):
+        raise RuntimeError(f"{profile} load failed: {result.get('error')}")
+    return {"load_ms": result["steps"][0]["elapsed_ms"], "articles": result["steps"][1]["result"]}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8005", help="CUA server")
+    parser.add_argument("--session", default="bench_scrape", help="Session key (multi-tenant servers)")
+    parser.add_argument("--secret", default=SESSION_SECRET, help="Server's CUA_SESSION_SECRET")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--port", type=int, default=8765, help="Fixture port")
+    parser.add_argument("--fixture-host", default="127.0.0.1", help="Fixture host as seen by the browser")
+    parser.add_argument("--third-party-host", default="localhost", help="Second host name for third-party assets")
+    args = parser.parse_args()
+
+    fixture = Fixture(args.articles, args.third_party_host, args.port)
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", fixture.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", args.port).start()
+    page_url = f"http://{args.fixture_host}:{args.port}/home"
+
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+            print("=" * 70)
+            print(f"📊 Scrape profile benchmark ({args.articles} articles, {args.runs} runs)")
+            print("=" * 70)
+
+            results = {}
+            for profile in ("interactive", "scrape"):
+                runs = []
+                for _ in range(args.runs):
+                    fixture.reset()
+                    outcome = await load(session, args.url, page_url, profile, args.session, args.secret)
+                    runs.append((outcome["load_ms"], fixture.bytes_served, fixture.requests_served, outcome["articles"]))
+                results[profile] = runs
+                load_ms = statistics.median(r[0] for r in runs)
+                kb = statistics.median(r[1] for r in runs) / 1024
+                requests = statistics.median(r[2] for r in runs)
+                print(f"   {profile:<12} {load_ms:7.0f} ms   {kb:8.0f} KB   {requests:4.0f} requests   {runs[-1][3]} articles")
+
+            # Leave the session on the normal profile
+            await load(session, args.url, "about:blank", "interactive", args.session, args.secret)
+
+            base, fast = results["interactive"], results["scrape"]
+            time_ratio = statistics.median(r[0] for r in base) / max(statistics.median(r[0] for r in fast), 1)
+            byte_ratio = statistics.median(r[1] for r in base) / max(statistics.median(r[1] for r in fast), 1)
+            print("\n" + "=" * 70)
+            print(f"   scrape profile: {time_ratio:.1f}x faster to idle, {byte_ratio:.1f}x fewer bytes")
+            print("=" * 70)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
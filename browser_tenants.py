@@ -0,0 +1,429 @@
+"""
+Browser Tenants
+
+Multi-tenant mode for the stealth CUA server: one Chromium process hosts an
+isolated BrowserContext (cookies, storage, cache, tabs) per user/session key
+instead of one container per user.
+
+- Contexts are created on a key's first request and kept in LRU order
+- Idle contexts (and the least recently used ones once MAX_CONTEXTS is
+  reached) are evicted to disk: storage state (cookies + localStorage) and
+  the current URL are written to STORAGE_DIR and the context is closed; the
+  next request for the key restores it
+- A context whose page JS heap grows past MAX_HEAP_MB is evicted (and so
+  restarted fresh) the next time it is idle
+- Contexts with a request in flight are never evicted
+- Session keys are user IDs, which aren't secret, so requests select a
+  non-default context with a signed, expiring token "<key>.<expiry>.<HMAC>"
+  (sign_session, keyed by CUA_SESSION_SECRET, valid for
+  CUA_SESSION_TTL_SECONDS); admin routes take the secret itself in the
+  X-CUA-Admin-Token header. Clients sign per request, so tokens stay short
+  lived
+
+Usage:
+    pool = TenantPool(browser, context_options={...})
+    await pool.start()
+    tenant = await pool.acquire("user_123")
+    await tenant.page.goto("https://x.com/home")
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Header (or ?session= query param) carrying the signed session token
+SESSION_HEADER = "X-CUA-Session"
+DEFAULT_SESSION = "default"
+
+# Without a secret only the default session is reachable in multi-tenant mode
+SESSION_SECRET = os.getenv("CUA_SESSION_SECRET", "")
+ADMIN_HEADER = "X-CUA-Admin-Token"
+SESSION_TTL_SECONDS = int(os.getenv("CUA_SESSION_TTL_SECONDS", "3600"))
+
+STORAGE_DIR = os.getenv("CUA_TENANT_STORAGE_DIR", "/tmp/cua_tenants")
+MAX_CONTEXTS = int(os.getenv("CUA_MAX_CONTEXTS", "8"))
+IDLE_SECONDS = int(os.getenv("CUA_CONTEXT_IDLE_SECONDS", "600"))
+MAX_HEAP_MB = int(os.getenv("CUA_CONTEXT_MAX_HEAP_MB", "512"))
+REAP_INTERVAL_SECONDS = 30
+
+
+def _session_digest(payload: str, secret: str) -> str:
+    return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def sign_session(key: str, secret: str = SESSION_SECRET, ttl: int = SESSION_TTL_SECONDS) -> str:
+    """
+    Session token for a key: "<key>.<unix expiry>.<hex HMAC-SHA256 of both>".
+
+    Without a secret the bare key is returned (single-tenant servers ignore
+    it; multi-tenant servers only serve the default session then).
+    """
+    if not secret:
+        return key
+    payload = f"{key}.{int(time.time()) + ttl}"
+    return f"{payload}.{_session_digest(payload, secret)}"
+
+
+def verify_session(token: str, secret: str = SESSION_SECRET) -> Optional[str]:
+    """Key of a valid, unexpired session token, else None (always None without a secret)."""
+    if not secret or not token:
+        return None
+    payload, _, digest = token.rpartition(".")
+    key, _, expires = payload.rpartition(".")
+    if not key or not expires.isdigit() or int(expires) < time.time():
+        return None
+    if hmac.compare_digest(_session_digest(payload, secret), digest):
+        return key
+    return None
+
+
+def is_admin(token: Optional[str], secret: str = SESSION_SECRET) -> bool:
+    """Whether an admin token matches the server secret."""
+    return bool(secret and token) and hmac.compare_digest(token.encode(), secret.encode())
+
+
+@dataclass
+class Tenant:
+    """One user's browser context and its working tab."""
+    key: str
+    context: Any  # BrowserContext
+    page: Any  # Page
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    restored: bool = False
+    cdp: Any = None  # CDPSession for heap metrics
+
+    async def ensure_main_tab(self):
+        """Recreate the working tab if it was closed and close any extras."""
+        if self.page is None or self.page.is_closed():
+            print(f"⚠️ [{self.key}] Main page lost, recreating...")
+            self.page = await self.context.new_page()
+            self.cdp = None
+        for p in self.context.pages:
+            if p != self.page and not p.is_closed():
+                print(f"🚫 [{self.key}] Closing extra tab: {p.url}")
+                await p.close()
+        return self.page
+
+    async def _on_new_page(self, new_page):
+        """Close tabs opened by the page and stay on the working tab."""
+        try:
+            if new_page != self.page:
+                await new_page.close()
+        except Exception as e:
+            print(f"⚠️ [{self.key}] Error handling new page: {e}")
+
+    async def heap_mb(self) -> Optional[float]:
+        """Used JS heap of the working tab in MB (None if unavailable)."""
+        try:
+            if self.cdp is None:
+                self.cdp = await self.context.new_cdp_session(self.page)
+                await self.cdp.send("Performance.enable")
+            metrics = await self.cdp.send("Performance.getMetrics")
+        except Exception:
+            self.cdp = None
+            return None
+        for metric in metrics.get("metrics", []):
+            if metric.get("name") == "JSHeapUsedSize":
+                return metric["value"] / (1024 * 1024)
+        return None
+
+
+class TenantPool:
+    """Per-key BrowserContexts in one shared browser, with LRU eviction to disk."""
+
+    def __init__(
+        self,
+        browser,
+        context_options: Optional[Dict[str, Any]] = None,
+        storage_dir: str = STORAGE_DIR,
+        max_contexts: int = MAX_CONTEXTS,
+        idle_seconds: int = IDLE_SECONDS,
+        max_heap_mb: int = MAX_HEAP_MB,
+    ):
+        """
+        Args:
+            browser: Launched patchright/playwright Browser
+            context_options: Keyword arguments for browser.new_context()
+            storage_dir: Where evicted contexts' storage state is written
+            max_contexts: Live contexts before the LRU idle one is evicted
+            idle_seconds: Evict contexts unused for this long
+            max_heap_mb: Evict (restart) contexts whose JS heap exceeds this
+        """
+        self.browser = browser
+        self.context_options = context_options or {}
+        self.storage_dir = storage_dir
+        self.max_contexts = max_contexts
+        self.idle_seconds = idle_seconds
+        self.max_heap_mb = max_heap_mb
+
+        # key -> Tenant, least recently used first
+        self.tenants: Dict[str, Tenant] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._busy: Dict[str, int] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+        # Stats
+        self.created = 0
+        self.restored = 0
+        self.evictions: Dict[str, int] = {"idle": 0, "lru": 0, "memory": 0, "manual": 0}
+
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    async def start(self):
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+        print(
+            f"🏢 Multi-tenant browser: max {self.max_contexts} live contexts, "
+            f"idle eviction after {self.idle_seconds}s, heap cap {self.max_heap_mb} MB"
+        )
+
+    async def stop(self):
+        """Persist and close every context."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+            self._reaper = None
+        for key in list(self.tenants):
+            await self.evict(key, "manual", force=True)
+
+    # =========================================================================
+    # Access
+    # =========================================================================
+
+    def peek(self, key: str) -> Optional[Tenant]:
+        """Live tenant for a key, without creating or touching it."""
+        return self.tenants.get(key)
+
+    def is_busy(self, key: str) -> bool:
+        return self._busy.get(key, 0) > 0
+
+    @asynccontextmanager
+    async def hold(self, key: str):
+        """Mark a key as in use (not evictable) for the duration of a request."""
+        self._busy[key] = self._busy.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self._busy[key] -= 1
+            if not self._busy[key]:
+                del self._busy[key]
+            tenant = self.tenants.get(key)
+            if tenant is not None:
+                tenant.last_used = time.monotonic()
+
+    async def acquire(self, key: str) -> Tenant:
+        """Get a key's tenant, creating or restoring its context if needed."""
+        tenant = self.tenants.get(key)
+        if tenant is None:
+            lock = self._locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                tenant = self.tenants.get(key)
+                if tenant is None:
+                    await self._make_room()
+                    tenant = await self._open(key)
+                    self.tenants[key] = tenant
+        else:
+            # Move to the most recently used end
+            self.tenants[key] = self.tenants.pop(key)
+        tenant.last_used = time.monotonic()
+        return tenant
+
+    def _storage_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        return os.path.join(self.storage_dir, f"{digest}.json")
+
+    async def _open(self, key: str) -> Tenant:
+        saved = None
+        path = self._storage_path(key)
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ [{key}] Ignoring unreadable saved state: {e}")
+
+        options = dict(self.context_options)
+        if saved and saved.get("storage_state"):
+            options["storage_state"] = saved["storage_state"]
+        context = await self.browser.new_context(**options)
+        page = await context.new_page()
+        tenant = Tenant(key=key, context=context, page=page, restored=saved is not None)
+        context.on("page", tenant._on_new_page)
+
+        if saved:
+            self.restored += 1
+            if saved.get("url", "").startswith("http"):
+                try:
+                    await page.goto(saved["url"], wait_until="domcontentloaded", timeout=15000)
+                except Exception as e:
+                    print(f"⚠️ [{key}] Could not restore {saved['url']}: {e}")
+            print(f"♻️ [{key}] Context restored from disk ({len(self.tenants) + 1} live)")
+        else:
+            self.created += 1
+            print(f"🆕 [{key}] Context created ({len(self.tenants) + 1} live)")
+        return tenant
+
+    # =========================================================================
+    # Eviction
+    # =========================================================================
+
+    async def evict(self, key: str, reason: str = "manual", force: bool = False) -> bool:
+        """
+        Save a tenant's storage state to disk and close its context.
+
+        Returns:
+            False if the tenant doesn't exist or is busy (unless force)
+        """
+        if key not in self.tenants:
+            return False
+        # Same lock as creation: a request for this key waits until the
+        # state is on disk and then restores it
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            tenant = self.tenants.get(key)
+            if tenant is None or (self.is_busy(key) and not force):
+                return False
+            del self.tenants[key]
+            await self._save_and_close(key, tenant)
+
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        print(f"💤 [{key}] Context evicted ({reason}), {len(self.tenants)} live")
+        return True
+
+    async def _save_and_close(self, key: str, tenant: Tenant):
+        try:
+            state = {
+                "storage_state": await tenant.context.storage_state(),
+                "url": tenant.page.url if tenant.page and not tenant.page.is_closed() else "",
+                "saved_at": time.time(),
+            }
+            path = self._storage_path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ [{key}] Failed to save context state: {e}")
+
+        try:
+            await tenant.context.close()
+        except Exception:
+            pass
+
+    async def _make_room(self):
+        """Evict least recently used idle tenants until a new one fits."""
+        for key in list(self.tenants):
+            if len(self.tenants) < self.max_contexts:
+                return
+            await self.evict(key, "lru")
+        if len(self.tenants) >= self.max_contexts:
+            print(f"⚠️ All {len(self.tenants)} contexts busy, exceeding max_contexts")
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL_SECONDS)
+            try:
+                await self.reap()
+            except Exception as e:
+                print(f"⚠️ Tenant reaper error: {e}")
+
+    async def reap(self):
+        """Evict idle tenants and tenants over the heap cap."""
+        now = time.monotonic()
+        for key, tenant in list(self.tenants.items()):
+            if self.is_busy(key):
+                continue
+            if now - tenant.last_used > self.idle_seconds:
+                await self.evict(key, "idle")
+                continue
+            heap = await tenant.heap_mb()
+            if heap is not None and heap > self.max_heap_mb:
+                print(f"🧠 [{key}] JS heap {heap:.0f} MB over {self.max_heap_mb} MB cap")
+                await self.evict(key, "memory")
+
+    # =========================================================================
+    # Stats
+    # =========================================================================
+
+    async def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        tenants: List[Dict[str, Any]] = []
+        for key, tenant in self.tenants.items():
+            heap = await tenant.heap_mb()
+            tenants.append({
+                "key": key,
+                "url": tenant.page.url if tenant.page and not tenant.page.is_closed() else None,
+                "idle_seconds": round(now - tenant.last_used, 1),
+                "age_seconds": round(now - tenant.created_at, 1),
+                "busy": self.is_busy(key),
+                "restored": tenant.restored,
+                "js_heap_mb": round(heap, 1) if heap is not None else None,
+            })
+        return {
+            "live_contexts": len(self.tenants),
+            "max_contexts": self.max_contexts,
+            "created": self.created,
+            "restored": self.restored,
+            "evictions": dict(self.evictions),
+            "tenants": tenants,
+        }
+
+
+# ============================================================================
+# Memory
+# ============================================================================
+
+def _read_kb(path: str, field_name: str) -> int:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field_name):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def process_tree_memory_mb(root_pid: Optional[int] = None) -> float:
+    """
+    Proportional set size (MB) of a process and all its descendants.
+
+    PSS splits shared pages between the processes mapping them, so the sum
+    is the real footprint of the server plus its Chromium processes.
+    """
+    root_pid = root_pid or os.getpid()
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        ppid = _read_kb(f"/proc/{entry}/status", "PPid:")
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total_kb += _read_kb(f"/proc/{pid}/smaps_rollup", "Pss:")
+        stack.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+def container_memory_mb() -> Optional[float]:
+    """Memory charged to this container's cgroup (MB), if readable."""
+    for path in ("/sys/fs/cgroup/memory.current", "/sys/fs/cgroup/memory/memory.usage_in_bytes"):
+        try:
+            with open(path) as f:
+                return int(f.read().strip()) / (1024 * 1024)
+        except (OSError, ValueError):
+            continue
+    return None
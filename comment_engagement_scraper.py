@@ -13,6 +13,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, List, Any
 import json
 
+from x_tweet_parser import fetch_tweets
+
 
 class CommentEngagementScraper:
     """
@@ -260,61 +262,18 @@ class CommentEngagementScraper:
         Returns:
             Dict with likes, replies, retweets, and success status
         """
-        script = '''(() => {
-            // Find the main article (the tweet we're viewing)
-            const article = document.querySelector('article[data-testid="tweet"]');
-            if (!article) {
-                return { error: 'not_found', success: false };
-            }
-
-            // Helper to parse engagement numbers like "1,234", "1.2K", "12K", "1.5M"
-            const parseEngagementNum = (label) => {
-                if (!label) return 0;
-                const match = label.match(/([\d,.]+)\s*([KkMm])?/);
-                if (!match) return 0;
-                let num = parseFloat(match[1].replace(/,/g, ''));
-                const suffix = match[2]?.toUpperCase();
-                if (suffix === 'K') num *= 1000;
-                else if (suffix === 'M') num *= 1000000;
-                return Math.round(num);
-            };
-
-            // Helper to extract count from aria-label
-            const getCount = (testId) => {
-                const btn = article.querySelector(`[data-testid="${testId}"]`);
-                if (!btn) return 0;
-
-                // Try aria-label first
-                const label = btn.getAttribute('aria-label') || '';
-                const parsed = parseEngagementNum(label);
-                if (parsed > 0) return parsed;
-
-                // Try inner text
-                const span = btn.querySelector('span');
-                if (span) {
-                    const text = span.innerText;
-                    if (text && /^\d/.test(text)) {
-                        return parseEngagementNum(text);
-                    }
-                }
-
-                return 0;
-            };
-
-            return {
-                likes: getCount('like'),
-                replies: getCount('reply'),
-                retweets: getCount('retweet'),
-                success: true
-            };
-        })()'''
-
-        result = await self.client._request("POST", "/playwright/evaluate", {"script": script})
-
-        if result.get("success"):
-            return result.get("result", {"error": "No result", "success": False})
-        else:
-            return {"error": result.get("error", "Script execution failed"), "success": False}
+        # The first rendered tweet is the one we're viewing
+        tweets = await fetch_tweets(self.client, limit=1)
+        if not tweets:
+            return {"error": "not_found", "success": False}
+
+        tweet = tweets[0]
+        return {
+            "likes": tweet.likes,
+            "replies": tweet.replies,
+            "retweets": tweet.retweets,
+            "success": True
+        }
 
     async def _extract_comments_on_post(self, max_comments: int = 20) -> List[Dict[str, Any]]:
         """
@@ -326,72 +285,21 @@ class CommentEngagementScraper:
         Returns:
             List of comment dicts with username, content, url, likes, replies
         """
-        script = f'''(() => {{
-            const comments = [];
-            const articles = document.querySelectorAll('article');
-
-            // Skip first article (it's the main post)
-            for (let i = 1; i < articles.length && comments.length < {max_comments}; i++) {{
-                const article = articles[i];
-
-                // Get username
-                const userLink = article.querySelector('a[href^="/"]');
-                const username = userLink ? userLink.getAttribute('href')?.replace('/', '').split('/')[0] : null;
-
-                // Get display name
-                const displayNameEl = article.querySelector('[data-testid="User-Name"] span');
-                const displayName = displayNameEl ? displayNameEl.innerText : null;
-
-                // Get content
-                const contentEl = article.querySelector('[data-testid="tweetText"]');
-                const content = contentEl ? contentEl.innerText : null;
-
-                // Get URL
-                const timeLink = article.querySelector('a[href*="/status/"]');
-                const url = timeLink ? 'https://x.com' + timeLink.getAttribute('href') : null;
-
-                // Helper to parse engagement numbers like "1,234", "1.2K", "12K", "1.5M"
-                const parseEngagementNum = (label) => {{
-                    if (!label) return 0;
-                    const match = label.match(/([\\d,.]+)\\s*([KkMm])?/);
-                    if (!match) return 0;
-                    let num = parseFloat(match[1].replace(/,/g, ''));
-                    const suffix = match[2]?.toUpperCase();
-                    if (suffix === 'K') num *= 1000;
-                    else if (suffix === 'M') num *= 1000000;
-                    return Math.round(num);
-                }};
-
-                // Get engagement
-                const getCount = (testId) => {{
-                    const btn = article.querySelector(`[data-testid="${{testId}}"]`);
-                    if (!btn) return 0;
-                    const label = btn.getAttribute('aria-label') || '';
-                    return parseEngagementNum(label);
-                }};
-
-                if (username && content) {{
-                    comments.push({{
-                        username,
-                        display_name: displayName,
-                        content,
-                        url,
-                        likes: getCount('like'),
-                        replies: getCount('reply')
-                    }});
-                }}
-            }}
-
-            return comments;
-        }})()'''
-
-        result = await self.client._request("POST", "/playwright/evaluate", {"script": script})
-
-        if result.get("success"):
-            return result.get("result", [])
-        else:
-            print(f"⚠️ Failed to extract comments: {result.get('error')}")
-            return []
+        # Skip first tweet (it's the main post)
+        tweets = await fetch_tweets(self.client, limit=max_comments + 1)
+
+        return [
+            {
+                "username": tweet.author,
+                "display_name": tweet.display_name,
+                "content": tweet.text,
+                "url": tweet.url,
+                "likes": tweet.likes,
+                "replies": tweet.replies
+            }
+            for tweet in tweets[1:]
+            if tweet.author and tweet.text
+        ]
 
 
 async def run_comment_scraping(cua_client, user_id: str) -> Dict[str, Any]:
@@ -15,6 +15,8 @@ from datetime import datetime
 from langgraph.store.base import BaseStore
 from langchain_anthropic import ChatAnthropic
 
+from x_tweet_parser import TweetRecord, fetch_tweets
+
 
 # ============================================================================
 # CONTENT SCRAPER
@@ -60,18 +62,15 @@ class CompetitorContentScraper:
         max_scrolls = 5
 
         while len(posts) < max_posts and scroll_count < max_scrolls:
-            # Get DOM
-            dom_result = await self.client._request("GET", "/dom/elements")
-
-            if not dom_result.get("success"):
-                break
-
-            # Extract post text from DOM
-            new_posts = self._extract_posts_from_dom(dom_result)
+            # Extract rendered tweets in the page
+            tweets = await fetch_tweets(self.client)
+            new_posts = self._posts_from_tweets(tweets)
 
+            seen_texts = {p["text"] for p in posts}
             for post in new_posts:
-                if post not in posts and len(posts) < max_posts:
+                if post["text"] not in seen_texts and len(posts) < max_posts:
                     posts.append(post)
+                    seen_texts.add(post["text"])
 
             # Scroll to load more
             await self.client._request("POST", "/scroll", {
@@ -84,27 +83,22 @@ class CompetitorContentScraper:
         print(f"      ✅ Scraped {len(posts)} posts")
         return posts[:max_posts]
 
-    def _extract_posts_from_dom(self, dom_result: Dict) -> List[Dict]:
+    def _posts_from_tweets(self, tweets: List[TweetRecord]) -> List[Dict]:
         """
-        Extract post text from X DOM structure.
+        Extract post text from extracted tweets.
 
-        X posts are in <article> tags with data-testid="tweet"
+        Skips reposts, ads and very short tweets.
         """
         posts = []
-        elements = dom_result.get("elements", [])
-
-        for el in elements:
-            # Look for tweet text
-            text = el.get("text", "").strip()
-
-            # Filter out navigation, headers, etc.
-            if text and len(text) > 20 and not text.startswith("@"):
-                # Basic heuristic: posts are longer than 20 chars
-                # and don't start with @ (which are usually metadata)
-                posts.append({
-                    "text": text,
-                    "scraped_at": datetime.utcnow().isoformat()
-                })
+
+        for tweet in tweets:
+            if tweet.is_repost or tweet.promoted or len(tweet.text) <= 20:
+                continue
+
+            posts.append({
+                "text": tweet.text,
+                "scraped_at": datetime.utcnow().isoformat()
+            })
 
         return posts
 
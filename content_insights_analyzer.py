@@ -3,21 +3,256 @@ Content Insights Analyzer
 
 Analyzes competitor posts to extract actionable insights and generate
 personalized content suggestions using AI.
+
+The numeric analytics (high performers, benchmarks, competitor clusters)
+run on a columnar CompetitorFrame: one array per feature over every
+competitor post, built in a single pass over the graph data. Percentiles,
+rankings and tier stats are numpy operations, and competitors are
+clustered with k-means over engagement, posting features and a hashed
+bag-of-words content embedding. Results are cached per
+(user, competitor-set version), so repeat requests only pay for the LLM
+steps.
 """
 
 import asyncio
+import hashlib
+import math
+import re
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+
+import numpy as np
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
 import json
 
 
+# Top posts kept for the LLM steps / response
+HIGH_PERFORMER_LIMIT = 50
+
+# Hashed bag-of-words embedding size and the SVD dimensions kept for clustering
+EMBEDDING_DIMENSIONS = 256
+EMBEDDING_COMPONENTS = 8
+
+# k-means
+MAX_CLUSTERS = 6
+KMEANS_ITERATIONS = 50
+KMEANS_SEED = 42
+
+# Cached analytics (user, competitor-set version) -> results
+ANALYTICS_CACHE_SIZE = 64
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9#@']+")
+
+# Skipped when naming a segment's top terms
+STOP_WORDS = {
+    "this", "that", "with", "have", "from", "your", "just", "what", "they", "will",
+    "about", "there", "their", "would", "when", "more", "like", "it's", "don't",
+    "than", "then", "them", "been", "were", "some", "into", "only", "also", "here",
+    "https", "because", "which", "being", "very", "much", "most", "every", "these",
+}
+
+FOLLOWER_TIER_EDGES = [1_000, 10_000, 50_000, 500_000, 1_000_000]
+FOLLOWER_TIERS = ["Nano (<1K)", "Nano (1K-10K)", "Micro (10K-50K)", "Mid (50K-500K)", "Macro (500K-1M)", "Mega (1M+)"]
+
+# Engagement-based tiers (fallback when follower count unavailable)
+ENGAGEMENT_TIER_EDGES = [50, 200, 1_000, 5_000]
+ENGAGEMENT_TIERS = ["Micro Influencer", "Growing Creator", "Mid-Tier Creator", "Popular Creator", "Viral Creator"]
+
+
+# ============================================================================
+# Columnar Post Data
+# ============================================================================
+
+def _hours_ago(post: Dict, now: datetime) -> float:
+    """Age of a post in hours from its timestamp (NaN if it has none)."""
+    value = post.get('timestamp') or post.get('posted_at')
+    if not value:
+        return math.nan
+    try:
+        posted = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return math.nan
+    if posted.tzinfo is None:
+        posted = posted.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - posted).total_seconds() / 3600)
+
+
+def _tokenize(texts: List[str]):
+    """
+    Tokenize posts once for embeddings and term counts.
+
+    Returns:
+        (post index per token, vocabulary ID per token, vocabulary)
+    """
+    per_post = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    lengths = np.fromiter((len(tokens) for tokens in per_post), dtype=np.int64, count=len(per_post))
+    tokens = [token for post_tokens in per_post for token in post_tokens]
+
+    vocabulary = {token: i for i, token in enumerate(dict.fromkeys(tokens))}
+    token_ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    post_ids = np.repeat(np.arange(len(per_post)), lengths)
+    return post_ids, token_ids, list(vocabulary)
+
+
+def _embed_tokens(post_ids: np.ndarray, token_ids: np.ndarray, vocabulary: List[str], post_count: int) -> np.ndarray:
+    """
+    Hashed bag-of-words vectors per post (term frequency, L2-normalized).
+
+    Cheap enough for thousands of posts per request and needs no model or
+    API call; good enough to separate accounts by what they post about.
+    """
+    buckets = np.fromiter(
+        (zlib.crc32(token.encode()) % EMBEDDING_DIMENSIONS for token in vocabulary),
+        dtype=np.int64, count=len(vocabulary)
+    )
+    cells = post_ids * EMBEDDING_DIMENSIONS + buckets[token_ids]
+    vectors = np.bincount(cells, minlength=post_count * EMBEDDING_DIMENSIONS).astype(np.float32)
+    vectors = vectors.reshape(post_count, EMBEDDING_DIMENSIONS)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+@dataclass
+class CompetitorFrame:
+    """
+    All competitor posts as columns.
+
+    Post columns are aligned (one entry per post); competitor_index maps a
+    post to its row in the competitor columns.
+    """
+    usernames: List[str]
+    follower_counts: np.ndarray
+    mutual_connections: np.ndarray
+    post_counts: np.ndarray
+
+    competitor_index: np.ndarray
+    texts: List[str]
+    likes: np.ndarray
+    retweets: np.ndarray
+    replies: np.ndarray
+    views: np.ndarray
+    lengths: np.ndarray
+    hours_ago: np.ndarray
+
+    @classmethod
+    def from_competitors(cls, competitors: List[Dict]) -> "CompetitorFrame":
+        """Flatten competitor dicts and their posts into columns (one pass)."""
+        now = datetime.now(timezone.utc)
+        posts, owners = [], []
+        for i, comp in enumerate(competitors):
+            comp_posts = comp.get('posts') or []
+            posts.extend(comp_posts)
+            owners.extend([i] * len(comp_posts))
+
+        def column(key):
+            return np.fromiter((p.get(key) or 0 for p in posts), dtype=np.float64, count=len(posts))
+
+        texts = [p.get('text') or '' for p in posts]
+        return cls(
+            usernames=[comp.get('username', '') for comp in competitors],
+            follower_counts=np.array([comp.get('follower_count') or 0 for comp in competitors], dtype=np.float64),
+            mutual_connections=np.array([comp.get('mutual_connections') or 0 for comp in competitors], dtype=np.float64),
+            post_counts=np.array([len(comp.get('posts') or []) for comp in competitors], dtype=np.int64),
+            competitor_index=np.array(owners, dtype=np.int64),
+            texts=texts,
+            likes=column('likes'),
+            retweets=column('retweets'),
+            replies=column('replies'),
+            views=column('views'),
+            lengths=np.fromiter((len(t) for t in texts), dtype=np.float64, count=len(texts)),
+            hours_ago=np.fromiter((_hours_ago(p, now) for p in posts), dtype=np.float64, count=len(posts)),
+        )
+
+    @property
+    def post_count(self) -> int:
+        return len(self.texts)
+
+    @property
+    def competitor_count(self) -> int:
+        return len(self.usernames)
+
+    @property
+    def engagement(self) -> np.ndarray:
+        """Unweighted likes + retweets + replies per post."""
+        return self.likes + self.retweets + self.replies
+
+    @property
+    def engagement_score(self) -> np.ndarray:
+        """Ranking score per post (retweets worth 2x)."""
+        return self.likes + self.retweets * 2 + self.replies
+
+    def per_competitor_mean(self, values: np.ndarray) -> np.ndarray:
+        """Mean of a post column per competitor (0 for competitors without posts)."""
+        totals = np.bincount(self.competitor_index, weights=values, minlength=self.competitor_count)
+        return totals / np.maximum(self.post_counts, 1)
+
+    def per_competitor_nanmean(self, values: np.ndarray) -> np.ndarray:
+        """Mean of a post column per competitor, ignoring NaN (NaN if none)."""
+        valid = ~np.isnan(values)
+        totals = np.bincount(self.competitor_index[valid], weights=values[valid], minlength=self.competitor_count)
+        counts = np.bincount(self.competitor_index[valid], minlength=self.competitor_count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def fingerprint_competitors(competitors: List[Dict]) -> str:
+    """Fingerprint of a competitor set (accounts, post counts and metrics)."""
+    digest = hashlib.sha1()
+    for comp in competitors:
+        posts = comp.get('posts') or []
+        digest.update(f"{comp.get('username')}|{comp.get('follower_count') or 0}|{len(posts)}|".encode())
+        for post in posts:
+            digest.update(
+                f"{post.get('url') or (post.get('text') or '')[:40]}:{post.get('likes') or 0}:"
+                f"{post.get('retweets') or 0}:{post.get('replies') or 0}:{post.get('views') or 0};".encode()
+            )
+    return digest.hexdigest()
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = KMEANS_SEED):
+    """
+    k-means with k-means++ seeding.
+
+    Returns:
+        (labels, centroids)
+    """
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    centroids = np.empty((k, points.shape[1]))
+    centroids[0] = points[rng.integers(n)]
+    distances = ((points - centroids[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = distances.sum()
+        index = rng.choice(n, p=distances / total) if total > 0 else rng.integers(n)
+        centroids[i] = points[index]
+        distances = np.minimum(distances, ((points - centroids[i]) ** 2).sum(axis=1))
+
+    labels = np.zeros(n, dtype=np.int64)
+    for iteration in range(iterations):
+        squared = ((points[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        new_labels = squared.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        for dim in range(points.shape[1]):
+            sums = np.bincount(labels, weights=points[:, dim], minlength=k)
+            centroids[:, dim] = np.where(counts > 0, sums / np.maximum(counts, 1), centroids[:, dim])
+    return labels, centroids
+
+
 class ContentInsightsAnalyzer:
     """
     Analyzes competitor content to extract patterns and generate insights.
     """
 
+    # Shared across instances (the endpoint builds one analyzer per request)
+    _analytics_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+
     def __init__(self, llm: Optional[ChatAnthropic] = None):
         self.llm = llm or ChatAnthropic(
             model="claude-sonnet-4-5-20250929",
@@ -27,7 +262,9 @@ class ContentInsightsAnalyzer:
     async def analyze_competitor_content(
         self,
         competitors_data: List[Dict],
-        user_handle: str
+        user_handle: str,
+        user_id: Optional[str] = None,
+        competitor_set_version: Optional[str] = None
     ) -> Dict:
         """
         Analyze all competitor posts to extract insights.
@@ -35,6 +272,9 @@ class ContentInsightsAnalyzer:
         Args:
             competitors_data: List of competitors with their posts
             user_handle: The user's X handle
+            user_id: Owner of the competitor set (cache key)
+            competitor_set_version: Version of the competitor set, e.g. the
+                graph's last_updated (default: fingerprint of the data)
 
         Returns:
             Comprehensive insights including:
@@ -44,17 +284,16 @@ class ContentInsightsAnalyzer:
             - Engagement benchmarks
         """
 
-        # Filter competitors with posts
-        with_posts = [c for c in competitors_data if c.get('posts') and len(c['posts']) > 0]
+        # Steps 1, 4, 5: numeric analytics (cached)
+        analytics = self.compute_analytics(competitors_data, user_id, competitor_set_version)
 
-        if not with_posts:
+        if not analytics["total_posts"]:
             return {
                 "success": False,
                 "error": "No competitor posts found to analyze"
             }
 
-        # Step 1: Extract high-performing posts
-        high_performers = self._extract_high_performers(with_posts)
+        high_performers = analytics["high_performers"]
 
         # Step 2: Analyze patterns using AI
         patterns = await self._analyze_patterns_with_ai(high_performers)
@@ -66,55 +305,74 @@ class ContentInsightsAnalyzer:
             user_handle
         )
 
-        # Step 4: Calculate benchmarks
-        benchmarks = self._calculate_benchmarks(with_posts)
-
-        # Step 5: Cluster competitors
-        clusters = self._cluster_competitors(competitors_data)
-
         return {
             "success": True,
             "insights": {
                 "top_performers": high_performers[:10],
                 "patterns": patterns,
                 "suggestions": suggestions,
-                "benchmarks": benchmarks,
-                "clusters": clusters,
+                "benchmarks": analytics["benchmarks"],
+                "clusters": analytics["clusters"],
                 "analyzed_at": datetime.utcnow().isoformat()
             }
         }
 
-    def _extract_high_performers(self, competitors: List[Dict]) -> List[Dict]:
+    def compute_analytics(
+        self,
+        competitors_data: List[Dict],
+        user_id: Optional[str] = None,
+        competitor_set_version: Optional[str] = None
+    ) -> Dict:
+        """
+        High performers, benchmarks and clusters for a competitor set.
+
+        Cached per (user_id, competitor_set_version); the LLM steps are not.
+        """
+        version = competitor_set_version or fingerprint_competitors(competitors_data)
+        key = (user_id, version)
+        cache = self._analytics_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        frame = CompetitorFrame.from_competitors(competitors_data)
+        analytics = {
+            "total_posts": frame.post_count,
+            "high_performers": self._extract_high_performers(frame),
+            "benchmarks": self._calculate_benchmarks(frame),
+            "clusters": self._cluster_competitors(frame, competitors_data),
+        }
+
+        cache[key] = analytics
+        while len(cache) > ANALYTICS_CACHE_SIZE:
+            cache.popitem(last=False)
+        return analytics
+
+    def _extract_high_performers(self, frame: CompetitorFrame) -> List[Dict]:
         """Extract posts with highest engagement."""
-        all_posts = []
-
-        for comp in competitors:
-            username = comp['username']
-            mutual = comp.get('mutual_connections', 0)
-
-            for post in comp.get('posts', []):
-                engagement = (
-                    post.get('likes', 0) +
-                    post.get('retweets', 0) * 2 +  # Retweets worth 2x
-                    post.get('replies', 0)
-                )
-
-                all_posts.append({
-                    'username': username,
-                    'text': post.get('text', ''),
-                    'likes': post.get('likes', 0),
-                    'retweets': post.get('retweets', 0),
-                    'replies': post.get('replies', 0),
-                    'views': post.get('views', 0),
-                    'engagement_score': engagement,
-                    'engagement_rate': (engagement / max(post.get('views', 1), 1)) * 100,
-                    'competitor_reach': mutual
-                })
-
-        # Sort by engagement score
-        all_posts.sort(key=lambda x: x['engagement_score'], reverse=True)
-
-        return all_posts[:50]  # Top 50 posts
+        if not frame.post_count:
+            return []
+
+        scores = frame.engagement_score
+        limit = min(HIGH_PERFORMER_LIMIT, frame.post_count)
+        # Highest first; ties keep post order
+        top = np.argsort(-scores, kind="stable")[:limit]
+
+        rates = scores[top] / np.maximum(frame.views[top], 1) * 100
+        return [
+            {
+                'username': frame.usernames[owner],
+                'text': frame.texts[i],
+                'likes': int(frame.likes[i]),
+                'retweets': int(frame.retweets[i]),
+                'replies': int(frame.replies[i]),
+                'views': int(frame.views[i]),
+                'engagement_score': int(scores[i]),
+                'engagement_rate': float(rate),
+                'competitor_reach': int(frame.mutual_connections[owner])
+            }
+            for i, owner, rate in zip(top.tolist(), frame.competitor_index[top].tolist(), rates.tolist())
+        ]
 
     async def _analyze_patterns_with_ai(self, posts: List[Dict]) -> Dict:
         """Use AI to analyze patterns in high-performing posts."""
@@ -228,50 +486,48 @@ Format as JSON array with keys: post_text, reasoning, engagement_type
                 "engagement_type": "N/A"
             }]
 
-    def _calculate_benchmarks(self, competitors: List[Dict]) -> Dict:
+    def _calculate_benchmarks(self, frame: CompetitorFrame) -> Dict:
         """Calculate engagement benchmarks."""
 
-        all_posts = []
-        for comp in competitors:
-            all_posts.extend(comp.get('posts', []))
-
-        if not all_posts:
+        if not frame.post_count:
             return {}
 
-        likes = [p.get('likes', 0) for p in all_posts if p.get('likes', 0) > 0]
-        retweets = [p.get('retweets', 0) for p in all_posts if p.get('retweets', 0) > 0]
-        replies = [p.get('replies', 0) for p in all_posts if p.get('replies', 0) > 0]
-        views = [p.get('views', 0) for p in all_posts if p.get('views', 0) > 0]
-
-        def percentile(data, p):
-            if not data:
-                return 0
-            sorted_data = sorted(data)
-            k = (len(sorted_data) - 1) * p
-            f = int(k)
-            c = k - f
-            if f + 1 < len(sorted_data):
-                return sorted_data[f] + c * (sorted_data[f + 1] - sorted_data[f])
-            return sorted_data[f]
+        def positive(values: np.ndarray) -> np.ndarray:
+            return values[values > 0]
+
+        def mean(values: np.ndarray) -> float:
+            return float(values.mean()) if values.size else 0
+
+        likes = positive(frame.likes)
+        retweets = positive(frame.retweets)
+        replies = positive(frame.replies)
+        views = positive(frame.views)
+
+        # Linear interpolation between closest ranks
+        if likes.size:
+            p25, p50, p75, p90 = (float(v) for v in np.percentile(likes, [25, 50, 75, 90]))
+        else:
+            p25 = p50 = p75 = p90 = 0
 
         return {
-            "total_posts_analyzed": len(all_posts),
-            "average_likes": sum(likes) / len(likes) if likes else 0,
-            "average_retweets": sum(retweets) / len(retweets) if retweets else 0,
-            "average_replies": sum(replies) / len(replies) if replies else 0,
-            "average_views": sum(views) / len(views) if views else 0,
-            "median_likes": percentile(likes, 0.5) if likes else 0,
-            "top_10_percent_likes": percentile(likes, 0.9) if likes else 0,
-            "top_25_percent_likes": percentile(likes, 0.75) if likes else 0,
+            "total_posts_analyzed": frame.post_count,
+            "average_likes": mean(likes),
+            "average_retweets": mean(retweets),
+            "average_replies": mean(replies),
+            "average_views": mean(views),
+            "median_likes": p50,
+            "top_10_percent_likes": p90,
+            "top_25_percent_likes": p75,
+            "median_length_chars": float(np.median(frame.lengths)),
             "engagement_goal": {
-                "beginner": percentile(likes, 0.25) if likes else 0,
-                "intermediate": percentile(likes, 0.5) if likes else 0,
-                "advanced": percentile(likes, 0.75) if likes else 0,
-                "expert": percentile(likes, 0.9) if likes else 0
+                "beginner": p25,
+                "intermediate": p50,
+                "advanced": p75,
+                "expert": p90
             }
         }
 
-    def _cluster_competitors(self, competitors: List[Dict]) -> Dict:
+    def _cluster_competitors(self, frame: CompetitorFrame, competitors: List[Dict]) -> Dict:
         """
         Cluster competitors based on follower count and analyze account types.
 
@@ -281,36 +537,11 @@ Format as JSON array with keys: post_text, reasoning, engagement_type
         - Mid: 50K-500K followers
         - Macro: 500K-1M followers
         - Mega: 1M+ followers
-        """
 
-        def get_tier_from_followers(followers: int) -> str:
-            """Tier based on follower count."""
-            if followers < 1000:
-                return "Nano (<1K)"
-            elif followers < 10000:
-                return "Nano (1K-10K)"
-            elif followers < 50000:
-                return "Micro (10K-50K)"
-            elif followers < 500000:
-                return "Mid (50K-500K)"
-            elif followers < 1000000:
-                return "Macro (500K-1M)"
-            else:
-                return "Mega (1M+)"
-
-        def get_tier_from_engagement(avg_engagement: float) -> str:
-            """Tier based on average engagement (fallback when follower count unavailable)."""
-            # Engagement-based tiers (based on typical engagement rates)
-            if avg_engagement < 50:
-                return "Micro Influencer"
-            elif avg_engagement < 200:
-                return "Growing Creator"
-            elif avg_engagement < 1000:
-                return "Mid-Tier Creator"
-            elif avg_engagement < 5000:
-                return "Popular Creator"
-            else:
-                return "Viral Creator"
+        Competitors without follower data are tiered by average engagement.
+        Alongside the tiers, "segments" groups competitors by k-means over
+        engagement, posting features and content embeddings.
+        """
 
         def infer_account_type(comp: Dict) -> str:
             """Infer account type from username and metrics."""
@@ -329,87 +560,62 @@ Format as JSON array with keys: post_text, reasoning, engagement_type
             else:
                 return "Personal Brand"
 
-        # Group by tier
-        clusters = {}
-        has_follower_data = any(comp.get('follower_count', 0) > 0 for comp in competitors)
-
-        for comp in competitors:
-            # Calculate average engagement from posts first (needed for engagement-based tiers)
-            posts = comp.get('posts', [])
-            avg_engagement = 0
-            if posts:
-                total_engagement = sum(
-                    p.get('likes', 0) + p.get('retweets', 0) + p.get('replies', 0)
-                    for p in posts
-                )
-                avg_engagement = total_engagement / len(posts)
-
-            # Determine tier (use followers if available, otherwise use engagement)
-            follower_count = comp.get('follower_count', 0)
-            if has_follower_data and follower_count > 0:
-                tier = get_tier_from_followers(follower_count)
-                tier_metric = follower_count
-            else:
-                tier = get_tier_from_engagement(avg_engagement)
-                tier_metric = avg_engagement
-
-            account_type = infer_account_type(comp)
-
-            if tier not in clusters:
-                clusters[tier] = {
-                    "count": 0,
-                    "accounts": [],
-                    "avg_followers": 0,
-                    "avg_engagement": 0,
-                    "account_types": {},
-                    "tier_type": "followers" if has_follower_data else "engagement"
-                }
-
-            clusters[tier]["count"] += 1
-            clusters[tier]["accounts"].append({
-                "username": comp.get('username'),
-                "followers": follower_count if has_follower_data else None,
-                "tier_metric": tier_metric,
-                "account_type": account_type,
-                "avg_engagement": round(avg_engagement),
-                "post_count": len(posts)
-            })
-
-            # Track account types
-            if account_type not in clusters[tier]["account_types"]:
-                clusters[tier]["account_types"][account_type] = 0
-            clusters[tier]["account_types"][account_type] += 1
-
-        # Calculate cluster averages and sort accounts
-        for tier in clusters:
-            accounts = clusters[tier]["accounts"]
-            if accounts:
-                # Calculate averages (handle None for followers in engagement mode)
-                if has_follower_data:
-                    clusters[tier]["avg_followers"] = sum(a.get("followers", 0) for a in accounts if a.get("followers")) / len(accounts)
-                else:
-                    clusters[tier]["avg_followers"] = 0
-
-                clusters[tier]["avg_engagement"] = sum(a["avg_engagement"] for a in accounts) / len(accounts)
-
-                # Sort accounts by tier_metric descending
-                clusters[tier]["accounts"] = sorted(
-                    accounts,
-                    key=lambda x: x["tier_metric"],
-                    reverse=True
-                )[:10]  # Top 10 per tier
+        followers = frame.follower_counts
+        avg_engagement = frame.per_competitor_mean(frame.engagement)
+        has_follower_data = bool((followers > 0).any())
+        account_types = [infer_account_type(comp) for comp in competitors]
+
+        # Determine tier (use followers if available, otherwise use engagement)
+        use_followers = (followers > 0) if has_follower_data else np.zeros(frame.competitor_count, dtype=bool)
+        follower_tiers = np.digitize(followers, FOLLOWER_TIER_EDGES)
+        engagement_tiers = np.digitize(avg_engagement, ENGAGEMENT_TIER_EDGES)
+        tier_labels = np.where(
+            use_followers,
+            np.array(FOLLOWER_TIERS, dtype=object)[follower_tiers],
+            np.array(ENGAGEMENT_TIERS, dtype=object)[engagement_tiers],
+        )
+        tier_metric = np.where(use_followers, followers, avg_engagement)
+        rounded_engagement = np.round(avg_engagement)
 
         # Sort tiers (by follower-based or engagement-based order)
-        if has_follower_data:
-            tier_order = ["Mega (1M+)", "Macro (500K-1M)", "Mid (50K-500K)", "Micro (10K-50K)", "Nano (1K-10K)", "Nano (<1K)"]
-        else:
-            tier_order = ["Viral Creator", "Popular Creator", "Mid-Tier Creator", "Growing Creator", "Micro Influencer"]
-
-        sorted_clusters = {tier: clusters[tier] for tier in tier_order if tier in clusters}
+        tier_order = list(reversed(FOLLOWER_TIERS if has_follower_data else ENGAGEMENT_TIERS))
+
+        sorted_clusters = {}
+        for tier in tier_order:
+            members = np.flatnonzero(tier_labels == tier)
+            if not members.size:
+                continue
+
+            type_counts: Dict[str, int] = {}
+            for i in members.tolist():
+                type_counts[account_types[i]] = type_counts.get(account_types[i], 0) + 1
+
+            # Top 10 per tier by tier_metric descending
+            top = members[np.argsort(-tier_metric[members], kind='stable')][:10]
+
+            sorted_clusters[tier] = {
+                "count": int(members.size),
+                "accounts": [
+                    {
+                        "username": frame.usernames[i],
+                        "followers": int(followers[i]) if has_follower_data else None,
+                        "tier_metric": int(tier_metric[i]) if use_followers[i] else float(tier_metric[i]),
+                        "account_type": account_types[i],
+                        "avg_engagement": int(rounded_engagement[i]),
+                        "post_count": int(frame.post_counts[i])
+                    }
+                    for i in top.tolist()
+                ],
+                "avg_followers": float(followers[members].mean()) if has_follower_data else 0,
+                "avg_engagement": float(rounded_engagement[members].mean()),
+                "account_types": type_counts,
+                "tier_type": "followers" if has_follower_data else "engagement"
+            }
 
         return {
-            "total_competitors": len(competitors),
+            "total_competitors": frame.competitor_count,
             "tiers": sorted_clusters,
+            "segments": self._segment_competitors(frame, avg_engagement, account_types),
             "summary": {
                 tier: {
                     "count": data["count"],
@@ -425,6 +631,103 @@ Format as JSON array with keys: post_text, reasoning, engagement_type
             }
         }
 
+    def _segment_competitors(
+        self,
+        frame: CompetitorFrame,
+        avg_engagement: np.ndarray,
+        account_types: List[str]
+    ) -> List[Dict]:
+        """
+        k-means segments of competitors with posts.
+
+        Features per competitor: log engagement, log followers, engagement
+        rate, average post length, average post age (when timestamps exist)
+        and the top SVD components of their mean content embedding, each
+        standardized so no single feature dominates.
+        """
+        active = np.flatnonzero(frame.post_counts > 0)
+        if active.size < 2 or not frame.post_count:
+            return []
+
+        avg_views = frame.per_competitor_mean(frame.views)
+        avg_length = frame.per_competitor_mean(frame.lengths)
+        avg_age = frame.per_competitor_nanmean(np.log1p(frame.hours_ago))
+
+        numeric = [
+            np.log1p(avg_engagement),
+            np.log1p(frame.follower_counts),
+            avg_engagement / np.maximum(avg_views, 1),
+            avg_length,
+        ]
+        if not np.isnan(avg_age[active]).all():
+            numeric.append(np.where(np.isnan(avg_age), np.nanmedian(avg_age[active]), avg_age))
+        numeric = np.column_stack(numeric)[active]
+
+        # Mean content embedding per competitor, reduced with SVD
+        post_ids, token_ids, vocabulary = _tokenize(frame.texts)
+        post_vectors = _embed_tokens(post_ids, token_ids, vocabulary, frame.post_count)
+        # Posts are grouped by competitor, so each active one is a contiguous run
+        starts = np.concatenate([[0], np.cumsum(frame.post_counts)[:-1]])
+        content = np.add.reduceat(post_vectors, starts[active], axis=0).astype(np.float64)
+        content /= frame.post_counts[active, None]
+        content -= content.mean(axis=0)
+        components = min(EMBEDDING_COMPONENTS, active.size - 1)
+        u, s, _ = np.linalg.svd(content, full_matrices=False)
+        content = u[:, :components] * s[:components]
+
+        features = np.hstack([numeric, content])
+        spread = features.std(axis=0)
+        features = (features - features.mean(axis=0)) / np.where(spread > 0, spread, 1)
+
+        k = min(MAX_CLUSTERS, max(2, round(math.sqrt(active.size / 2))), int(active.size))
+        labels, _ = _kmeans(features, k)
+
+        # Top terms per segment: tokens in the most members' posts
+        post_labels = np.full(frame.competitor_count, -1)
+        post_labels[active] = labels
+        post_labels = post_labels[frame.competitor_index]
+        pairs = np.unique(post_ids * len(vocabulary) + token_ids)
+        pair_posts, pair_tokens = np.divmod(pairs, len(vocabulary))
+        pair_labels = post_labels[pair_posts]
+        is_term = np.fromiter(
+            (len(t) > 3 and t not in STOP_WORDS and not t.startswith(('@', 'http')) for t in vocabulary),
+            dtype=bool, count=len(vocabulary)
+        )
+
+        segments = []
+        for label in range(k):
+            members = active[labels == label]
+            if not members.size:
+                continue
+            order = members[np.argsort(-avg_engagement[members], kind='stable')]
+
+            type_counts: Dict[str, int] = {}
+            for i in members.tolist():
+                type_counts[account_types[i]] = type_counts.get(account_types[i], 0) + 1
+
+            segments.append({
+                "segment": len(segments),
+                "count": int(members.size),
+                "avg_engagement": round(float(avg_engagement[members].mean())),
+                "median_followers": round(float(np.median(frame.follower_counts[members]))),
+                "avg_post_length": round(float(avg_length[members].mean())),
+                "top_terms": self._top_terms(pair_tokens[pair_labels == label], vocabulary, is_term),
+                "top_account_types": sorted(type_counts.items(), key=lambda x: x[1], reverse=True)[:3],
+                "accounts": [frame.usernames[i] for i in order[:10].tolist()]
+            })
+
+        segments.sort(key=lambda s: s["avg_engagement"], reverse=True)
+        for i, segment in enumerate(segments):
+            segment["segment"] = i
+        return segments
+
+    @staticmethod
+    def _top_terms(tokens: np.ndarray, vocabulary: List[str], is_term: np.ndarray, limit: int = 5) -> List[str]:
+        """Most frequent content words (vocabulary IDs, one per post) in a segment."""
+        counts = np.bincount(tokens, minlength=len(vocabulary)) * is_term
+        top = np.argsort(-counts, kind='stable')[:limit]
+        return [vocabulary[i] for i in top.tolist() if counts[i] > 0]
+
 
 async def main():
     """Test the analyzer."""
@@ -7,10 +7,13 @@ Links customer actions (visits, purchases) back to ad campaigns.
 Docs: https://developers.facebook.com/docs/marketing-api/conversions-api
 """
 
+import asyncio
 import logging
 import hashlib
+import random
 import time
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import httpx
 
@@ -18,6 +21,44 @@ from ..config import get_crm_settings, CAPI_EVENTS
 
 logger = logging.getLogger(__name__)
 
+# Meta accepts up to 1,000 events per /events request
+CAPI_MAX_BATCH_SIZE = 1000
+
+# Status codes worth retrying (rate limited / transient server errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@lru_cache(maxsize=10000)
+def _hashed_user_data(
+    phone: Optional[str],
+    email: Optional[str],
+    first_name: Optional[str],
+    last_name: Optional[str],
+    city: Optional[str],
+    state: Optional[str],
+    zip_code: Optional[str],
+    country: Optional[str],
+) -> Tuple[Tuple[str, str], ...]:
+    """
+    Hash customer PII for CAPI user_data matching.
+
+    Memoized on the raw field values, so repeated events for the same
+    customer reuse the SHA256 digests. Returns (key, hash) pairs.
+    """
+    fields = (
+        ("ph", MetaCAPIClient.normalize_phone(phone) if phone else None),
+        ("em", email),
+        ("fn", first_name),
+        ("ln", last_name),
+        ("ct", city),
+        ("st", state),
+        ("zp", zip_code),
+        ("country", country),
+    )
+    return tuple(
+        (key, MetaCAPIClient.hash_value(value)) for key, value in fields if value
+    )
+
 
 class MetaCAPIClient:
     """
@@ -31,6 +72,7 @@ class MetaCAPIClient:
         pixel_id: str,
         access_token: str,
         test_event_code: Optional[str] = None,
+        base_url: Optional[str] = None,
     ):
         """
         Initialize CAPI client.
@@ -39,6 +81,7 @@ class MetaCAPIClient:
             pixel_id: Meta Pixel ID
             access_token: Access token with CAPI permissions
             test_event_code: Test event code (for development)
+            base_url: Graph API base URL override (e.g. a local fake CAPI server)
         """
         self.pixel_id = pixel_id
         self.access_token = access_token
@@ -46,7 +89,7 @@ class MetaCAPIClient:
 
         settings = get_crm_settings()
         self.api_version = settings.meta_api_version
-        self.base_url = f"https://graph.facebook.com/{self.api_version}"
+        self.base_url = base_url or f"https://graph.facebook.com/{self.api_version}"
 
         self._client: Optional[httpx.AsyncClient] = None
 
@@ -84,6 +127,36 @@ class MetaCAPIClient:
         digits = "".join(c for c in phone if c.isdigit())
         return digits
 
+    @staticmethod
+    def build_user_data(
+        phone: Optional[str] = None,
+        email: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        zip_code: Optional[str] = None,
+        country: Optional[str] = None,
+        click_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build CAPI user_data with hashed PII.
+
+        Hashes are memoized per distinct set of customer fields.
+        """
+        user_data: Dict[str, Any] = {
+            key: [hashed]
+            for key, hashed in _hashed_user_data(
+                phone, email, first_name, last_name, city, state, zip_code, country
+            )
+        }
+
+        # Add click_id for attribution (not hashed)
+        if click_id:
+            user_data["ctwa_clid"] = click_id
+
+        return user_data
+
     # =========================================================================
     # Event Sending
     # =========================================================================
@@ -138,35 +211,17 @@ class MetaCAPIClient:
         client = await self._get_client()
 
         # Build user_data with hashed PII
-        user_data = {}
-
-        if phone:
-            user_data["ph"] = [self.hash_value(self.normalize_phone(phone))]
-
-        if email:
-            user_data["em"] = [self.hash_value(email)]
-
-        if first_name:
-            user_data["fn"] = [self.hash_value(first_name)]
-
-        if last_name:
-            user_data["ln"] = [self.hash_value(last_name)]
-
-        if city:
-            user_data["ct"] = [self.hash_value(city)]
-
-        if state:
-            user_data["st"] = [self.hash_value(state)]
-
-        if zip_code:
-            user_data["zp"] = [self.hash_value(zip_code)]
-
-        if country:
-            user_data["country"] = [self.hash_value(country)]
-
-        # Add click_id for attribution (not hashed)
-        if click_id:
-            user_data["ctwa_clid"] = click_id
+        user_data = self.build_user_data(
+            phone=phone,
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            city=city,
+            state=state,
+            zip_code=zip_code,
+            country=country,
+            click_id=click_id,
+        )
 
         # Build event data
         event_data: Dict[str, Any] = {
@@ -310,16 +365,23 @@ class MetaCAPIClient:
     # =========================================================================
 
     async def send_batch_events(
-        self, events: List[Dict[str, Any]]
+        self,
+        events: List[Dict[str, Any]],
+        max_retries: int = 0,
     ) -> Dict[str, Any]:
         """
         Send multiple events in a single request.
 
         Args:
-            events: List of event dictionaries (same format as send_event)
+            events: List of event dictionaries (same format as send_event,
+                plus optional event_id for deduplication)
+            max_retries: Retries with exponential backoff on 429/5xx/network errors
 
         Returns:
-            API response with events_received count
+            API response with events_received count. After the retries run
+            out on transient errors it also has "retryable": True; other
+            errors mean CAPI rejected the request (one invalid event fails
+            the whole batch).
         """
         client = await self._get_client()
 
@@ -327,17 +389,17 @@ class MetaCAPIClient:
         processed_events = []
         for event in events:
             # Hash user data
-            user_data = {}
-            if event.get("phone"):
-                user_data["ph"] = [self.hash_value(self.normalize_phone(event["phone"]))]
-            if event.get("email"):
-                user_data["em"] = [self.hash_value(event["email"])]
-            if event.get("first_name"):
-                user_data["fn"] = [self.hash_value(event["first_name"])]
-            if event.get("last_name"):
-                user_data["ln"] = [self.hash_value(event["last_name"])]
-            if event.get("click_id"):
-                user_data["ctwa_clid"] = event["click_id"]
+            user_data = self.build_user_data(
+                phone=event.get("phone"),
+                email=event.get("email"),
+                first_name=event.get("first_name"),
+                last_name=event.get("last_name"),
+                city=event.get("city"),
+                state=event.get("state"),
+                zip_code=event.get("zip_code"),
+                country=event.get("country", "US"),
+                click_id=event.get("click_id"),
+            )
 
             event_data = {
                 "event_name": event.get("event_name", "Lead"),
@@ -348,6 +410,9 @@ class MetaCAPIClient:
                 "user_data": user_data,
             }
 
+            if event.get("event_id"):
+                event_data["event_id"] = event["event_id"]
+
             if event.get("value"):
                 event_data["custom_data"] = {
                     "value": event["value"],
@@ -367,20 +432,34 @@ class MetaCAPIClient:
 
         url = f"{self.base_url}/{self.pixel_id}/events"
 
-        try:
-            response = await client.post(url, json=payload)
-            result = response.json()
-
-            logger.info(
-                f"CAPI batch sent: {len(events)} events, "
-                f"received: {result.get('events_received', 0)}"
-            )
-
-            return result
+        for attempt in range(max_retries + 1):
+            retry_after = None
+            try:
+                response = await client.post(url, json=payload)
+                result = response.json()
+
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.info(
+                        f"CAPI batch sent: {len(events)} events, "
+                        f"received: {result.get('events_received', 0)}"
+                    )
+                    return result
+
+                logger.warning(f"CAPI batch got {response.status_code}: {result}")
+                retry_after = response.headers.get("Retry-After")
+
+            except Exception as e:
+                logger.warning(f"CAPI batch request failed: {e}")
+                result = {"error": str(e)}
+
+            if attempt < max_retries:
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else (
+                    min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+                )
+                await asyncio.sleep(delay)
 
-        except Exception as e:
-            logger.error(f"CAPI batch request failed: {e}")
-            return {"error": str(e)}
+        logger.error(f"CAPI batch failed after {max_retries + 1} attempts: {result}")
+        return {**result, "retryable": True}
 
 
 # =============================================================================
@@ -404,6 +483,7 @@ def create_capi_client(
         pixel_id=pixel_id or settings.meta_pixel_id,
         access_token=access_token or settings.meta_capi_access_token,
         test_event_code=test_event_code or settings.meta_capi_test_code,
+        base_url=settings.meta_capi_base_url,
     )
 
 
@@ -425,4 +505,5 @@ async def create_capi_client_for_user(user_id: str) -> Optional[MetaCAPIClient]:
         pixel_id=settings.meta_pixel_id,
         access_token=settings.meta_capi_access_token,
         test_event_code=settings.meta_capi_test_code,
+        base_url=settings.meta_capi_base_url,
     )
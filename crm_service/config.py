@@ -74,6 +74,24 @@ class CRMSettings(BaseSettings):
     # Webhook verification token (generate unique per deployment)
     meta_webhook_verify_token: Optional[str] = None
 
+    # Enqueue webhook events for background workers (False = process inline)
+    meta_webhook_queue_enabled: bool = True
+
+    # Background workers draining the webhook queue
+    meta_webhook_workers: int = 2
+
+    # Events claimed per worker transaction
+    meta_webhook_batch_size: int = 100
+
+    # Attempts before an event is left as failed
+    meta_webhook_max_attempts: int = 5
+
+    # Minutes before a claimed-but-unfinished event can be reclaimed
+    meta_webhook_claim_lease_minutes: int = 5
+
+    # Days processed ("done") events are kept before the retention sweep deletes them
+    meta_webhook_retention_days: int = 7
+
     # ==========================================================================
     # WhatsApp Cloud API
     # ==========================================================================
@@ -95,6 +113,21 @@ class CRMSettings(BaseSettings):
     # Test event code (for development - events go to test panel)
     meta_capi_test_code: Optional[str] = None
 
+    # Events per CAPI request when syncing pending events (Meta max is 1000)
+    capi_batch_size: int = 1000
+
+    # Concurrent CAPI batch requests during a sync
+    capi_sync_concurrency: int = 4
+
+    # Retries per batch on rate limiting / transient errors
+    capi_max_retries: int = 3
+
+    # Rejected syncs before a pending event is skipped by sync runs
+    capi_max_attempts: int = 5
+
+    # Graph API base URL override (e.g. a local fake CAPI server)
+    meta_capi_base_url: Optional[str] = None
+
     # ==========================================================================
     # Automated Follow-ups
     # ==========================================================================
@@ -105,6 +138,18 @@ class CRMSettings(BaseSettings):
     # Days without visit to consider customer dormant
     dormant_threshold_days: int = 30
 
+    # Max follow-up sends in flight per dispatcher worker
+    followup_dispatch_concurrency: int = 20
+
+    # Sustained send rate per WhatsApp phone number (Cloud API allows ~80/s)
+    followup_whatsapp_messages_per_second: float = 20.0
+
+    # Sustained send rate per channel across all senders in one worker
+    followup_channel_messages_per_second: float = 200.0
+
+    # Minutes before a claimed-but-unfinished follow-up can be reclaimed
+    followup_claim_lease_minutes: int = 10
+
     # ==========================================================================
     # QR Check-in Settings
     # ==========================================================================
@@ -76,6 +76,7 @@ class FollowupType(str, Enum):
 class FollowupStatus(str, Enum):
     """Followup status."""
     SCHEDULED = "scheduled"
+    SENDING = "sending"
     SENT = "sent"
     CANCELLED = "cancelled"
     FAILED = "failed"
@@ -10,7 +10,9 @@ FastAPI routes for:
 - Attribution (reports, customer journey)
 """
 
+import asyncio
 import logging
+import time
 from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Request, Response, Query, Depends
@@ -450,6 +452,9 @@ async def verify_webhook(
 async def receive_webhook(request: Request):
     """Receive webhook events from Meta (WhatsApp, Instagram, Messenger)."""
     from .webhooks.meta_webhook import get_webhook_handler
+    from .webhooks.ingest_queue import get_webhook_queue
+
+    started = time.perf_counter()
 
     # Get raw body for signature verification
     body = await request.body()
@@ -468,16 +473,29 @@ async def receive_webhook(request: Request):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON")
 
-    # Determine user from webhook (we need to look up platform)
-    # This is simplified - in production, parse the webhook to get phone_number_id
-    # and look up the user from MessagingPlatform
-    user_id = None  # Will be determined by handler based on platform
+    settings = get_crm_settings()
+    queue = get_webhook_queue()
+
+    if settings.meta_webhook_queue_enabled:
+        # Persist and return 200 quickly (Meta expects fast response);
+        # background workers apply the events
+        queued = await queue.enqueue_payload(payload)
+        queue.metrics.record_ack(time.perf_counter() - started, queued)
+        return {"success": True, "queued": queued}
+
+    # Queue disabled: process inline (user is determined from the platform)
+    results = await handler.handle_webhook(payload, None)
+    queue.metrics.record_ack(time.perf_counter() - started, len(results))
+    return {"success": True, "processed": len(results)}
 
-    # Process webhook
-    results = await handler.handle_webhook(payload, user_id)
 
-    # Return 200 quickly (Meta expects fast response)
-    return {"success": True, "processed": len(results)}
+@crm_router.get("/webhooks/meta/metrics")
+async def get_webhook_metrics(user_id: str = Depends(get_user_id)):
+    """Webhook queue depth, ack latency and processing lag."""
+    from .webhooks.ingest_queue import get_webhook_queue
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_webhook_queue().get_metrics)
 
 
 # =============================================================================
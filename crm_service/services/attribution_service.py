@@ -7,8 +7,10 @@ Handles:
 - Customer journey tracking
 """
 
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 from sqlalchemy.orm import Session
@@ -27,7 +29,8 @@ from ..models import (
     CustomerJourneyEvent,
     LifecycleStage,
 )
-from ..clients.meta_capi import create_capi_client, MetaCAPIClient
+from ..clients.meta_capi import create_capi_client, MetaCAPIClient, CAPI_MAX_BATCH_SIZE
+from ..config import get_crm_settings
 
 logger = logging.getLogger(__name__)
 
@@ -143,53 +146,164 @@ class AttributionService:
         """
         Sync all pending conversion events for a user.
 
+        Pending events are loaded together with their customers in one
+        query, grouped per pixel into CAPI-sized batches, sent concurrently
+        with retry/backoff, and marked synced with a single bulk update.
+
+        CAPI rejects a whole request for one invalid event, so a rejected
+        batch is split in halves and resent until the bad events are
+        isolated. Each rejection counts toward the event's capi_attempts
+        (with the error in capi_error), and events at capi_max_attempts are
+        no longer selected, so they can't block the rest of the queue.
+        Transient failures (after retries) aren't counted.
+
         Args:
             user_id: Owner's Clerk user ID
-            batch_size: Max events to sync in one batch
+            batch_size: Max events to sync in one run
 
         Returns:
             Dict with synced/failed counts
         """
         db = self._get_db()
         try:
-            # Get pending events
-            pending_events = (
-                db.query(ConversionEvent)
-                .join(Customer)
+            settings = get_crm_settings()
+
+            # Get pending events with their customers
+            pending = (
+                db.query(ConversionEvent, Customer)
+                .join(Customer, ConversionEvent.customer_id == Customer.id)
                 .filter(
                     Customer.user_id == user_id,
                     ConversionEvent.capi_synced_at.is_(None),
+                    ConversionEvent.capi_attempts < settings.capi_max_attempts,
                 )
+                .order_by(ConversionEvent.id)
                 .limit(batch_size)
                 .all()
             )
 
-            if not pending_events:
+            if not pending:
                 return {"synced": 0, "failed": 0}
 
             capi_client = create_capi_client()
-            if not capi_client:
+            if not capi_client or not capi_client.pixel_id:
                 logger.warning("CAPI not configured")
-                return {"synced": 0, "failed": len(pending_events)}
+                return {"synced": 0, "failed": len(pending)}
+
+            # All users currently share the app-level pixel; group per pixel so
+            # per-user pixels only need a different client here.
+            clients = {capi_client.pixel_id: capi_client}
+            by_pixel: Dict[str, List[Tuple[ConversionEvent, Customer]]] = defaultdict(list)
+            for event, customer in pending:
+                by_pixel[capi_client.pixel_id].append((event, customer))
+
+            chunk_size = max(1, min(settings.capi_batch_size, CAPI_MAX_BATCH_SIZE))
+            batches = [
+                (pixel_id, rows[i:i + chunk_size])
+                for pixel_id, rows in by_pixel.items()
+                for i in range(0, len(rows), chunk_size)
+            ]
+
+            slots = asyncio.Semaphore(max(1, settings.capi_sync_concurrency))
+
+            async def send(pixel_id: str, rows: List[Tuple[ConversionEvent, Customer]]):
+                events = [self._capi_event_payload(event, customer) for event, customer in rows]
+                async with slots:
+                    result = await clients[pixel_id].send_batch_events(
+                        events, max_retries=settings.capi_max_retries
+                    )
+                if (
+                    result.get("events_received", 0) < len(rows)
+                    and len(rows) > 1
+                    and not result.get("retryable")
+                ):
+                    # Rejected: bisect to isolate the invalid event(s)
+                    mid = len(rows) // 2
+                    first, second = await asyncio.gather(
+                        send(pixel_id, rows[:mid]), send(pixel_id, rows[mid:])
+                    )
+                    return first + second
+                return [(rows, events, result)]
 
-            synced = 0
-            failed = 0
+            try:
+                results = await asyncio.gather(
+                    *(send(pixel_id, rows) for pixel_id, rows in batches)
+                )
+            finally:
+                for client in clients.values():
+                    await client.close()
+
+            now = datetime.utcnow()
+            synced_rows = []
+            failed_rows = []
+            requests = 0
+
+            for rows, events, result in (outcome for outcomes in results for outcome in outcomes):
+                requests += 1
+                if result.get("events_received", 0) >= len(rows):
+                    synced_rows.extend(
+                        {
+                            "id": event.id,
+                            "capi_event_id": payload["event_id"],
+                            "capi_synced_at": now,
+                            "capi_response": {"fbtrace_id": result.get("fbtrace_id")},
+                            "capi_error": None,
+                        }
+                        for (event, _), payload in zip(rows, events)
+                    )
+                    continue
 
-            for event in pending_events:
-                success = await self.sync_event_to_capi(event.id, capi_client)
-                if success:
-                    synced += 1
-                else:
-                    failed += 1
+                error = str(result.get("error") or result)[:1000]
+                rejected = not result.get("retryable")
+                logger.error(
+                    f"CAPI batch of {len(rows)} events "
+                    f"{'rejected' if rejected else 'failed'}: {error}"
+                )
+                for event, _ in rows:
+                    attempts = (event.capi_attempts or 0) + (1 if rejected else 0)
+                    if attempts >= settings.capi_max_attempts:
+                        logger.warning(
+                            f"Event {event.id} rejected {attempts} times, no longer syncing it"
+                        )
+                    failed_rows.append({"id": event.id, "capi_attempts": attempts, "capi_error": error})
+
+            if synced_rows or failed_rows:
+                db.bulk_update_mappings(ConversionEvent, synced_rows + failed_rows)
+                db.commit()
 
-            await capi_client.close()
+            logger.info(
+                f"Batch sync complete: {len(synced_rows)} synced, {len(failed_rows)} failed "
+                f"({requests} CAPI batches)"
+            )
+            return {"synced": len(synced_rows), "failed": len(failed_rows)}
 
-            logger.info(f"Batch sync complete: {synced} synced, {failed} failed")
-            return {"synced": synced, "failed": failed}
+        except Exception as e:
+            logger.error(f"Error syncing pending events for user {user_id}: {e}")
+            db.rollback()
+            raise
 
         finally:
             self._close_db(db)
 
+    @staticmethod
+    def _capi_event_payload(event: ConversionEvent, customer: Customer) -> Dict[str, Any]:
+        """Build a send_batch_events entry for a conversion event."""
+        return {
+            # Stable ID so Meta deduplicates retries and pixel/browser duplicates
+            "event_id": event.capi_event_id or f"crm-{event.id}",
+            "event_name": event.event_name,
+            "event_time": event.event_time or event.created_at,
+            "phone": customer.phone_number,
+            "email": customer.email,
+            "first_name": customer.first_name,
+            "last_name": customer.last_name,
+            # Same default as send_event (customers have no address fields)
+            "country": "US",
+            "click_id": event.click_id or customer.ctwa_clid,
+            "value": event.value_cents / 100 if event.value_cents else None,
+            "currency": event.currency or "USD",
+        }
+
     # =========================================================================
     # Attribution Reporting
     # =========================================================================
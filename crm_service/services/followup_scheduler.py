@@ -8,10 +8,12 @@ Handles:
 - Follow-up execution (triggered by cron job)
 """
 
+import asyncio
 import logging
-from typing import Optional, List
+import time
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from database.database import SessionLocal
@@ -32,6 +34,36 @@ from ..models import (
 logger = logging.getLogger(__name__)
 
 
+class _SendRateLimiter:
+    """
+    Async token bucket used to pace outbound messages for one sender.
+
+    Allows a burst of up to one second's worth of sends, then refills at
+    `rate` tokens per second.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a send token is available."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
 class FollowupScheduler:
     """
     Service for scheduling and executing automated follow-ups.
@@ -347,136 +379,283 @@ class FollowupScheduler:
         """
         Execute all pending follow-ups that are due.
 
-        This should be called by a cron job every few minutes.
+        This should be called by a cron job every few minutes. Rows are
+        claimed with FOR UPDATE SKIP LOCKED, so any number of workers can
+        run this concurrently without double-sending.
 
         Args:
-            batch_size: Max followups to process in one batch
+            batch_size: Max followups to claim in one batch
 
         Returns:
             Dict with sent/failed counts
         """
-        db = self._get_db()
         try:
-            # Get followups that are due
-            due_followups = (
-                db.query(AutomatedFollowup)
-                .filter(
-                    AutomatedFollowup.status == "scheduled",
-                    AutomatedFollowup.scheduled_at <= datetime.utcnow(),
-                )
-                .limit(batch_size)
-                .all()
-            )
+            claimed, outcomes = self._claim_due_followups(batch_size)
 
-            if not due_followups:
+            if not claimed and not outcomes:
                 return {"sent": 0, "failed": 0, "message": "No pending followups"}
 
-            sent = 0
-            failed = 0
-
-            for followup in due_followups:
-                success = await self._execute_single_followup(db, followup)
-                if success:
-                    sent += 1
-                else:
-                    failed += 1
+            outcomes.extend(await self._dispatch_claimed_followups(claimed))
+            self._record_followup_outcomes(outcomes)
 
-            db.commit()
+            sent = sum(1 for o in outcomes if o["status"] == "sent")
+            failed = len(outcomes) - sent
 
             logger.info(f"Executed followups: {sent} sent, {failed} failed")
             return {"sent": sent, "failed": failed}
 
         except Exception as e:
             logger.error(f"Error executing followups: {e}")
-            db.rollback()
             return {"sent": 0, "failed": 0, "error": str(e)}
 
-        finally:
-            self._close_db(db)
-
-    async def _execute_single_followup(
-        self, db: Session, followup: AutomatedFollowup
-    ) -> bool:
+    def _claim_due_followups(self, batch_size: int) -> Tuple[List[dict], List[dict]]:
         """
-        Execute a single follow-up.
+        Atomically claim due follow-ups and resolve their send context.
+
+        Due rows (and rows whose previous claim lease expired) are locked
+        with SKIP LOCKED and flipped to "sending" in one short transaction,
+        so concurrent workers each get a disjoint batch. Customer, platform
+        and credential rows are loaded with one query each.
 
         Args:
-            db: Database session
-            followup: The followup to execute
+            batch_size: Max followups to claim
 
         Returns:
-            True if sent successfully
+            Tuple of (claimed jobs ready to send, outcomes for rows that
+            cannot be sent and were failed at claim time)
         """
+        db = self._get_db()
         try:
-            # Get customer
-            customer = db.query(Customer).filter(Customer.id == followup.customer_id).first()
+            now = datetime.utcnow()
+            lease_cutoff = now - timedelta(minutes=self.settings.followup_claim_lease_minutes)
 
-            if not customer or not customer.phone_number:
-                followup.status = "failed"
-                return False
+            rows = (
+                db.query(AutomatedFollowup)
+                .filter(
+                    or_(
+                        and_(
+                            AutomatedFollowup.status == "scheduled",
+                            AutomatedFollowup.scheduled_at <= now,
+                        ),
+                        and_(
+                            AutomatedFollowup.status == "sending",
+                            AutomatedFollowup.updated_at < lease_cutoff,
+                        ),
+                    )
+                )
+                .order_by(AutomatedFollowup.scheduled_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            if not rows:
+                db.commit()
+                return [], []
+
+            for row in rows:
+                row.status = "sending"
+                row.updated_at = now
+
+            customers = {
+                c.id: c
+                for c in db.query(Customer)
+                .filter(Customer.id.in_({r.customer_id for r in rows}))
+                .all()
+            }
 
-            # Get messaging platform for this customer's owner
-            platform = (
+            owner_ids = {c.user_id for c in customers.values()}
+            platforms = {}
+            for platform in (
                 db.query(MessagingPlatform)
                 .filter(
-                    MessagingPlatform.user_id == customer.user_id,
+                    MessagingPlatform.user_id.in_(owner_ids),
                     MessagingPlatform.is_connected == True,
                 )
-                .first()
-            )
+                .order_by(MessagingPlatform.id)
+                .all()
+            ):
+                platforms.setdefault(platform.user_id, platform)
+
+            credentials = {}
+            if platforms:
+                for credential in (
+                    db.query(MessagingCredential)
+                    .filter(
+                        MessagingCredential.platform_id.in_(
+                            {p.id for p in platforms.values()}
+                        )
+                    )
+                    .order_by(MessagingCredential.id)
+                    .all()
+                ):
+                    credentials.setdefault(credential.platform_id, credential)
+
+            claimed = []
+            outcomes = []
+            for row in rows:
+                customer = customers.get(row.customer_id)
+                platform = platforms.get(customer.user_id) if customer else None
+                credential = credentials.get(platform.id) if platform else None
+
+                error = None
+                if not customer or not customer.phone_number:
+                    error = "Customer has no phone number"
+                elif not platform or not platform.phone_number_id:
+                    logger.warning(f"No WhatsApp platform for user {customer.user_id}")
+                    error = "No connected WhatsApp platform"
+                elif not credential:
+                    error = "No messaging credentials"
+
+                if error:
+                    outcomes.append(self._followup_outcome(row.id, row.retry_count, error=error))
+                    continue
+
+                claimed.append({
+                    "id": row.id,
+                    "retry_count": row.retry_count or 0,
+                    "template_name": row.template_name or "default",
+                    "channel": row.send_channel or "whatsapp",
+                    "to": customer.phone_number,
+                    "phone_number_id": platform.phone_number_id,
+                    "credential_id": credential.id,
+                    "encrypted_access_token": credential.encrypted_access_token,
+                })
 
-            if not platform or not platform.phone_number_id:
-                logger.warning(f"No WhatsApp platform for user {customer.user_id}")
-                followup.status = "failed"
-                return False
+            db.commit()
+            return claimed, outcomes
 
-            # Get credentials
-            credential = (
-                db.query(MessagingCredential)
-                .filter(MessagingCredential.platform_id == platform.id)
-                .first()
-            )
+        except Exception:
+            db.rollback()
+            raise
 
-            if not credential:
-                followup.status = "failed"
-                return False
+        finally:
+            self._close_db(db)
 
-            # Decrypt token
-            from ads_service.routes import TokenEncryptionService
-            encryption = TokenEncryptionService()
-            access_token = encryption.decrypt_token(credential.encrypted_access_token)
+    async def _dispatch_claimed_followups(self, claimed: List[dict]) -> List[dict]:
+        """
+        Send claimed follow-ups concurrently.
 
-            # Send template message via WhatsApp
-            from ..clients.meta_messaging import MetaMessagingClient
+        One MetaMessagingClient is created per credential and shared by all
+        of its sends. Sends are paced per channel and per WhatsApp phone
+        number, with a global cap on in-flight requests.
 
-            client = MetaMessagingClient(
-                access_token=access_token,
-                phone_number_id=platform.phone_number_id,
-            )
+        Args:
+            claimed: Jobs returned by _claim_due_followups
 
-            result = await client.send_whatsapp_template(
-                to=customer.phone_number,
-                template_name=followup.template_name or "default",
-                components=None,  # Could add customer name here
-            )
+        Returns:
+            Outcome dicts for _record_followup_outcomes
+        """
+        if not claimed:
+            return []
+
+        from ads_service.routes import TokenEncryptionService
+        from ..clients.meta_messaging import MetaMessagingClient
+
+        encryption = TokenEncryptionService()
+        clients: Dict[int, MetaMessagingClient] = {}
+        client_errors: Dict[int, str] = {}
+
+        for job in claimed:
+            credential_id = job["credential_id"]
+            if credential_id in clients or credential_id in client_errors:
+                continue
+            try:
+                clients[credential_id] = MetaMessagingClient(
+                    access_token=encryption.decrypt_token(job["encrypted_access_token"]),
+                    phone_number_id=job["phone_number_id"],
+                )
+            except Exception as e:
+                logger.error(f"Cannot decrypt messaging credential {credential_id}: {e}")
+                client_errors[credential_id] = f"Credential error: {e}"
+
+        concurrency = asyncio.Semaphore(self.settings.followup_dispatch_concurrency)
+        limiters: Dict[Tuple[str, str], _SendRateLimiter] = {}
+
+        def limiter_for(key: Tuple[str, str], rate: float) -> "_SendRateLimiter":
+            if key not in limiters:
+                limiters[key] = _SendRateLimiter(rate)
+            return limiters[key]
+
+        async def send(job: dict) -> dict:
+            credential_id = job["credential_id"]
+            if credential_id in client_errors:
+                return self._followup_outcome(
+                    job["id"], job["retry_count"], error=client_errors[credential_id]
+                )
 
-            await client.close()
+            async with concurrency:
+                await limiter_for(
+                    ("channel", job["channel"]),
+                    self.settings.followup_channel_messages_per_second,
+                ).acquire()
+                await limiter_for(
+                    ("whatsapp", job["phone_number_id"]),
+                    self.settings.followup_whatsapp_messages_per_second,
+                ).acquire()
+
+                try:
+                    result = await clients[credential_id].send_whatsapp_template(
+                        to=job["to"],
+                        template_name=job["template_name"],
+                        components=None,  # Could add customer name here
+                    )
+                except Exception as e:
+                    logger.error(f"Error executing followup {job['id']}: {e}")
+                    return self._followup_outcome(job["id"], job["retry_count"], error=str(e))
 
-            # Check result
             if result.get("messages"):
-                followup.status = "sent"
-                followup.sent_at = datetime.utcnow()
-                logger.info(f"Sent followup {followup.id} to {customer.phone_number}")
-                return True
-            else:
-                followup.status = "failed"
-                logger.error(f"Failed to send followup {followup.id}: {result}")
-                return False
+                logger.info(f"Sent followup {job['id']} to {job['to']}")
+                return self._followup_outcome(job["id"], job["retry_count"])
+
+            logger.error(f"Failed to send followup {job['id']}: {result}")
+            return self._followup_outcome(job["id"], job["retry_count"], error=str(result))
+
+        try:
+            return list(await asyncio.gather(*(send(job) for job in claimed)))
+        finally:
+            await asyncio.gather(
+                *(client.close() for client in clients.values()),
+                return_exceptions=True,
+            )
+
+    @staticmethod
+    def _followup_outcome(
+        followup_id: int, retry_count: Optional[int], error: Optional[str] = None
+    ) -> dict:
+        """Build a bulk-update mapping for a finished follow-up."""
+        now = datetime.utcnow()
+        if error is None:
+            return {
+                "id": followup_id,
+                "status": "sent",
+                "sent_at": now,
+                "last_error": None,
+                "updated_at": now,
+            }
+        return {
+            "id": followup_id,
+            "status": "failed",
+            "retry_count": (retry_count or 0) + 1,
+            "last_error": error[:1000],
+            "updated_at": now,
+        }
+
+    def _record_followup_outcomes(self, outcomes: List[dict]):
+        """Persist send outcomes with a single bulk UPDATE per status shape."""
+        if not outcomes:
+            return
 
+        db = self._get_db()
+        try:
+            db.bulk_update_mappings(AutomatedFollowup, outcomes)
+            db.commit()
         except Exception as e:
-            logger.error(f"Error executing followup {followup.id}: {e}")
-            followup.status = "failed"
-            return False
+            logger.error(f"Error recording followup outcomes: {e}")
+            db.rollback()
+            raise
+        finally:
+            self._close_db(db)
 
     # =========================================================================
     # Dormant Customer Detection (called by cron job)
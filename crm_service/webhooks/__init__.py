@@ -2,6 +2,7 @@
 CRM Service Webhook Handlers
 
 - meta_webhook: Unified webhook for WhatsApp, Instagram, Messenger
+- ingest_queue: Durable queue between the webhook endpoint and processing
 """
 
 __all__ = []
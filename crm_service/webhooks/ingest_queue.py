@@ -0,0 +1,472 @@
+"""
+Meta Webhook Ingest Queue - Durable queue between the webhook endpoint and processing
+
+Meta expects webhook deliveries to be acknowledged quickly and redelivers on
+slow responses. The endpoint therefore only verifies the signature, splits
+the payload into events and inserts them into meta_webhook_events. Background
+workers claim events in batches and apply them with MetaWebhookHandler.
+
+Ordering: events for one sender on one business number/page share an
+ordering_key. A worker only claims an event when no other worker holds events
+for the same key, so per-conversation order is preserved while unrelated
+conversations are processed in parallel. Within a batch, a failed event
+holds back the rest of its key: those go back to pending (without using an
+attempt) and are retried after it.
+
+Retention: processed ("done") rows are deleted once they are older than
+meta_webhook_retention_days, by a sweep that runs alongside the workers.
+Failed rows are kept for inspection.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import func, and_, or_, exists, select
+from sqlalchemy.orm import Session, aliased
+
+from ..config import get_crm_settings
+
+logger = logging.getLogger(__name__)
+
+# Samples kept for latency percentiles
+METRICS_WINDOW = 2000
+
+# Seconds a worker sleeps when the queue is empty
+IDLE_SLEEP_SECONDS = 0.5
+
+# Seconds between retention sweeps, and rows deleted per sweep transaction
+PRUNE_INTERVAL_SECONDS = 3600
+PRUNE_BATCH_SIZE = 5000
+
+
+def _percentiles(samples) -> Dict[str, Optional[float]]:
+    """Return p50/p95/p99 (milliseconds) for a sample window."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(q: float) -> float:
+        return round(ordered[min(last, int(q * last + 0.5))] * 1000, 1)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+class WebhookIngestMetrics:
+    """
+    In-process metrics for the webhook queue.
+
+    Tracks acknowledgement latency (request received -> 200 returned),
+    processing lag (event received -> applied) and throughput counters.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.ack_latency = deque(maxlen=window)
+        self.processing_lag = deque(maxlen=window)
+        self.events_enqueued = 0
+        self.events_processed = 0
+        self.events_failed = 0
+        self.batches_processed = 0
+
+    def record_ack(self, seconds: float, events: int):
+        self.ack_latency.append(seconds)
+        self.events_enqueued += events
+
+    def record_batch(self, lags: List[float], failed: int):
+        self.processing_lag.extend(lags)
+        self.events_processed += len(lags)
+        self.events_failed += failed
+        self.batches_processed += 1
+
+    def snapshot(self, queue_depth: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "queue_depth": queue_depth,
+            "events_enqueued": self.events_enqueued,
+            "events_processed": self.events_processed,
+            "events_failed": self.events_failed,
+            "batches_processed": self.batches_processed,
+            "ack_latency": _percentiles(self.ack_latency),
+            "processing_lag": _percentiles(self.processing_lag),
+        }
+
+
+class MetaWebhookQueue:
+    """
+    Postgres-backed queue of Meta webhook events.
+
+    Usage:
+        queue = get_webhook_queue()
+        count = await queue.enqueue_payload(payload)   # in the webhook route
+        queue.start(num_workers=2)                     # at app startup
+    """
+
+    def __init__(self):
+        self.settings = get_crm_settings()
+        self.metrics = WebhookIngestMetrics()
+        self._workers: List[asyncio.Task] = []
+        self._pruner: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def _get_db(self) -> Session:
+        from database.database import SessionLocal
+        return SessionLocal()
+
+    # =========================================================================
+    # Enqueue
+    # =========================================================================
+
+    def enqueue(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Insert split webhook events as pending rows.
+
+        Args:
+            events: Events from MetaWebhookHandler.split_payload
+
+        Returns:
+            Number of events enqueued
+        """
+        from database.models import MetaWebhookEvent
+
+        if not events:
+            return 0
+
+        now = datetime.utcnow()
+        db = self._get_db()
+        try:
+            db.execute(
+                MetaWebhookEvent.__table__.insert(),
+                [
+                    {
+                        "event_kind": event["event_kind"],
+                        "ordering_key": event["ordering_key"],
+                        "payload": event["payload"],
+                        "status": "pending",
+                        "attempts": 0,
+                        "received_at": now,
+                    }
+                    for event in events
+                ],
+            )
+            db.commit()
+            return len(events)
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    async def enqueue_payload(self, payload: Dict[str, Any]) -> int:
+        """
+        Split a webhook payload and enqueue its events.
+
+        The insert runs in the default executor so the event loop keeps
+        accepting deliveries.
+
+        Args:
+            payload: Parsed webhook JSON payload
+
+        Returns:
+            Number of events enqueued
+        """
+        from .meta_webhook import get_webhook_handler
+
+        events = get_webhook_handler().split_payload(payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.enqueue, events)
+
+    # =========================================================================
+    # Claim & Process
+    # =========================================================================
+
+    def claim_batch(self, db: Session, batch_size: int) -> List[Any]:
+        """
+        Claim up to batch_size events, oldest first.
+
+        An event is claimable when it is pending (or its processing lease
+        expired) and no live claim exists for its ordering_key. The advisory
+        lock on the key closes the race between two workers claiming at the
+        same moment; row locks use SKIP LOCKED so workers never block.
+
+        Args:
+            db: Database session (committed by this method)
+            batch_size: Maximum events to claim
+
+        Returns:
+            Claimed MetaWebhookEvent rows, in id order
+        """
+        from database.models import MetaWebhookEvent
+
+        now = datetime.utcnow()
+        lease_cutoff = now - timedelta(minutes=self.settings.meta_webhook_claim_lease_minutes)
+        other = aliased(MetaWebhookEvent)
+
+        key_in_flight = exists().where(
+            and_(
+                other.ordering_key == MetaWebhookEvent.ordering_key,
+                other.id != MetaWebhookEvent.id,
+                other.status == "processing",
+                other.claimed_at >= lease_cutoff,
+            )
+        )
+
+        rows = (
+            db.query(MetaWebhookEvent)
+            .filter(
+                or_(
+                    MetaWebhookEvent.status == "pending",
+                    and_(
+                        MetaWebhookEvent.status == "processing",
+                        MetaWebhookEvent.claimed_at < lease_cutoff,
+                    ),
+                ),
+                ~key_in_flight,
+                func.pg_try_advisory_xact_lock(func.hashtext(MetaWebhookEvent.ordering_key)),
+            )
+            .order_by(MetaWebhookEvent.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        for row in rows:
+            row.status = "processing"
+            row.claimed_at = now
+            row.attempts = (row.attempts or 0) + 1
+
+        db.commit()
+        return rows
+
+    def process_batch(self, batch_size: Optional[int] = None) -> int:
+        """
+        Claim and apply one batch of events.
+
+        Args:
+            batch_size: Maximum events to claim (defaults to settings)
+
+        Returns:
+            Number of events claimed
+        """
+        from database.models import MetaWebhookEvent
+        from .meta_webhook import ORDERING_KEY_BLOCKED, get_webhook_handler
+
+        batch_size = batch_size or self.settings.meta_webhook_batch_size
+        db = self._get_db()
+        try:
+            claimed = self.claim_batch(db, batch_size)
+            if not claimed:
+                return 0
+
+            events = [
+                {
+                    "event_kind": row.event_kind,
+                    "ordering_key": row.ordering_key,
+                    "payload": row.payload,
+                }
+                for row in claimed
+            ]
+
+            try:
+                outcomes = get_webhook_handler().apply_events(db, events)
+                db.commit()
+            except Exception as e:
+                # Loading the batch failed; every event gets retried
+                logger.error(f"Webhook batch failed: {e}")
+                db.rollback()
+                outcomes = [(None, str(e))] * len(claimed)
+
+            now = datetime.utcnow()
+            updates = []
+            lags = []
+            failed = 0
+            for row, (_, error) in zip(claimed, outcomes):
+                if error is None:
+                    updates.append({
+                        "id": row.id,
+                        "status": "done",
+                        "processed_at": now,
+                        "last_error": None,
+                    })
+                    lags.append((now - row.received_at).total_seconds())
+                elif error == ORDERING_KEY_BLOCKED:
+                    # Never applied: back to pending without using an attempt
+                    updates.append({
+                        "id": row.id,
+                        "status": "pending",
+                        "attempts": max((row.attempts or 1) - 1, 0),
+                    })
+                else:
+                    failed += 1
+                    exhausted = row.attempts >= self.settings.meta_webhook_max_attempts
+                    updates.append({
+                        "id": row.id,
+                        "status": "failed" if exhausted else "pending",
+                        "last_error": error[:1000],
+                    })
+
+            db.bulk_update_mappings(MetaWebhookEvent, updates)
+            db.commit()
+
+            self.metrics.record_batch(lags, failed)
+            if failed:
+                logger.warning(f"⚠️ {failed}/{len(claimed)} webhook events failed")
+
+            return len(claimed)
+
+        except Exception as e:
+            logger.error(f"Error processing webhook queue: {e}")
+            db.rollback()
+            return 0
+
+        finally:
+            db.close()
+
+    def queue_depth(self) -> Optional[int]:
+        """Count events waiting to be processed."""
+        from database.models import MetaWebhookEvent
+
+        db = self._get_db()
+        try:
+            return (
+                db.query(func.count(MetaWebhookEvent.id))
+                .filter(MetaWebhookEvent.status.in_(["pending", "processing"]))
+                .scalar()
+            )
+        except Exception as e:
+            logger.error(f"Error counting webhook queue: {e}")
+            return None
+        finally:
+            db.close()
+
+    def prune_done(self, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+        """
+        Delete processed events older than meta_webhook_retention_days.
+
+        Deletes in batches of batch_size rows per transaction so the sweep
+        never holds long locks on the queue table.
+
+        Returns:
+            Number of events deleted
+        """
+        from database.models import MetaWebhookEvent
+
+        cutoff = datetime.utcnow() - timedelta(days=self.settings.meta_webhook_retention_days)
+        deleted = 0
+        db = self._get_db()
+        try:
+            while True:
+                expired = (
+                    select(MetaWebhookEvent.id)
+                    .where(
+                        MetaWebhookEvent.status == "done",
+                        MetaWebhookEvent.processed_at < cutoff,
+                    )
+                    .limit(batch_size)
+                )
+                count = (
+                    db.query(MetaWebhookEvent)
+                    .filter(MetaWebhookEvent.id.in_(expired))
+                    .delete(synchronize_session=False)
+                )
+                db.commit()
+                deleted += count
+                if count < batch_size:
+                    return deleted
+
+        except Exception:
+            db.rollback()
+            raise
+
+        finally:
+            db.close()
+
+    # =========================================================================
+    # Workers
+    # =========================================================================
+
+    async def run_worker(self, worker_id: int):
+        """Drain the queue until stop() is called."""
+        loop = asyncio.get_running_loop()
+        logger.info(f"Webhook worker {worker_id} started")
+
+        while not self._stopping:
+            try:
+                claimed = await loop.run_in_executor(None, self.process_batch)
+            except Exception as e:
+                logger.error(f"Webhook worker {worker_id} error: {e}")
+                claimed = 0
+
+            if not claimed:
+                await asyncio.sleep(IDLE_SLEEP_SECONDS)
+
+        logger.info(f"Webhook worker {worker_id} stopped")
+
+    async def run_pruner(self):
+        """Run the retention sweep every PRUNE_INTERVAL_SECONDS until stop()."""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                deleted = await loop.run_in_executor(None, self.prune_done)
+                if deleted:
+                    logger.info(f"Pruned {deleted} processed webhook events")
+            except Exception as e:
+                logger.error(f"Webhook retention sweep error: {e}")
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+
+    def start(self, num_workers: Optional[int] = None):
+        """Start background workers on the running event loop."""
+        if self._workers:
+            return
+
+        num_workers = num_workers or self.settings.meta_webhook_workers
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self.run_worker(i)) for i in range(num_workers)
+        ]
+        self._pruner = asyncio.create_task(self.run_pruner())
+
+    async def stop(self):
+        """Stop workers after their current batch."""
+        self._stopping = True
+        if self._pruner is not None:
+            # Sleeps between sweeps; don't wait out the interval
+            self._pruner.cancel()
+            await asyncio.gather(self._pruner, return_exceptions=True)
+            self._pruner = None
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Metrics snapshot including current queue depth."""
+        return self.metrics.snapshot(queue_depth=self.queue_depth())
+
+
+# Singleton instance
+_webhook_queue: Optional[MetaWebhookQueue] = None
+
+
+def get_webhook_queue() -> MetaWebhookQueue:
+    """Get or create the webhook queue singleton."""
+    global _webhook_queue
+    if _webhook_queue is None:
+        _webhook_queue = MetaWebhookQueue()
+    return _webhook_queue
+
+
+def start_webhook_workers():
+    """Start webhook queue workers (call from app startup)."""
+    queue = get_webhook_queue()
+    queue.start()
+    logger.info(f"✅ Meta webhook queue started ({queue.settings.meta_webhook_workers} workers)")
+
+
+async def stop_webhook_workers():
+    """Stop webhook queue workers (call from app shutdown)."""
+    if _webhook_queue is not None:
+        await _webhook_queue.stop()
@@ -29,6 +29,10 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# Outcome error for events held back because an earlier event with the same
+# ordering_key failed in the batch (they're retried after it, not counted)
+ORDERING_KEY_BLOCKED = "Skipped: an earlier event with this ordering_key failed"
+
 
 class WebhookEventType(str, Enum):
     """Types of webhook events we handle."""
@@ -79,20 +83,25 @@ class MetaWebhookHandler:
 
         return hmac.compare_digest(expected_signature, provided)
 
-    async def handle_webhook(
-        self, payload: Dict[str, Any], user_id: str
-    ) -> List[WebhookEventResponse]:
+    # =========================================================================
+    # Payload Splitting
+    # =========================================================================
+
+    def split_payload(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Process a webhook payload from Meta.
+        Split a webhook payload into individually processable events.
+
+        Meta batches several messages/statuses per delivery. Each one becomes
+        an event with an ordering key identifying the sender on a business
+        number or page, so events for one conversation stay in order.
 
         Args:
             payload: Parsed webhook JSON payload
-            user_id: Owner's Clerk user ID (from platform lookup)
 
         Returns:
-            List of processed event responses
+            List of {"event_kind", "ordering_key", "payload"} dicts
         """
-        results = []
+        events = []
 
         # Meta sends webhooks in batches
         for entry in payload.get("entry", []):
@@ -100,288 +109,334 @@ class MetaWebhookHandler:
             if "changes" in entry:
                 # WhatsApp Cloud API format
                 for change in entry["changes"]:
-                    if change.get("field") == "messages":
-                        result = await self._handle_whatsapp_change(
-                            change.get("value", {}), user_id
-                        )
-                        if result:
-                            results.append(result)
+                    if change.get("field") != "messages":
+                        continue
+
+                    value = change.get("value", {})
+                    phone_number_id = value.get("metadata", {}).get("phone_number_id")
+
+                    for msg in value.get("messages", []):
+                        events.append({
+                            "event_kind": "whatsapp_message",
+                            "ordering_key": f"wa:{phone_number_id}:{msg.get('from')}",
+                            "payload": {"phone_number_id": phone_number_id, "message": msg},
+                        })
+
+                    for status in value.get("statuses", []):
+                        events.append({
+                            "event_kind": "whatsapp_status",
+                            "ordering_key": f"wa:{phone_number_id}:{status.get('recipient_id')}",
+                            "payload": {"phone_number_id": phone_number_id, "status": status},
+                        })
 
             elif "messaging" in entry:
                 # Messenger/Instagram format
                 for event in entry["messaging"]:
-                    result = await self._handle_messaging_event(event, user_id)
-                    if result:
-                        results.append(result)
+                    sender_id = event.get("sender", {}).get("id")
+                    recipient_id = event.get("recipient", {}).get("id")
+                    events.append({
+                        "event_kind": "messaging",
+                        "ordering_key": f"meta:{recipient_id}:{sender_id}",
+                        "payload": {"event": event},
+                    })
 
-        return results
+        return events
 
-    async def _handle_whatsapp_change(
-        self, value: Dict[str, Any], user_id: str
-    ) -> Optional[WebhookEventResponse]:
-        """Handle a WhatsApp webhook change event."""
-        from database.database import SessionLocal
-        from database.models import (
-            Customer,
-            Conversation,
-            Message,
-            ConversionEvent,
-            MessagingPlatform,
-        )
+    # =========================================================================
+    # Event Processing
+    # =========================================================================
 
-        # Extract metadata
-        metadata = value.get("metadata", {})
-        phone_number_id = metadata.get("phone_number_id")
+    async def handle_webhook(
+        self, payload: Dict[str, Any], user_id: str
+    ) -> List[WebhookEventResponse]:
+        """
+        Process a webhook payload from Meta inline.
 
-        # Process messages
-        messages = value.get("messages", [])
-        if not messages:
-            # Might be a status update
-            return await self._handle_whatsapp_status(value)
+        The webhook route normally enqueues payloads instead (see
+        ingest_queue); this path is kept for when the queue is disabled.
 
-        db = SessionLocal()
-        try:
-            # Get the messaging platform for this phone_number_id
-            platform = (
-                db.query(MessagingPlatform)
-                .filter(MessagingPlatform.phone_number_id == phone_number_id)
-                .first()
-            )
+        Args:
+            payload: Parsed webhook JSON payload
+            user_id: Owner's Clerk user ID (from platform lookup)
 
-            if not platform:
-                logger.warning(f"No platform found for phone_number_id: {phone_number_id}")
-                return None
-
-            for msg in messages:
-                # Extract sender info
-                from_number = msg.get("from")  # Sender's phone number
-                message_id = msg.get("id")
-                timestamp = datetime.fromtimestamp(int(msg.get("timestamp", 0)))
-
-                # Get message content
-                msg_type = msg.get("type", "text")
-                text_content = None
-                media_url = None
-
-                if msg_type == "text":
-                    text_content = msg.get("text", {}).get("body")
-                elif msg_type == "image":
-                    media_url = msg.get("image", {}).get("id")  # Media ID, not URL
-                    text_content = msg.get("image", {}).get("caption")
-                elif msg_type == "interactive":
-                    # Button click or list selection
-                    interactive = msg.get("interactive", {})
-                    if "button_reply" in interactive:
-                        text_content = interactive["button_reply"].get("title")
-                    elif "list_reply" in interactive:
-                        text_content = interactive["list_reply"].get("title")
-
-                # Check for referral (Click-to-WhatsApp attribution)
-                referral = msg.get("referral")
-                ctwa_clid = None
-                source_campaign_id = None
-
-                if referral:
-                    ctwa_clid = referral.get("ctwa_clid")
-                    # TODO: Look up campaign from ctwa_clid
-
-                # Check if this is a check-in message
-                is_checkin = False
-                if text_content and text_content.upper().startswith(self.checkin_prefix):
-                    is_checkin = True
-
-                # Find or create customer
-                customer = (
-                    db.query(Customer)
-                    .filter(
-                        Customer.user_id == platform.user_id,
-                        Customer.phone_number == f"+{from_number}",
-                    )
-                    .first()
-                )
+        Returns:
+            List of processed event responses
+        """
+        from database.database import SessionLocal
 
-                is_new_customer = False
-                if not customer:
-                    is_new_customer = True
-                    customer = Customer(
-                        user_id=platform.user_id,
-                        phone_number=f"+{from_number}",
-                        whatsapp_id=from_number,
-                        source_channel="whatsapp",
-                        ctwa_clid=ctwa_clid,
-                        source_campaign_id=source_campaign_id,
-                        lifecycle_stage="lead",
-                    )
-                    db.add(customer)
-                    db.flush()  # Get the customer ID
-
-                    logger.info(f"Created new customer from WhatsApp: {customer.id}")
-
-                # Find or create conversation
-                conversation = (
-                    db.query(Conversation)
-                    .filter(
-                        Conversation.customer_id == customer.id,
-                        Conversation.channel == "whatsapp",
-                        Conversation.status != "closed",
-                    )
-                    .first()
-                )
+        events = self.split_payload(payload)
+        if not events:
+            return []
 
-                if not conversation:
-                    conversation = Conversation(
-                        customer_id=customer.id,
-                        user_id=platform.user_id,
-                        channel="whatsapp",
-                        status="open",
-                        is_unread=True,
-                        ctwa_clid=ctwa_clid,
-                        source_campaign_id=source_campaign_id,
-                    )
-                    db.add(conversation)
-                    db.flush()
-
-                # Update conversation with new message
-                conversation.last_customer_message_at = timestamp
-                conversation.is_unread = True
-                # 24-hour window for free replies
-                conversation.window_expires_at = timestamp + timedelta(hours=24)
-
-                # Create message record
-                message = Message(
-                    conversation_id=conversation.id,
-                    external_message_id=message_id,
-                    direction="inbound",
-                    message_type="checkin" if is_checkin else msg_type,
-                    content=text_content,
-                    media_url=media_url,
-                    status="delivered",
-                )
-                db.add(message)
-                db.flush()
-
-                # Handle check-in
-                if is_checkin:
-                    # Extract check-in code
-                    checkin_code = text_content.upper().replace(self.checkin_prefix, "").strip()
-
-                    # Verify this is the right business
-                    if platform.checkin_code and checkin_code == platform.checkin_code.upper():
-                        # Record the visit
-                        customer.visit_count = (customer.visit_count or 0) + 1
-                        customer.last_visit_at = timestamp
-
-                        # Update lifecycle stage
-                        if customer.visit_count >= 2:
-                            customer.lifecycle_stage = "repeat"
-                        elif customer.lifecycle_stage == "lead":
-                            customer.lifecycle_stage = "customer"
-
-                        # Create conversion event
-                        visit_event = ConversionEvent(
-                            customer_id=customer.id,
-                            event_name="Visit",
-                            event_source="checkin",
-                            campaign_id=customer.source_campaign_id,
-                            click_id=customer.ctwa_clid,
-                        )
-                        db.add(visit_event)
-
-                        logger.info(
-                            f"Check-in recorded for customer {customer.id}, "
-                            f"visit #{customer.visit_count}"
-                        )
-
-                        # TODO: Send auto-reply
-                        # TODO: Schedule review request
-
-                db.commit()
-
-                return WebhookEventResponse(
-                    success=True,
-                    customer_id=customer.id,
-                    conversation_id=conversation.id,
-                    message_id=message.id,
-                    is_checkin=is_checkin,
-                    is_new_customer=is_new_customer,
-                )
+        db = SessionLocal()
+        try:
+            outcomes = self.apply_events(db, events)
+            db.commit()
+            return [response for response, _ in outcomes if response]
 
         except Exception as e:
-            logger.error(f"Error handling WhatsApp webhook: {e}")
+            logger.error(f"Error handling webhook: {e}")
             db.rollback()
-            return WebhookEventResponse(success=False)
+            return [WebhookEventResponse(success=False)]
 
         finally:
             db.close()
 
-        return None
+    def apply_events(
+        self, db, events: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[WebhookEventResponse], Optional[str]]]:
+        """
+        Apply split events to the database in order.
+
+        Platforms, customers, open conversations and already-stored messages
+        for the whole batch are loaded up front with one query each; records
+        created along the way are reused by later events in the batch. Each
+        event runs in a savepoint so one bad event doesn't discard the rest.
+        Once an event fails, later events with the same ordering_key are not
+        applied (error ORDERING_KEY_BLOCKED), so they can't overtake it.
+        The caller owns the transaction and commits.
+
+        Args:
+            db: Database session
+            events: Events from split_payload (in arrival order)
 
-    async def _handle_whatsapp_status(
-        self, value: Dict[str, Any]
+        Returns:
+            One (response, error) tuple per event
+        """
+        batch = _WebhookBatchContext(db, events)
+        outcomes = []
+        failed_keys = set()
+
+        for event in events:
+            kind = event["event_kind"]
+            data = event["payload"]
+            key = event.get("ordering_key")
+            if key is not None and key in failed_keys:
+                outcomes.append((None, ORDERING_KEY_BLOCKED))
+                continue
+            try:
+                with db.begin_nested():
+                    if kind == "whatsapp_message":
+                        response = self._apply_whatsapp_message(batch, data)
+                    elif kind == "whatsapp_status":
+                        response = self._apply_whatsapp_status(batch, data)
+                    elif kind == "messaging":
+                        response = self._apply_messaging_event(batch, data["event"])
+                    else:
+                        response = None
+                batch.commit_pending()
+                outcomes.append((response, None))
+
+            except Exception as e:
+                logger.error(f"Error handling {kind} webhook event: {e}")
+                batch.forget_pending()
+                if key is not None:
+                    failed_keys.add(key)
+                outcomes.append((WebhookEventResponse(success=False), str(e)))
+
+        return outcomes
+
+    def _apply_whatsapp_message(
+        self, batch: "_WebhookBatchContext", data: Dict[str, Any]
     ) -> Optional[WebhookEventResponse]:
-        """Handle WhatsApp message status updates."""
-        from database.database import SessionLocal
-        from database.models import Message
+        """Apply one inbound WhatsApp message."""
+        from database.models import Customer, Conversation, Message, ConversionEvent
 
-        statuses = value.get("statuses", [])
-        if not statuses:
+        phone_number_id = data.get("phone_number_id")
+        msg = data["message"]
+        db = batch.db
+
+        # Get the messaging platform for this phone_number_id
+        platform = batch.platforms_by_phone_id.get(phone_number_id)
+        if not platform:
+            logger.warning(f"No platform found for phone_number_id: {phone_number_id}")
             return None
 
-        db = SessionLocal()
-        try:
-            for status in statuses:
-                message_id = status.get("id")
-                status_value = status.get("status")  # sent, delivered, read, failed
-                timestamp = datetime.fromtimestamp(int(status.get("timestamp", 0)))
-
-                # Find the message
-                message = (
-                    db.query(Message)
-                    .filter(Message.external_message_id == message_id)
-                    .first()
-                )
+        # Extract sender info
+        from_number = msg.get("from")  # Sender's phone number
+        message_id = msg.get("id")
+        timestamp = datetime.fromtimestamp(int(msg.get("timestamp", 0)))
 
-                if message:
-                    message.status = status_value
-                    if status_value == "sent":
-                        message.sent_at = timestamp
-                    elif status_value == "delivered":
-                        message.delivered_at = timestamp
-                    elif status_value == "read":
-                        message.read_at = timestamp
-                    elif status_value == "failed":
-                        error = status.get("errors", [{}])[0]
-                        message.error_message = error.get("message")
+        # Meta redelivers on slow acks; skip messages we already stored
+        if message_id and message_id in batch.known_message_ids:
+            return None
 
-            db.commit()
-            return WebhookEventResponse(success=True)
+        # Get message content
+        msg_type = msg.get("type", "text")
+        text_content = None
+        media_url = None
+
+        if msg_type == "text":
+            text_content = msg.get("text", {}).get("body")
+        elif msg_type == "image":
+            media_url = msg.get("image", {}).get("id")  # Media ID, not URL
+            text_content = msg.get("image", {}).get("caption")
+        elif msg_type == "interactive":
+            # Button click or list selection
+            interactive = msg.get("interactive", {})
+            if "button_reply" in interactive:
+                text_content = interactive["button_reply"].get("title")
+            elif "list_reply" in interactive:
+                text_content = interactive["list_reply"].get("title")
+
+        # Check for referral (Click-to-WhatsApp attribution)
+        referral = msg.get("referral")
+        ctwa_clid = None
+        source_campaign_id = None
+
+        if referral:
+            ctwa_clid = referral.get("ctwa_clid")
+            # TODO: Look up campaign from ctwa_clid
+
+        # Check if this is a check-in message
+        is_checkin = False
+        if text_content and text_content.upper().startswith(self.checkin_prefix):
+            is_checkin = True
+
+        # Find or create customer
+        customer_key = (platform.user_id, f"+{from_number}")
+        customer = batch.customers_by_phone.get(customer_key)
+
+        is_new_customer = False
+        if not customer:
+            is_new_customer = True
+            customer = Customer(
+                user_id=platform.user_id,
+                phone_number=f"+{from_number}",
+                whatsapp_id=from_number,
+                source_channel="whatsapp",
+                ctwa_clid=ctwa_clid,
+                source_campaign_id=source_campaign_id,
+                lifecycle_stage="lead",
+            )
+            db.add(customer)
+            db.flush()  # Get the customer ID
+            batch.remember("customers_by_phone", customer_key, customer)
 
-        except Exception as e:
-            logger.error(f"Error handling status update: {e}")
-            db.rollback()
-            return WebhookEventResponse(success=False)
+            logger.info(f"Created new customer from WhatsApp: {customer.id}")
 
-        finally:
-            db.close()
+        # Find or create conversation
+        conversation = batch.conversations.get((customer.id, "whatsapp"))
 
-    async def _handle_messaging_event(
-        self, event: Dict[str, Any], user_id: str
+        if not conversation:
+            conversation = Conversation(
+                customer_id=customer.id,
+                user_id=platform.user_id,
+                channel="whatsapp",
+                status="open",
+                is_unread=True,
+                ctwa_clid=ctwa_clid,
+                source_campaign_id=source_campaign_id,
+            )
+            db.add(conversation)
+            db.flush()
+            batch.remember("conversations", (customer.id, "whatsapp"), conversation)
+
+        # Update conversation with new message
+        conversation.last_customer_message_at = timestamp
+        conversation.is_unread = True
+        # 24-hour window for free replies
+        conversation.window_expires_at = timestamp + timedelta(hours=24)
+
+        # Create message record
+        message = Message(
+            conversation_id=conversation.id,
+            external_message_id=message_id,
+            direction="inbound",
+            message_type="checkin" if is_checkin else msg_type,
+            content=text_content,
+            media_url=media_url,
+            status="delivered",
+        )
+        db.add(message)
+        db.flush()
+        if message_id:
+            batch.known_message_ids.add(message_id)
+
+        # Handle check-in
+        if is_checkin:
+            # Extract check-in code
+            checkin_code = text_content.upper().replace(self.checkin_prefix, "").strip()
+
+            # Verify this is the right business
+            if platform.checkin_code and checkin_code == platform.checkin_code.upper():
+                # Record the visit
+                customer.visit_count = (customer.visit_count or 0) + 1
+                customer.last_visit_at = timestamp
+
+                # Update lifecycle stage
+                if customer.visit_count >= 2:
+                    customer.lifecycle_stage = "repeat"
+                elif customer.lifecycle_stage == "lead":
+                    customer.lifecycle_stage = "customer"
+
+                # Create conversion event
+                visit_event = ConversionEvent(
+                    customer_id=customer.id,
+                    user_id=platform.user_id,
+                    event_name="Visit",
+                    event_source="checkin",
+                    campaign_id=customer.source_campaign_id,
+                    click_id=customer.ctwa_clid,
+                )
+                db.add(visit_event)
+
+                logger.info(
+                    f"Check-in recorded for customer {customer.id}, "
+                    f"visit #{customer.visit_count}"
+                )
+
+                # TODO: Send auto-reply
+                # TODO: Schedule review request
+
+        return WebhookEventResponse(
+            success=True,
+            customer_id=customer.id,
+            conversation_id=conversation.id,
+            message_id=message.id,
+            is_checkin=is_checkin,
+            is_new_customer=is_new_customer,
+        )
+
+    def _apply_whatsapp_status(
+        self, batch: "_WebhookBatchContext", data: Dict[str, Any]
+    ) -> Optional[WebhookEventResponse]:
+        """Apply one WhatsApp message status update."""
+        status = data["status"]
+        message_id = status.get("id")
+        status_value = status.get("status")  # sent, delivered, read, failed
+        timestamp = datetime.fromtimestamp(int(status.get("timestamp", 0)))
+
+        # Find the message
+        message = batch.messages_by_external_id.get(message_id)
+
+        if message:
+            message.status = status_value
+            if status_value == "sent":
+                message.sent_at = timestamp
+            elif status_value == "delivered":
+                message.delivered_at = timestamp
+            elif status_value == "read":
+                message.read_at = timestamp
+            elif status_value == "failed":
+                error = status.get("errors", [{}])[0]
+                message.error_message = error.get("message")
+
+        return WebhookEventResponse(success=True)
+
+    def _apply_messaging_event(
+        self, batch: "_WebhookBatchContext", event: Dict[str, Any]
     ) -> Optional[WebhookEventResponse]:
         """
-        Handle Messenger/Instagram messaging events.
+        Apply one Messenger/Instagram messaging event.
 
         Similar structure to WhatsApp but different payload format.
         """
-        from database.database import SessionLocal
-        from database.models import (
-            Customer,
-            Conversation,
-            Message,
-            MessagingPlatform,
-        )
+        from database.models import Customer, Conversation, Message
+
+        db = batch.db
 
         # Determine channel from event structure
-        # Instagram has 'instagram' in the page_id field pattern
         sender_id = event.get("sender", {}).get("id")
         recipient_id = event.get("recipient", {}).get("id")
         timestamp = datetime.fromtimestamp(event.get("timestamp", 0) / 1000)
@@ -389,129 +444,238 @@ class MetaWebhookHandler:
         if not sender_id or not recipient_id:
             return None
 
-        db = SessionLocal()
-        try:
-            # Determine if this is Instagram or Messenger
-            # Instagram page IDs are typically longer numbers
-            platform = (
-                db.query(MessagingPlatform)
-                .filter(
-                    (MessagingPlatform.page_id == recipient_id) |
-                    (MessagingPlatform.instagram_account_id == recipient_id)
-                )
-                .first()
-            )
+        platform = batch.platforms_by_recipient.get(recipient_id)
 
-            if not platform:
-                logger.warning(f"No platform found for recipient: {recipient_id}")
-                return None
-
-            # Determine channel
-            channel = "messenger"
-            if platform.instagram_account_id == recipient_id:
-                channel = "instagram"
-
-            # Get message content
-            message_data = event.get("message", {})
-            text_content = message_data.get("text")
-            attachments = message_data.get("attachments", [])
-
-            media_url = None
-            msg_type = "text"
-            if attachments:
-                attachment = attachments[0]
-                msg_type = attachment.get("type", "text")
-                media_url = attachment.get("payload", {}).get("url")
-
-            # Find or create customer
-            if channel == "instagram":
-                customer = (
-                    db.query(Customer)
-                    .filter(
-                        Customer.user_id == platform.user_id,
-                        Customer.instagram_id == sender_id,
-                    )
-                    .first()
-                )
-            else:
-                customer = (
-                    db.query(Customer)
-                    .filter(
-                        Customer.user_id == platform.user_id,
-                        Customer.messenger_id == sender_id,
-                    )
-                    .first()
-                )
+        if not platform:
+            logger.warning(f"No platform found for recipient: {recipient_id}")
+            return None
 
-            is_new_customer = False
-            if not customer:
-                is_new_customer = True
-                customer = Customer(
-                    user_id=platform.user_id,
-                    instagram_id=sender_id if channel == "instagram" else None,
-                    messenger_id=sender_id if channel == "messenger" else None,
-                    source_channel=channel,
-                    lifecycle_stage="lead",
-                )
-                db.add(customer)
-                db.flush()
-
-            # Find or create conversation
-            conversation = (
-                db.query(Conversation)
-                .filter(
-                    Conversation.customer_id == customer.id,
-                    Conversation.channel == channel,
-                    Conversation.status != "closed",
-                )
-                .first()
-            )
+        # Determine channel
+        channel = "messenger"
+        if platform.instagram_account_id == recipient_id:
+            channel = "instagram"
 
-            if not conversation:
-                conversation = Conversation(
-                    customer_id=customer.id,
-                    user_id=platform.user_id,
-                    channel=channel,
-                    status="open",
-                    is_unread=True,
-                )
-                db.add(conversation)
-                db.flush()
-
-            # Update conversation
-            conversation.last_customer_message_at = timestamp
-            conversation.is_unread = True
-            conversation.window_expires_at = timestamp + timedelta(hours=24)
-
-            # Create message
-            message = Message(
-                conversation_id=conversation.id,
-                external_message_id=message_data.get("mid"),
-                direction="inbound",
-                message_type=msg_type,
-                content=text_content,
-                media_url=media_url,
-                status="delivered",
+        # Get message content
+        message_data = event.get("message", {})
+        external_id = message_data.get("mid")
+        if external_id and external_id in batch.known_message_ids:
+            return None
+
+        text_content = message_data.get("text")
+        attachments = message_data.get("attachments", [])
+
+        media_url = None
+        msg_type = "text"
+        if attachments:
+            attachment = attachments[0]
+            msg_type = attachment.get("type", "text")
+            media_url = attachment.get("payload", {}).get("url")
+
+        # Find or create customer
+        customer_key = (platform.user_id, channel, sender_id)
+        customer = batch.customers_by_scoped_id.get(customer_key)
+
+        is_new_customer = False
+        if not customer:
+            is_new_customer = True
+            customer = Customer(
+                user_id=platform.user_id,
+                instagram_id=sender_id if channel == "instagram" else None,
+                messenger_id=sender_id if channel == "messenger" else None,
+                source_channel=channel,
+                lifecycle_stage="lead",
             )
-            db.add(message)
+            db.add(customer)
+            db.flush()
+            batch.remember("customers_by_scoped_id", customer_key, customer)
 
-            db.commit()
+        # Find or create conversation
+        conversation = batch.conversations.get((customer.id, channel))
 
-            return WebhookEventResponse(
-                success=True,
+        if not conversation:
+            conversation = Conversation(
                 customer_id=customer.id,
-                conversation_id=conversation.id,
-                message_id=message.id,
-                is_new_customer=is_new_customer,
+                user_id=platform.user_id,
+                channel=channel,
+                status="open",
+                is_unread=True,
             )
+            db.add(conversation)
+            db.flush()
+            batch.remember("conversations", (customer.id, channel), conversation)
+
+        # Update conversation
+        conversation.last_customer_message_at = timestamp
+        conversation.is_unread = True
+        conversation.window_expires_at = timestamp + timedelta(hours=24)
+
+        # Create message
+        message = Message(
+            conversation_id=conversation.id,
+            external_message_id=external_id,
+            direction="inbound",
+            message_type=msg_type,
+            content=text_content,
+            media_url=media_url,
+            status="delivered",
+        )
+        db.add(message)
+        db.flush()
+        if external_id:
+            batch.known_message_ids.add(external_id)
+
+        return WebhookEventResponse(
+            success=True,
+            customer_id=customer.id,
+            conversation_id=conversation.id,
+            message_id=message.id,
+            is_new_customer=is_new_customer,
+        )
 
-        except Exception as e:
-            logger.error(f"Error handling messaging event: {e}")
-            db.rollback()
-            return WebhookEventResponse(success=False)
 
-        finally:
-            db.close()
+class _WebhookBatchContext:
+    """
+    Records needed by a batch of webhook events, loaded with one query per table.
+
+    Records created while applying the batch are added back so
+    later events for the same sender reuse them. Additions made inside a
+    savepoint that rolled back are dropped via forget_pending().
+    """
+
+    def __init__(self, db, events: List[Dict[str, Any]]):
+        from database.models import (
+            Customer,
+            Conversation,
+            Message,
+            MessagingPlatform,
+        )
+
+        self.db = db
+        self._pending: List[Tuple[str, Any]] = []
+
+        phone_number_ids = set()
+        recipient_ids = set()
+        sender_phones = set()
+        sender_scoped_ids = set()
+        message_ids = set()
+        status_message_ids = set()
+
+        for event in events:
+            data = event["payload"]
+            kind = event["event_kind"]
+            if kind == "whatsapp_message":
+                phone_number_ids.add(data.get("phone_number_id"))
+                sender_phones.add(f"+{data['message'].get('from')}")
+                if data["message"].get("id"):
+                    message_ids.add(data["message"]["id"])
+            elif kind == "whatsapp_status":
+                if data["status"].get("id"):
+                    status_message_ids.add(data["status"]["id"])
+            elif kind == "messaging":
+                messaging = data["event"]
+                recipient_ids.add(messaging.get("recipient", {}).get("id"))
+                sender_scoped_ids.add(messaging.get("sender", {}).get("id"))
+                mid = messaging.get("message", {}).get("mid")
+                if mid:
+                    message_ids.add(mid)
+
+        phone_number_ids.discard(None)
+        recipient_ids.discard(None)
+        sender_scoped_ids.discard(None)
+
+        # Platforms
+        self.platforms_by_phone_id: Dict[str, Any] = {}
+        self.platforms_by_recipient: Dict[str, Any] = {}
+        if phone_number_ids:
+            for platform in db.query(MessagingPlatform).filter(
+                MessagingPlatform.phone_number_id.in_(phone_number_ids)
+            ):
+                self.platforms_by_phone_id.setdefault(platform.phone_number_id, platform)
+        if recipient_ids:
+            for platform in db.query(MessagingPlatform).filter(
+                (MessagingPlatform.page_id.in_(recipient_ids)) |
+                (MessagingPlatform.instagram_account_id.in_(recipient_ids))
+            ):
+                if platform.page_id in recipient_ids:
+                    self.platforms_by_recipient.setdefault(platform.page_id, platform)
+                if platform.instagram_account_id in recipient_ids:
+                    self.platforms_by_recipient.setdefault(platform.instagram_account_id, platform)
+
+        owner_ids = {
+            p.user_id
+            for p in list(self.platforms_by_phone_id.values()) + list(self.platforms_by_recipient.values())
+        }
+
+        # Customers
+        self.customers_by_phone: Dict[Tuple[str, str], Any] = {}
+        self.customers_by_scoped_id: Dict[Tuple[str, str, str], Any] = {}
+        if owner_ids and sender_phones:
+            for customer in db.query(Customer).filter(
+                Customer.user_id.in_(owner_ids),
+                Customer.phone_number.in_(sender_phones),
+            ):
+                self.customers_by_phone.setdefault((customer.user_id, customer.phone_number), customer)
+        if owner_ids and sender_scoped_ids:
+            for customer in db.query(Customer).filter(
+                Customer.user_id.in_(owner_ids),
+                (Customer.instagram_id.in_(sender_scoped_ids)) |
+                (Customer.messenger_id.in_(sender_scoped_ids)),
+            ):
+                if customer.instagram_id in sender_scoped_ids:
+                    self.customers_by_scoped_id.setdefault(
+                        (customer.user_id, "instagram", customer.instagram_id), customer
+                    )
+                if customer.messenger_id in sender_scoped_ids:
+                    self.customers_by_scoped_id.setdefault(
+                        (customer.user_id, "messenger", customer.messenger_id), customer
+                    )
+
+        # Open conversations
+        self.conversations: Dict[Tuple[int, str], Any] = {}
+        customer_ids = {
+            c.id
+            for c in list(self.customers_by_phone.values()) + list(self.customers_by_scoped_id.values())
+        }
+        if customer_ids:
+            for conversation in db.query(Conversation).filter(
+                Conversation.customer_id.in_(customer_ids),
+                Conversation.status != "closed",
+            ):
+                self.conversations.setdefault(
+                    (conversation.customer_id, conversation.channel), conversation
+                )
+
+        # Messages already stored (redeliveries) and status targets
+        self.known_message_ids = set()
+        if message_ids:
+            self.known_message_ids = {
+                row[0]
+                for row in db.query(Message.external_message_id).filter(
+                    Message.external_message_id.in_(message_ids)
+                )
+            }
+
+        self.messages_by_external_id: Dict[str, Any] = {}
+        if status_message_ids:
+            for message in db.query(Message).filter(
+                Message.external_message_id.in_(status_message_ids)
+            ):
+                self.messages_by_external_id[message.external_message_id] = message
+
+    def remember(self, table: str, key: Any, record: Any):
+        """Add a record created during the batch to a lookup map."""
+        getattr(self, table)[key] = record
+        self._pending.append((table, key))
+
+    def forget_pending(self):
+        """Drop records remembered since the last successful event."""
+        for table, key in self._pending:
+            getattr(self, table).pop(key, None)
+        self._pending = []
+
+    def commit_pending(self):
+        """Keep records remembered by the last successful event."""
+        self._pending = []
 
 
 # Singleton instance
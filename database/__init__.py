@@ -1,5 +1,6 @@
 from .models import User, XAccount, UserCookies, UserPost, APIUsage, ScheduledPost
 from .database import get_db, init_db, SessionLocal
+from . import posting_heatmap  # Registers the UserPost -> heatmap flush hook
 
 __all__ = [
     "User",
@@ -76,6 +76,8 @@ def init_db():
     Initialize database tables
     """
     from .models import User, XAccount, UserCookies, UserPost, APIUsage, ScheduledPost
+    # Import posting-time heatmaps (precomputed scheduling stats)
+    from .models import PostingTimeHeatmap
     # Import billing models to ensure they're created
     from .models import Subscription, CreditBalance, CreditTransaction, FeatureUsage
     # Import comment tracking models
@@ -1,7 +1,7 @@
 """
 Database models for X Growth Automation
 """
-from sqlalchemy import Column, String, Integer, DateTime, Date, Boolean, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, String, Integer, DateTime, Date, Boolean, Text, ForeignKey, JSON, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -109,6 +109,28 @@ class UserPost(Base):
     x_account = relationship("XAccount", back_populates="posts")
 
 
+class PostingTimeHeatmap(Base):
+    """
+    Per-account engagement by weekday x hour (7x24 = 168 cells)
+
+    Cell index is weekday * 24 + hour (weekday 0 = Monday, hour of posted_at).
+    Kept up to date incrementally as UserPost rows are added, re-scored or
+    deleted (see database.posting_heatmap).
+    """
+    __tablename__ = "posting_time_heatmaps"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    x_account_id = Column(Integer, ForeignKey("x_accounts.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    # Per-cell sufficient statistics of the engagement score
+    counts = Column(JSON, nullable=False)       # 168 post counts
+    sums = Column(JSON, nullable=False)         # 168 sums of scores
+    sum_squares = Column(JSON, nullable=False)  # 168 sums of squared scores
+
+    post_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class UserComment(Base):
     """
     Track comments WE make on other people's posts and their engagement.
@@ -588,6 +610,9 @@ class AdsMetrics(Base):
     Synced from Meta/Google APIs
     """
     __tablename__ = "ads_metrics"
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "date", name="uq_ads_metrics_campaign_date"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     campaign_id = Column(Integer, ForeignKey("ads_campaigns.id"), nullable=False)
@@ -827,6 +852,8 @@ class ConversionEvent(Base):
     capi_event_id = Column(String(100))  # Unique event ID for deduplication
     capi_synced_at = Column(DateTime)
     capi_response = Column(JSON)
+    capi_attempts = Column(Integer, default=0, nullable=False)  # Rejected syncs; skipped at capi_max_attempts
+    capi_error = Column(Text)  # Last CAPI error
 
     # Timestamps
     event_time = Column(DateTime, default=datetime.utcnow)
@@ -858,7 +885,7 @@ class AutomatedFollowup(Base):
     send_channel = Column(String(20), default="whatsapp")  # whatsapp, instagram, messenger
 
     # Status
-    status = Column(String(20), default="scheduled")  # scheduled, sent, cancelled, failed
+    status = Column(String(20), default="scheduled")  # scheduled, sending, sent, cancelled, failed
     sent_at = Column(DateTime)
     message_id = Column(Integer, ForeignKey("messages.id"))  # Link to sent message
 
@@ -954,6 +981,36 @@ class MessagingCredential(Base):
     platform = relationship("MessagingPlatform", back_populates="credentials")
 
 
+class MetaWebhookEvent(Base):
+    """
+    Durable ingest queue for Meta webhook events.
+
+    The webhook endpoint verifies the signature, splits the payload into one
+    row per message/status/messaging event and returns immediately. Workers
+    claim pending rows in order and apply them to customers, conversations
+    and messages. Rows sharing an ordering_key (one sender on one business
+    number/page) are never processed concurrently.
+    """
+    __tablename__ = "meta_webhook_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Event identity
+    event_kind = Column(String(30), nullable=False)  # whatsapp_message, whatsapp_status, messaging
+    ordering_key = Column(String(150), nullable=False, index=True)  # e.g. wa:<phone_number_id>:<from>
+    payload = Column(JSON, nullable=False)  # The single event plus the context needed to apply it
+
+    # Processing state
+    status = Column(String(20), default="pending", index=True)  # pending, processing, done, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+
+    # Timestamps
+    received_at = Column(DateTime, default=datetime.utcnow, index=True)
+    claimed_at = Column(DateTime)
+    processed_at = Column(DateTime)
+
+
 # =============================================================================
 # Image Generation & Asset Management Models
 # =============================================================================
@@ -1137,6 +1194,10 @@ class FeatureUsage(Base):
     Counts usage per feature per billing period.
     """
     __tablename__ = "feature_usage"
+    __table_args__ = (
+        # One counter per feature per period (target of the atomic upsert)
+        UniqueConstraint("user_id", "feature", "period_start", name="uq_feature_usage_user_feature_period"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -1535,6 +1596,10 @@ class WorkIntegration(Base):
     last_synced_at = Column(DateTime)
     last_activity_at = Column(DateTime)  # When last activity was captured
 
+    # Polling state (Notion/Figma) - change cursors/ETags and jittered schedule
+    poll_cursor = Column(JSON, default={})
+    next_poll_at = Column(DateTime)
+
     # Relationships
     user = relationship("User", backref="work_integrations")
     credentials = relationship("WorkIntegrationCredential", back_populates="integration", uselist=False, cascade="all, delete-orphan")
@@ -0,0 +1,329 @@
+"""
+Posting-time heatmaps
+
+Precomputed weekday x hour engagement statistics per X account, read by
+OptimalPostingTimesAnalyzer instead of a GROUP BY over every UserPost.
+
+Each account has one posting_time_heatmaps row holding the count, sum and
+sum of squares of the engagement score per cell. An after_flush hook applies
+the change of every inserted, re-scored or deleted UserPost to its account's
+row, under a row lock and in the same transaction, so imports and metric
+refreshes keep heatmaps current without callers doing anything. Accounts
+without a row get one built from their posts on first use.
+
+Bulk query deletes (query(UserPost)...delete()) bypass the hook; call
+rebuild_heatmap() after them.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, extract, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, attributes
+
+from .models import PostingTimeHeatmap, UserPost
+
+logger = logging.getLogger(__name__)
+
+CELLS = 7 * 24
+
+# Pseudo-posts pulling each cell toward the account-wide mean
+PRIOR_WEIGHT = 3.0
+
+# UserPost attributes that move a post's contribution
+TRACKED_ATTRIBUTES = ("x_account_id", "posted_at", "likes", "retweets", "replies")
+
+heatmaps = PostingTimeHeatmap.__table__
+
+
+def engagement_score(likes: Optional[int], retweets: Optional[int], replies: Optional[int]) -> float:
+    """Weighted engagement: replies 3x, retweets 2x, likes 1x."""
+    return (likes or 0) + (retweets or 0) * 2 + (replies or 0) * 3
+
+
+def cell_index(weekday: int, hour: int) -> int:
+    """Cell for a weekday (0 = Monday) and hour."""
+    return weekday * 24 + hour
+
+
+@dataclass
+class HeatmapCells:
+    """Per-cell count, sum and sum of squares of engagement scores."""
+    counts: List[int] = field(default_factory=lambda: [0] * CELLS)
+    sums: List[float] = field(default_factory=lambda: [0.0] * CELLS)
+    sum_squares: List[float] = field(default_factory=lambda: [0.0] * CELLS)
+
+    @classmethod
+    def from_row(cls, row) -> "HeatmapCells":
+        return cls(list(row.counts), list(row.sums), list(row.sum_squares))
+
+    def add(self, index: int, score: float, sign: int = 1):
+        self.counts[index] += sign
+        self.sums[index] += sign * score
+        self.sum_squares[index] += sign * score * score
+
+    def merge(self, other: "HeatmapCells"):
+        for i in range(CELLS):
+            self.counts[i] += other.counts[i]
+            self.sums[i] += other.sums[i]
+            self.sum_squares[i] += other.sum_squares[i]
+
+    @property
+    def post_count(self) -> int:
+        return sum(self.counts)
+
+    def is_empty(self) -> bool:
+        return not any(self.counts)
+
+    def mean(self, index: int) -> float:
+        count = self.counts[index]
+        return self.sums[index] / count if count else 0.0
+
+    def std(self, index: int) -> float:
+        count = self.counts[index]
+        if count < 2:
+            return 0.0
+        mean = self.sums[index] / count
+        return math.sqrt(max(0.0, self.sum_squares[index] / count - mean * mean))
+
+    def overall_mean(self) -> float:
+        total = self.post_count
+        return sum(self.sums) / total if total else 0.0
+
+    def smoothed_mean(self, index: int, prior_mean: float, prior_weight: float = PRIOR_WEIGHT) -> float:
+        """Posterior mean of a cell, shrunk toward prior_mean for sparse cells."""
+        return (self.sums[index] + prior_weight * prior_mean) / (self.counts[index] + prior_weight)
+
+    def to_values(self) -> Dict:
+        return {
+            "counts": self.counts,
+            "sums": [round(v, 6) for v in self.sums],
+            "sum_squares": [round(v, 6) for v in self.sum_squares],
+            "post_count": self.post_count,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+# ============================================================================
+# Build & Load
+# ============================================================================
+
+def aggregate_cells(conn, x_account_id: int) -> HeatmapCells:
+    """Compute an account's cells from its UserPost rows (one GROUP BY)."""
+    score = (
+        func.coalesce(UserPost.likes, 0)
+        + func.coalesce(UserPost.retweets, 0) * 2
+        + func.coalesce(UserPost.replies, 0) * 3
+    )
+    isodow = extract("isodow", UserPost.posted_at)
+    hour = extract("hour", UserPost.posted_at)
+
+    rows = conn.execute(
+        select(
+            isodow.label("isodow"),
+            hour.label("hour"),
+            func.count(UserPost.id).label("count"),
+            func.sum(score).label("total"),
+            func.sum(score * score).label("total_squares"),
+        )
+        .where(UserPost.x_account_id == x_account_id, UserPost.posted_at.isnot(None))
+        .group_by(isodow, hour)
+    ).all()
+
+    cells = HeatmapCells()
+    for row in rows:
+        # ISO weekday: 1 = Monday ... 7 = Sunday
+        index = cell_index(int(row.isodow) - 1, int(row.hour))
+        cells.counts[index] = int(row.count)
+        cells.sums[index] = float(row.total or 0)
+        cells.sum_squares[index] = float(row.total_squares or 0)
+    return cells
+
+
+def _lock_row(conn, x_account_id: int) -> Optional[HeatmapCells]:
+    """
+    Lock an account's heatmap row for this transaction.
+
+    Returns:
+        The stored cells, or None if the row was just created (empty) and
+        must be filled from aggregate_cells
+    """
+    created = conn.execute(
+        pg_insert(heatmaps)
+        .values(x_account_id=x_account_id, **HeatmapCells().to_values())
+        .on_conflict_do_nothing(index_elements=["x_account_id"])
+        .returning(heatmaps.c.id)
+    ).first()
+    if created is not None:
+        return None
+
+    row = conn.execute(
+        select(heatmaps.c.counts, heatmaps.c.sums, heatmaps.c.sum_squares)
+        .where(heatmaps.c.x_account_id == x_account_id)
+        .with_for_update()
+    ).first()
+    return HeatmapCells.from_row(row)
+
+
+def _store(conn, x_account_id: int, cells: HeatmapCells):
+    conn.execute(
+        update(heatmaps)
+        .where(heatmaps.c.x_account_id == x_account_id)
+        .values(**cells.to_values())
+    )
+
+
+def rebuild_heatmap(db: Session, x_account_id: int, commit: bool = True) -> HeatmapCells:
+    """
+    Recompute and store an account's heatmap from its posts.
+
+    Args:
+        db: Database session
+        x_account_id: Account to rebuild
+        commit: Commit the session afterwards (releases the row lock)
+
+    Returns:
+        The rebuilt cells
+    """
+    conn = db.connection()
+    _lock_row(conn, x_account_id)
+    cells = aggregate_cells(conn, x_account_id)
+    _store(conn, x_account_id, cells)
+    if commit:
+        db.commit()
+    return cells
+
+
+def load_heatmap(db: Session, x_account_ids: Iterable[int]) -> HeatmapCells:
+    """
+    Combined heatmap of one or more accounts.
+
+    Accounts without a stored heatmap are built first (in a savepoint, so
+    this only scans UserPost once per account). Nothing is committed: the
+    caller's transaction is left as it was and owns the commit.
+    """
+    x_account_ids = list(x_account_ids)
+    cells = HeatmapCells()
+    if not x_account_ids:
+        return cells
+
+    rows = db.query(PostingTimeHeatmap).filter(
+        PostingTimeHeatmap.x_account_id.in_(x_account_ids)
+    ).all()
+    found = set()
+    for row in rows:
+        cells.merge(HeatmapCells.from_row(row))
+        found.add(row.x_account_id)
+
+    for x_account_id in x_account_ids:
+        if x_account_id not in found:
+            with db.begin_nested():
+                cells.merge(rebuild_heatmap(db, x_account_id, commit=False))
+    db.flush()
+
+    return cells
+
+
+# ============================================================================
+# Incremental Updates
+# ============================================================================
+
+def _old_value(post: UserPost, name: str):
+    """Pre-flush value of an attribute (raises KeyError if it wasn't loaded)."""
+    history = attributes.get_history(post, name)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    if history.added:
+        raise KeyError(name)  # Overwritten without the old value loaded
+    return None
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    """posted_at as assigned: a datetime or (from scrapers) an ISO string."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return value
+
+
+def _contribution(values: Dict) -> Optional[tuple]:
+    """(account ID, cell, score) of a post, or None if it has no posting time."""
+    posted_at = _as_datetime(values["posted_at"])
+    if values["x_account_id"] is None or posted_at is None:
+        return None
+    return (
+        values["x_account_id"],
+        cell_index(posted_at.weekday(), posted_at.hour),
+        engagement_score(values["likes"], values["retweets"], values["replies"]),
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _update_heatmaps(session: Session, flush_context):
+    """Apply flushed UserPost changes to their accounts' heatmaps."""
+    deltas: Dict[int, HeatmapCells] = {}
+    rebuild: Set[int] = set()
+
+    def apply(contribution, sign):
+        if contribution is not None:
+            account_id, index, score = contribution
+            deltas.setdefault(account_id, HeatmapCells()).add(index, score, sign)
+
+    for post in session.new:
+        if isinstance(post, UserPost):
+            apply(_contribution({name: getattr(post, name) for name in TRACKED_ATTRIBUTES}), 1)
+
+    for post in session.deleted:
+        if not isinstance(post, UserPost):
+            continue
+        try:
+            apply(_contribution({name: _old_value(post, name) for name in TRACKED_ATTRIBUTES}), -1)
+        except KeyError:
+            if post.__dict__.get("x_account_id") is not None:
+                rebuild.add(post.__dict__["x_account_id"])
+
+    for post in session.dirty:
+        if not isinstance(post, UserPost):
+            continue
+        if not any(attributes.get_history(post, name).has_changes() for name in TRACKED_ATTRIBUTES):
+            continue
+        new = _contribution({name: getattr(post, name) for name in TRACKED_ATTRIBUTES})
+        try:
+            old = _contribution({name: _old_value(post, name) for name in TRACKED_ATTRIBUTES})
+        except KeyError:
+            if post.x_account_id is not None:
+                rebuild.add(post.x_account_id)
+            continue
+        if old != new:
+            apply(old, -1)
+            apply(new, 1)
+
+    if not deltas and not rebuild:
+        return
+
+    conn = session.connection()
+    if conn.dialect.name != "postgresql":
+        return
+
+    try:
+        # Savepoint: a heatmap failure must not abort the caller's post writes
+        with conn.begin_nested():
+            for account_id in sorted(deltas.keys() | rebuild):  # Stable lock order
+                cells = _lock_row(conn, account_id)
+                if cells is None or account_id in rebuild:
+                    # New row (or unknown old values): build from posts,
+                    # which already include this flush
+                    cells = aggregate_cells(conn, account_id)
+                else:
+                    cells.merge(deltas[account_id])
+                _store(conn, account_id, cells)
+    except Exception as e:
+        logger.warning(f"Posting-time heatmap update failed: {e}")
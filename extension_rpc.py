@@ -0,0 +1,452 @@
+"""
+Extension RPC
+
+Routes agent commands to the Chrome extension WebSocket of a user, whichever
+replica of the extension backend holds that socket.
+
+Each replica keeps its own sockets and pending futures. With Redis configured
+(REDIS_URL, or REDIS_HOST/REDIS_PORT):
+- ext:conn:{user_id} names the replica that owns the user's socket (TTL,
+  refreshed by a heartbeat while the socket is open)
+- every replica subscribes to ext:instance:{instance_id}; a command for a
+  socket held elsewhere is published to the owner's channel and the response
+  comes back on the sender's channel
+
+Without Redis everything stays in-process (single replica), as before.
+
+Commands to one user are pipelined: several can be in flight at once (up to
+EXTENSION_MAX_INFLIGHT per user), sends on the socket are serialized, and
+responses are matched by request_id.
+
+Usage:
+    rpc = get_extension_rpc()
+    await rpc.start()                       # app startup
+    await rpc.register(user_id, websocket)  # on connect
+    rpc.resolve(message)                    # for messages with a request_id
+    result = await rpc.send(user_id, {"type": "CHECK_RATE_LIMIT"})
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Registry entry lifetime; the heartbeat refreshes it well before expiry
+CONNECTION_TTL_SECONDS = 90
+HEARTBEAT_SECONDS = 30
+
+# Backoff between resubscribe attempts after the listener loses Redis
+LISTEN_RETRY_SECONDS = 1
+LISTEN_RETRY_MAX_SECONDS = 30
+
+# Concurrent commands per user (extra commands queue)
+DEFAULT_MAX_INFLIGHT = int(os.getenv("EXTENSION_MAX_INFLIGHT", "4"))
+
+CONNECTION_KEY = "ext:conn:{user_id}"
+INSTANCE_CHANNEL = "ext:instance:{instance_id}"
+
+# Delete a registry entry only if this replica still owns it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _redis_url() -> Optional[str]:
+    url = os.getenv("REDIS_URL")
+    if url:
+        return url
+    host = os.getenv("REDIS_HOST")
+    if host:
+        return f"redis://{host}:{os.getenv('REDIS_PORT', '6379')}"
+    return None
+
+
+class ExtensionRPC:
+    """Connection registry and request/response routing for extension sockets."""
+
+    def __init__(self, redis_url: Optional[str] = None, max_inflight: int = DEFAULT_MAX_INFLIGHT):
+        self.instance_id = uuid.uuid4().hex
+        self.redis_url = redis_url if redis_url is not None else _redis_url()
+        self.max_inflight = max_inflight
+
+        # Sockets held by this replica (user_id -> WebSocket)
+        self.connections: Dict[str, Any] = {}
+        # Futures waiting for a response (request_id -> Future)
+        self.pending: Dict[str, asyncio.Future] = {}
+        self._pending_users: Dict[str, str] = {}
+
+        self._send_locks: Dict[str, asyncio.Lock] = {}
+        self._inflight: Dict[str, asyncio.Semaphore] = {}
+
+        self.redis = None
+        self._release = None
+        self._tasks: List[asyncio.Task] = []
+        # Set while the channel subscription is live; the heartbeat only
+        # advertises this replica's sockets while commands can reach it
+        self._listening = asyncio.Event()
+
+    @property
+    def channel(self) -> str:
+        return INSTANCE_CHANNEL.format(instance_id=self.instance_id)
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    async def start(self):
+        """Connect to Redis and start the listener and heartbeat (if configured)."""
+        if not self.redis_url or self.redis is not None:
+            return
+        try:
+            import redis.asyncio as aioredis
+
+            self.redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            await self.redis.ping()
+            self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        except Exception as e:
+            print(f"⚠️ Extension RPC: Redis unavailable, routing in-process only: {e}")
+            self.redis = None
+            return
+
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listening.set()
+        listener = asyncio.create_task(self._listen(pubsub))
+        heartbeat = asyncio.create_task(self._heartbeat())
+        # If the listener ever exits, stop advertising: let the entries expire
+        listener.add_done_callback(lambda _: heartbeat.cancel())
+        self._tasks = [listener, heartbeat]
+        print(f"✅ Extension RPC: instance {self.instance_id[:8]} routing via Redis")
+
+    async def stop(self):
+        """Release this replica's registry entries and stop background tasks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self.redis is not None:
+            for user_id in list(self.connections):
+                await self._release_owner(user_id)
+            await self.redis.close()
+            self.redis = None
+
+    # =========================================================================
+    # Connections
+    # =========================================================================
+
+    async def register(self, user_id: str, websocket):
+        """Record a newly accepted extension socket as owned by this replica."""
+        self.connections[user_id] = websocket
+        self._send_locks.setdefault(user_id, asyncio.Lock())
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    CONNECTION_KEY.format(user_id=user_id),
+                    self.instance_id,
+                    ex=CONNECTION_TTL_SECONDS,
+                )
+            except Exception as e:
+                print(f"⚠️ Extension RPC: failed to register {user_id}: {e}")
+
+    async def unregister(self, user_id: str, websocket=None):
+        """
+        Forget a socket and fail its outstanding requests.
+
+        Args:
+            user_id: User whose socket closed
+            websocket: The closed socket; ignored if the user has since
+                reconnected with a different one
+        """
+        current = self.connections.get(user_id)
+        if current is None or (websocket is not None and current is not websocket):
+            return
+        del self.connections[user_id]
+
+        for request_id, owner in list(self._pending_users.items()):
+            if owner == user_id:
+                self._finish(request_id, {"success": False, "error": "Extension disconnected"})
+
+        if self.redis is not None:
+            await self._release_owner(user_id)
+
+    async def _release_owner(self, user_id: str):
+        try:
+            await self._release(keys=[CONNECTION_KEY.format(user_id=user_id)], args=[self.instance_id])
+        except Exception as e:
+            print(f"⚠️ Extension RPC: failed to release {user_id}: {e}")
+
+    async def owner_of(self, user_id: str) -> Optional[str]:
+        """Instance ID holding the user's socket (None if not connected)."""
+        if user_id in self.connections:
+            return self.instance_id
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.get(CONNECTION_KEY.format(user_id=user_id))
+        except Exception:
+            return None
+
+    async def is_connected(self, user_id: str) -> bool:
+        return await self.owner_of(user_id) is not None
+
+    async def connected_users(self) -> List[str]:
+        """Users with an open extension socket on any replica."""
+        users = set(self.connections)
+        if self.redis is not None:
+            try:
+                prefix = CONNECTION_KEY.format(user_id="")
+                async for key in self.redis.scan_iter(match=f"{prefix}*", count=500):
+                    users.add(key[len(prefix):])
+            except Exception as e:
+                print(f"⚠️ Extension RPC: failed to list connections: {e}")
+        return sorted(users)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            if not self.connections or not self._listening.is_set():
+                continue
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for user_id in self.connections:
+                    pipe.set(
+                        CONNECTION_KEY.format(user_id=user_id),
+                        self.instance_id,
+                        ex=CONNECTION_TTL_SECONDS,
+                    )
+                await pipe.execute()
+            except Exception as e:
+                print(f"⚠️ Extension RPC heartbeat failed: {e}")
+
+    # =========================================================================
+    # Commands
+    # =========================================================================
+
+    async def send(self, user_id: str, command: dict, timeout: float = 30) -> dict:
+        """
+        Send a command to the user's extension and wait for its response.
+
+        Args:
+            user_id: User whose extension should run the command
+            command: Command dict (a request_id is added)
+            timeout: Seconds to wait for the response
+
+        Returns:
+            Response from the extension, or {"success": False, "error": ...}
+        """
+        owner = await self.owner_of(user_id)
+        if owner is None:
+            return {"success": False, "error": "Extension not connected"}
+        if owner == self.instance_id:
+            return await self._send_local(user_id, command, timeout)
+        return await self._send_remote(owner, user_id, command, timeout)
+
+    async def _send_local(self, user_id: str, command: dict, timeout: float) -> dict:
+        semaphore = self._inflight.setdefault(user_id, asyncio.Semaphore(self.max_inflight))
+        async with semaphore:
+            websocket = self.connections.get(user_id)
+            if websocket is None:
+                return {"success": False, "error": "Extension not connected"}
+
+            request_id = str(uuid.uuid4())
+            command = {**command, "request_id": request_id}
+            future = self._expect(request_id, user_id)
+
+            try:
+                async with self._send_locks.setdefault(user_id, asyncio.Lock()):
+                    await websocket.send_json(command)
+                return await asyncio.wait_for(future, timeout=timeout)
+
+            except asyncio.TimeoutError:
+                return {
+                    "success": False,
+                    "error": f"Timeout waiting for extension response ({timeout:g}s)"
+                }
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+
+            finally:
+                self._forget(request_id)
+
+    async def _send_remote(self, owner: str, user_id: str, command: dict, timeout: float) -> dict:
+        request_id = str(uuid.uuid4())
+        future = self._expect(request_id, user_id)
+        try:
+            receivers = await self.redis.publish(
+                INSTANCE_CHANNEL.format(instance_id=owner),
+                json.dumps({
+                    "kind": "command",
+                    "request_id": request_id,
+                    "reply_to": self.instance_id,
+                    "user_id": user_id,
+                    "command": command,
+                    "timeout": timeout,
+                }),
+            )
+            if not receivers:
+                # Owner died without releasing its entry
+                await self.redis.delete(CONNECTION_KEY.format(user_id=user_id))
+                return {"success": False, "error": "Extension not connected"}
+
+            # The owner applies the timeout; allow for the trip back
+            return await asyncio.wait_for(future, timeout=timeout + 5)
+
+        except asyncio.TimeoutError:
+            return {
+                "success": False,
+                "error": f"Timeout waiting for extension response ({timeout:g}s)"
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        finally:
+            self._forget(request_id)
+
+    async def close(self, user_id: str, reason: str = "User disconnected") -> bool:
+        """Close the user's socket on whichever replica holds it."""
+        websocket = self.connections.get(user_id)
+        if websocket is not None:
+            await websocket.close(code=1000, reason=reason)
+            await self.unregister(user_id, websocket)
+            return True
+
+        owner = await self.owner_of(user_id)
+        if owner is None or owner == self.instance_id:
+            return False
+        await self.redis.publish(
+            INSTANCE_CHANNEL.format(instance_id=owner),
+            json.dumps({"kind": "close", "user_id": user_id, "reason": reason}),
+        )
+        return True
+
+    # =========================================================================
+    # Responses
+    # =========================================================================
+
+    def _expect(self, request_id: str, user_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self._pending_users[request_id] = user_id
+        return future
+
+    def _forget(self, request_id: str):
+        self.pending.pop(request_id, None)
+        self._pending_users.pop(request_id, None)
+
+    def _finish(self, request_id: str, response: dict) -> bool:
+        future = self.pending.get(request_id)
+        self._forget(request_id)
+        if future is None or future.done():
+            return False
+        future.set_result(response)
+        return True
+
+    def resolve(self, message: dict) -> bool:
+        """
+        Resolve the pending request a message from an extension answers.
+
+        Returns:
+            True if the message matched a pending request
+        """
+        return self._finish(message.get("request_id"), message)
+
+    async def _listen(self, pubsub):
+        """
+        Handle commands and responses published to this replica's channel.
+
+        If the subscription breaks (e.g. Redis restarted), the error is
+        logged and the channel is resubscribed with exponential backoff.
+        The heartbeat pauses meanwhile, so other replicas stop routing here
+        once the registry entries expire.
+        """
+        retry = LISTEN_RETRY_SECONDS
+        try:
+            while True:
+                try:
+                    if pubsub is None:
+                        pubsub = self.redis.pubsub()
+                        await pubsub.subscribe(self.channel)
+                        self._listening.set()
+                        retry = LISTEN_RETRY_SECONDS
+                        print(f"✅ Extension RPC: resubscribed to {self.channel}")
+                    await self._consume(pubsub)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._listening.clear()
+                    print(f"⚠️ Extension RPC listener failed, retrying in {retry}s: {e}")
+                    if pubsub is not None:
+                        try:
+                            await pubsub.close()
+                        except Exception:
+                            pass
+                        pubsub = None
+                    await asyncio.sleep(retry)
+                    retry = min(retry * 2, LISTEN_RETRY_MAX_SECONDS)
+        finally:
+            self._listening.clear()
+            if pubsub is not None:
+                await pubsub.close()
+
+    async def _consume(self, pubsub):
+        """Dispatch messages from a live subscription until it fails."""
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                continue
+            try:
+                payload = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+
+            kind = payload.get("kind")
+            try:
+                if kind == "response":
+                    self._finish(payload["request_id"], payload["response"])
+                elif kind == "command":
+                    asyncio.create_task(self._run_remote_command(payload))
+                elif kind == "close":
+                    asyncio.create_task(self._close_local(payload["user_id"], payload.get("reason", "")))
+            except (KeyError, TypeError) as e:
+                print(f"⚠️ Extension RPC: ignoring malformed {kind} message: {e}")
+
+    async def _run_remote_command(self, payload: dict):
+        response = await self._send_local(payload["user_id"], payload["command"], payload["timeout"])
+        try:
+            await self.redis.publish(
+                INSTANCE_CHANNEL.format(instance_id=payload["reply_to"]),
+                json.dumps({"kind": "response", "request_id": payload["request_id"], "response": response}),
+            )
+        except Exception as e:
+            print(f"⚠️ Extension RPC: failed to return response: {e}")
+
+    async def _close_local(self, user_id: str, reason: str):
+        try:
+            await self.close(user_id, reason)
+        except Exception as e:
+            print(f"⚠️ Extension RPC: failed to close {user_id}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instance_id": self.instance_id,
+            "redis": self.redis is not None,
+            "local_connections": len(self.connections),
+            "pending_requests": len(self.pending),
+        }
+
+
+# Singleton instance
+_extension_rpc: Optional[ExtensionRPC] = None
+
+
+def get_extension_rpc() -> ExtensionRPC:
+    """Get or create the extension RPC singleton."""
+    global _extension_rpc
+    if _extension_rpc is None:
+        _extension_rpc = ExtensionRPC()
+    return _extension_rpc
@@ -62,97 +62,20 @@ class FollowerBasedDiscovery:
         await asyncio.sleep(3)
 
         followers = []
-        seen_usernames = set()
-        scroll_count = 0
         max_scrolls = 50  # More scrolls to get more followers
 
-        while len(followers) < max_count and scroll_count < max_scrolls:
-            dom_result = await self.client._request("GET", "/dom/elements")
-            if not dom_result.get("success"):
-                break
-
-            new_accounts = self._extract_follower_info(dom_result)
-
-            for account in new_accounts:
-                username_key = account['username']
-                if username_key not in seen_usernames:
-                    seen_usernames.add(username_key)
-                    followers.append(account)
-
-            if len(followers) >= max_count:
-                break
-
-            # Scroll to load more
-            await self.client._request("POST", "/scroll", {
-                "x": 500, "y": 800, "scroll_x": 0, "scroll_y": 5
-            })
-            scroll_count += 1
-            await asyncio.sleep(1.5)
+        # Scroll and collect user rows (deduped server-side, waits for renders)
+        async for users in self.client.collect("users", target=max_count, max_scrolls=max_scrolls):
+            followers.extend(
+                # Follower counts aren't shown on list rows; 0 = unknown
+                {"username": u["username"], "follower_count": 0}
+                for u in users
+                if u["username"].lower() != username.lower()
+            )
 
         print(f"      ✅ Got {len(followers)} followers")
         return followers[:max_count]
 
-    def _extract_follower_info(self, dom_result: Dict) -> List[Dict]:
-        """
-        Extract follower usernames and basic info from DOM.
-        Returns list of dicts with username and estimated follower_count.
-        """
-        followers = []
-        elements = dom_result.get("elements", [])
-        excluded = {"home", "explore", "notifications", "messages", "compose", "i", "settings", "search"}
-
-        # Look for follower count patterns in text
-        for el in elements:
-            # Extract username from href
-            href = el.get("href", "")
-            if href.startswith("/") and len(href) > 1:
-                username = href[1:].split("/")[0]  # Get username before any /status or /photo
-                if username and "/" not in username and username not in excluded:
-                    # Try to find follower count nearby in text
-                    text = el.get("text", "")
-                    follower_count = self._extract_follower_count(text)
-
-                    followers.append({
-                        "username": username,
-                        "follower_count": follower_count
-                    })
-
-            # Also check @mentions
-            text = el.get("text", "")
-            if text.startswith("@"):
-                username = text[1:].split()[0]
-                if username and username not in excluded:
-                    followers.append({
-                        "username": username,
-                        "follower_count": 0  # Unknown
-                    })
-
-        return followers
-
-    def _extract_follower_count(self, text: str) -> int:
-        """
-        Try to extract follower count from text.
-        Looks for patterns like "1.2K followers" or "500 Followers".
-        """
-        import re
-
-        # Pattern: number followed by K/M and "follower"
-        pattern = r'([\d.]+)\s*([KkMm])?\s*[Ff]ollowers?'
-        match = re.search(pattern, text)
-
-        if match:
-            num = float(match.group(1))
-            multiplier = match.group(2)
-
-            if multiplier and multiplier.upper() == 'K':
-                return int(num * 1000)
-            elif multiplier and multiplier.upper() == 'M':
-                return int(num * 1000000)
-            else:
-                return int(num)
-
-        return 0  # Unknown
-
     async def get_following_list(
         self,
         username: str,
@@ -174,53 +97,15 @@ class FollowerBasedDiscovery:
         await asyncio.sleep(2)
 
         following = []
-        scroll_count = 0
         max_scrolls = 50  # Increased from 10 to 50 to get ~1000 accounts
 
-        while len(following) < max_count and scroll_count < max_scrolls:
-            dom_result = await self.client._request("GET", "/dom/elements")
-            if not dom_result.get("success"):
-                break
-
-            new_accounts = self._extract_usernames(dom_result)
-            for account in new_accounts:
-                if account not in following:
-                    following.append(account)
-
-            if len(following) >= max_count:
-                break
-
-            await self.client._request("POST", "/scroll", {
-                "x": 500, "y": 800, "scroll_x": 0, "scroll_y": 5
-            })
-            scroll_count += 1
-            await asyncio.sleep(1)
+        async for users in self.client.collect("users", target=max_count, max_scrolls=max_scrolls):
+            following.extend(u["username"] for u in users if u["username"].lower() != username.lower())
 
         result_set = set(following[:max_count])
         print(f"         ✅ Got {len(result_set)} accounts")
         return result_set
 
-    def _extract_usernames(self, dom_result: Dict) -> List[str]:
-        """Extract usernames from DOM."""
-        usernames = []
-        elements = dom_result.get("elements", [])
-        excluded = {"home", "explore", "notifications", "messages", "compose", "i", "settings", "search"}
-
-        for el in elements:
-            href = el.get("href", "")
-            if href.startswith("/") and len(href) > 1:
-                username = href[1:].split("/")[0]
-                if username and username not in excluded:
-                    usernames.append(username)
-
-            text = el.get("text", "")
-            if text.startswith("@"):
-                username = text[1:].split()[0]
-                if username and username not in excluded:
-                    usernames.append(username)
-
-        return list(set(usernames))
-
     def calculate_overlap(
         self,
         user_following: Set[str],
@@ -22,7 +22,8 @@ Usage:
 import asyncio
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
-import re
+
+from x_tweet_parser import fetch_tweets, scrape_job
 
 
 class HistoricalDataImporter:
@@ -70,6 +71,7 @@ class HistoricalDataImporter:
         result = await self.client._request("POST", "/playwright/evaluate", {"script": script})
         return result.get("result")
 
+    @scrape_job
     async def import_posts(
         self,
         max_posts: int = 100,
@@ -112,7 +114,7 @@ class HistoricalDataImporter:
             print(f"📥 Importing posts for @{username}...")
 
             # Navigate to profile posts tab
-            await self.client._request("POST", "/navigate", {"url": f"https://x.com/{username}"})
+            await self.client._request("POST", "/navigate", {"url": f"https://x.com/{username}", "profile": "scrape"})
             await asyncio.sleep(3)
 
             imported_urls = set()
@@ -202,6 +204,7 @@ class HistoricalDataImporter:
         finally:
             db.close()
 
+    @scrape_job
     async def import_comments(
         self,
         max_comments: int = 100,
@@ -244,7 +247,7 @@ class HistoricalDataImporter:
             print(f"📥 Importing comments/replies for @{username}...")
 
             # Navigate to profile replies tab
-            await self.client._request("POST", "/navigate", {"url": f"https://x.com/{username}/with_replies"})
+            await self.client._request("POST", "/navigate", {"url": f"https://x.com/{username}/with_replies", "profile": "scrape"})
             await asyncio.sleep(3)
 
             imported_urls = set()
@@ -362,166 +365,44 @@ class HistoricalDataImporter:
         }
 
     async def _extract_posts_from_page(self, username: str) -> List[Dict[str, Any]]:
-        """Extract posts from the current page view."""
-        script = f'''(() => {{
-            const posts = [];
-            const articles = document.querySelectorAll('article[data-testid="tweet"]');
-
-            for (const article of articles) {{
-                // Check if this is user's own post (not a retweet)
-                const userLink = article.querySelector('a[href="/{username}"]');
-                if (!userLink) continue;
-
-                // Skip retweets (check for both "reposted" and "retweeted")
-                const retweetIndicator = article.querySelector('[data-testid="socialContext"]');
-                if (retweetIndicator) {{
-                    const indicatorText = retweetIndicator.innerText.toLowerCase();
-                    if (indicatorText.includes('reposted') || indicatorText.includes('retweeted')) continue;
-                }}
-
-                // Get content
-                const contentEl = article.querySelector('[data-testid="tweetText"]');
-                const content = contentEl ? contentEl.innerText : '';
-
-                // Also skip RT @ style retweets
-                if (content.startsWith('RT @')) continue;
-
-                // Get URL
-                const timeLink = article.querySelector('time')?.parentElement;
-                const url = timeLink ? 'https://x.com' + timeLink.getAttribute('href') : null;
-
-                // Get timestamp
-                const timeEl = article.querySelector('time');
-                const datetime = timeEl ? timeEl.getAttribute('datetime') : null;
-
-                // Helper to parse engagement numbers like "1,234", "1.2K", "12K", "1.5M"
-                const parseEngagementNum = (label) => {{
-                    if (!label) return 0;
-                    const match = label.match(/([\\d,.]+)\\s*([KkMm])?/);
-                    if (!match) return 0;
-                    let num = parseFloat(match[1].replace(/,/g, ''));
-                    const suffix = match[2]?.toUpperCase();
-                    if (suffix === 'K') num *= 1000;
-                    else if (suffix === 'M') num *= 1000000;
-                    return Math.round(num);
-                }};
-
-                // Get engagement counts
-                const getCount = (testId) => {{
-                    const btn = article.querySelector(`[data-testid="${{testId}}"]`);
-                    if (!btn) return 0;
-                    const label = btn.getAttribute('aria-label') || '';
-                    return parseEngagementNum(label);
-                }};
-
-                if (url && content) {{
-                    posts.push({{
-                        content,
-                        url,
-                        posted_at: datetime,
-                        likes: getCount('like'),
-                        retweets: getCount('retweet'),
-                        replies: getCount('reply')
-                    }});
-                }}
-            }}
-
-            return posts;
-        }})()'''
-
-        result = await self.client._request("POST", "/playwright/evaluate", {"script": script})
-        return result.get("result", []) if result.get("success") else []
+        """Extract the user's own posts (not reposts) from the current page view."""
+        tweets = await fetch_tweets(self.client, author=username)
+
+        return [
+            {
+                "content": tweet.text,
+                "url": tweet.url,
+                "posted_at": tweet.timestamp,
+                "likes": tweet.likes,
+                "retweets": tweet.retweets,
+                "replies": tweet.replies
+            }
+            for tweet in tweets
+            if tweet.text and not tweet.is_repost
+        ]
 
     async def _extract_replies_from_page(self, username: str) -> List[Dict[str, Any]]:
         """Extract replies/comments from the current page view."""
-        # Use case-insensitive matching for username
-        script = f'''(() => {{
-            const replies = [];
-            const articles = document.querySelectorAll('article[data-testid="tweet"]');
-            const targetUsername = "{username}".toLowerCase();
-
-            for (const article of articles) {{
-                // Check if this is user's tweet (case-insensitive)
-                const allLinks = article.querySelectorAll('a[href^="/"]');
-                let isUsersTweet = false;
-                for (const link of allLinks) {{
-                    const href = link.getAttribute('href') || '';
-                    if (href.toLowerCase() === '/' + targetUsername) {{
-                        isUsersTweet = true;
-                        break;
-                    }}
-                }}
-                if (!isUsersTweet) continue;
-
-                // Check if it's a reply - look for reply context or "Replying to" in any form
-                // On the with_replies page, replies show a thread indicator or parent tweet
-                const hasReplyContext = article.querySelector('[data-testid="Tweet-User-Avatar-Container"]');
-                const replyingToText = article.innerText.match(/Replying to|replying to|Reply to/i);
-                const socialContext = article.querySelector('[data-testid="socialContext"]');
-
-                // On with_replies page, we want ALL tweets (including replies shown in context)
-                // The page itself filters to show replies, so we just extract everything by this user
-
-                // Get content
-                const contentEl = article.querySelector('[data-testid="tweetText"]');
-                const content = contentEl ? contentEl.innerText : '';
-
-                // Get URL
-                const timeLink = article.querySelector('time')?.parentElement;
-                const url = timeLink ? 'https://x.com' + timeLink.getAttribute('href') : null;
-
-                // Get timestamp
-                const timeEl = article.querySelector('time');
-                const datetime = timeEl ? timeEl.getAttribute('datetime') : null;
-
-                // Try to get who we're replying to from various sources
-                let replyToAuthor = null;
-                const replyMatch = article.innerText.match(/Replying to\\s*(@\\w+)/i);
-                if (replyMatch) {{
-                    replyToAuthor = replyMatch[1].slice(1);
-                }}
-
-                // Helper to parse engagement numbers like "1,234", "1.2K", "12K", "1.5M"
-                const parseEngagementNum = (label) => {{
-                    if (!label) return 0;
-                    const match = label.match(/([\\d,.]+)\\s*([KkMm])?/);
-                    if (!match) return 0;
-                    let num = parseFloat(match[1].replace(/,/g, ''));
-                    const suffix = match[2]?.toUpperCase();
-                    if (suffix === 'K') num *= 1000;
-                    else if (suffix === 'M') num *= 1000000;
-                    return Math.round(num);
-                }};
-
-                // Get engagement counts
-                const getCount = (testId) => {{
-                    const btn = article.querySelector(`[data-testid="${{testId}}"]`);
-                    if (!btn) return 0;
-                    const label = btn.getAttribute('aria-label') || '';
-                    return parseEngagementNum(label);
-                }};
-
-                if (url && content) {{
-                    replies.push({{
-                        content,
-                        url,
-                        posted_at: datetime,
-                        reply_to_author: replyToAuthor,
-                        reply_to_url: null,
-                        reply_to_content: null,
-                        likes: getCount('like'),
-                        retweets: getCount('retweet'),
-                        replies: getCount('reply'),
-                        is_reply: !!replyingToText || !!replyToAuthor
-                    }});
-                }}
-            }}
-
-            return replies;
-        }})()'''
-
-        result = await self.client._request("POST", "/playwright/evaluate", {"script": script})
-        return result.get("result", []) if result.get("success") else []
+        # On the with_replies page, we want ALL tweets by this user (the page
+        # itself filters to show replies, with parent tweets in context)
+        tweets = await fetch_tweets(self.client, author=username)
+
+        return [
+            {
+                "content": tweet.text,
+                "url": tweet.url,
+                "posted_at": tweet.timestamp,
+                "reply_to_author": tweet.replying_to,
+                "reply_to_url": None,
+                "reply_to_content": None,
+                "likes": tweet.likes,
+                "retweets": tweet.retweets,
+                "replies": tweet.replies,
+                "is_reply": bool(tweet.replying_to)
+            }
+            for tweet in tweets
+            if tweet.text
+        ]
 
 
 async def run_historical_import(cua_client, user_id: str, max_posts: int = 100, max_comments: int = 100) -> Dict[str, Any]:
@@ -170,7 +170,7 @@ async def get_timeline_posts(
         # Create client and scrape timeline
         from timeline_feed_scraper import TimelineFeedScraper, get_following_timeline_posts
 
-        client = get_client_for_url(vnc_url)
+        client = get_client_for_url(vnc_url, session_key=clerk_user_id)
         posts = await get_following_timeline_posts(
             browser_client=client,
             max_posts=max_posts,
@@ -0,0 +1,18 @@
+-- Ads Metrics Unique Day Migration
+-- Removes duplicate daily metrics rows and adds the unique key used by the
+-- bulk INSERT ... ON CONFLICT (campaign_id, date) upsert in the metrics sync
+-- Run via: psql $DATABASE_URL -f migrations/add_ads_metrics_unique.sql
+
+BEGIN;
+
+-- Keep the most recently synced row for each campaign/day
+DELETE FROM ads_metrics am
+USING ads_metrics newer
+WHERE am.campaign_id = newer.campaign_id
+  AND am.date = newer.date
+  AND am.id < newer.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_ads_metrics_campaign_date
+    ON ads_metrics(campaign_id, date);
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Conversion Event CAPI Attempts Migration
+-- Counts rejected CAPI syncs per event so a permanently invalid event is
+-- skipped instead of blocking the rest of the user's pending events
+-- Run via: psql $DATABASE_URL -f migrations/add_conversion_event_capi_attempts.sql
+
+ALTER TABLE conversion_events ADD COLUMN IF NOT EXISTS capi_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE conversion_events ADD COLUMN IF NOT EXISTS capi_error TEXT;
+
+-- sync_pending_events selects a user's unsynced, not-abandoned events in id order
+CREATE INDEX IF NOT EXISTS idx_conversion_events_capi_pending
+    ON conversion_events(user_id, id)
+    WHERE capi_synced_at IS NULL;
@@ -0,0 +1,29 @@
+-- Feature Usage Unique Period Migration
+-- Merges duplicate per-period usage rows and adds the unique key used by the
+-- atomic INSERT ... ON CONFLICT increment in BillingService
+-- Run via: psql $DATABASE_URL -f migrations/add_feature_usage_unique.sql
+
+BEGIN;
+
+-- Fold duplicates (created by concurrent first increments) into the oldest row
+UPDATE feature_usage fu
+SET count = totals.total
+FROM (
+    SELECT MIN(id) AS keep_id, SUM(count) AS total
+    FROM feature_usage
+    GROUP BY user_id, feature, period_start
+    HAVING COUNT(*) > 1
+) totals
+WHERE fu.id = totals.keep_id;
+
+DELETE FROM feature_usage fu
+USING feature_usage keep
+WHERE fu.user_id = keep.user_id
+  AND fu.feature = keep.feature
+  AND fu.period_start = keep.period_start
+  AND fu.id > keep.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_feature_usage_user_feature_period
+    ON feature_usage(user_id, feature, period_start);
+
+COMMIT;
@@ -0,0 +1,11 @@
+-- Work Integrations Polling Cursor Migration
+-- Adds per-integration change cursors and jittered poll schedule for Notion/Figma
+-- Run via: psql $DATABASE_URL -f migrations/add_work_integration_poll_cursor.sql
+
+ALTER TABLE work_integrations ADD COLUMN IF NOT EXISTS poll_cursor JSONB DEFAULT '{}'::jsonb;
+ALTER TABLE work_integrations ADD COLUMN IF NOT EXISTS next_poll_at TIMESTAMP;
+
+-- The poller only selects integrations that are due
+CREATE INDEX IF NOT EXISTS idx_work_integrations_next_poll_at
+    ON work_integrations(next_poll_at)
+    WHERE platform IN ('notion', 'figma');
@@ -3,13 +3,16 @@ Optimal Posting Times Analytics Module
 
 Combines industry best practices with your historical engagement data
 to determine the best times to schedule X posts.
+
+Historical data comes from the precomputed per-account weekday x hour
+heatmaps (database.posting_heatmap), read once per analyzer and user.
 """
 
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from database import ScheduledPost, UserPost, XAccount
+from database import ScheduledPost, XAccount
+from database.posting_heatmap import HeatmapCells, cell_index, engagement_score, load_heatmap
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,68 +57,68 @@ class OptimalPostingTimesAnalyzer:
 
     def __init__(self, db: Session):
         self.db = db
+        # Heatmaps per user_id, loaded once per analyzer
+        self._heatmaps: Dict[str, HeatmapCells] = {}
 
     def calculate_engagement_score(self, likes: int, retweets: int, replies: int) -> float:
         """
         Calculate weighted engagement score
         Replies are weighted highest (3x), retweets medium (2x), likes baseline (1x)
         """
-        return (likes or 0) + (retweets or 0) * 2 + (replies or 0) * 3
+        return engagement_score(likes, retweets, replies)
+
+    def get_heatmap(self, user_id: str) -> HeatmapCells:
+        """
+        Combined weekday x hour engagement heatmap of the user's X accounts
+
+        Loaded from the precomputed heatmaps once and cached on the analyzer,
+        so scheduling a week of posts costs two small queries.
+        """
+        if user_id not in self._heatmaps:
+            x_account_ids = [
+                row.id for row in self.db.query(XAccount.id).filter(XAccount.user_id == user_id).all()
+            ]
+            if not x_account_ids:
+                logger.warning(f"No X accounts found for user {user_id}")
+            self._heatmaps[user_id] = load_heatmap(self.db, x_account_ids)
+        return self._heatmaps[user_id]
 
     def get_historical_best_times(
         self,
         user_id: str,
-        min_posts_threshold: int = 2
+        min_posts_threshold: int = 1
     ) -> Dict[int, List[Tuple[int, float]]]:
         """
         Analyze user's historical posts to find their best performing hours
 
+        Scores are Bayesian-smoothed: each hour's average is shrunk toward the
+        account-wide average, so an hour with one lucky post doesn't outrank
+        hours with a steady record.
+
         Args:
             user_id: The user's ID
             min_posts_threshold: Minimum number of posts in an hour to consider it valid
 
         Returns:
-            Dict mapping day_of_week (0-6) to list of (hour, avg_engagement_score) tuples
+            Dict mapping day_of_week (0-6, Monday = 0) to list of
+            (hour, smoothed_engagement_score) tuples
         """
-        # Get user's X accounts
-        x_accounts = self.db.query(XAccount).filter(XAccount.user_id == user_id).all()
-        if not x_accounts:
-            logger.warning(f"No X accounts found for user {user_id}")
+        heatmap = self.get_heatmap(user_id)
+        if heatmap.is_empty():
             return {}
 
-        x_account_ids = [acc.id for acc in x_accounts]
-
-        # Query engagement by day of week and hour
-        results = self.db.query(
-            extract('dow', UserPost.posted_at).label('day_of_week'),
-            extract('hour', UserPost.posted_at).label('hour'),
-            func.count(UserPost.id).label('post_count'),
-            func.avg(
-                (func.coalesce(UserPost.likes, 0) +
-                 func.coalesce(UserPost.retweets, 0) * 2 +
-                 func.coalesce(UserPost.replies, 0) * 3)
-            ).label('avg_engagement')
-        ).filter(
-            UserPost.x_account_id.in_(x_account_ids),
-            UserPost.posted_at.isnot(None)
-        ).group_by(
-            extract('dow', UserPost.posted_at),
-            extract('hour', UserPost.posted_at)
-        ).having(
-            func.count(UserPost.id) >= min_posts_threshold
-        ).all()
+        prior_mean = heatmap.overall_mean()
 
         # Organize by day of week
         best_times_by_day = {}
-        for row in results:
-            day_of_week = int(row.day_of_week)
-            hour = int(row.hour)
-            avg_engagement = float(row.avg_engagement)
-
-            if day_of_week not in best_times_by_day:
-                best_times_by_day[day_of_week] = []
-
-            best_times_by_day[day_of_week].append((hour, avg_engagement))
+        for day_of_week in range(7):
+            for hour in range(24):
+                index = cell_index(day_of_week, hour)
+                if heatmap.counts[index] < max(1, min_posts_threshold):
+                    continue
+                best_times_by_day.setdefault(day_of_week, []).append(
+                    (hour, heatmap.smoothed_mean(index, prior_mean))
+                )
 
         # Sort each day's hours by engagement score (descending)
         for day in best_times_by_day:
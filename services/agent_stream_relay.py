@@ -0,0 +1,246 @@
+"""
+Agent Stream Relay
+
+Relays streamed LLM text to a client WebSocket as AGENT_TOKEN frames.
+
+LangGraph's "messages" stream mode sends the whole partial message on every
+chunk. Rebuilding the full text per chunk and diffing it against the last
+one is O(n²) over an answer, and sending one frame per token means
+thousands of tiny frames. The relay instead:
+- tracks how much of each text block was already sent and only slices the
+  new tail (no full-text rebuild or prefix comparison)
+- coalesces deltas into one frame per flush window (FLUSH_INTERVAL_SECONDS
+  or FLUSH_MAX_BYTES, whichever comes first; the first delta of a message
+  goes out immediately so time-to-first-token is unchanged)
+- awaits sends, so a slow socket slows the stream loop instead of growing
+  an unbounded backlog
+
+Frames keep the existing shape: {"type": "AGENT_TOKEN", "token": "..."}.
+
+Usage:
+    relay = TokenStreamRelay(lambda: active_connections.get(user_id))
+    async for chunk in stream:
+        await relay.feed(message_dict)
+    await relay.close()
+    print(relay.summary())
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Flush window for coalescing deltas into one frame
+FLUSH_INTERVAL_SECONDS = 0.03
+FLUSH_MAX_BYTES = 512
+
+
+class TokenStreamRelay:
+    """Incremental delta extraction and coalesced sending for one run."""
+
+    def __init__(
+        self,
+        get_socket: Callable[[], Any],
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_bytes: int = FLUSH_MAX_BYTES,
+    ):
+        """
+        Args:
+            get_socket: Returns the client's current WebSocket (or None);
+                looked up per frame so reconnects mid-run are picked up
+            flush_interval: Max seconds a delta waits before being sent
+            max_bytes: Send as soon as this many bytes are pending
+        """
+        self.get_socket = get_socket
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+
+        # Current message: ID and characters already seen per text block
+        self._message_id: Optional[str] = None
+        self._block_lengths: List[int] = []
+        self._parts: List[str] = []
+
+        # Deltas waiting for the next frame
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+        # Stats
+        self.message_count = 0
+        self.chunks = 0
+        self.frames = 0
+        self.bytes_sent = 0
+        self.chars = 0
+        self.send_errors = 0
+        self.cpu_seconds = 0.0
+        self._started = time.monotonic()
+        self._first_frame_at: Optional[float] = None
+        self._last_frame_at: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        """Full text of the current (last) message."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    # =========================================================================
+    # Delta extraction
+    # =========================================================================
+
+    @staticmethod
+    def _text_blocks(content: Any) -> List[str]:
+        if isinstance(content, str):
+            return [content]
+        if isinstance(content, list):
+            return [
+                block.get("text", "")
+                for block in content
+                if isinstance(block, dict) and block.get("type") == "text"
+            ]
+        return []
+
+    def _extract(self, message: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        New text in a partial message since the last chunk.
+
+        Returns:
+            (delta, whether the delta starts a new message)
+        """
+        blocks = self._text_blocks(message.get("content"))
+        if not blocks:
+            return "", False
+
+        message_id = message.get("id")
+        is_new = (
+            (message_id is not None and message_id != self._message_id)
+            or len(blocks) < len(self._block_lengths)
+            or any(len(text) < seen for text, seen in zip(blocks, self._block_lengths))
+        )
+        if is_new:
+            # A different message: start over and send all of it
+            self._message_id = message_id
+            self._block_lengths = []
+            self._parts = []
+
+        deltas = []
+        for i, text in enumerate(blocks):
+            seen = self._block_lengths[i] if i < len(self._block_lengths) else 0
+            if len(text) > seen:
+                deltas.append(text[seen:])
+            if i < len(self._block_lengths):
+                self._block_lengths[i] = len(text)
+            else:
+                self._block_lengths.append(len(text))
+
+        delta = "".join(deltas)
+        starts_message = bool(delta) and not self._parts
+        if delta:
+            if starts_message:
+                self.message_count += 1
+            self._parts.append(delta)
+        return delta, starts_message
+
+    # =========================================================================
+    # Sending
+    # =========================================================================
+
+    async def feed(self, message: Dict[str, Any]):
+        """Process one partial message chunk from the stream."""
+        cpu_start = time.thread_time()
+        self.chunks += 1
+        delta, starts_message = self._extract(message)
+        if delta:
+            self._pending.append(delta)
+            self._pending_bytes += len(delta.encode("utf-8"))
+            self.chars += len(delta)
+        self.cpu_seconds += time.thread_time() - cpu_start
+        if not delta:
+            return
+
+        if starts_message or self._pending_bytes >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.flush_interval, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        if self._pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        """Send all pending deltas as one frame."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._send_lock:
+            if not self._pending:
+                return
+            token = "".join(self._pending)
+            size = self._pending_bytes
+            self._pending = []
+            self._pending_bytes = 0
+
+            websocket = self.get_socket()
+            if websocket is None:
+                return
+            try:
+                await websocket.send_json({"type": "AGENT_TOKEN", "token": token})
+            except Exception as e:
+                self.send_errors += 1
+                if self.send_errors == 1:
+                    print(f"⚠️ Failed to send WebSocket update: {e}")
+                return
+
+            now = time.monotonic()
+            self._first_frame_at = self._first_frame_at or now
+            self._last_frame_at = now
+            self.frames += 1
+            self.bytes_sent += size
+
+    async def close(self):
+        """Send whatever is still pending."""
+        await self.flush()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+
+    def discard(self):
+        """Drop pending deltas without sending (run failed or was cancelled)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending = []
+        self._pending_bytes = 0
+
+    # =========================================================================
+    # Stats
+    # =========================================================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frames, bytes and relay CPU time for this run."""
+        if self._first_frame_at and self._last_frame_at and self._last_frame_at > self._first_frame_at:
+            frames_per_second = (self.frames - 1) / (self._last_frame_at - self._first_frame_at)
+        else:
+            frames_per_second = 0.0
+        return {
+            "chunks": self.chunks,
+            "frames": self.frames,
+            "frames_per_second": round(frames_per_second, 1),
+            "bytes": self.bytes_sent,
+            "chars": self.chars,
+            "messages": self.message_count,
+            "relay_cpu_ms": round(self.cpu_seconds * 1000, 2),
+            "duration_seconds": round(time.monotonic() - self._started, 2),
+            "send_errors": self.send_errors,
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        return (
+            f"📤 Streamed {stats['chars']:,} chars from {stats['chunks']} chunks in "
+            f"{stats['frames']} frames ({stats['frames_per_second']} frames/s, "
+            f"{stats['bytes'] / 1024:.1f} KB, relay CPU {stats['relay_cpu_ms']} ms)"
+        )
@@ -2,11 +2,23 @@
 Billing Service
 
 Handles subscription management, credit tracking, and feature gating.
+
+Metering is atomic:
+- Credit consumption is a single UPDATE ... RETURNING on credit_balances,
+  with its CreditTransaction audit row inserted in the same transaction
+- Feature usage is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+- Plan/status lookups for gating are cached per user and invalidated
+  whenever a Stripe webhook changes the subscription
 """
 import logging
+import os
+import threading
+import time
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from typing import Optional, Dict, Any, Tuple
+from sqlalchemy import select, update, func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from database.models import User, Subscription, CreditBalance, CreditTransaction, FeatureUsage
@@ -14,6 +26,58 @@ from services.stripe_service import PLAN_CREDITS, PLAN_LIMITS, CREDIT_COSTS
 
 logger = logging.getLogger(__name__)
 
+# Subscription statuses that count as having a subscription
+BILLABLE_STATUSES = ["active", "past_due", "trialing"]
+
+# Seconds a cached plan is trusted (bounds staleness in other processes)
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("BILLING_PLAN_CACHE_TTL", "60"))
+
+
+# =============================================================================
+# Plan Cache
+# =============================================================================
+
+
+class _PlanCache:
+    """
+    Per-user cache of subscription plan and status for feature gating.
+
+    Entries expire after PLAN_CACHE_TTL_SECONDS and are dropped immediately
+    when BillingService changes a subscription (Stripe webhooks).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str):
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return _MISSING
+
+    def set(self, user_id: str, value: Optional[Dict[str, Any]]):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+
+_MISSING = object()
+_plan_cache = _PlanCache(PLAN_CACHE_TTL_SECONDS)
+
+
+def invalidate_plan_cache(user_id: Optional[str] = None):
+    """Drop cached plan info for a user (or everyone)."""
+    _plan_cache.invalidate(user_id)
+
 
 class BillingService:
     """
@@ -36,8 +100,28 @@ class BillingService:
         """
         return self.db.query(Subscription).filter(
             Subscription.user_id == user_id,
-            Subscription.status.in_(["active", "past_due", "trialing"])
-        ).first()
+            Subscription.status.in_(BILLABLE_STATUSES)
+        ).order_by(Subscription.id.desc()).first()
+
+    def _get_plan(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the user's plan and status, cached for gating checks.
+
+        Returns:
+            {"plan", "status"} or None without a subscription
+        """
+        cached = _plan_cache.get(user_id)
+        if cached is not _MISSING:
+            return cached
+
+        row = self.db.query(Subscription.plan, Subscription.status).filter(
+            Subscription.user_id == user_id,
+            Subscription.status.in_(BILLABLE_STATUSES)
+        ).order_by(Subscription.id.desc()).first()
+
+        plan = {"plan": row.plan, "status": row.status} if row else None
+        _plan_cache.set(user_id, plan)
+        return plan
 
     def has_active_subscription(self, user_id: str) -> bool:
         """
@@ -92,15 +176,15 @@ class BillingService:
         Returns:
             Tuple of (has_access: bool, reason: str)
         """
-        subscription = self.get_subscription(user_id)
+        subscription = self._get_plan(user_id)
 
         if not subscription:
             return False, "No active subscription. Please subscribe to access this feature."
 
-        if subscription.status == "past_due":
+        if subscription["status"] == "past_due":
             return False, "Your payment is past due. Please update your payment method."
 
-        limits = PLAN_LIMITS.get(subscription.plan, {})
+        limits = PLAN_LIMITS.get(subscription["plan"], {})
 
         # Boolean features (like CRM access)
         if feature in limits and isinstance(limits[feature], bool):
@@ -112,7 +196,7 @@ class BillingService:
         limit = limits.get(feature, 0)
 
         if limit == 0:
-            plan_name = subscription.plan.replace("_", " ").title()
+            plan_name = subscription["plan"].replace("_", " ").title()
             return False, f"This feature is not included in your {plan_name} plan. Please upgrade."
 
         if limit == -1:  # Unlimited
@@ -151,6 +235,8 @@ class BillingService:
         """
         Increment usage counter for a feature.
 
+        One atomic upsert, so concurrent increments never lose updates.
+
         Args:
             user_id: Clerk user ID
             feature: Feature identifier
@@ -162,28 +248,28 @@ class BillingService:
         today = date.today()
         period_start = today.replace(day=1)
         period_end = (period_start + relativedelta(months=1)) - relativedelta(days=1)
+        now = datetime.utcnow()
 
-        usage = self.db.query(FeatureUsage).filter(
-            FeatureUsage.user_id == user_id,
-            FeatureUsage.feature == feature,
-            FeatureUsage.period_start == period_start,
-        ).first()
-
-        if usage:
-            usage.count += count
-            usage.updated_at = datetime.utcnow()
-        else:
-            usage = FeatureUsage(
-                user_id=user_id,
-                feature=feature,
-                count=count,
-                period_start=period_start,
-                period_end=period_end,
-            )
-            self.db.add(usage)
-
+        stmt = pg_insert(FeatureUsage).values(
+            user_id=user_id,
+            feature=feature,
+            count=count,
+            period_start=period_start,
+            period_end=period_end,
+            created_at=now,
+            updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "feature", "period_start"],
+            set_={
+                "count": FeatureUsage.count + stmt.excluded.count,
+                "updated_at": now,
+            },
+        ).returning(FeatureUsage.count)
+
+        new_count = self.db.execute(stmt).scalar_one()
         self.db.commit()
-        return usage.count
+        return new_count
 
     def get_credit_balance(self, user_id: str) -> Dict[str, Any]:
         """
@@ -255,6 +341,13 @@ class BillingService:
         """
         Consume credits for an action.
 
+        The balance is updated by a single UPDATE ... RETURNING, so
+        concurrent agent tool calls can't lose updates. Purchased credits are
+        used first, then the monthly allocation, and anything beyond both is
+        recorded as overage (billed via Stripe metered billing). The
+        CreditTransaction audit row is inserted in the same transaction, so
+        a balance change is never committed without it.
+
         Args:
             user_id: Clerk user ID
             credits: Number of credits to consume
@@ -265,44 +358,53 @@ class BillingService:
         Returns:
             Tuple of (success: bool, reason: str)
         """
-        subscription = self.get_subscription(user_id)
-
-        if not subscription or not subscription.credit_balance:
-            return False, "No active subscription"
-
-        balance = subscription.credit_balance
-        available = (
-            balance.monthly_allocation - balance.credits_used +
-            balance.credits_purchased
+        # All expressions see the pre-update row
+        from_purchased = func.least(CreditBalance.credits_purchased, credits)
+        from_allocation = func.least(
+            credits - from_purchased,
+            func.greatest(CreditBalance.monthly_allocation - CreditBalance.credits_used, 0),
+        )
+        overage = credits - from_purchased - from_allocation
+
+        # Same subscription get_subscription returns (newest billable one)
+        subscription_id = (
+            select(Subscription.id)
+            .where(
+                Subscription.user_id == user_id,
+                Subscription.status.in_(BILLABLE_STATUSES),
+            )
+            .order_by(Subscription.id.desc())
+            .limit(1)
+            .scalar_subquery()
         )
 
-        if available < credits:
-            # Record as overage (will be billed via Stripe metered billing)
-            overage = credits - available
-            balance.overage_credits += overage
-            balance.credits_used = balance.monthly_allocation
-            balance.credits_purchased = 0  # Use up purchased credits first
-        else:
-            # First use purchased credits, then monthly allocation
-            if balance.credits_purchased >= credits:
-                balance.credits_purchased -= credits
-            else:
-                remaining = credits - balance.credits_purchased
-                balance.credits_purchased = 0
-                balance.credits_used += remaining
+        stmt = (
+            update(CreditBalance)
+            .where(CreditBalance.subscription_id == subscription_id)
+            .values(
+                credits_purchased=CreditBalance.credits_purchased - from_purchased,
+                credits_used=CreditBalance.credits_used + from_allocation,
+                overage_credits=CreditBalance.overage_credits + overage,
+                updated_at=datetime.utcnow(),
+            )
+            .returning(CreditBalance.overage_credits)
+        )
 
-        balance.updated_at = datetime.utcnow()
+        row = self.db.execute(stmt).first()
+        if row is None:
+            self.db.rollback()
+            return False, "No active subscription"
 
         # Record transaction
-        transaction = CreditTransaction(
+        self.db.execute(insert(CreditTransaction).values(
             user_id=user_id,
             transaction_type="usage",
             credits=-credits,
             description=description,
             endpoint=endpoint,
             agent_type=agent_type,
-        )
-        self.db.add(transaction)
+            created_at=datetime.utcnow(),
+        ))
         self.db.commit()
 
         logger.info(f"Consumed {credits} credits for user {user_id}: {description}")
@@ -446,8 +548,6 @@ class BillingService:
         Returns:
             Dict with credits used per agent type
         """
-        from sqlalchemy import func
-
         # Query credit transactions grouped by agent_type
         results = self.db.query(
             CreditTransaction.agent_type,
@@ -554,6 +654,7 @@ class BillingService:
         self.db.add(transaction)
 
         self.db.commit()
+        invalidate_plan_cache(user_id)
         logger.info(f"Created subscription for user {user_id}: {plan}")
         return subscription
 
@@ -612,6 +713,7 @@ class BillingService:
             subscription.cancel_at_period_end = cancel_at_period_end
 
         self.db.commit()
+        invalidate_plan_cache(subscription.user_id)
         logger.info(f"Updated subscription {stripe_subscription_id}: status={status}")
         return subscription
 
@@ -642,6 +744,7 @@ class BillingService:
             user.plan = "free"
 
         self.db.commit()
+        invalidate_plan_cache(subscription.user_id)
         logger.info(f"Canceled subscription {stripe_subscription_id}")
         return subscription
 
@@ -7,12 +7,15 @@ Prompt Guide: https://www.imagine.art/blogs/nano-banana-pro-prompt-guide
 """
 
 import os
+import json
 import asyncio
 import aiohttp
 import anthropic
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 
+from services.task_poller import TaskProvider, get_task_poller, PENDING, SUCCESS, FAILED
+
 logger = logging.getLogger(__name__)
 
 # Anthropic client for prompt generation
@@ -29,6 +32,50 @@ DEFAULT_RESOLUTION = "1K"
 DEFAULT_OUTPUT_FORMAT = "png"
 
 
+class KIERecordInfoProvider(TaskProvider):
+    """Checks KIE jobs via /jobs/recordInfo for the shared task poller."""
+
+    name = "kie"
+    expected_seconds = 20.0
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def fetch(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """recordInfo has no batch form: check all due tasks on one session."""
+        url = f"{KIE_API_BASE_URL}/jobs/recordInfo"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        async with aiohttp.ClientSession(headers=headers) as session:
+            async def _one(task_id: str):
+                try:
+                    async with session.get(
+                        url,
+                        params={"taskId": task_id},
+                        timeout=aiohttp.ClientTimeout(total=10)
+                    ) as response:
+                        data = await response.json()
+                        if response.status != 200 or data.get("code") != 200:
+                            logger.warning(f"KIE poll error: {data.get('msg', f'HTTP {response.status}')}")
+                            return task_id, None
+                        return task_id, data.get("data", {})
+                except Exception as e:
+                    logger.warning(f"Error polling task {task_id}: {e}")
+                    return task_id, None
+
+            results = await asyncio.gather(*(_one(task_id) for task_id in task_ids))
+
+        return {task_id: data for task_id, data in results if data is not None}
+
+    def classify(self, status: Dict[str, Any]) -> str:
+        state = status.get("state")
+        if state == "success":
+            return SUCCESS
+        if state == "fail":
+            return FAILED
+        return PENDING
+
+
 class KIEImageService:
     """Service for generating images using KIE AI's Nano Banana Pro model"""
 
@@ -36,6 +83,7 @@ class KIEImageService:
         self.api_key = api_key or KIE_API_KEY
         if not self.api_key:
             logger.warning("KIE_API_KEY not set - AI image generation will not work")
+        self._provider = KIERecordInfoProvider(self.api_key)
 
     async def generate_image(
         self,
@@ -166,97 +214,59 @@ class KIEImageService:
         task_id: str,
         timeout_seconds: int
     ) -> Dict[str, Any]:
-        """Poll KIE API until task completes or times out"""
-        url = f"{KIE_API_BASE_URL}/jobs/recordInfo"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        """Wait for a task via the shared task poller"""
+        try:
+            task_data = await get_task_poller().wait(
+                self._provider, task_id, timeout=timeout_seconds
+            )
+        except TimeoutError:
+            return {
+                "success": False,
+                "error": f"Timeout after {timeout_seconds}s",
+                "image_url": None,
+                "task_id": task_id
+            }
 
-        start_time = asyncio.get_event_loop().time()
-        poll_interval = 2  # Start with 2 seconds
+        logger.info(f"KIE task {task_id} state: {task_data.get('state')}")
 
-        async with aiohttp.ClientSession() as session:
-            while True:
-                elapsed = asyncio.get_event_loop().time() - start_time
-                if elapsed > timeout_seconds:
-                    return {
-                        "success": False,
-                        "error": f"Timeout after {timeout_seconds}s",
-                        "image_url": None,
-                        "task_id": task_id
-                    }
+        if task_data.get("state") == "fail":
+            fail_msg = task_data.get("failMsg", "Unknown error")
+            fail_code = task_data.get("failCode", "")
+            return {
+                "success": False,
+                "error": f"{fail_code}: {fail_msg}",
+                "image_url": None,
+                "task_id": task_id
+            }
 
-                try:
-                    async with session.get(
-                        url,
-                        params={"taskId": task_id},
-                        headers=headers,
-                        timeout=aiohttp.ClientTimeout(total=10)
-                    ) as response:
-                        data = await response.json()
+        # Parse resultJson
+        result_json = task_data.get("resultJson", "{}")
+        try:
+            result = json.loads(result_json)
+        except json.JSONDecodeError as e:
+            return {
+                "success": False,
+                "error": f"Failed to parse resultJson: {e}",
+                "image_url": None,
+                "task_id": task_id
+            }
 
-                        if response.status != 200 or data.get("code") != 200:
-                            error_msg = data.get("msg", f"HTTP {response.status}")
-                            logger.warning(f"KIE poll error: {error_msg}")
-                            await asyncio.sleep(poll_interval)
-                            continue
-
-                        task_data = data.get("data", {})
-                        state = task_data.get("state")
-
-                        logger.info(f"KIE task {task_id} state: {state}")
-
-                        if state == "success":
-                            # Parse resultJson
-                            import json
-                            result_json = task_data.get("resultJson", "{}")
-                            try:
-                                result = json.loads(result_json)
-                                result_urls = result.get("resultUrls", [])
-                                if result_urls:
-                                    return {
-                                        "success": True,
-                                        "image_url": result_urls[0],
-                                        "all_urls": result_urls,
-                                        "task_id": task_id,
-                                        "cost_time_ms": task_data.get("costTime")
-                                    }
-                                else:
-                                    return {
-                                        "success": False,
-                                        "error": "No result URLs in response",
-                                        "image_url": None,
-                                        "task_id": task_id
-                                    }
-                            except json.JSONDecodeError as e:
-                                return {
-                                    "success": False,
-                                    "error": f"Failed to parse resultJson: {e}",
-                                    "image_url": None,
-                                    "task_id": task_id
-                                }
-
-                        elif state == "fail":
-                            fail_msg = task_data.get("failMsg", "Unknown error")
-                            fail_code = task_data.get("failCode", "")
-                            return {
-                                "success": False,
-                                "error": f"{fail_code}: {fail_msg}",
-                                "image_url": None,
-                                "task_id": task_id
-                            }
-
-                        # Still waiting, continue polling
-                        await asyncio.sleep(poll_interval)
-                        # Increase poll interval up to 5 seconds
-                        poll_interval = min(poll_interval + 1, 5)
-
-                except asyncio.TimeoutError:
-                    logger.warning(f"Timeout polling task {task_id}, retrying...")
-                    await asyncio.sleep(poll_interval)
-                except Exception as e:
-                    logger.error(f"Error polling task {task_id}: {e}")
-                    await asyncio.sleep(poll_interval)
+        result_urls = result.get("resultUrls", [])
+        if not result_urls:
+            return {
+                "success": False,
+                "error": "No result URLs in response",
+                "image_url": None,
+                "task_id": task_id
+            }
+
+        return {
+            "success": True,
+            "image_url": result_urls[0],
+            "all_urls": result_urls,
+            "task_id": task_id,
+            "cost_time_ms": task_data.get("costTime")
+        }
 
 
 async def generate_image_prompt_from_post(post_content: str) -> str:
@@ -0,0 +1,321 @@
+"""
+Shared Task Poller
+
+One scheduler for all async generation tasks (KIE / Nano Banana images,
+KeyAI videos). Instead of every caller running its own poll loop with fixed
+sleeps, tasks are registered here and awaited as futures:
+
+    poller = get_task_poller()
+    status = await poller.wait(provider, task_id, timeout=120)
+
+The scheduler checks each task on an adaptive schedule derived from the
+provider's expected render time (learned from completed tasks), groups due
+tasks per provider and uses the provider's batch status call when it has one.
+With dozens of concurrent generations this replaces dozens of independent
+loops with a handful of requests per tick.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Bounds on the delay between two checks of one task (seconds)
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 15.0
+
+# Weight of the newest observation in the expected-duration average
+DURATION_EWMA_ALPHA = 0.2
+
+# Task states reported by TaskProvider.classify
+PENDING = "pending"
+SUCCESS = "success"
+FAILED = "fail"
+
+
+class TaskProvider:
+    """
+    How to check tasks of one kind.
+
+    Subclasses implement fetch() and classify(). Providers with a batch
+    status endpoint set batch_size > 1 and get up to that many task IDs per
+    fetch() call.
+    """
+
+    name = "provider"
+    batch_size = 1
+    expected_seconds = 30.0
+
+    async def fetch(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get raw statuses for tasks.
+
+        Returns:
+            Status dict per task ID (missing IDs are retried next tick)
+        """
+        raise NotImplementedError
+
+    def classify(self, status: Dict[str, Any]) -> str:
+        """Map a raw status to PENDING, SUCCESS or FAILED."""
+        raise NotImplementedError
+
+
+@dataclass
+class _TrackedTask:
+    provider: TaskProvider
+    task_id: str
+    future: asyncio.Future
+    started_at: float
+    timeout: float
+    deadline: float
+    expected_seconds: float
+    next_check: float
+    checks: int = 0
+
+
+class TaskPoller:
+    """
+    Tracks generation tasks and resolves a future per task.
+
+    Usage:
+        poller = get_task_poller()
+        future = poller.track(provider, task_id, timeout=300)
+        status = await future        # raw provider status on success/fail
+    """
+
+    def __init__(self):
+        self._tasks: Dict[tuple, _TrackedTask] = {}
+        self._expected: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.status_requests = 0
+        self.tasks_completed = 0
+
+    # =========================================================================
+    # Registration
+    # =========================================================================
+
+    def _bind_loop(self):
+        """Attach to the running loop, dropping state from a closed one."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._tasks = {}
+            self._wakeup = asyncio.Event()
+            self._runner = None
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+
+    def track(
+        self,
+        provider: TaskProvider,
+        task_id: str,
+        timeout: float = 120.0,
+        expected_seconds: Optional[float] = None,
+        started_at: Optional[float] = None,
+    ) -> asyncio.Future:
+        """
+        Register a task and get a future for its final status.
+
+        Tracking the same task twice returns the same future.
+
+        Args:
+            provider: Provider that knows how to check the task
+            task_id: Provider task ID
+            timeout: Seconds before the future fails with TimeoutError
+            expected_seconds: Render time estimate (defaults to what the
+                provider's completed tasks took)
+            started_at: time.monotonic() when the task was created, if earlier
+
+        Returns:
+            Future resolving to the provider's raw status dict
+        """
+        self._bind_loop()
+        key = (provider.name, task_id)
+        tracked = self._tasks.get(key)
+        if tracked is not None:
+            return tracked.future
+
+        now = time.monotonic()
+        started_at = started_at or now
+        expected = expected_seconds or self._expected.get(provider.name, provider.expected_seconds)
+
+        tracked = _TrackedTask(
+            provider=provider,
+            task_id=task_id,
+            future=self._loop.create_future(),
+            started_at=started_at,
+            timeout=timeout,
+            deadline=now + timeout,
+            expected_seconds=expected,
+            next_check=self._first_check(started_at, expected, now),
+        )
+        self._tasks[key] = tracked
+        self._wakeup.set()
+        return tracked.future
+
+    async def wait(
+        self,
+        provider: TaskProvider,
+        task_id: str,
+        timeout: float = 120.0,
+        expected_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Track a task and wait for its final status.
+
+        Raises:
+            TimeoutError: If the task doesn't finish within timeout
+        """
+        future = self.track(provider, task_id, timeout, expected_seconds)
+        # Shield so one cancelled waiter doesn't cancel the shared future
+        return await asyncio.shield(future)
+
+    def is_tracking(self, provider: TaskProvider, task_id: str) -> bool:
+        return (provider.name, task_id) in self._tasks
+
+    # =========================================================================
+    # Scheduling
+    # =========================================================================
+
+    @staticmethod
+    def _first_check(started_at: float, expected: float, now: float) -> float:
+        """First check shortly before the task is expected to finish."""
+        return max(now + MIN_POLL_INTERVAL, started_at + expected * 0.8)
+
+    @staticmethod
+    def _next_delay(tracked: _TrackedTask, now: float) -> float:
+        """
+        Delay until the next check.
+
+        Before the expected finish, halve the remaining time; after it, back
+        off geometrically (tasks that overrun tend to overrun by a lot).
+        """
+        remaining = tracked.started_at + tracked.expected_seconds - now
+        if remaining > 0:
+            delay = remaining / 2
+        else:
+            delay = MIN_POLL_INTERVAL * (1.5 ** min(tracked.checks, 10))
+        return min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, delay))
+
+    def _learn(self, provider: TaskProvider, seconds: float):
+        previous = self._expected.get(provider.name, provider.expected_seconds)
+        self._expected[provider.name] = (
+            (1 - DURATION_EWMA_ALPHA) * previous + DURATION_EWMA_ALPHA * seconds
+        )
+
+    async def _run(self):
+        """
+        Scheduler loop: check due tasks, then sleep until the next one.
+
+        An unexpected error is logged and the loop carries on after a short
+        pause, so one bad iteration can't strand every tracked task.
+        """
+        while True:
+            try:
+                self._wakeup.clear()
+                now = time.monotonic()
+
+                self._expire(now)
+                due = [t for t in self._tasks.values() if t.next_check <= now]
+                if due:
+                    await self._check(due)
+                    continue
+
+                if self._tasks:
+                    sleep_for = min(t.next_check for t in self._tasks.values()) - now
+                else:
+                    sleep_for = None
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+                except asyncio.TimeoutError:
+                    pass
+
+            except Exception as e:
+                logger.error(f"Task poller loop error: {e}")
+                await asyncio.sleep(MIN_POLL_INTERVAL)
+
+    def _expire(self, now: float):
+        for key, tracked in list(self._tasks.items()):
+            if tracked.future.done():
+                del self._tasks[key]
+            elif now > tracked.deadline:
+                tracked.future.set_exception(TimeoutError(
+                    f"Task {tracked.task_id} did not complete within {tracked.timeout:.0f}s"
+                ))
+                del self._tasks[key]
+
+    async def _check(self, due: List[_TrackedTask]):
+        """Fetch statuses for due tasks, batched per provider."""
+        by_provider: Dict[int, List[_TrackedTask]] = {}
+        for tracked in due:
+            # Group by instance: providers can differ in credentials
+            by_provider.setdefault(id(tracked.provider), []).append(tracked)
+
+        requests = []
+        for tasks in by_provider.values():
+            provider = tasks[0].provider
+            size = max(1, provider.batch_size)
+            for i in range(0, len(tasks), size):
+                requests.append(self._check_batch(provider, tasks[i:i + size]))
+
+        await asyncio.gather(*requests)
+
+    async def _check_batch(self, provider: TaskProvider, tasks: List[_TrackedTask]):
+        try:
+            self.status_requests += 1
+            statuses = await provider.fetch([t.task_id for t in tasks])
+        except Exception as e:
+            logger.warning(f"{provider.name} status check failed: {e}")
+            statuses = {}
+
+        now = time.monotonic()
+        for tracked in tasks:
+            tracked.checks += 1
+            try:
+                status = statuses.get(tracked.task_id)
+                state = provider.classify(status) if status is not None else PENDING
+            except Exception as e:
+                # A status this provider can't read fails only its own task
+                logger.warning(f"{provider.name} status for {tracked.task_id} unreadable: {e}")
+                self._tasks.pop((provider.name, tracked.task_id), None)
+                if not tracked.future.done():
+                    tracked.future.set_exception(e)
+                continue
+
+            if state == PENDING:
+                tracked.next_check = now + self._next_delay(tracked, now)
+                continue
+
+            if state == SUCCESS:
+                self._learn(provider, now - tracked.started_at)
+            self.tasks_completed += 1
+            self._tasks.pop((provider.name, tracked.task_id), None)
+            if not tracked.future.done():
+                tracked.future.set_result(status)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tracking counters and learned render times."""
+        return {
+            "tracked": len(self._tasks),
+            "status_requests": self.status_requests,
+            "tasks_completed": self.tasks_completed,
+            "expected_seconds": {k: round(v, 1) for k, v in self._expected.items()},
+        }
+
+
+# Singleton instance
+_task_poller: Optional[TaskPoller] = None
+
+
+def get_task_poller() -> TaskPoller:
+    """Get or create the shared task poller."""
+    global _task_poller
+    if _task_poller is None:
+        _task_poller = TaskPoller()
+    return _task_poller
@@ -19,6 +19,8 @@ from datetime import datetime
 from typing import List, Dict, Set, Optional
 from langgraph.store.base import BaseStore
 
+from x_tweet_parser import TweetRecord, collect_tweets, parse_metric, scrape_job
+
 
 # ============================================================================
 # SOCIAL GRAPH SCRAPER
@@ -39,6 +41,7 @@ class SocialGraphScraper:
         """
         self.client = browser_client
 
+    @scrape_job
     async def scrape_following_list(
         self,
         username: str,
@@ -65,7 +68,7 @@ class SocialGraphScraper:
 
         # Navigate to following page
         url = f"https://x.com/{username}/following"
-        result = await self.client._request("POST", "/navigate", {"url": url})
+        result = await self.client._request("POST", "/navigate", {"url": url, "profile": "scrape"})
 
         if not result.get("success"):
             raise Exception(f"Failed to navigate to {url}: {result.get('error')}")
@@ -73,57 +76,21 @@ class SocialGraphScraper:
         await asyncio.sleep(3)  # Wait for initial load
 
         following = []
-        last_count = 0
-        stall_count = 0
         max_scrolls = 50  # Prevent infinite loops
-        scroll_count = 0
 
         print(f"   Starting scroll loop (max {max_scrolls} scrolls)...")
 
-        while len(following) < max_count and scroll_count < max_scrolls:
-            # Get current DOM
-            dom_result = await self.client._request("GET", "/dom/elements")
-
-            if not dom_result.get("success"):
-                print(f"   ⚠️ Failed to get DOM: {dom_result.get('error')}")
-                break
-
-            # Extract usernames from DOM
-            new_accounts = self._extract_usernames_from_dom(dom_result)
-
-            # Add to list (dedupe automatically)
-            for account in new_accounts:
-                if account not in following:
-                    following.append(account)
-
-            # Check if we're making progress
-            current_count = len(following)
-            if current_count == last_count:
-                stall_count += 1
-                if stall_count >= 3:
-                    print(f"   ⚠️ No new accounts after 3 scrolls, stopping at {current_count}")
-                    break
-            else:
-                stall_count = 0
-                last_count = current_count
-                print(f"   Found {current_count} accounts so far...")
-
-            # Scroll down to load more
-            await self.client._request("POST", "/scroll", {
-                "x": 500,
-                "y": 800,
-                "scroll_x": 0,
-                "scroll_y": 5  # Scroll down
-            })
-
-            scroll_count += 1
-            await asyncio.sleep(2)  # Rate limit friendly delay
+        # Scroll and collect user rows (deduped server-side, waits for renders)
+        async for users in self.client.collect("users", target=max_count, max_scrolls=max_scrolls):
+            following.extend(u["username"] for u in users if u["username"].lower() != username.lower())
+            print(f"   Found {len(following)} accounts so far...")
 
         result_list = following[:max_count]
         print(f"✅ Scraped {len(result_list)} following accounts")
 
         return result_list
 
+    @scrape_job
     async def scrape_followers_sample(
         self,
         username: str,
@@ -146,7 +113,7 @@ class SocialGraphScraper:
 
         # Navigate to followers page
         url = f"https://x.com/{username}/followers"
-        result = await self.client._request("POST", "/navigate", {"url": url})
+        result = await self.client._request("POST", "/navigate", {"url": url, "profile": "scrape"})
 
         if not result.get("success"):
             print(f"      ⚠️ Failed to navigate: {result.get('error')}")
@@ -155,36 +122,17 @@ class SocialGraphScraper:
         await asyncio.sleep(3)
 
         followers = []
-        scroll_count = 0
         max_scrolls = 10  # Limit scrolls for sampling
 
-        while len(followers) < sample_size and scroll_count < max_scrolls:
-            # Get DOM
-            dom_result = await self.client._request("GET", "/dom/elements")
-
-            if not dom_result.get("success"):
-                break
-
-            # Extract usernames
-            new_accounts = self._extract_usernames_from_dom(dom_result)
-
-            for account in new_accounts:
-                if account not in followers:
-                    followers.append(account)
-
-            # Scroll for more
-            await self.client._request("POST", "/scroll", {
-                "x": 500, "y": 800, "scroll_x": 0, "scroll_y": 5
-            })
-
-            scroll_count += 1
-            await asyncio.sleep(2)
+        async for users in self.client.collect("users", target=sample_size, max_scrolls=max_scrolls):
+            followers.extend(u["username"] for u in users if u["username"].lower() != username.lower())
 
         result_list = followers[:sample_size]
         print(f"      ✅ Sampled {len(result_list)} followers")
 
         return result_list
 
+    @scrape_job
     async def scrape_competitor_posts(
         self,
         username: str,
@@ -202,7 +150,7 @@ class SocialGraphScraper:
         """
         # Navigate to profile
         url = f"https://x.com/{username}"
-        result = await self.client._request("POST", "/navigate", {"url": url})
+        result = await self.client._request("POST", "/navigate", {"url": url, "profile": "scrape"})
 
         if not result.get("success"):
             print(f"   ⚠️ Failed to navigate: {result.get('error')}")
@@ -221,142 +169,49 @@ class SocialGraphScraper:
         except Exception as e:
             print(f"   ⚠️ Could not extract follower count: {e}")
 
-        posts = []
-        scroll_count = 0
+        tweets = []
         max_scrolls = 8  # Scroll more to get more posts
 
-        while len(posts) < max_posts and scroll_count < max_scrolls:
-            # Get DOM
-            dom_result = await self.client._request("GET", "/dom/elements")
-
-            if not dom_result.get("success"):
-                break
-
-            # Extract posts
-            new_posts = self._extract_posts_from_dom(dom_result)
+        # Over-collect: reposts, ads and short tweets are filtered out below
+        async for batch in collect_tweets(self.client, target=max_posts * 2, max_scrolls=max_scrolls):
+            tweets.extend(batch)
 
-            for post in new_posts:
-                # Deduplicate by text
-                if not any(p['text'] == post['text'] for p in posts):
-                    posts.append(post)
-
-            # Scroll for more
-            await self.client._request("POST", "/scroll", {
-                "x": 500, "y": 800, "scroll_x": 0, "scroll_y": 3
-            })
-
-            scroll_count += 1
-            await asyncio.sleep(2)
+        posts = self._posts_from_tweets(tweets)
 
         result_posts = posts[:max_posts]
         print(f"   ✅ Scraped {len(result_posts)} posts")
 
         return result_posts, follower_count
 
-    def _extract_posts_from_dom(self, dom_result: Dict) -> List[Dict]:
+    def _posts_from_tweets(self, tweets: List[TweetRecord]) -> List[Dict]:
         """
-        Extract post content from X DOM with engagement metrics.
-
-        X tweets are in <article> tags. Each article contains:
-        - Tweet text
-        - Engagement buttons with aria-labels like "123 Likes. Like"
+        Convert extracted tweets into post dicts with engagement metrics.
 
-        Returns posts with text and engagement metrics.
+        Skips reposts and ads (we only want original content) and very
+        short tweets. Returns posts sorted by engagement.
         """
-        import re
-
-        posts = []
-        elements = dom_result.get("elements", [])
-
-        # Find all article elements (tweets)
-        articles = [el for el in elements if el.get("tagName", "").lower() == "article"]
-
-        print(f"      Found {len(articles)} article elements")
-
-        for article in articles:
-            article_text = article.get("text", "").strip()
-            article_y = article.get("y", 0)
-
-            # Skip if article is too short
-            if len(article_text) < 30:
-                continue
-
-            # Extract clean tweet text
-            # Article text contains: username, timestamp, and tweet content
-            # We want just the tweet content
-            post_text = article_text
-
-            # Find engagement buttons near this article (within 500px vertically)
-            likes = 0
-            retweets = 0
-            replies = 0
-            views = 0
-
-            for el in elements:
-                el_y = el.get("y", 0)
-                # Check if element is near this article
-                if abs(el_y - article_y) > 500:
-                    continue
-
-                aria_label = el.get("ariaLabel", "").lower()
-
-                # Parse likes: "123 likes. like" or "1.2k likes. like"
-                if "like" in aria_label and el.get("tagName") == "button":
-                    match = re.search(r'(\d+\.?\d*[km]?)\s*like', aria_label)
-                    if match:
-                        new_likes = self._parse_metric(match.group(1))
-                        likes = max(likes, new_likes)  # Take highest value found
-
-                # Parse retweets: "45 retweets. repost"
-                if "retweet" in aria_label or "repost" in aria_label:
-                    match = re.search(r'(\d+\.?\d*[km]?)\s*(?:retweet|repost)', aria_label)
-                    if match:
-                        new_retweets = self._parse_metric(match.group(1))
-                        retweets = max(retweets, new_retweets)
-
-                # Parse replies: "10 replies. reply"
-                if "repl" in aria_label:
-                    match = re.search(r'(\d+\.?\d*[km]?)\s*repl', aria_label)
-                    if match:
-                        new_replies = self._parse_metric(match.group(1))
-                        replies = max(replies, new_replies)
-
-                # Parse views from aria-label: "59226 views. View post analytics"
-                if "view" in aria_label and el.get("tagName") == "a":
-                    match = re.search(r'(\d+\.?\d*[km]?)\s*views?\.\s*view', aria_label)
-                    if match:
-                        new_views = self._parse_metric(match.group(1))
-                        views = max(views, new_views)
-
-            posts.append({
-                "text": post_text,
-                "likes": likes,
-                "retweets": retweets,
-                "replies": replies,
-                "views": views,
-                "scraped_at": datetime.utcnow().isoformat()
-            })
-
-        # Dedupe and filter
         seen_texts = set()
         unique_posts = []
 
-        for post in posts:
+        for tweet in tweets:
+            if tweet.is_repost or tweet.promoted or len(tweet.text) < 30:
+                continue
+
             # Simple dedup by first 100 chars
-            text_sig = post["text"][:100]
+            text_sig = tweet.text[:100]
             if text_sig in seen_texts:
                 continue
             seen_texts.add(text_sig)
 
-            # Filter out obvious junk AND reposts (we only want original content)
-            text_lower = post["text"].lower()
-            if any(junk in text_lower for junk in [
-                "followed by", "you might like", "show this thread",
-                "trending in", "live on x", "reposted"
-            ]):
-                continue
-
-            unique_posts.append(post)
+            unique_posts.append({
+                "text": tweet.text,
+                "url": tweet.url,
+                "likes": tweet.likes,
+                "retweets": tweet.retweets,
+                "replies": tweet.replies,
+                "views": tweet.views,
+                "scraped_at": datetime.utcnow().isoformat()
+            })
 
         # Sort by engagement
         unique_posts.sort(key=lambda p: p.get("likes", 0) + p.get("retweets", 0) + p.get("replies", 0), reverse=True)
@@ -365,27 +220,6 @@ class SocialGraphScraper:
 
         return unique_posts
 
-    def _parse_metric(self, metric_str: str) -> int:
-        """
-        Parse engagement metric string like '1.2K' or '123' to integer.
-
-        Examples:
-        - "123" -> 123
-        - "1.2K" -> 1200
-        - "1.5M" -> 1500000
-        """
-        metric_str = metric_str.strip().upper()
-
-        if 'K' in metric_str:
-            return int(float(metric_str.replace('K', '')) * 1000)
-        elif 'M' in metric_str:
-            return int(float(metric_str.replace('M', '')) * 1000000)
-        else:
-            try:
-                return int(float(metric_str))
-            except ValueError:
-                return 0
-
     def _extract_follower_count(self, dom_result: Dict) -> int:
         """
         Extract follower count from X profile page DOM.
@@ -408,7 +242,7 @@ class SocialGraphScraper:
             match = re.search(r'([\d,.]+[KM]?)\s+Followers?', text, re.IGNORECASE)
             if match:
                 follower_str = match.group(1)
-                count = self._parse_metric(follower_str)
+                count = parse_metric(follower_str)
                 if count > 0:
                     return count
 
@@ -418,64 +252,12 @@ class SocialGraphScraper:
             match = re.search(r'([\d,.]+[KM]?)\s+Followers?', aria_label, re.IGNORECASE)
             if match:
                 follower_str = match.group(1)
-                count = self._parse_metric(follower_str)
+                count = parse_metric(follower_str)
                 if count > 0:
                     return count
 
         return 0
 
-    def _extract_usernames_from_dom(self, dom_result: Dict) -> List[str]:
-        """
-        Extract usernames from X's DOM structure.
-
-        X (Twitter) uses structure like:
-        <div data-testid="UserCell">
-          <a href="/username">@username</a>
-        </div>
-
-        We look for links matching the pattern /username (no subdirectories).
-
-        Args:
-            dom_result: DOM data from browser
-
-        Returns:
-            List of unique usernames
-        """
-        usernames = []
-        elements = dom_result.get("elements", [])
-
-        # System pages to exclude (not real users)
-        excluded = {
-            "home", "explore", "notifications", "messages",
-            "compose", "i", "settings", "search"
-        }
-
-        for el in elements:
-            # Check href attribute
-            href = el.get("href", "")
-
-            # Username links are like: /username (single path segment)
-            if href.startswith("/") and len(href) > 1:
-                # Remove leading slash
-                potential_username = href[1:]
-
-                # Make sure it's a single segment (no more slashes)
-                if "/" not in potential_username:
-                    # Not a system page
-                    if potential_username not in excluded:
-                        usernames.append(potential_username)
-
-            # Also check text content for @username patterns
-            text = el.get("text", "")
-            if text.startswith("@"):
-                username = text[1:].split()[0]  # Get first word after @
-                if username and username not in excluded:
-                    usernames.append(username)
-
-        # Deduplicate and return
-        return list(set(usernames))
-
-
 # ============================================================================
 # SOCIAL GRAPH BUILDER
 # ============================================================================
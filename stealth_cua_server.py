@@ -2,20 +2,44 @@
 """
 Enhanced CUA Server with Playwright Stealth Integration
 Maintains FastAPI compatibility while adding stealth browser capabilities
+
+Multi-tenant mode (CUA_MULTI_TENANT=1): one browser hosts an isolated
+context per user instead of one server per user. Requests are routed by a
+signed session token in the X-CUA-Session header (or ?session=), and the
+/tenants routes need the X-CUA-Admin-Token header; both are keyed by
+CUA_SESSION_SECRET. See browser_tenants.py.
+The shared browser runs headless and the X display, /mode and the xdotool
+fallbacks are off in that mode: the display isn't per tenant.
 """
 
 import os
-import subprocess
 import base64
-import shlex
 import asyncio
-from fastapi import FastAPI
+import time
+import uuid
+import weakref
+from urllib.parse import urlparse
+from contextvars import ContextVar
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 from patchright.async_api import async_playwright, Browser, BrowserContext, Page
 # playwright_stealth not needed with patchright - it has built-in stealth
 import json
 from typing import Optional
+from x11_input import xdotool, xdotool_sequence, screenshot_png
+from browser_tenants import (
+    TenantPool,
+    SESSION_HEADER,
+    DEFAULT_SESSION,
+    SESSION_SECRET,
+    ADMIN_HEADER,
+    verify_session,
+    is_admin,
+    process_tree_memory_mb,
+    container_memory_mb,
+)
 
 # Patchright has built-in stealth - no need for playwright_stealth
 
@@ -30,6 +54,18 @@ page: Optional[Page] = None
 main_page: Optional[Page] = None  # Track the main working page
 stealth_mode = True  # Toggle between stealth browser and xdotool
 
+# Multi-tenant mode: per-session contexts in one shared browser
+MULTI_TENANT = os.getenv("CUA_MULTI_TENANT", "").lower() in ("1", "true", "yes")
+tenant_pool: Optional[TenantPool] = None
+current_session: ContextVar[str] = ContextVar("current_session", default=DEFAULT_SESSION)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+CONTEXT_OPTIONS = {
+    "viewport": {'width': 1280, 'height': 720},
+    "user_agent": USER_AGENT,
+    "locale": 'en-US',
+}
+
 # Request Models (same as original)
 class ClickRequest(BaseModel):
     x: int
@@ -53,10 +89,72 @@ class ScrollRequest(BaseModel):
 
 class NavigateRequest(BaseModel):
     url: str
+    profile: str = "interactive"  # "interactive" or "scrape" (see use_navigation_profile)
+
+class ProfileRequest(BaseModel):
+    profile: str = "interactive"
 
 class ModeRequest(BaseModel):
     stealth: bool = True
 
+class TweetsRequest(BaseModel):
+    author: Optional[str] = None
+    limit: int = 0
+
+class CollectRequest(BaseModel):
+    kind: str = "tweets"  # "tweets" or "users"
+    target: int = 50
+    max_scrolls: int = 30
+    stall_scrolls: int = 3
+    author: Optional[str] = None
+    scroll_px: int = 0  # 0 = ~one viewport
+    settle_timeout_ms: int = 3000
+    quiet_ms: int = 250
+
+@app.middleware("http")
+async def bind_session(request: Request, call_next):
+    """Route the request to its session's browser context (multi-tenant mode)."""
+    key = request.headers.get(SESSION_HEADER) or request.query_params.get("session") or DEFAULT_SESSION
+    if MULTI_TENANT and key != DEFAULT_SESSION:
+        # The key is a user ID anyone could guess: require a signed token
+        key = verify_session(key)
+        if key is None:
+            return JSONResponse({"success": False, "error": "Invalid session token"}, status_code=403)
+    token = current_session.set(key)
+    try:
+        if tenant_pool is not None:
+            # Keep the context from being evicted while the request runs
+            async with tenant_pool.hold(key):
+                return await call_next(request)
+        return await call_next(request)
+    finally:
+        current_session.reset(token)
+
+async def current_page() -> Optional[Page]:
+    """Working page for this request: the session's tab or the global page"""
+    if not MULTI_TENANT:
+        return page
+    if tenant_pool is None:
+        return None
+    tenant = await tenant_pool.acquire(current_session.get())
+    return tenant.page
+
+async def current_context() -> Optional[BrowserContext]:
+    """Browser context for this request: the session's or the global one"""
+    if not MULTI_TENANT:
+        return context
+    if tenant_pool is None:
+        return None
+    tenant = await tenant_pool.acquire(current_session.get())
+    return tenant.context
+
+def peek_page() -> Optional[Page]:
+    """Session's page if it is live, without creating or restoring a context"""
+    if not MULTI_TENANT:
+        return page
+    tenant = tenant_pool.peek(current_session.get()) if tenant_pool else None
+    return tenant.page if tenant else None
+
 async def handle_new_page(new_page: Page):
     """
     Handle new tabs/pages: close them immediately and switch back to main page.
@@ -79,9 +177,17 @@ async def handle_new_page(new_page: Page):
     except Exception as e:
         print(f"⚠️ Error handling new page: {e}")
 
-async def ensure_main_tab():
-    """Ensure we're always on the main working tab"""
+async def ensure_main_tab() -> Optional[Page]:
+    """Ensure we're always on the main working tab; returns that tab"""
     global main_page, page, context
+
+    if MULTI_TENANT:
+        try:
+            tenant = await tenant_pool.acquire(current_session.get())
+            return await tenant.ensure_main_tab()
+        except Exception as e:
+            print(f"⚠️ Error ensuring main tab: {e}")
+            return await current_page()
     
     try:
         if not main_page or main_page.is_closed():
@@ -90,8 +196,8 @@ async def ensure_main_tab():
                 main_page = await context.new_page()
                 # Patchright automatically applies stealth
                 page = main_page
-                return True
-            return False
+                return page
+            return page
         
         # Get all pages
         pages = context.pages if context else []
@@ -105,15 +211,18 @@ async def ensure_main_tab():
         # Bring main page to front
         await main_page.bring_to_front()
         page = main_page
-        return True
+        return page
         
     except Exception as e:
         print(f"⚠️ Error ensuring main tab: {e}")
-        return False
+        return page
 
 async def initialize_stealth_browser():
     """Initialize Playwright stealth browser"""
     global playwright_instance, browser, context, page
+
+    if MULTI_TENANT:
+        return await initialize_tenant_browser()
     
     # Check if already initialized (context is the key for persistent context)
     if context is not None and page is not None:
@@ -139,9 +248,7 @@ async def initialize_stealth_browser():
             context = await playwright_instance.chromium.launch_persistent_context(
                 user_data_dir="/tmp/playwright_profile",
                 headless=False,  # Show browser in VNC (Docker has display :98)
-                viewport={'width': 1280, 'height': 720},
-                user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                locale='en-US',
+                **CONTEXT_OPTIONS,
                 args=[
                     "--no-sandbox",
                     "--disable-dev-shm-usage",
@@ -170,11 +277,7 @@ async def initialize_stealth_browser():
                     "--remote-debugging-address=0.0.0.0"  # Allow external connections
                 ]
             )
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 720},
-                user_agent="Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                locale='en-US'
-            )
+            context = await browser.new_context(**CONTEXT_OPTIONS)
         
         page = await context.new_page()
         # Patchright automatically applies stealth
@@ -196,29 +299,73 @@ async def initialize_stealth_browser():
         print(f"❌ Failed to initialize stealth browser: {e}")
         return False
 
-def xdotool_screenshot():
-    """Take screenshot using xdotool (fallback)"""
+async def initialize_tenant_browser():
+    """
+    Launch the shared browser for multi-tenant mode.
+
+    Contexts are created per session on first use. Extensions need a
+    persistent context per profile, so the extension isn't loaded here.
+    """
+    global playwright_instance, browser, tenant_pool
+
+    if tenant_pool is not None:
+        return True
+
     try:
-        result = subprocess.run(['scrot', '-'], capture_output=True, check=True)
-        return base64.b64encode(result.stdout).decode()
+        print("🥷 Initializing shared stealth browser (multi-tenant mode)...")
+        if not SESSION_SECRET:
+            print("⚠️ CUA_SESSION_SECRET not set: only the default session is reachable")
+        playwright_instance = await async_playwright().start()
+        # Headless: every tenant's windows on the one X display would be
+        # visible (VNC, display screenshots) and reachable by xdotool input
+        browser = await playwright_instance.chromium.launch(
+            headless=True,
+            args=[
+                "--no-sandbox",
+                "--disable-dev-shm-usage",
+                "--disable-blink-features=AutomationControlled",
+                "--no-first-run",
+                "--no-default-browser-check",
+            ]
+        )
+        tenant_pool = TenantPool(browser, context_options=CONTEXT_OPTIONS)
+        await tenant_pool.start()
+        print("✅ Shared stealth browser ready")
+        return True
+
     except Exception as e:
-        print(f"Screenshot error: {e}")
+        print(f"❌ Failed to initialize shared browser: {e}")
+        return False
+
+# Multi-tenant mode shares one X display between all sessions, so display
+# screenshots and xdotool input would cross tenants
+X_DISPLAY_DISABLED = {
+    "success": False,
+    "error": "X display input and screenshots are disabled in multi-tenant mode"
+}
+
+async def xdotool_screenshot():
+    """Take screenshot of the X display (fallback)"""
+    if MULTI_TENANT:
         return None
+    png = await screenshot_png()
+    return base64.b64encode(png).decode() if png else None
 
 async def playwright_screenshot():
     """Take screenshot using Playwright stealth browser"""
     try:
-        if page is None:
+        if await current_page() is None:
             await initialize_stealth_browser()
+        page = await current_page()
         
         if page:
             screenshot_bytes = await page.screenshot(full_page=False)
             return base64.b64encode(screenshot_bytes).decode()
         else:
-            return xdotool_screenshot()
+            return await xdotool_screenshot()
     except Exception as e:
         print(f"Playwright screenshot error: {e}")
-        return xdotool_screenshot()
+        return await xdotool_screenshot()
 
 @app.get("/screenshot")
 async def take_screenshot():
@@ -227,7 +374,7 @@ async def take_screenshot():
         if stealth_mode:
             image_data = await playwright_screenshot()
         else:
-            image_data = xdotool_screenshot()
+            image_data = await xdotool_screenshot()
         
         if image_data:
             return {
@@ -256,7 +403,7 @@ async def get_cdp_url():
     return {
         "cdp_url": "ws://localhost:9222",
         "cdp_http": "http://localhost:9222",
-        "browser_ready": stealth_mode and page is not None
+        "browser_ready": stealth_mode and (tenant_pool is not None if MULTI_TENANT else page is not None)
     }
 
 
@@ -268,9 +415,10 @@ class ClickSelectorRequest(BaseModel):
 async def click(request: ClickRequest):
     """Click at coordinates - stealth browser or xdotool"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Ensure we're on the main tab before clicking
-            await ensure_main_tab()
+            page = await ensure_main_tab()
 
             # Log what element is at these coordinates BEFORE clicking
             element_info = await page.evaluate(f"""
@@ -304,19 +452,19 @@ async def click(request: ClickRequest):
                 "message": f"Stealth clicked at ({request.x}, {request.y})",
                 "element": element_info
             }
+        elif MULTI_TENANT:
+            return X_DISPLAY_DISABLED
         else:
             # Fallback to xdotool
-            result = subprocess.run([
-                'xdotool', 'mousemove', str(request.x), str(request.y), 'click', '1'
-            ], capture_output=True, text=True)
+            ok, output = await xdotool('mousemove', request.x, request.y, 'click', '1')
             
-            if result.returncode == 0:
+            if ok:
                 return {
                     "success": True, 
                     "message": f"XDoTool clicked at ({request.x}, {request.y})"
                 }
             else:
-                return {"success": False, "error": result.stderr}
+                return {"success": False, "error": output}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -324,6 +472,7 @@ async def click(request: ClickRequest):
 async def click_selector(request: ClickSelectorRequest):
     """Click element using CSS selector or XPath - better than coordinates"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             if request.selector_type == "css":
                 await page.click(request.selector)
@@ -345,6 +494,7 @@ async def click_selector(request: ClickSelectorRequest):
 async def fill_selector(request: ClickSelectorRequest):
     """Fill input field using CSS selector - much better than coordinates + typing"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Extract text from selector (assuming it's passed in a combined format)
             parts = request.selector.split('|||')  # Use ||| as separator
@@ -369,26 +519,26 @@ async def fill_selector(request: ClickSelectorRequest):
 async def type_text(request: TypeRequest):
     """Type text - stealth browser or xdotool"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             await page.keyboard.type(request.text, delay=50)
             return {
                 "success": True, 
                 "message": f"Stealth typed: {request.text}"
             }
+        elif MULTI_TENANT:
+            return X_DISPLAY_DISABLED
         else:
-            # Fallback to xdotool
-            escaped_text = shlex.quote(request.text)
-            result = subprocess.run([
-                'xdotool', 'type', '--delay', '100', escaped_text
-            ], capture_output=True, text=True)
+            # Fallback to xdotool (no shell, so the text goes through as-is)
+            ok, output = await xdotool('type', '--delay', '100', '--', request.text)
             
-            if result.returncode == 0:
+            if ok:
                 return {
                     "success": True, 
                     "message": f"XDoTool typed: {request.text}"
                 }
             else:
-                return {"success": False, "error": result.stderr}
+                return {"success": False, "error": output}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -396,6 +546,7 @@ async def type_text(request: TypeRequest):
 async def press_keys(request: KeyPressRequest):
     """Press key combination - stealth browser or xdotool"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Convert to Playwright format
             key_combination = "+".join(request.keys)
@@ -404,6 +555,8 @@ async def press_keys(request: KeyPressRequest):
                 "success": True, 
                 "message": f"Stealth pressed: {key_combination}"
             }
+        elif MULTI_TENANT:
+            return X_DISPLAY_DISABLED
         else:
             # Fallback to xdotool
             xdotool_keys = []
@@ -419,53 +572,136 @@ async def press_keys(request: KeyPressRequest):
                 else:
                     xdotool_keys.append(key)
             
-            cmd = ['xdotool', 'key'] + xdotool_keys
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            ok, output = await xdotool('key', *xdotool_keys)
             
-            if result.returncode == 0:
+            if ok:
                 return {
                     "success": True, 
                     "message": f"XDoTool pressed: {xdotool_keys}"
                 }
             else:
-                return {"success": False, "error": result.stderr}
+                return {"success": False, "error": output}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# Navigation profiles: "interactive" (default) loads everything; "scrape"
+# aborts what text/aria scrapers never read (images, video, fonts and
+# third-party hosts) and stops media autoplay. The profile is per context and
+# lasts until the next navigation picks another one, so interactive
+# navigation and posting always get the full page back.
+
+NAVIGATION_PROFILES = ("interactive", "scrape")
+SCRAPE_BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "texttrack"}
+# Hosts (and their subdomains) treated as first party besides the page's own
+SCRAPE_ALLOWED_DOMAINS = [
+    domain.strip()
+    for domain in os.getenv("CUA_SCRAPE_ALLOWED_DOMAINS", "x.com,twitter.com,twimg.com").split(",")
+    if domain.strip()
+]
+
+# Context -> (route handler, {"blocked": n}) while the scrape profile is active
+scrape_routes: "weakref.WeakKeyDictionary[BrowserContext, tuple]" = weakref.WeakKeyDictionary()
+
+MEDIA_CAP_JS = """(() => {
+    HTMLMediaElement.prototype.play = function () { this.pause(); return Promise.resolve(); };
+    document.querySelectorAll('video, audio').forEach(media => {
+        media.autoplay = false;
+        media.preload = 'none';
+        media.pause();
+    });
+})()"""
+
+def _scrape_route_handler(page_host: Optional[str], stats: dict):
+    """Route handler aborting heavy resource types and third-party requests."""
+    allowed = SCRAPE_ALLOWED_DOMAINS + ([page_host] if page_host else [])
+
+    async def handle(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        first_party = any(host == domain or host.endswith("." + domain) for domain in allowed)
+        if request.resource_type in SCRAPE_BLOCKED_RESOURCE_TYPES or not first_party:
+            stats["blocked"] += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    return handle
+
+async def use_navigation_profile(ctx: Optional[BrowserContext], profile: str, url: Optional[str] = None) -> dict:
+    """
+    Switch a context's navigation profile.
+
+    Args:
+        ctx: Browser context (no-op if None)
+        profile: "interactive" or "scrape"
+        url: URL about to be loaded; its host counts as first party
+
+    Returns:
+        Live block counters for the scrape profile ({} for interactive)
+    """
+    if profile not in NAVIGATION_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Use one of: {', '.join(NAVIGATION_PROFILES)}")
+    if ctx is None:
+        return {}
+
+    previous = scrape_routes.pop(ctx, None)
+    if previous is not None:
+        await ctx.unroute("**/*", previous[0])
+    if profile != "scrape":
+        return {}
+
+    stats = {"blocked": 0}
+    handler = _scrape_route_handler(urlparse(url).hostname if url else None, stats)
+    await ctx.route("**/*", handler)
+    scrape_routes[ctx] = (handler, stats)
+    return stats
+
 @app.post("/navigate")
 async def navigate(request: NavigateRequest):
-    """Navigate to URL - stealth browser or Firefox"""
+    """
+    Navigate to URL - stealth browser or Firefox
+
+    profile="scrape" blocks images, video, fonts and third-party requests for
+    this and later loads until a navigation with the default "interactive"
+    profile (or POST /navigate/profile) restores them. Scrapers restore it
+    when their job ends.
+    """
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Ensure we're on the main tab before navigating
-            await ensure_main_tab()
-            
+            page = await ensure_main_tab()
+            blocked = await use_navigation_profile(await current_context(), request.profile, request.url)
+
             # Navigate on the main page
+            started = time.monotonic()
             await page.goto(request.url, wait_until="domcontentloaded")
+            load_ms = round((time.monotonic() - started) * 1000)
+            if request.profile == "scrape":
+                await page.evaluate(MEDIA_CAP_JS)
             
             # Close any popups/extra tabs that might have opened
             await ensure_main_tab()
             
             return {
                 "success": True, 
-                "message": f"Stealth navigated to: {request.url}"
+                "message": f"Stealth navigated to: {request.url}",
+                "profile": request.profile,
+                "load_ms": load_ms,
+                "blocked_requests": blocked.get("blocked", 0)
             }
+        elif MULTI_TENANT:
+            return X_DISPLAY_DISABLED
         else:
-            # Fallback: Focus Firefox and navigate
-            # Focus Firefox window
-            subprocess.run(['xdotool', 'search', '--name', 'firefox', 'windowactivate'], 
-                         capture_output=True)
-            
-            # Press Ctrl+L for address bar
-            subprocess.run(['xdotool', 'key', 'ctrl+l'], capture_output=True)
-            subprocess.run(['sleep', '0.5'])
-            
-            # Type URL
-            escaped_url = shlex.quote(request.url)
-            subprocess.run(['xdotool', 'type', escaped_url], capture_output=True)
-            
-            # Press Enter
-            subprocess.run(['xdotool', 'key', 'Return'], capture_output=True)
+            # Fallback: Focus Firefox and navigate, as one uninterrupted input sequence
+            await xdotool_sequence(
+                ['search', '--name', 'firefox', 'windowactivate'],  # Focus Firefox window
+                ['key', 'ctrl+l'],  # Address bar
+                0.5,
+                ['type', '--', request.url],
+                ['key', 'Return'],
+                stop_on_error=False
+            )
             
             return {
                 "success": True, 
@@ -474,10 +710,21 @@ async def navigate(request: NavigateRequest):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@app.post("/navigate/profile")
+async def set_navigation_profile(request: ProfileRequest):
+    """Switch the navigation profile without navigating (e.g. back to interactive after a scrape)"""
+    try:
+        ctx = await current_context() if stealth_mode else None
+        await use_navigation_profile(ctx, request.profile)
+        return {"success": True, "profile": request.profile}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
 @app.post("/scroll")
 async def scroll(request: ScrollRequest):
     """Scroll at location - stealth browser or xdotool"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Move to position and scroll
             await page.mouse.move(request.x, request.y)
@@ -486,21 +733,21 @@ async def scroll(request: ScrollRequest):
                 "success": True, 
                 "message": f"Stealth scrolled at ({request.x}, {request.y})"
             }
+        elif MULTI_TENANT:
+            return X_DISPLAY_DISABLED
         else:
             # Fallback to xdotool
-            # Move to position
-            subprocess.run(['xdotool', 'mousemove', str(request.x), str(request.y)], 
-                         capture_output=True)
-            
             # Scroll
             if request.scroll_y > 0:
                 button = '5'  # Scroll down
             else:
                 button = '4'  # Scroll up
             
-            for _ in range(abs(request.scroll_y)):
-                subprocess.run(['xdotool', 'click', button], capture_output=True)
-                subprocess.run(['sleep', '0.1'])
+            # Move to position, then one wheel click per step 100ms apart
+            steps = [['mousemove', request.x, request.y]]
+            if request.scroll_y:
+                steps.append(['click', '--repeat', abs(request.scroll_y), '--delay', '100', button])
+            await xdotool_sequence(*steps, stop_on_error=False)
             
             return {
                 "success": True, 
@@ -511,8 +758,16 @@ async def scroll(request: ScrollRequest):
 
 @app.post("/mode")
 async def set_mode(request: ModeRequest):
-    """Switch between stealth mode and xdotool mode"""
+    """Switch between stealth mode and xdotool mode (single-tenant only)"""
     global stealth_mode
+
+    if MULTI_TENANT:
+        # The mode is server-wide and xdotool drives the shared display
+        return {
+            "success": False,
+            "error": "Mode is fixed to stealth in multi-tenant mode",
+            "mode": "stealth"
+        }
     
     stealth_mode = request.stealth
     
@@ -542,6 +797,7 @@ async def set_mode(request: ModeRequest):
 async def get_dom_elements():
     """Get all interactive elements from Playwright DOM with proper selectors"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             elements = await page.evaluate("""
                 () => {
@@ -609,10 +865,255 @@ async def get_dom_elements():
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# One pass over the rendered tweets; metric labels are returned raw and
+# parsed client-side by x_tweet_parser
+TWEET_EXTRACTOR_JS = r"""
+(opts) => {
+    const author = (opts.author || '').toLowerCase();
+    const limit = opts.limit || 0;
+
+    const labelOf = (article, testIds) => {
+        for (const testId of testIds) {
+            const el = article.querySelector(`[data-testid="${testId}"]`);
+            if (el) return el.getAttribute('aria-label') || el.innerText || '';
+        }
+        return '';
+    };
+
+    const records = [];
+    for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+        const timeEl = article.querySelector('time');
+        const statusLink = (timeEl && timeEl.closest('a[href*="/status/"]'))
+            || article.querySelector('a[href*="/status/"]');
+        const href = statusLink ? statusLink.getAttribute('href') : '';
+        const match = href.match(/^\/([^/]+)\/status\/(\d+)/);
+        if (!match) continue;
+        if (author && match[1].toLowerCase() !== author) continue;
+
+        const nameEl = article.querySelector('[data-testid="User-Name"] span');
+        const textEl = article.querySelector('[data-testid="tweetText"]');
+        const socialEl = article.querySelector('[data-testid="socialContext"]');
+        const viewsEl = article.querySelector('a[href$="/analytics"]');
+        const articleText = article.innerText;
+        const lines = articleText.split('\n');
+        const replyMatch = articleText.match(/Replying to\s*@(\w+)/i);
+
+        records.push({
+            id: match[2],
+            url: `https://x.com/${match[1]}/status/${match[2]}`,
+            author: match[1],
+            display_name: nameEl ? nameEl.innerText : '',
+            text: textEl ? textEl.innerText : '',
+            timestamp: timeEl ? timeEl.getAttribute('datetime') : null,
+            time_text: timeEl ? timeEl.innerText : '',
+            social_context: socialEl ? socialEl.innerText : '',
+            replying_to: replyMatch ? replyMatch[1] : null,
+            promoted: lines.some(line => line === 'Ad' || line === 'Promoted'),
+            metrics: {
+                replies: labelOf(article, ['reply']),
+                retweets: labelOf(article, ['retweet', 'unretweet']),
+                likes: labelOf(article, ['like', 'unlike']),
+                bookmarks: labelOf(article, ['bookmark', 'removeBookmark']),
+                views: viewsEl ? (viewsEl.getAttribute('aria-label') || '') : ''
+            }
+        });
+        if (limit && records.length >= limit) break;
+    }
+    return records;
+}
+"""
+
+@app.post("/dom/tweets")
+async def get_dom_tweets(request: TweetsRequest = TweetsRequest()):
+    """Get structured tweet records for every rendered article[data-testid=tweet]"""
+    try:
+        page = await current_page()
+        if stealth_mode and page:
+            tweets = await page.evaluate(TWEET_EXTRACTOR_JS, {
+                "author": request.author,
+                "limit": request.limit
+            })
+            return {"success": True, "tweets": tweets, "count": len(tweets)}
+        else:
+            return {"success": False, "error": "Stealth mode not active"}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+# User rows on following/followers lists
+USER_EXTRACTOR_JS = r"""
+() => {
+    const records = [];
+    for (const cell of document.querySelectorAll('[data-testid="UserCell"]')) {
+        let username = '';
+        for (const link of cell.querySelectorAll('a[href^="/"]')) {
+            const match = (link.getAttribute('href') || '').match(/^\/(\w{1,15})$/);
+            if (match) { username = match[1]; break; }
+        }
+        if (!username) continue;
+        const nameEl = cell.querySelector('a[href^="/"] span');
+        records.push({
+            username: username,
+            display_name: nameEl ? nameEl.innerText : '',
+            follows_you: cell.innerText.includes('Follows you')
+        });
+    }
+    return records;
+}
+"""
+
+COLLECT_ITEM_SELECTORS = {
+    "tweets": 'article[data-testid="tweet"]',
+    "users": '[data-testid="UserCell"]',
+}
+
+# Per-collector state lives in the page: seen keys (dedupe) and a promise
+# that settles once new items have rendered and mutations go quiet
+COLLECT_ARM_JS = r"""
+(opts) => {
+    window.__cuaCollectors = window.__cuaCollectors || {};
+    const state = window.__cuaCollectors[opts.id] || { seen: new Set() };
+    window.__cuaCollectors[opts.id] = state;
+
+    state.settled = new Promise(resolve => {
+        let quietTimer = null;
+        let hardTimer = null;
+        let observer = null;
+        const done = (grew) => {
+            observer.disconnect();
+            clearTimeout(hardTimer);
+            clearTimeout(quietTimer);
+            resolve(grew);
+        };
+        observer = new MutationObserver(mutations => {
+            for (const mutation of mutations) {
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType === 1 && (node.matches(opts.selector) || node.querySelector(opts.selector))) {
+                        clearTimeout(quietTimer);
+                        quietTimer = setTimeout(() => done(true), opts.quiet_ms);
+                        return;
+                    }
+                }
+            }
+        });
+        observer.observe(document.body, { childList: true, subtree: true });
+        hardTimer = setTimeout(() => done(false), opts.timeout_ms);
+    });
+    return window.innerHeight;
+}
+"""
+
+COLLECT_WAIT_JS = r"""
+(opts) => window.__cuaCollectors[opts.id].settled
+"""
+
+COLLECT_BATCH_JS = r"""
+(opts) => {
+    const extractTweets = """ + TWEET_EXTRACTOR_JS + r""";
+    const extractUsers = """ + USER_EXTRACTOR_JS + r""";
+    const state = window.__cuaCollectors[opts.id];
+    const items = opts.kind === 'users' ? extractUsers() : extractTweets({ author: opts.author, limit: 0 });
+    const fresh = [];
+    for (const item of items) {
+        const key = item.id || item.username;
+        if (!state.seen.has(key)) {
+            state.seen.add(key);
+            fresh.push(item);
+        }
+    }
+    return fresh;
+}
+"""
+
+async def _collect_stream(request: CollectRequest, collector_id: str, page: Page):
+    """Yield NDJSON batches of newly rendered items while scrolling."""
+    if tenant_pool is not None:
+        # The response outlives the middleware: hold the session while streaming
+        async with tenant_pool.hold(current_session.get()):
+            async for line in _collect_lines(request, collector_id, page):
+                yield line
+    else:
+        async for line in _collect_lines(request, collector_id, page):
+            yield line
+
+async def _collect_lines(request: CollectRequest, collector_id: str, page: Page):
+    selector = COLLECT_ITEM_SELECTORS[request.kind]
+    opts = {
+        "id": collector_id,
+        "kind": request.kind,
+        "author": request.author,
+        "selector": selector,
+        "timeout_ms": request.settle_timeout_ms,
+        "quiet_ms": request.quiet_ms,
+    }
+    total = 0
+    stalls = 0
+    scrolls = 0
+
+    try:
+        viewport_height = await page.evaluate(COLLECT_ARM_JS, opts)
+        while True:
+            batch = await page.evaluate(COLLECT_BATCH_JS, opts)
+            total += len(batch)
+            stalls = 0 if batch else stalls + 1
+
+            reason = None
+            if total >= request.target:
+                reason = "target"
+            elif stalls >= request.stall_scrolls:
+                reason = "stalled"
+            elif scrolls >= request.max_scrolls:
+                reason = "max_scrolls"
+
+            yield json.dumps({
+                "items": batch,
+                "total": total,
+                "scrolls": scrolls,
+                "done": reason is not None,
+                "reason": reason,
+            }) + "\n"
+            if reason:
+                break
+
+            # Arm the observer before scrolling so no render is missed
+            await page.evaluate(COLLECT_ARM_JS, opts)
+            await page.mouse.wheel(0, request.scroll_px or int(viewport_height * 0.9))
+            await page.evaluate(COLLECT_WAIT_JS, opts)
+            scrolls += 1
+
+    except Exception as e:
+        yield json.dumps({"items": [], "total": total, "done": True, "reason": "error", "error": str(e)}) + "\n"
+
+    finally:
+        try:
+            await page.evaluate("(id) => { if (window.__cuaCollectors) delete window.__cuaCollectors[id]; }", collector_id)
+        except Exception:
+            pass
+
+@app.post("/dom/collect")
+async def collect_dom_items(request: CollectRequest):
+    """
+    Scroll and collect tweets or user rows until a target count or a stall.
+
+    Streams NDJSON: one line per scroll with the items first seen on that
+    pass (deduped in the page). Each pass waits for new items to render
+    instead of sleeping a fixed time.
+    """
+    page = await current_page()
+    if not (stealth_mode and page):
+        return {"success": False, "error": "Stealth mode not active"}
+    if request.kind not in COLLECT_ITEM_SELECTORS:
+        return {"success": False, "error": f"Unknown kind: {request.kind}"}
+
+    return StreamingResponse(
+        _collect_stream(request, uuid.uuid4().hex, page),
+        media_type="application/x-ndjson"
+    )
+
 @app.get("/dom/page_info")
 async def get_page_info():
     """Get current page information from Playwright"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             info = await page.evaluate("""
                 () => ({
@@ -640,6 +1141,7 @@ async def get_page_info():
 async def get_enhanced_context():
     """Get comprehensive page context: DOM elements + page info + screenshot"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Get DOM elements
             elements = await page.evaluate("""
@@ -708,18 +1210,74 @@ async def get_enhanced_context():
 @app.get("/status")
 async def get_status():
     """Get current server status"""
+    page = peek_page()
     return {
         "success": True,
         "mode": "stealth" if stealth_mode else "xdotool",
-        "stealth_browser_ready": context is not None and page is not None,
+        "multi_tenant": MULTI_TENANT,
+        "stealth_browser_ready": tenant_pool is not None if MULTI_TENANT else (context is not None and page is not None),
         "current_url": page.url if page else None,
         "message": "Stealth CUA Server running"
     }
 
+def admin_denied(request: Request) -> Optional[JSONResponse]:
+    """403 response unless the request carries the admin token (multi-tenant mode)."""
+    if MULTI_TENANT and not is_admin(request.headers.get(ADMIN_HEADER)):
+        return JSONResponse({"success": False, "error": "Admin token required"}, status_code=403)
+    return None
+
+@app.get("/tenants")
+async def get_tenants(request: Request):
+    """
+    Live contexts and memory footprint (admin only in multi-tenant mode).
+
+    memory_mb is the PSS of this server and its browser processes;
+    container_mb is the whole container's cgroup usage (includes the X
+    server and VNC), i.e. what one user costs in one-container-per-user mode.
+    """
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    if MULTI_TENANT and tenant_pool is not None:
+        stats = await tenant_pool.get_stats()
+    else:
+        stats = {"live_contexts": 1 if context is not None else 0}
+    memory_mb = await asyncio.to_thread(process_tree_memory_mb)
+    stats.update({
+        "success": True,
+        "multi_tenant": MULTI_TENANT,
+        "memory_mb": round(memory_mb, 1),
+        "container_mb": round(container_memory_mb() or 0, 1) or None,
+    })
+    return stats
+
+@app.post("/tenants/evict")
+async def evict_tenant(request: Request, data: dict = {}):
+    """
+    Persist a session's context to disk and close it (multi-tenant mode).
+
+    A session may evict itself; evicting any other session needs the admin
+    token.
+
+    Request body (optional):
+        session: Session key (defaults to this request's session)
+    """
+    if not (MULTI_TENANT and tenant_pool is not None):
+        return {"success": False, "error": "Multi-tenant mode not active"}
+    key = data.get("session") or current_session.get()
+    if key != current_session.get() or key == DEFAULT_SESSION:
+        denied = admin_denied(request)
+        if denied:
+            return denied
+    # This request holds its own session; evicting it here is safe
+    evicted = await tenant_pool.evict(key, "manual", force=key == current_session.get())
+    return {"success": evicted, "session": key}
+
 @app.get("/page_text")
 async def get_page_text():
     """Get all page text content directly from Playwright"""
     try:
+        page = await current_page()
         if stealth_mode and page:
             # Get all text content using document.body.innerText (clean, readable text)
             page_text = await page.evaluate("document.body.innerText")
@@ -741,6 +1299,7 @@ async def execute_script(request: dict):
         if not script:
             return {"success": False, "error": "No script provided"}
         
+        page = await current_page()
         if stealth_mode and page:
             result = await page.evaluate(script)
             return {
@@ -759,6 +1318,8 @@ async def save_session():
     Returns cookies that can be stored in database (encrypted!)
     """
     try:
+        context = await current_context()
+        page = await current_page()
         if not context:
             return {"success": False, "error": "No active browser context"}
         
@@ -799,11 +1360,14 @@ async def load_session(request: dict):
     """
     try:
         # Initialize browser if not already done
+        context = await current_context()
         if not context:
             print("🔄 Browser not initialized, initializing now...")
             init_result = await initialize_stealth_browser()
+            context = await current_context()
             if not init_result or not context:
                 return {"success": False, "error": "Failed to initialize browser"}
+        page = await current_page()
         
         cookies = request.get("cookies", [])
         if not cookies:
@@ -878,6 +1442,7 @@ async def check_session(request: dict = {}):
         url: Target URL to check (defaults to X for backward compatibility)
     """
     try:
+        page = await current_page()
         if not page:
             return {"success": False, "error": "No active page"}
         
@@ -960,6 +1525,12 @@ async def startup():
         import traceback
         traceback.print_exc()
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Persist tenant contexts so sessions survive a restart"""
+    if tenant_pool is not None:
+        await tenant_pool.stop()
+
 @app.post("/initialize")
 async def manual_initialize():
     """Manually trigger browser initialization"""
@@ -975,7 +1546,7 @@ async def manual_initialize():
 @app.post("/inject-cookies")
 async def inject_cookies(data: dict):
     """Inject cookies into the browser context"""
-    global context
+    context = await current_context()
     
     if not context:
         return {"success": False, "error": "Browser not initialized"}
@@ -1017,11 +1588,14 @@ async def inject_cookies(data: dict):
 @app.post("/create-post-playwright")
 async def create_post_playwright(data: dict):
     """Create a post using Playwright - types like a real user"""
-    global page
+    page = await current_page()
 
     if not page:
         return {"success": False, "error": "Browser not initialized"}
 
+    # Posting needs the full page (media previews, fonts)
+    await use_navigation_profile(await current_context(), "interactive")
+
     try:
         post_text = data.get("text", "")
         if not post_text:
@@ -1108,7 +1682,7 @@ async def create_post_playwright(data: dict):
 @app.post("/playwright/click")
 async def playwright_click(data: dict):
     """Click an element using Playwright's locator"""
-    global page
+    page = await current_page()
     
     if not page:
         return {"success": False, "error": "Browser not initialized"}
@@ -1133,7 +1707,7 @@ async def playwright_click(data: dict):
 @app.post("/playwright/type")
 async def playwright_type(data: dict):
     """Type text using keyboard.type() - works with X.com React components"""
-    global page
+    page = await current_page()
 
     if not page:
         return {"success": False, "error": "Browser not initialized"}
@@ -1171,7 +1745,7 @@ async def playwright_type(data: dict):
 @app.post("/playwright/evaluate")
 async def playwright_evaluate(data: dict):
     """Evaluate JavaScript in the page context"""
-    global page
+    page = await current_page()
 
     if not page:
         return {"success": False, "error": "Browser not initialized"}
@@ -1192,6 +1766,204 @@ async def playwright_evaluate(data: dict):
         return {"success": False, "error": str(e)}
 
 
+# Batched action scripts: one request runs a whole micro-step sequence
+# (navigate -> wait -> click -> type -> ...) server-side, so each step costs
+# a browser round trip instead of a network round trip
+
+MAX_BATCH_STEPS = 100
+
+class BatchWait(BaseModel):
+    selector: Optional[str] = None  # Wait for this selector to reach `state`
+    state: str = "visible"  # "visible", "hidden", "attached" or "detached"
+    text: Optional[str] = None  # Wait for this text anywhere in the page
+    network_idle: bool = False  # Wait for no network activity for 500ms
+    timeout: int = 5000
+
+class BatchStep(BaseModel):
+    action: str  # navigate, click, type, key, scroll, evaluate, wait
+    label: Optional[str] = None
+    url: Optional[str] = None
+    profile: str = "interactive"  # Navigation profile for navigate steps
+    selector: Optional[str] = None
+    x: Optional[int] = None
+    y: Optional[int] = None
+    text: Optional[str] = None
+    keys: list = []
+    scroll_x: int = 0
+    scroll_y: int = 3
+    script: Optional[str] = None
+    delay: int = 50  # Per-keystroke delay (ms) for type
+    ms: int = 0  # Pause after the action (ms)
+    timeout: int = 5000
+    wait: Optional[BatchWait] = None
+    # JS expression over `result` (this step's return value) and the page;
+    # a falsy value stops the batch
+    expect: Optional[str] = None
+    optional: bool = False  # Record failures but keep going
+
+class BatchRequest(BaseModel):
+    steps: list[BatchStep]
+    screenshot: bool = False  # Attach a screenshot taken after the last step
+
+async def _batch_navigate(page: Page, step: BatchStep):
+    page = await ensure_main_tab()
+    await use_navigation_profile(await current_context(), step.profile, step.url)
+    await page.goto(step.url, wait_until="domcontentloaded", timeout=max(step.timeout, 30000))
+    if step.profile == "scrape":
+        await page.evaluate(MEDIA_CAP_JS)
+    await ensure_main_tab()
+    return page.url
+
+async def _batch_click(page: Page, step: BatchStep):
+    if step.selector:
+        await page.locator(step.selector).first.click(timeout=step.timeout)
+    elif step.x is not None and step.y is not None:
+        await page.mouse.click(step.x, step.y)
+    else:
+        raise ValueError("click needs a selector or x/y")
+
+async def _batch_type(page: Page, step: BatchStep):
+    if step.selector:
+        # Focus the field first; keyboard typing triggers React's handlers
+        await page.locator(step.selector).first.click(timeout=step.timeout)
+        await asyncio.sleep(0.3)
+    await page.keyboard.type(step.text or "", delay=step.delay)
+
+async def _batch_key(page: Page, step: BatchStep):
+    await page.keyboard.press("+".join(step.keys))
+
+async def _batch_scroll(page: Page, step: BatchStep):
+    if step.x is not None and step.y is not None:
+        await page.mouse.move(step.x, step.y)
+    await page.mouse.wheel(step.scroll_x * 100, step.scroll_y * 100)
+
+async def _batch_evaluate(page: Page, step: BatchStep):
+    return await page.evaluate(step.script)
+
+async def _batch_wait(page: Page, step: BatchStep):
+    return None  # Only the step's wait condition and pause
+
+BATCH_ACTIONS = {
+    "navigate": _batch_navigate,
+    "click": _batch_click,
+    "type": _batch_type,
+    "key": _batch_key,
+    "scroll": _batch_scroll,
+    "evaluate": _batch_evaluate,
+    "wait": _batch_wait,
+}
+
+async def _wait_for(page: Page, wait: BatchWait):
+    """Block until every condition in `wait` holds (raises on timeout)."""
+    if wait.selector:
+        await page.locator(wait.selector).first.wait_for(state=wait.state, timeout=wait.timeout)
+    if wait.text:
+        await page.wait_for_function(
+            "text => !!document.body && document.body.innerText.includes(text)",
+            arg=wait.text,
+            timeout=wait.timeout,
+        )
+    if wait.network_idle:
+        await page.wait_for_load_state("networkidle", timeout=wait.timeout)
+
+async def _run_step(page: Page, step: BatchStep) -> dict:
+    """Run one step; a failure names its phase: "action", "wait" or "expect"."""
+    handler = BATCH_ACTIONS.get(step.action)
+    if handler is None:
+        return {
+            "success": False,
+            "phase": "action",
+            "error": f"Unknown action '{step.action}'. Use one of: {', '.join(BATCH_ACTIONS)}",
+        }
+
+    phase = "action"
+    try:
+        result = await handler(page, step)
+        phase = "wait"
+        if step.wait:
+            await _wait_for(page, step.wait)
+        if step.ms:
+            await asyncio.sleep(step.ms / 1000)
+        phase = "expect"
+        if step.expect and not await page.evaluate(f"(result) => ({step.expect})", result):
+            return {
+                "success": False,
+                "phase": phase,
+                "result": result,
+                "error": f"Assertion failed: {step.expect}",
+            }
+    except Exception as e:
+        return {"success": False, "phase": phase, "error": str(e)}
+    return {"success": True, "result": result}
+
+@app.post("/batch")
+async def run_batch(request: BatchRequest):
+    """
+    Run an ordered list of actions in one request.
+
+    Each step runs its action, then waits for its `wait` conditions (selector
+    state, text present, network idle) and pauses `ms`. A failed action, wait
+    or `expect` assertion stops the batch unless the step is optional.
+
+    Returns:
+        success: True if every non-optional step succeeded
+        completed: Number of steps run
+        failed_step: Index of the step that stopped the batch (or None)
+        failed_phase: "action", "wait" or "expect" for that step (or None)
+        steps: Per-step {index, action, label, success, result|error,
+            phase (failed steps only), elapsed_ms}
+        url: Page URL after the last step
+        image: Final screenshot (data URL) if requested
+    """
+    if len(request.steps) > MAX_BATCH_STEPS:
+        return {"success": False, "error": f"At most {MAX_BATCH_STEPS} steps per batch"}
+
+    page = await current_page()
+    if not (stealth_mode and page):
+        return {"success": False, "error": "Browser not initialized"}
+
+    started = time.monotonic()
+    results = []
+    failed_step = None
+    for index, step in enumerate(request.steps):
+        step_started = time.monotonic()
+        outcome = await _run_step(page, step)
+        # Navigation can swap the main tab
+        page = await current_page() or page
+
+        outcome.update(
+            index=index,
+            action=step.action,
+            label=step.label,
+            elapsed_ms=round((time.monotonic() - step_started) * 1000),
+        )
+        results.append(outcome)
+        if not outcome["success"]:
+            print(f"⚠️ Batch step {index} ({step.label or step.action}) failed: {outcome['error']}")
+            if not step.optional:
+                failed_step = index
+                break
+
+    response = {
+        "success": failed_step is None,
+        "completed": len(results),
+        "failed_step": failed_step,
+        "failed_phase": results[failed_step]["phase"] if failed_step is not None else None,
+        "error": results[failed_step]["error"] if failed_step is not None else None,
+        "steps": results,
+        "url": page.url,
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    }
+    if request.screenshot:
+        try:
+            image = base64.b64encode(await page.screenshot(full_page=False)).decode()
+            response["image"] = f"data:image/png;base64,{image}"
+        except Exception as e:
+            response["screenshot_error"] = str(e)
+    print(f"📦 Batch: {len(results)}/{len(request.steps)} steps in {response['elapsed_ms']}ms")
+    return response
+
+
 @app.post("/create-post-with-media")
 async def create_post_with_media(data: dict):
     """
@@ -1211,11 +1983,14 @@ async def create_post_with_media(data: dict):
     Returns:
         Success/failure with details
     """
-    global page
+    page = await current_page()
 
     if not page:
         return {"success": False, "error": "Browser not initialized"}
 
+    # Posting needs the full page (media previews, fonts)
+    await use_navigation_profile(await current_context(), "interactive")
+
     try:
         import aiohttp
         import tempfile
@@ -10,11 +10,12 @@ you've already explicitly chosen to follow.
 """
 
 import asyncio
-import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from datetime import datetime
+from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from x_tweet_parser import TweetRecord, collect_tweets, scrape_job
+
 
 @dataclass
 class TimelinePost:
@@ -64,6 +65,7 @@ class TimelineFeedScraper:
         """
         self.client = browser_client
 
+    @scrape_job
     async def scrape_following_feed(
         self,
         max_posts: int = 30,
@@ -91,7 +93,7 @@ class TimelineFeedScraper:
         print(f"\n📰 Scraping Following timeline feed...")
 
         # Navigate to home
-        result = await self.client._request("POST", "/navigate", {"url": "https://x.com/home"})
+        result = await self.client._request("POST", "/navigate", {"url": "https://x.com/home", "profile": "scrape"})
 
         if not result.get("success"):
             raise Exception(f"Failed to navigate to home: {result.get('error')}")
@@ -105,55 +107,15 @@ class TimelineFeedScraper:
 
         await asyncio.sleep(2)  # Wait for feed to update
 
-        # Scrape posts with scrolling
+        # Scroll and collect posts (the server dedupes and waits for renders)
         posts = []
-        scroll_count = 0
         max_scrolls = 15  # ~15 scrolls should get 30+ posts
-        stall_count = 0
-        last_count = 0
 
         print(f"   Starting scroll loop (target: {max_posts} posts)...")
 
-        while len(posts) < max_posts * 2 and scroll_count < max_scrolls:  # Get 2x to filter later
-            # Get DOM elements
-            dom_result = await self.client._request("GET", "/dom/elements")
-
-            if not dom_result.get("success"):
-                print(f"   ⚠️ Failed to get DOM: {dom_result.get('error')}")
-                break
-
-            # Extract posts from DOM
-            new_posts = self._extract_posts_from_dom(dom_result)
-
-            # Add new posts (dedupe by URL)
-            existing_urls = {p.url for p in posts}
-            for post in new_posts:
-                if post.url and post.url not in existing_urls:
-                    posts.append(post)
-                    existing_urls.add(post.url)
-
-            # Check progress
-            current_count = len(posts)
-            if current_count == last_count:
-                stall_count += 1
-                if stall_count >= 3:
-                    print(f"   ⚠️ No new posts after 3 scrolls, stopping at {current_count}")
-                    break
-            else:
-                stall_count = 0
-                last_count = current_count
-                print(f"   Found {current_count} posts so far...")
-
-            # Scroll down
-            await self.client._request("POST", "/scroll", {
-                "x": 500,
-                "y": 800,
-                "scroll_x": 0,
-                "scroll_y": 3
-            })
-
-            scroll_count += 1
-            await asyncio.sleep(1.5)  # Rate limit friendly
+        async for tweets in collect_tweets(self.client, target=max_posts * 2, max_scrolls=max_scrolls):  # Get 2x to filter later
+            posts.extend(p for p in (self._to_timeline_post(t) for t in tweets) if p)
+            print(f"   Found {len(posts)} posts so far...")
 
         # Filter by engagement and recency
         filtered_posts = []
@@ -233,350 +195,33 @@ class TimelineFeedScraper:
             print(f"   ⚠️ Error clicking Following tab: {e}")
             return False
 
-    def _extract_posts_from_dom(self, dom_result: Dict) -> List[TimelinePost]:
-        """
-        Extract posts from X.com DOM with full metadata.
-
-        Extracts:
-        - Post URL (from status link)
-        - Author username and display name
-        - Post content
-        - Engagement metrics (likes, retweets, replies, views)
-        - Timestamp (converted to hours_ago)
+    def _to_timeline_post(self, tweet: TweetRecord) -> Optional[TimelinePost]:
         """
-        posts = []
-        elements = dom_result.get("elements", [])
-
-        # Find all article elements (tweets)
-        articles = [el for el in elements if el.get("tagName", "").lower() == "article"]
-
-        for article in articles:
-            try:
-                post = self._parse_article(article, elements)
-                if post:
-                    posts.append(post)
-            except Exception as e:
-                # Skip malformed articles
-                continue
+        Convert an extracted tweet into a TimelinePost.
 
-        return posts
-
-    def _parse_article(self, article: Dict, all_elements: List[Dict]) -> Optional[TimelinePost]:
-        """
-        Parse a single article element into a TimelinePost.
+        Skips ads and posts with too little text to learn from.
         """
-        article_text = article.get("text", "").strip()
-        article_y = article.get("y", 0)
-        article_height = article.get("height", 500)
-
-        # Skip very short articles
-        if len(article_text) < 30:
-            return None
-
-        # Skip junk
-        text_lower = article_text.lower()
-        junk_patterns = [
-            "followed by", "you might like", "show this thread",
-            "trending in", "live on x", "promoted", "ad"
-        ]
-        if any(junk in text_lower for junk in junk_patterns):
+        if tweet.promoted:
             return None
 
-        # Extract post URL from nearby link elements
-        post_url = ""
-        author = ""
-        author_display_name = ""
-        timestamp_text = ""
-
-        for el in all_elements:
-            el_y = el.get("y", 0)
-
-            # Only look at elements within this article's bounds
-            if el_y < article_y - 50 or el_y > article_y + article_height + 50:
-                continue
-
-            href = el.get("href", "")
-            el_text = el.get("text", "").strip()
-
-            # Find status URL (post link)
-            if "/status/" in href and not post_url:
-                post_url = f"https://x.com{href}" if href.startswith("/") else href
-                # Extract author from URL: /username/status/123
-                parts = href.split("/")
-                if len(parts) >= 2:
-                    author = parts[1]
-
-            # Find @username mention (author)
-            if el_text.startswith("@") and not author:
-                author = el_text[1:]  # Remove @
-
-            # Find timestamp (e.g., "2h", "1d", "Jan 5")
-            if el.get("tagName") == "time" or self._looks_like_timestamp(el_text):
-                timestamp_text = el_text
-
-        # Skip if no URL found
-        if not post_url:
-            return None
-
-        # Extract engagement metrics
-        likes, retweets, replies, views = self._extract_engagement(article_y, all_elements)
-
-        # Parse timestamp to hours_ago
-        hours_ago = self._parse_timestamp(timestamp_text)
-
-        # Extract clean content (remove username, timestamp from article text)
-        content = self._extract_content(article_text, author)
-
-        # Skip if content is too short after cleaning
+        content = " ".join(tweet.text.split())
         if len(content) < 20:
             return None
 
         return TimelinePost(
-            url=post_url,
-            author=author,
-            author_display_name=author_display_name or author,
+            url=tweet.url,
+            author=tweet.author,
+            author_display_name=tweet.display_name or tweet.author,
             author_followers=0,  # Would need separate profile lookup
             content=content,
-            likes=likes,
-            retweets=retweets,
-            replies=replies,
-            views=views,
-            hours_ago=hours_ago,
+            likes=tweet.likes,
+            retweets=tweet.retweets,
+            replies=tweet.replies,
+            views=tweet.views,
+            hours_ago=tweet.hours_ago(),
             scraped_at=datetime.utcnow().isoformat()
         )
 
-    def _extract_engagement(self, article_y: int, elements: List[Dict]) -> Tuple[int, int, int, int]:
-        """
-        Extract engagement metrics from elements near the article.
-
-        X/Twitter uses aria-labels and group elements with specific patterns.
-        Updated to handle various formats including:
-        - "1,234 Likes" or "1234 likes"
-        - "1.2K Likes"
-        - Button groups with role="group"
-        """
-        likes = 0
-        retweets = 0
-        replies = 0
-        views = 0
-
-        for el in elements:
-            el_y = el.get("y", 0)
-
-            # Check if element is near this article (within 500px vertically)
-            if abs(el_y - article_y) > 500:
-                continue
-
-            aria_label = el.get("ariaLabel", "").lower()
-            el_text = el.get("text", "").lower()
-            tag = el.get("tagName", "").lower()
-            role = el.get("role", "").lower()
-
-            # Method 1: Parse from aria-label (various formats)
-            if aria_label:
-                # Likes - handle "123 likes", "1,234 likes", "1.2K likes"
-                if "like" in aria_label:
-                    # Try patterns: "123 likes", "1,234 Likes", "1.2K likes"
-                    match = re.search(r'([\d,]+\.?\d*[km]?)\s*like', aria_label, re.IGNORECASE)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        likes = max(likes, self._parse_metric(metric_str))
-
-                # Retweets/Reposts
-                if "retweet" in aria_label or "repost" in aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)\s*(?:retweet|repost)', aria_label, re.IGNORECASE)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        retweets = max(retweets, self._parse_metric(metric_str))
-
-                # Replies
-                if "repl" in aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)\s*repl', aria_label, re.IGNORECASE)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        replies = max(replies, self._parse_metric(metric_str))
-
-                # Views - handle "1,234 views" and "1.2M Views. View post"
-                if "view" in aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)\s*views?', aria_label, re.IGNORECASE)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        views = max(views, self._parse_metric(metric_str))
-
-            # Method 2: Parse from element text content (fallback)
-            # X sometimes shows metrics in group elements without aria-labels
-            if el_text and (tag in ['span', 'div', 'a'] or role == 'group'):
-                # Look for standalone numbers that might be metrics
-                # Usually in format like "1.2K" or "123"
-                if re.match(r'^[\d,]+\.?\d*[km]?$', el_text.strip(), re.IGNORECASE):
-                    # This is a metric, but we need context from siblings
-                    # For now, just skip as we can't determine type
-                    pass
-
-            # Method 3: Parse from testid or data attributes
-            test_id = el.get("testId", "").lower()
-            if test_id:
-                if "like" in test_id and aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)', aria_label)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        likes = max(likes, self._parse_metric(metric_str))
-                elif "retweet" in test_id and aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)', aria_label)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        retweets = max(retweets, self._parse_metric(metric_str))
-                elif "reply" in test_id and aria_label:
-                    match = re.search(r'([\d,]+\.?\d*[km]?)', aria_label)
-                    if match:
-                        metric_str = match.group(1).replace(',', '')
-                        replies = max(replies, self._parse_metric(metric_str))
-
-        return likes, retweets, replies, views
-
-    def _parse_metric(self, metric_str: str) -> int:
-        """
-        Parse engagement metric string like '1.2K' to integer.
-        """
-        metric_str = metric_str.strip().upper()
-
-        try:
-            if 'K' in metric_str:
-                return int(float(metric_str.replace('K', '')) * 1000)
-            elif 'M' in metric_str:
-                return int(float(metric_str.replace('M', '')) * 1000000)
-            else:
-                return int(float(metric_str))
-        except:
-            return 0
-
-    def _looks_like_timestamp(self, text: str) -> bool:
-        """
-        Check if text looks like a timestamp.
-        Examples: "2h", "1d", "5m", "Jan 5", "Dec 30"
-        """
-        text = text.strip().lower()
-
-        # Relative timestamps
-        if re.match(r'^\d+[hdms]$', text):
-            return True
-
-        # Date timestamps
-        months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
-                  'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-        for month in months:
-            if text.startswith(month):
-                return True
-
-        return False
-
-    def _parse_timestamp(self, timestamp_text: str) -> float:
-        """
-        Parse timestamp text to hours ago.
-
-        Examples:
-        - "2h" -> 2.0
-        - "1d" -> 24.0
-        - "5m" -> 0.083
-        - "Jan 5" -> hours since Jan 5
-        """
-        text = timestamp_text.strip().lower()
-
-        # Relative: "2h", "1d", "5m", "30s"
-        match = re.match(r'^(\d+)([hdms])$', text)
-        if match:
-            value = int(match.group(1))
-            unit = match.group(2)
-
-            if unit == 'h':
-                return float(value)
-            elif unit == 'd':
-                return float(value * 24)
-            elif unit == 'm':
-                return float(value) / 60
-            elif unit == 's':
-                return float(value) / 3600
-
-        # Date format: "Jan 5"
-        months = {
-            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-            'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-        }
-
-        for month_name, month_num in months.items():
-            if text.startswith(month_name):
-                try:
-                    day = int(re.search(r'\d+', text).group())
-                    now = datetime.utcnow()
-                    year = now.year
-
-                    # Handle year rollover
-                    post_date = datetime(year, month_num, day)
-                    if post_date > now:
-                        post_date = datetime(year - 1, month_num, day)
-
-                    delta = now - post_date
-                    return delta.total_seconds() / 3600
-                except:
-                    pass
-
-        # Default: assume recent
-        return 12.0
-
-    def _extract_content(self, article_text: str, author: str) -> str:
-        """
-        Extract clean post content from article text.
-
-        Article text includes username, timestamp, and buttons.
-        We want just the actual post content.
-        """
-        # Remove common noise patterns
-        lines = article_text.split('\n')
-        content_lines = []
-
-        skip_patterns = [
-            'show more', 'show this thread', 'translate',
-            'quote', 'repost', 'like', 'bookmark', 'share',
-            'more', 'copy link', 'reply', 'follows you'
-        ]
-
-        for line in lines:
-            line = line.strip()
-
-            # Skip empty lines
-            if not line:
-                continue
-
-            # Skip usernames
-            if line.startswith('@'):
-                continue
-
-            # Skip timestamps
-            if self._looks_like_timestamp(line):
-                continue
-
-            # Skip noise
-            if line.lower() in skip_patterns:
-                continue
-
-            # Skip very short fragments
-            if len(line) < 3:
-                continue
-
-            # Skip if it's just the author name
-            if author and line.lower() == author.lower():
-                continue
-
-            content_lines.append(line)
-
-        # Join and clean
-        content = ' '.join(content_lines)
-
-        # Remove duplicate spaces
-        content = re.sub(r'\s+', ' ', content).strip()
-
-        return content
-
 
 # ============================================================================
 # CONVENIENCE FUNCTIONS
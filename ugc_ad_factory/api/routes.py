@@ -222,6 +222,7 @@ async def job_progress_websocket(websocket: WebSocket, job_id: str):
                 "progress_percent": _calculate_progress(state),
                 "completed_variations": state.completed_count,
                 "target_variations": state.target_count,
+                "stage_progress": state.stage_progress,
                 "warnings": state.warnings[-5:],  # Last 5 warnings
             }
 
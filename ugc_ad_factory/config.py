@@ -29,6 +29,12 @@ class Settings(BaseSettings):
     gcp_project: str = "parallel-universe-prod"
     gcs_bucket: str = "ugc-ad-assets"
     google_application_credentials: str | None = None
+    gcs_endpoint: str | None = None  # Fake GCS endpoint for local testing
+    gcs_upload_concurrency: int = 8  # Dedicated upload thread pool size
+    gcs_resumable_threshold_mb: int = 8  # Larger files use chunked resumable uploads
+    gcs_chunk_size_mb: int = 8  # Resumable chunk size (multiple of 256 KB)
+    gcs_public_access: str = "bucket"  # bucket (public-read bucket) or signed
+    gcs_signed_url_minutes: int = 7 * 24 * 60  # V4 signed URL lifetime (max 7 days)
 
     # LLM Configuration
     anthropic_api_key: str = ""
@@ -43,6 +49,15 @@ class Settings(BaseSettings):
     keyai_concurrency: int = 10  # Max parallel KeyAI jobs
     max_retries: int = 2  # Retry failed renders
     keyai_timeout: int = 300  # 5 min timeout per video task
+    assembly_concurrency: int = 0  # Max parallel ffmpeg encodes (0 = one per core)
+
+    # Render cache (content-addressed, shared across jobs)
+    render_cache_enabled: bool = True
+    render_cache_backend: str = "local"  # local or gcs
+    render_cache_dir: str = ""  # Local cache directory (default: <tmp>/ugc_render_cache)
+    render_cache_max_gb: float = 20.0  # Size cap before LRU eviction
+    render_cache_pin_minutes: int = 120  # Entries hit or stored this recently are never evicted
+    render_cache_gcs_prefix: str = "render_cache/"  # Object prefix for the gcs backend
 
     # QC Configuration
     qc_min_duration: float = 9.0  # seconds
@@ -94,7 +94,7 @@ async def assemble_perspective_video(state: UGCPipelineState) -> UGCPipelineStat
     async with aiohttp.ClientSession() as session:
         for i, clip in enumerate(clips):
             if clip["path"].startswith("http"):
-                local_path = output_dir / f"trans_clip_{i}.mp4"
+                local_path = assembler.work_dir / f"trans_clip_{i}.mp4"
                 try:
                     async with session.get(clip["path"]) as resp:
                         if resp.status == 200:
@@ -130,6 +130,9 @@ async def assemble_perspective_video(state: UGCPipelineState) -> UGCPipelineStat
     except Exception as e:
         state.error = f"Assembly failed: {e}"
 
+    finally:
+        assembler.cleanup()
+
     return state
 
 
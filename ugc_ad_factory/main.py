@@ -11,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .api.routes import router
 from .config import settings
+from .storage import GCSAssetStore
 from . import __version__
 
 
@@ -23,6 +24,13 @@ async def lifespan(app: FastAPI):
     print(f"KeyAI API: {settings.keyai_api_url}")
     print(f"GCS Bucket: {settings.gcs_bucket}")
 
+    # Fail fast on a bucket that would hand out URLs that 403
+    store = GCSAssetStore()
+    try:
+        await store.check_public_read()
+    finally:
+        store.close()
+
     yield
 
     # Shutdown
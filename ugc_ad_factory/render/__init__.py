@@ -4,10 +4,12 @@ from .comfyui_client import ComfyUIClient
 from .keyai_client import KeyAISora2Client
 from .coordinator import RenderCoordinator
 from .assembler import FFmpegAssembler
+from .render_cache import RenderCache
 
 __all__ = [
     "ComfyUIClient",
     "KeyAISora2Client",
     "RenderCoordinator",
     "FFmpegAssembler",
+    "RenderCache",
 ]
@@ -2,11 +2,19 @@
 Video Assembler - FFmpeg-based video assembly with text overlays.
 
 Stitches together video clips, adds text overlays, transitions, and music.
+
+Each video is built from one filter_complex graph (normalize, Ken Burns
+fallbacks, concat or xfade transitions, drawtext overlays, audio mix) and
+encoded in a single ffmpeg run. Clip probes are cached by content hash so
+clips shared between variants are only inspected once.
 """
 
 import asyncio
+import hashlib
 import json
-import subprocess
+import os
+import shutil
+import time
 from pathlib import Path
 from typing import Any
 import tempfile
@@ -23,6 +31,69 @@ from ..state import (
 from ..config import settings
 
 
+# Output format every segment is normalized to
+OUTPUT_WIDTH = 1080
+OUTPUT_HEIGHT = 1920
+OUTPUT_FPS = 25
+AUDIO_SAMPLE_RATE = 44100
+
+# Crossfade length between clips (capped at half the shortest clip)
+TRANSITION_SECONDS = 0.5
+
+# Parallel clip downloads per assembler
+DOWNLOAD_CONCURRENCY = 8
+
+# xfade transition names per ShotList.transition_style
+XFADE_TRANSITIONS = {
+    "crossfade": "fade",
+    "wipe": "wipeleft",
+}
+
+
+def _file_hash(path: str | Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_assembly_pool(variant_count: int) -> tuple[int, int]:
+    """
+    Size the ffmpeg worker pool for a batch of variants.
+
+    Concurrent encodes split the available cores between them so ffmpeg's
+    own threading doesn't oversubscribe the machine.
+
+    Args:
+        variant_count: Number of videos to assemble
+
+    Returns:
+        (concurrent encodes, ffmpeg threads per encode)
+    """
+    cores = available_cores()
+    workers = settings.assembly_concurrency or cores
+    workers = max(1, min(workers, variant_count, cores))
+    return workers, max(1, cores // workers)
+
+
+def _parse_overlay_time(value: Any) -> float:
+    """Parse an overlay time given as seconds or "m:ss"."""
+    if isinstance(value, str) and ":" in value:
+        minutes, seconds = value.split(":", 1)
+        return int(minutes or 0) * 60 + float(seconds or 0)
+    return float(value or 0)
+
+
 class FFmpegAssembler:
     """
     Assembles final videos from rendered clips using FFmpeg.
@@ -30,14 +101,28 @@ class FFmpegAssembler:
     Features:
     - Concatenate clips in sequence
     - Add text overlays with timing
-    - Simple transitions (cuts or crossfades)
+    - Transitions (cuts, crossfades, wipes)
     - Background music mixing
     - Ken Burns fallback for missing video clips
+
+    All of the above happens in one ffmpeg encode per video. encode_count
+    counts the ffmpeg encodes this assembler has run.
+
+    Assembled videos and the probe cache live in output_dir, which may be
+    shared between jobs. Downloaded clips and filter scripts go in a private
+    work_dir that cleanup() removes.
     """
 
     def __init__(self, output_dir: Path | None = None):
         self.output_dir = output_dir or Path(tempfile.gettempdir()) / "ugc_assembly"
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.probe_cache_dir = self.output_dir / "probe_cache"
+        self.probe_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.work_dir = Path(tempfile.mkdtemp(prefix="work_", dir=self.output_dir))
+        self._probe_cache: dict[str, dict] = {}
+        self._downloads: dict[str, asyncio.Task] = {}
+        self._download_slots = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+        self.encode_count = 0
 
     async def assemble_video(
         self,
@@ -46,6 +131,7 @@ class FFmpegAssembler:
         asset_requests: list[AssetRequest],
         job_id: str,
         music_path: str | None = None,
+        threads: int | None = None,
     ) -> dict[str, Any]:
         """
         Assemble a single video from its components.
@@ -56,18 +142,23 @@ class FFmpegAssembler:
             asset_requests: All asset requests (to find rendered clips)
             job_id: Job ID for output naming
             music_path: Optional path to background music
+            threads: ffmpeg threads for the encode (None = ffmpeg default)
 
         Returns:
             dict with:
                 - success: bool
                 - output_path: path to assembled video
                 - duration_seconds: actual duration
+                - encode_count: ffmpeg encodes run for this video
+                - wall_seconds: assembly wall time
                 - error: error message if failed
         """
+        started = time.perf_counter()
+        encodes_before = self.encode_count
+
         try:
             # Collect clips for each shot
             clips = []
-            total_duration = 0.0
 
             for shot in shotlist.shots:
                 # Find the video clip for this shot
@@ -89,7 +180,7 @@ class FFmpegAssembler:
                         "is_fallback": False,
                     })
                 else:
-                    # Try to use image fallback (Ken Burns)
+                    # Try to use image fallback (Ken Burns, rendered in the graph)
                     image_req = next(
                         (r for r in asset_requests
                          if r.shot_id == shot.shot_id and r.asset_type == "image"
@@ -98,19 +189,12 @@ class FFmpegAssembler:
                     )
 
                     if image_req and image_req.local_path:
-                        fallback_path = await self._create_ken_burns_clip(
-                            image_req.local_path,
-                            shot.duration_seconds,
-                            shot.shot_id,
-                        )
                         clips.append({
-                            "path": fallback_path,
+                            "path": image_req.local_path,
                             "duration": shot.duration_seconds,
                             "is_fallback": True,
                         })
 
-                total_duration += shot.duration_seconds
-
             if not clips:
                 return {
                     "success": False,
@@ -120,158 +204,378 @@ class FFmpegAssembler:
             # Build output path
             output_path = self.output_dir / f"{job_id}_{shotlist.shotlist_id}.mp4"
 
-            # Concatenate clips
-            concat_path = await self._concatenate_clips(clips, shotlist.transition_style)
-
-            # Add text overlays
-            if script.text_overlays:
-                with_overlays = await self._add_text_overlays(
-                    concat_path, script.text_overlays
-                )
-            else:
-                with_overlays = concat_path
-
-            # Add music if provided
-            if music_path:
-                final_path = await self._add_music(with_overlays, music_path, output_path)
-            else:
-                # Just copy/move to final location
-                final_path = output_path
-                if with_overlays != output_path:
-                    subprocess.run(["cp", str(with_overlays), str(final_path)], check=True)
-
-            # Get actual duration
-            duration = await self._get_video_duration(final_path)
+            duration = await self.render(
+                clips,
+                output_path,
+                transition_style=shotlist.transition_style,
+                overlays=script.text_overlays,
+                music_path=music_path,
+                threads=threads,
+            )
 
             return {
                 "success": True,
-                "output_path": str(final_path),
+                "output_path": str(output_path),
                 "duration_seconds": duration,
+                "encode_count": self.encode_count - encodes_before,
+                "wall_seconds": round(time.perf_counter() - started, 3),
             }
 
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
+                "encode_count": self.encode_count - encodes_before,
+                "wall_seconds": round(time.perf_counter() - started, 3),
             }
 
+    async def render(
+        self,
+        clips: list[dict],
+        output_path: Path | str,
+        transition_style: str = "cut",
+        overlays: list[dict] | None = None,
+        music_path: str | None = None,
+        threads: int | None = None,
+    ) -> float:
+        """
+        Render clips into one video with a single ffmpeg encode.
+
+        Args:
+            clips: Segments in order, each {"path", "duration", "is_fallback"}.
+                Video clips play in full, as the concat demuxer did; their
+                "duration" is only used when ffprobe can't read one.
+                Fallback segments are still images animated with zoompan.
+            output_path: Where to write the MP4
+            transition_style: "cut", "crossfade" or "wipe"
+            overlays: Text overlays ({"time", "text", "style"})
+            music_path: Optional background music, mixed under clip audio
+            threads: ffmpeg threads for decode, filtering and encode
+
+        Returns:
+            Duration of the rendered video in seconds
+        """
+        output_path = Path(output_path)
+
+        # Probe every input (cached by content hash)
+        probes = await asyncio.gather(*(self._probe(c["path"]) for c in clips))
+        segments = []
+        for clip, probe in zip(clips, probes):
+            duration = float(clip["duration"])
+            if not clip.get("is_fallback") and probe.get("duration"):
+                # Play the whole clip, as the old concat-demuxer path did
+                duration = probe["duration"]
+            segments.append({**clip, "duration": duration, "probe": probe})
+
+        music_probe = await self._probe(music_path) if music_path else None
+        if music_probe is not None and not music_probe.get("has_audio"):
+            # Unreadable music: render without it rather than fail
+            music_path = None
+
+        filter_graph, total_duration = self._build_filter_graph(
+            segments,
+            transition_style,
+            overlays or [],
+            mix_music=bool(music_path),
+        )
+
+        cmd = ["ffmpeg", "-y", "-hide_banner"]
+        if threads:
+            cmd += ["-filter_complex_threads", str(threads)]
+        for segment in segments:
+            cmd += ["-i", str(segment["path"])]
+        if music_path:
+            cmd += ["-stream_loop", "-1", "-i", music_path]
+
+        # Long graphs go through a script file (argv limits); removed after
+        script_fd, script_path = tempfile.mkstemp(
+            prefix="graph_", suffix=".txt", dir=self.work_dir
+        )
+        partial_path = output_path.with_name(f".{output_path.stem}.{uuid.uuid4().hex[:8]}.mp4")
+        try:
+            with os.fdopen(script_fd, "w") as f:
+                f.write(filter_graph)
+
+            cmd += [
+                "-filter_complex_script", script_path,
+                "-map", "[vout]",
+                "-map", "[aout]",
+                "-t", f"{total_duration:.3f}",
+                *(["-threads", str(threads)] if threads else []),
+                "-c:v", "libx264",
+                "-preset", "fast",
+                "-crf", "23",
+                "-pix_fmt", "yuv420p",
+                "-c:a", "aac",
+                "-b:a", "128k",
+                "-movflags", "+faststart",
+                str(partial_path),
+            ]
+
+            self.encode_count += 1
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await process.communicate()
+
+            if process.returncode != 0:
+                raise RuntimeError(f"Assembly failed: {stderr.decode()[-2000:]}")
+
+            os.replace(partial_path, output_path)
+
+        finally:
+            Path(script_path).unlink(missing_ok=True)
+            partial_path.unlink(missing_ok=True)
+
+        return round(total_duration, 3)
+
+    def _build_filter_graph(
+        self,
+        segments: list[dict],
+        transition_style: str,
+        overlays: list[dict],
+        mix_music: bool = False,
+    ) -> tuple[str, float]:
+        """
+        Build the filter_complex graph for a render.
+
+        Input i is segments[i]; the music input (if any) follows them.
+
+        Returns:
+            (filter graph, output duration in seconds)
+        """
+        chains = []
+        size = f"{OUTPUT_WIDTH}x{OUTPUT_HEIGHT}"
+        audio_format = (
+            f"aresample={AUDIO_SAMPLE_RATE},"
+            f"aformat=sample_fmts=fltp:channel_layouts=stereo"
+        )
+
+        # Per-segment normalization: same size, fps, pixel and audio format
+        for i, segment in enumerate(segments):
+            duration = segment["duration"]
+            probe = segment["probe"]
+
+            if segment.get("is_fallback"):
+                # Ken Burns pan/zoom from a single still frame
+                frames = max(1, int(duration * OUTPUT_FPS))
+                video = (
+                    f"[{i}:v]scale={OUTPUT_WIDTH}:{OUTPUT_HEIGHT}:force_original_aspect_ratio=increase,"
+                    f"crop={OUTPUT_WIDTH}:{OUTPUT_HEIGHT},"
+                    f"zoompan=z='min(zoom+0.0015,1.3)':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+                    f":d={frames}:s={size}:fps={OUTPUT_FPS},"
+                    f"trim=duration={duration:.3f},setpts=PTS-STARTPTS,"
+                    f"fps={OUTPUT_FPS},settb=AVTB,setsar=1,format=yuv420p[v{i}]"
+                )
+            else:
+                steps = [f"trim=duration={duration:.3f}", "setpts=PTS-STARTPTS"]
+                if (probe.get("width"), probe.get("height")) != (OUTPUT_WIDTH, OUTPUT_HEIGHT):
+                    steps += [
+                        f"scale={OUTPUT_WIDTH}:{OUTPUT_HEIGHT}:force_original_aspect_ratio=decrease",
+                        f"pad={OUTPUT_WIDTH}:{OUTPUT_HEIGHT}:(ow-iw)/2:(oh-ih)/2",
+                    ]
+                # Always resample: xfade needs identical frame rates and
+                # timebases, which a matching probed rate doesn't guarantee
+                steps += [f"fps={OUTPUT_FPS}", "settb=AVTB", "setsar=1", "format=yuv420p"]
+                video = f"[{i}:v]" + ",".join(steps) + f"[v{i}]"
+            chains.append(video)
+
+            if probe.get("has_audio") and not segment.get("is_fallback"):
+                audio = (
+                    f"[{i}:a]apad,atrim=duration={duration:.3f},asetpts=PTS-STARTPTS,"
+                    f"{audio_format}[a{i}]"
+                )
+            else:
+                audio = (
+                    f"anullsrc=r={AUDIO_SAMPLE_RATE}:cl=stereo,"
+                    f"atrim=duration={duration:.3f},{audio_format}[a{i}]"
+                )
+            chains.append(audio)
+
+        # Join segments
+        durations = [s["duration"] for s in segments]
+        xfade = XFADE_TRANSITIONS.get(transition_style)
+
+        if xfade and len(segments) > 1:
+            fade = min(TRANSITION_SECONDS, min(durations) / 2)
+            video_label, audio_label = "[v0]", "[a0]"
+            elapsed = durations[0]
+            for i in range(1, len(segments)):
+                offset = elapsed - fade
+                next_video = "[vcat]" if i == len(segments) - 1 else f"[vx{i}]"
+                next_audio = "[acat]" if i == len(segments) - 1 else f"[ax{i}]"
+                chains.append(
+                    f"{video_label}[v{i}]xfade=transition={xfade}"
+                    f":duration={fade:.3f}:offset={offset:.3f}{next_video}"
+                )
+                chains.append(
+                    f"{audio_label}[a{i}]acrossfade=d={fade:.3f}{next_audio}"
+                )
+                video_label, audio_label = next_video, next_audio
+                elapsed = offset + durations[i]
+            total_duration = elapsed
+        else:
+            pairs = "".join(f"[v{i}][a{i}]" for i in range(len(segments)))
+            chains.append(f"{pairs}concat=n={len(segments)}:v=1:a=1[vcat][acat]")
+            total_duration = sum(durations)
+
+        # Text overlays
+        drawtext = self._drawtext_filters(overlays)
+        if drawtext:
+            chains.append("[vcat]" + ",".join(drawtext) + "[vout]")
+        else:
+            chains.append("[vcat]null[vout]")
+
+        # Background music
+        if mix_music:
+            music = len(segments)
+            chains.append(f"[{music}:a]volume=0.3,{audio_format}[music]")
+            chains.append("[acat][music]amix=inputs=2:duration=first[aout]")
+        else:
+            chains.append("[acat]anull[aout]")
+
+        return ";\n".join(chains), total_duration
+
+    async def prefetch_clips(self, asset_requests: list[AssetRequest]) -> dict[str, str]:
+        """
+        Download every successful video clip concurrently.
+
+        Clips are deduplicated by URL, so a clip shared by several variants
+        is fetched once.
+
+        Args:
+            asset_requests: Asset requests whose rendered clips are needed
+
+        Returns:
+            Map of result_url -> local path for clips that downloaded
+        """
+        by_url: dict[str, AssetRequest] = {}
+        for request in asset_requests:
+            if (request.asset_type == "video" and request.status == AssetStatus.SUCCESS
+                    and request.result_url):
+                by_url.setdefault(request.result_url, request)
+
+        paths = await asyncio.gather(
+            *(self._ensure_local_clip(url, r.request_id) for url, r in by_url.items()),
+            return_exceptions=True,
+        )
+        return {
+            url: path for url, path in zip(by_url, paths)
+            if not isinstance(path, BaseException)
+        }
+
     async def _ensure_local_clip(self, url: str, clip_id: str) -> str:
-        """Download a clip from URL if needed, return local path."""
-        local_path = self.output_dir / f"clip_{clip_id}.mp4"
+        """
+        Download a clip from URL if needed, return local path.
+
+        Concurrent calls for the same URL share one download.
+        """
+        task = self._downloads.get(url)
+        if task is None or (task.done() and (task.cancelled() or task.exception())):
+            task = asyncio.ensure_future(self._download_clip(url, clip_id))
+            self._downloads[url] = task
+        return await asyncio.shield(task)
+
+    async def _download_clip(self, url: str, clip_id: str) -> str:
+        """Stream a clip to disk (via a partial file) under the download limit."""
+        local_path = self.work_dir / f"clip_{clip_id}.mp4"
 
         if local_path.exists():
             return str(local_path)
 
-        # Download using curl or aiohttp
         import aiohttp
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status == 200:
-                    with open(local_path, "wb") as f:
-                        f.write(await resp.read())
-                    return str(local_path)
+        partial_path = local_path.with_name(f".{local_path.stem}.{uuid.uuid4().hex[:8]}.mp4")
+        async with self._download_slots:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url) as resp:
+                        if resp.status != 200:
+                            raise RuntimeError(
+                                f"Failed to download clip from {url} (HTTP {resp.status})"
+                            )
+                        with open(partial_path, "wb") as f:
+                            async for chunk in resp.content.iter_chunked(1024 * 1024):
+                                f.write(chunk)
+                os.replace(partial_path, local_path)
+            finally:
+                partial_path.unlink(missing_ok=True)
+
+        return str(local_path)
+
+    async def _probe(self, path: str | Path) -> dict[str, Any]:
+        """
+        Probe a media file's duration, size, frame rate and audio.
 
-        raise RuntimeError(f"Failed to download clip from {url}")
+        Results are cached in memory and on disk by content hash, so clips
+        reused across variants (or re-downloaded) are probed once.
+        """
+        loop = asyncio.get_running_loop()
+        content_hash = await loop.run_in_executor(None, _file_hash, path)
 
-    async def _create_ken_burns_clip(
-        self,
-        image_path: str,
-        duration: float,
-        shot_id: str,
-    ) -> str:
-        """Create Ken Burns pan/zoom effect from static image."""
-        output_path = self.output_dir / f"fallback_{shot_id}.mp4"
+        if content_hash in self._probe_cache:
+            return self._probe_cache[content_hash]
 
-        # FFmpeg Ken Burns effect using zoompan filter
-        filter_complex = (
-            f"zoompan=z='min(zoom+0.0015,1.3)':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
-            f":d={int(duration * 25)}:s=1080x1920:fps=25"
-        )
+        cache_file = self.probe_cache_dir / f"{content_hash}.json"
+        if cache_file.exists():
+            try:
+                probe = json.loads(cache_file.read_text())
+                self._probe_cache[content_hash] = probe
+                return probe
+            except (OSError, ValueError):
+                pass
 
         cmd = [
-            "ffmpeg", "-y",
-            "-loop", "1",
-            "-i", image_path,
-            "-vf", filter_complex,
-            "-t", str(duration),
-            "-pix_fmt", "yuv420p",
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "23",
-            str(output_path),
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration:stream=codec_type,width,height,avg_frame_rate",
+            "-of", "json",
+            str(path),
         ]
-
         process = await asyncio.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        _, stderr = await process.communicate()
+        stdout, _ = await process.communicate()
 
-        if process.returncode != 0:
-            raise RuntimeError(f"Ken Burns creation failed: {stderr.decode()}")
+        probe: dict[str, Any] = {"duration": None, "has_audio": False}
+        try:
+            info = json.loads(stdout.decode() or "{}")
+        except ValueError:
+            info = {}
 
-        return str(output_path)
+        try:
+            probe["duration"] = float(info.get("format", {}).get("duration"))
+        except (TypeError, ValueError):
+            pass
+
+        for stream in info.get("streams", []):
+            if stream.get("codec_type") == "audio":
+                probe["has_audio"] = True
+            elif stream.get("codec_type") == "video" and "width" not in probe:
+                probe["width"] = stream.get("width")
+                probe["height"] = stream.get("height")
+                num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+                try:
+                    probe["fps"] = round(float(num) / float(den or 1), 3)
+                except (ValueError, ZeroDivisionError):
+                    probe["fps"] = None
+
+        if process.returncode == 0:
+            self._probe_cache[content_hash] = probe
+            cache_file.write_text(json.dumps(probe))
+
+        return probe
 
     async def _concatenate_clips(
         self,
         clips: list[dict],
         transition_style: str = "cut",
     ) -> str:
-        """Concatenate clips with optional transitions."""
+        """Concatenate clips with optional transitions (single encode)."""
         output_path = self.output_dir / f"concat_{uuid.uuid4().hex[:8]}.mp4"
-
-        # Create concat file
-        concat_file = self.output_dir / f"concat_{uuid.uuid4().hex[:8]}.txt"
-        with open(concat_file, "w") as f:
-            for clip in clips:
-                f.write(f"file '{clip['path']}'\n")
-
-        if transition_style == "crossfade" and len(clips) > 1:
-            # Use xfade filter for crossfades
-            # This is more complex, simplified to cuts for now
-            pass
-
-        # Simple concatenation with cuts
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", str(concat_file),
-            "-c", "copy",
-            str(output_path),
-        ]
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            # Try re-encoding if copy fails
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", str(concat_file),
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
-                "-c:a", "aac",
-                str(output_path),
-            ]
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                raise RuntimeError(f"Concatenation failed: {stderr.decode()}")
-
+        await self.render(clips, output_path, transition_style=transition_style)
         return str(output_path)
 
     def _escape_drawtext(self, text: str) -> str:
@@ -291,18 +595,11 @@ class FFmpegAssembler:
         text = text.replace("=", "\\=")
         return text
 
-    async def _add_text_overlays(
-        self,
-        input_path: str,
-        overlays: list[dict],
-    ) -> str:
-        """Add text overlays to video using drawtext filter."""
-        output_path = self.output_dir / f"overlays_{uuid.uuid4().hex[:8]}.mp4"
-
-        # Build drawtext filter chain
+    def _drawtext_filters(self, overlays: list[dict]) -> list[str]:
+        """Build drawtext filters for text overlays."""
         filters = []
         for overlay in overlays:
-            time = float(overlay.get("time", 0))
+            start = _parse_overlay_time(overlay.get("time", 0))
             text = self._escape_drawtext(overlay.get("text", ""))
             style = overlay.get("style", "benefit")
 
@@ -318,93 +615,28 @@ class FFmpegAssembler:
                 fontcolor = "white"
 
             # Enable for ~3 seconds after time
-            enable = f"between(t,{time},{time + 3})"
+            enable = f"between(t,{start},{start + 3})"
 
-            filter_str = (
+            filters.append(
                 f"drawtext=text='{text}':fontsize={fontsize}:fontcolor={fontcolor}"
                 f":x=(w-text_w)/2:y=h-text_h-100:enable='{enable}'"
                 f":shadowcolor=black:shadowx=2:shadowy=2"
             )
-            filters.append(filter_str)
-
-        if not filters:
-            return input_path
-
-        filter_complex = ",".join(filters)
-
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", input_path,
-            "-vf", filter_complex,
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "23",
-            "-c:a", "copy",
-            str(output_path),
-        ]
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            raise RuntimeError(f"Text overlay failed: {stderr.decode()}")
-
-        return str(output_path)
-
-    async def _add_music(
-        self,
-        video_path: str,
-        music_path: str,
-        output_path: Path,
-    ) -> str:
-        """Add background music to video."""
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_path,
-            "-i", music_path,
-            "-filter_complex",
-            "[1:a]volume=0.3[music];[0:a][music]amix=inputs=2:duration=first",
-            "-c:v", "copy",
-            str(output_path),
-        ]
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        _, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            # Fall back to video without music
-            subprocess.run(["cp", video_path, str(output_path)], check=True)
-
-        return str(output_path)
+        return filters
 
     async def _get_video_duration(self, path: Path | str) -> float:
         """Get video duration using ffprobe."""
-        cmd = [
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            str(path),
-        ]
+        probe = await self._probe(path)
+        return probe.get("duration") or 0.0
 
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await process.communicate()
+    def cleanup(self):
+        """
+        Remove this assembler's work directory (downloaded clips, filter scripts).
 
-        try:
-            return float(stdout.decode().strip())
-        except ValueError:
-            return 0.0
+        Assembled videos in output_dir and other jobs' files are left alone.
+        """
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self._downloads.clear()
 
 
 async def assemble_videos(state: UGCPipelineState) -> UGCPipelineState:
@@ -412,6 +644,9 @@ async def assemble_videos(state: UGCPipelineState) -> UGCPipelineState:
     Stage 7: Assemble final videos from rendered assets.
 
     This is the LangGraph node function that wraps the FFmpegAssembler.
+    All clips are downloaded up front (concurrently, once per URL), then
+    variants are encoded across a pool sized to the available cores.
+    Progress is published on state.stage_progress as variants finish.
     """
     state.current_stage = "assemble"
 
@@ -424,6 +659,8 @@ async def assemble_videos(state: UGCPipelineState) -> UGCPipelineState:
 
     assembler = FFmpegAssembler()
 
+    # Pair each shotlist with its script
+    variants = []
     for i, shotlist in enumerate(state.shot_lists):
         # Find matching script
         script = next(
@@ -435,14 +672,33 @@ async def assemble_videos(state: UGCPipelineState) -> UGCPipelineState:
             state.warnings.append(f"No script found for shotlist {shotlist.shotlist_id}")
             continue
 
-        # Assemble this video
-        result = await assembler.assemble_video(
-            shotlist=shotlist,
-            script=script,
-            asset_requests=state.asset_requests,
-            job_id=state.job_id,
-        )
+        variants.append((i, shotlist, script))
+
+    state.stage_progress = {"stage": "assemble", "completed": 0, "total": len(variants)}
+
+    # Download every clip once, concurrently
+    await assembler.prefetch_clips(state.asset_requests)
+
+    workers, threads = plan_assembly_pool(len(variants))
+    slots = asyncio.Semaphore(workers)
+
+    async def assemble_variant(shotlist: ShotList, script: ScriptPackage) -> dict[str, Any]:
+        async with slots:
+            result = await assembler.assemble_video(
+                shotlist=shotlist,
+                script=script,
+                asset_requests=state.asset_requests,
+                job_id=state.job_id,
+                threads=threads,
+            )
+        state.stage_progress["completed"] += 1
+        return result
 
+    results = await asyncio.gather(
+        *(assemble_variant(shotlist, script) for _, shotlist, script in variants)
+    )
+
+    for (i, shotlist, _), result in zip(variants, results):
         if result.get("success"):
             video = GeneratedVideo(
                 video_id=f"video_{i:03d}",
@@ -459,6 +715,53 @@ async def assemble_videos(state: UGCPipelineState) -> UGCPipelineState:
                 f"Assembly failed for {shotlist.shotlist_id}: {result.get('error')}"
             )
 
-    state.warnings.append(f"Assembled {len(state.videos)} videos")
+    # Downloaded clips are no longer needed once every variant is encoded
+    assembler.cleanup()
+
+    state.warnings.append(
+        f"Assembled {len(state.videos)} videos "
+        f"({workers} parallel encodes x {threads} threads)"
+    )
 
     return state
+
+
+async def _benchmark(clip_paths: list[str], transition_style: str) -> None:
+    """Time one assembly of local sample clips and report encode count."""
+    assembler = FFmpegAssembler()
+    clips = [
+        {
+            "path": path,
+            "duration": 3.0,
+            "is_fallback": Path(path).suffix.lower() in (".png", ".jpg", ".jpeg", ".webp"),
+        }
+        for path in clip_paths
+    ]
+    overlays = [{"time": 0, "text": "Benchmark", "style": "hook"}]
+
+    started = time.perf_counter()
+    output_path = assembler.output_dir / f"benchmark_{uuid.uuid4().hex[:8]}.mp4"
+    try:
+        duration = await assembler.render(
+            clips, output_path, transition_style=transition_style, overlays=overlays
+        )
+    finally:
+        assembler.cleanup()
+    print(json.dumps({
+        "output_path": str(output_path),
+        "duration_seconds": duration,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "encode_count": assembler.encode_count,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    # python -m ugc_ad_factory.render.assembler [--transition crossfade] clip1.mp4 image.png ...
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark single-pass assembly")
+    parser.add_argument("clips", nargs="+", help="Local video clips or images (Ken Burns)")
+    parser.add_argument("--transition", default="cut", choices=["cut", "crossfade", "wipe"])
+    args = parser.parse_args()
+
+    asyncio.run(_benchmark(args.clips, args.transition))
@@ -7,19 +7,42 @@ Supports:
 
 For the perspective-based pipeline, img2img uses IP-Adapter or similar
 conditioning to transform source product images into new perspectives.
+
+Completion is event-driven: one WebSocket per client receives ComfyUI's
+/ws execution events and resolves the futures of every waiting prompt. If
+the socket is unavailable, waiters fall back to polling /history with an
+adaptive backoff.
 """
 
 import asyncio
 import json
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 import aiohttp
 
 from ..config import settings
 
 
+# Adaptive /history polling when the WebSocket is down (seconds)
+POLL_INITIAL_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+
+# History check while the WebSocket is up, in case an event was missed
+SAFETY_POLL_INTERVAL = 10.0
+
+# Reconnect delay bounds for the event listener (seconds)
+WS_RECONNECT_MIN = 1.0
+WS_RECONNECT_MAX = 30.0
+
+# Completed prompts remembered before anyone waited on them (and prompt
+# IDs remembered as finished, so duplicate completion events are ignored)
+MAX_EARLY_RESULTS = 1000
+
+
 class ComfyUIClient:
     """
     Client for ComfyUI API - handles image generation with ZImage Turbo.
@@ -38,6 +61,18 @@ class ComfyUIClient:
         self.base_url = f"http://{self.host}:{self.port}"
         self._session: aiohttp.ClientSession | None = None
 
+        # Shared /ws event listener
+        self.client_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+        self._ws_connected = asyncio.Event()
+        self._waiters: dict[str, asyncio.Future] = {}
+        self._outputs: dict[str, list[dict]] = {}
+        self._early_results: OrderedDict[str, dict] = OrderedDict()
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        # In-flight /history lookups for finished prompts (one per prompt);
+        # the task references keep them from being garbage collected
+        self._history_fetches: dict[str, asyncio.Task] = {}
+
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
         if self._session is None or self._session.closed:
@@ -45,7 +80,19 @@ class ComfyUIClient:
         return self._session
 
     async def close(self):
-        """Close the aiohttp session."""
+        """Stop the event listener and close the aiohttp session."""
+        if self._listener and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+
+        for task in list(self._history_fetches.values()):
+            task.cancel()
+        self._history_fetches.clear()
+
         if self._session and not self._session.closed:
             await self._session.close()
 
@@ -77,7 +124,6 @@ class ComfyUIClient:
                 - error: error message if failed
         """
         try:
-            # Build workflow
             workflow = self._build_workflow(
                 prompt=prompt,
                 negative_prompt=negative_prompt,
@@ -85,44 +131,80 @@ class ComfyUIClient:
                 height=height,
                 seed=seed or self._random_seed(),
             )
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        return await self._run_workflow(workflow)
 
-            # Queue the prompt
-            prompt_id = await self._queue_prompt(workflow)
+    async def generate_images(
+        self,
+        requests: list[dict[str, Any]],
+        slots: asyncio.Semaphore | None = None,
+        on_result: Callable[[int, dict[str, Any]], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Generate several images over the shared WebSocket.
 
-            # Wait for completion
-            result = await self._wait_for_completion(prompt_id)
+        Without slots every prompt is queued up front, so ComfyUI runs them
+        back to back. With slots, at most that many are queued or running
+        at once (each prompt's wait timeout then starts near its turn).
 
-            if result.get("success"):
-                # Download the image
-                image_path = await self._download_image(
-                    result["filename"],
-                    result.get("subfolder", ""),
-                )
-                return {
-                    "success": True,
-                    "image_path": str(image_path),
-                    "prompt_id": prompt_id,
-                }
+        Args:
+            requests: generate_image keyword arguments, one dict per image
+            slots: Optional semaphore bounding prompts in flight
+            on_result: Called with (index, result) as each image finishes
+
+        Returns:
+            One generate_image-style result per request, in order
+        """
+        self._ensure_listener()
+
+        async def run(index: int, request: dict[str, Any]) -> dict[str, Any]:
+            if slots is None:
+                result = await self.generate_image(**request)
             else:
+                async with slots:
+                    result = await self.generate_image(**request)
+            if on_result is not None:
+                on_result(index, result)
+            return result
+
+        return list(await asyncio.gather(*(run(i, r) for i, r in enumerate(requests))))
+
+    async def _run_workflow(self, workflow: dict) -> dict[str, Any]:
+        """Queue a workflow, wait for it and download its image."""
+        prompt_id = None
+        try:
+            prompt_id = await self._queue_prompt(workflow)
+            result = await self._wait_for_completion(prompt_id)
+            if not result.get("success"):
                 return {
                     "success": False,
                     "error": result.get("error", "Unknown error"),
                     "prompt_id": prompt_id,
                 }
-
-        except Exception as e:
+            image_path = await self._download_image(
+                result["filename"],
+                result.get("subfolder", ""),
+            )
             return {
-                "success": False,
-                "error": str(e),
+                "success": True,
+                "image_path": str(image_path),
+                "prompt_id": prompt_id,
             }
+        except Exception as e:
+            error = {"success": False, "error": str(e)}
+            if prompt_id is not None:
+                error["prompt_id"] = prompt_id
+            return error
 
     async def _queue_prompt(self, workflow: dict) -> str:
         """Queue a prompt and return the prompt ID."""
         session = await self._get_session()
+        self._ensure_listener()
 
         async with session.post(
             f"{self.base_url}/prompt",
-            json={"prompt": workflow},
+            json={"prompt": workflow, "client_id": self.client_id},
         ) as resp:
             if resp.status != 200:
                 text = await resp.text()
@@ -135,49 +217,206 @@ class ComfyUIClient:
         self,
         prompt_id: str,
         timeout: int = 120,
-        poll_interval: float = 1.0,
     ) -> dict:
         """
-        Poll ComfyUI until the prompt is complete.
+        Wait until the prompt is complete.
+
+        Resolves from /ws events when the listener is connected. Otherwise
+        (or as a periodic safety check) falls back to polling /history,
+        starting fast and backing off.
 
         Returns dict with success/failure and image info.
         """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        if prompt_id in self._early_results:
+            return self._early_results.pop(prompt_id)
+
+        future = self._waiters.get(prompt_id)
+        if future is None:
+            future = loop.create_future()
+            self._waiters[prompt_id] = future
+
+        interval = POLL_INITIAL_INTERVAL
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return {"success": False, "error": f"Timeout after {timeout}s"}
+
+                wait = SAFETY_POLL_INTERVAL if self._ws_connected.is_set() else interval
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), min(wait, remaining))
+                except asyncio.TimeoutError:
+                    pass
+
+                result = await self._check_history(prompt_id)
+                if result is not None:
+                    self._mark_finished(prompt_id)
+                    return result
+
+                if not self._ws_connected.is_set():
+                    interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+        finally:
+            self._waiters.pop(prompt_id, None)
+            self._outputs.pop(prompt_id, None)
+
+    async def _check_history(self, prompt_id: str) -> dict | None:
+        """
+        Read a prompt's result from /history.
+
+        Returns:
+            Result dict if the prompt finished, None while still running
+        """
         session = await self._get_session()
-        start_time = asyncio.get_event_loop().time()
+
+        async with session.get(f"{self.base_url}/history/{prompt_id}") as resp:
+            if resp.status != 200:
+                return None
+            history = await resp.json()
+
+        if prompt_id not in history:
+            return None
+
+        prompt_data = history[prompt_id]
+
+        # Check for errors
+        if prompt_data.get("status", {}).get("status_str") == "error":
+            return {
+                "success": False,
+                "error": prompt_data.get("status", {}).get("messages", "Unknown error"),
+            }
+
+        # Check for outputs
+        outputs = prompt_data.get("outputs", {})
+        result = self._image_result(list(outputs.values()))
+        if result is not None:
+            return result
+
+        if prompt_data.get("status", {}).get("completed"):
+            return {"success": False, "error": "Prompt finished without image output"}
+        return None
+
+    @staticmethod
+    def _image_result(node_outputs: list[dict]) -> dict | None:
+        """Pick the first image from a list of node outputs."""
+        for node_output in node_outputs:
+            if node_output and node_output.get("images"):
+                image = node_output["images"][0]
+                return {
+                    "success": True,
+                    "filename": image["filename"],
+                    "subfolder": image.get("subfolder", ""),
+                    "type": image.get("type", "output"),
+                }
+        return None
+
+    # =========================================================================
+    # /ws event listener
+    # =========================================================================
+
+    def _ensure_listener(self):
+        """Start the shared WebSocket listener if it isn't running."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        """
+        Consume ComfyUI /ws events for this client_id, reconnecting on failure.
+
+        While disconnected, waiters poll /history instead.
+        """
+        ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://")
+        delay = WS_RECONNECT_MIN
 
         while True:
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > timeout:
-                return {"success": False, "error": f"Timeout after {timeout}s"}
-
-            # Check history for completion
-            async with session.get(f"{self.base_url}/history/{prompt_id}") as resp:
-                if resp.status == 200:
-                    history = await resp.json()
-
-                    if prompt_id in history:
-                        prompt_data = history[prompt_id]
-
-                        # Check for errors
-                        if prompt_data.get("status", {}).get("status_str") == "error":
-                            return {
-                                "success": False,
-                                "error": prompt_data.get("status", {}).get("messages", "Unknown error"),
-                            }
-
-                        # Check for outputs
-                        outputs = prompt_data.get("outputs", {})
-                        for node_id, node_output in outputs.items():
-                            if "images" in node_output:
-                                image = node_output["images"][0]
-                                return {
-                                    "success": True,
-                                    "filename": image["filename"],
-                                    "subfolder": image.get("subfolder", ""),
-                                    "type": image.get("type", "output"),
-                                }
-
-            await asyncio.sleep(poll_interval)
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(
+                    f"{ws_url}/ws?clientId={self.client_id}", heartbeat=30
+                ) as ws:
+                    self._ws_connected.set()
+                    delay = WS_RECONNECT_MIN
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._handle_event(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+                        # Binary frames are latent previews; ignored
+
+            except asyncio.CancelledError:
+                self._ws_connected.clear()
+                raise
+            except Exception:
+                pass
+
+            self._ws_connected.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WS_RECONNECT_MAX)
+
+    def _handle_event(self, event: dict):
+        """Route one /ws event to the prompt it belongs to."""
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        if event_type == "executed":
+            self._outputs.setdefault(prompt_id, []).append(data.get("output") or {})
+
+        elif event_type == "execution_error":
+            self._resolve(prompt_id, {
+                "success": False,
+                "error": data.get("exception_message") or "Execution error",
+            })
+
+        elif event_type == "execution_success" or (
+            event_type == "executing" and data.get("node") is None
+        ):
+            # Whole prompt finished (both events arrive; act on the first)
+            if self._is_resolved(prompt_id) or prompt_id in self._history_fetches:
+                return
+            result = self._image_result(self._outputs.pop(prompt_id, []))
+            if result is None:
+                # Outputs came from cache (no executed event); read history
+                task = asyncio.create_task(self._resolve_from_history(prompt_id))
+                self._history_fetches[prompt_id] = task
+                task.add_done_callback(lambda _: self._history_fetches.pop(prompt_id, None))
+                return
+            self._resolve(prompt_id, result)
+
+    def _is_resolved(self, prompt_id: str) -> bool:
+        return prompt_id in self._finished
+
+    def _mark_finished(self, prompt_id: str):
+        self._finished[prompt_id] = None
+        while len(self._finished) > MAX_EARLY_RESULTS:
+            self._finished.popitem(last=False)
+
+    def _resolve(self, prompt_id: str, result: dict):
+        """Hand a result to the prompt's waiter (or keep it until one arrives)."""
+        self._mark_finished(prompt_id)
+        future = self._waiters.get(prompt_id)
+        if future is not None:
+            if not future.done():
+                future.set_result(result)
+            return
+
+        self._early_results[prompt_id] = result
+        while len(self._early_results) > MAX_EARLY_RESULTS:
+            self._early_results.popitem(last=False)
+
+    async def _resolve_from_history(self, prompt_id: str):
+        """Resolve a finished prompt whose outputs weren't in the event stream."""
+        try:
+            result = await self._check_history(prompt_id)
+        except Exception:
+            return
+        if result is not None:
+            self._resolve(prompt_id, result)
 
     async def _download_image(
         self,
@@ -370,34 +609,12 @@ class ComfyUIClient:
                 seed=seed or self._random_seed(),
             )
 
-            # Queue the prompt
-            prompt_id = await self._queue_prompt(workflow)
-
-            # Wait for completion
-            result = await self._wait_for_completion(prompt_id)
-
-            if result.get("success"):
-                image_path = await self._download_image(
-                    result["filename"],
-                    result.get("subfolder", ""),
-                )
-                return {
-                    "success": True,
-                    "image_path": str(image_path),
-                    "prompt_id": prompt_id,
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": result.get("error", "Unknown error"),
-                    "prompt_id": prompt_id,
-                }
-
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
             }
+        return await self._run_workflow(workflow)
 
     async def _upload_image(self, image_path: str) -> str:
         """Upload an image to ComfyUI and return the filename."""
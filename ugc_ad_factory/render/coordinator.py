@@ -2,13 +2,16 @@
 Render Coordinator - Orchestrates image and video generation with concurrency control.
 
 Manages the rendering pipeline:
-1. Generate images via ComfyUI (with semaphore limit)
+1. Generate images via ComfyUI (generate_images, with semaphore limit)
 2. Upload images to GCS for public URLs
 3. Generate videos via KeyAI Sora 2 (with semaphore limit)
 4. Handle failures with retries and fallbacks
+
+Renders identical to an earlier job are served from the render cache.
 """
 
 import asyncio
+import time
 from asyncio import Semaphore
 from datetime import datetime
 from pathlib import Path
@@ -18,6 +21,7 @@ from ..state import UGCPipelineState, AssetRequest, AssetStatus, GeneratedAsset
 from ..config import settings
 from .comfyui_client import ComfyUIClient
 from .keyai_client import KeyAISora2Client
+from .render_cache import RenderCache, RenderCacheStats, canonical_hash, file_digest, get_render_cache
 from ..storage.gcs_store import GCSAssetStore
 
 
@@ -34,10 +38,13 @@ class RenderCoordinator:
         comfyui_client: ComfyUIClient | None = None,
         keyai_client: KeyAISora2Client | None = None,
         gcs_store: GCSAssetStore | None = None,
+        render_cache: RenderCache | None = None,
     ):
         self.comfyui = comfyui_client or ComfyUIClient()
         self.keyai = keyai_client or KeyAISora2Client()
         self.gcs = gcs_store or GCSAssetStore()
+        self.cache = render_cache or get_render_cache()
+        self.cache_stats = RenderCacheStats()
 
         # Concurrency controls
         self.comfyui_semaphore = Semaphore(settings.comfyui_concurrency)
@@ -51,6 +58,7 @@ class RenderCoordinator:
         """Close all client sessions."""
         await self.comfyui.close()
         await self.keyai.close()
+        self.gcs.close()
 
     async def render_all_assets(
         self,
@@ -87,27 +95,25 @@ class RenderCoordinator:
             progress_callback("images", 0, total_images)
 
         completed_images = 0
-        image_tasks = []
-        for request in image_requests:
-            task = asyncio.create_task(
-                self._render_image_with_retry(request, state.job_id)
-            )
-            image_tasks.append((request, task))
 
-        for request, task in image_tasks:
-            await task
+        def image_done():
+            nonlocal completed_images
             completed_images += 1
             if progress_callback:
                 progress_callback("images", completed_images, total_images)
 
+        await self._render_images(image_requests, on_done=image_done)
+
         # Step 2: Upload successful images to GCS
         await self._upload_images_to_gcs(image_requests, state.job_id, state.user_id)
 
         # Step 3: Link video requests to their image URLs
         image_url_map = {}
+        image_path_map = {}
         for req in image_requests:
             if req.status == AssetStatus.SUCCESS and req.result_url:
                 image_url_map[req.shot_id] = req.result_url
+                image_path_map[req.shot_id] = req.local_path
 
         # Step 4: Generate videos
         if progress_callback:
@@ -126,7 +132,9 @@ class RenderCoordinator:
 
             request.reference_image_url = image_url
             task = asyncio.create_task(
-                self._render_video_with_retry(request, state.job_id)
+                self._render_video_with_retry(
+                    request, state.job_id, state.user_id, image_path_map.get(request.shot_id)
+                )
             )
             video_tasks.append((request, task))
 
@@ -158,63 +166,183 @@ class RenderCoordinator:
             f"{video_success}/{total_videos} videos"
         )
 
+        if self.cache:
+            state.render_cache = self.cache_stats.merge(state.render_cache)
+            state.warnings.append(
+                f"Render cache: {state.render_cache['hits']} hits "
+                f"({state.render_cache['hit_rate']:.0%}), "
+                f"{state.render_cache['gpu_seconds_saved']:.0f} GPU-seconds saved"
+            )
+
         return state
 
-    async def _render_image_with_retry(
+    async def _render_images(
         self,
-        request: AssetRequest,
-        job_id: str,
+        requests: list[AssetRequest],
+        on_done: Callable[[], None] | None = None,
     ) -> None:
-        """Render an image with concurrency control and retries."""
-        async with self.comfyui_semaphore:
-            for attempt in range(self.max_retries + 1):
-                try:
-                    request.status = AssetStatus.RENDERING
-                    request.started_at = datetime.utcnow()
-
-                    result = await self.comfyui.generate_image(
-                        prompt=request.prompt,
-                        negative_prompt=request.negative_prompt,
-                        width=request.width,
-                        height=request.height,
-                        style_preset=request.style_preset,
-                    )
-
-                    if result.get("success"):
-                        request.status = AssetStatus.SUCCESS
-                        request.local_path = result["image_path"]
-                        request.completed_at = datetime.utcnow()
-                        return
-                    else:
-                        request.error_message = result.get("error", "Unknown error")
+        """
+        Render images through ComfyUIClient.generate_images, with retries.
 
-                except asyncio.TimeoutError:
-                    request.error_message = "Timeout during image generation"
-                except Exception as e:
-                    request.error_message = str(e)
+        Cache hits are served first; the misses go to ComfyUI in one
+        generate_images call per attempt (bounded by the ComfyUI semaphore,
+        completions over the client's shared WebSocket). Failed images are
+        retried together with exponential backoff.
+        """
+        lookups = await asyncio.gather(*(self._cached_image(r) for r in requests))
+        pending = []
+        for request, (hit, cache_key) in zip(requests, lookups):
+            if not hit:
+                pending.append((request, cache_key))
+            elif on_done:
+                on_done()
+
+        def finished(index: int, result: dict[str, Any]):
+            if result.get("success") and on_done:
+                on_done()
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                return
+
+            started_at = datetime.utcnow()
+            for request, _ in pending:
+                request.status = AssetStatus.RENDERING
+                request.started_at = started_at
+            started = time.perf_counter()
+
+            results = await self.comfyui.generate_images(
+                [
+                    {
+                        "prompt": request.prompt,
+                        "negative_prompt": request.negative_prompt,
+                        "width": request.width,
+                        "height": request.height,
+                        "style_preset": request.style_preset,
+                    }
+                    for request, _ in pending
+                ],
+                slots=self.comfyui_semaphore,
+                on_result=finished,
+            )
+            # ComfyUI runs one prompt at a time: split the GPU time evenly
+            gpu_seconds = (time.perf_counter() - started) / len(pending)
+
+            retry, puts = [], []
+            for (request, cache_key), result in zip(pending, results):
+                if result.get("success"):
+                    request.status = AssetStatus.SUCCESS
+                    request.local_path = result["image_path"]
+                    request.completed_at = datetime.utcnow()
+                    if cache_key:
+                        puts.append(self.cache.put(
+                            cache_key, result["image_path"], gpu_seconds=gpu_seconds
+                        ))
+                else:
+                    request.error_message = result.get("error", "Unknown error")
+                    request.retry_count += 1
+                    retry.append((request, cache_key))
+            await asyncio.gather(*puts)
+
+            pending = retry
+            if pending and attempt < self.max_retries:
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+        # All retries failed
+        for request, _ in pending:
+            request.status = AssetStatus.FAILED
+            request.completed_at = datetime.utcnow()
+            if on_done:
+                on_done()
 
-                request.retry_count += 1
-                if attempt < self.max_retries:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+    async def _cached_image(self, request: AssetRequest) -> tuple[bool, str | None]:
+        """
+        Serve an image from the render cache if possible.
 
-            # All retries failed
-            request.status = AssetStatus.FAILED
+        Returns:
+            (hit, cache key to store a fresh render under; None without a cache)
+        """
+        if not self.cache:
+            return False, None
+
+        # Unseeded renders use a random seed, so any cached seed is an
+        # equally valid result: hash the workflow with a fixed seed
+        workflow = self.comfyui._build_workflow(
+            prompt=request.prompt,
+            negative_prompt=request.negative_prompt,
+            width=request.width,
+            height=request.height,
+            seed=0,
+        )
+        cache_key = canonical_hash({"backend": "comfyui", "workflow": workflow})
+        hit = await self.cache.get(cache_key)
+        if hit:
+            request.status = AssetStatus.SUCCESS
+            request.local_path = hit["path"]
             request.completed_at = datetime.utcnow()
+            self.cache_stats.record_hit(hit["gpu_seconds"])
+            return True, cache_key
+        self.cache_stats.record_miss()
+        return False, cache_key
 
     async def _render_video_with_retry(
         self,
         request: AssetRequest,
         job_id: str,
+        user_id: str,
+        reference_image_path: str | None = None,
     ) -> None:
-        """Render a video with concurrency control and retries."""
+        """
+        Render a video with concurrency control and retries.
+
+        reference_image_path (the local copy of the reference image) lets the
+        render cache key on image content rather than its per-job URL.
+        result_url is always a URL: a hit from the local cache backend is
+        uploaded to GCS like a rendered image.
+        """
+        # Determine duration (10 or 15 seconds)
+        duration = "10" if (request.duration_seconds or 10) <= 10 else "15"
+
+        cache_key = None
+        if self.cache and reference_image_path and Path(reference_image_path).exists():
+            cache_key = canonical_hash({
+                "backend": "keyai",
+                "model": self.keyai.MODEL_NAME,
+                "prompt": request.prompt,
+                "duration": duration,
+                "aspect_ratio": "portrait",
+                "size": "high",
+                "reference": await asyncio.to_thread(file_digest, reference_image_path),
+            })
+            hit = await self.cache.get(cache_key)
+            url = hit["url"] if hit else None
+            if hit and not url:
+                try:
+                    url = await self.gcs.upload_video(
+                        local_path=hit["path"],
+                        job_id=job_id,
+                        user_id=user_id,
+                        video_id=request.request_id,
+                    )
+                except Exception as e:
+                    # Render it instead
+                    request.error_message = f"Cached clip upload failed: {e}"
+            if url:
+                request.status = AssetStatus.SUCCESS
+                request.result_url = url
+                request.local_path = hit["path"]
+                request.error_message = None
+                request.completed_at = datetime.utcnow()
+                self.cache_stats.record_hit(hit["gpu_seconds"])
+                return
+            self.cache_stats.record_miss()
+
         async with self.keyai_semaphore:
             for attempt in range(self.max_retries + 1):
                 try:
                     request.status = AssetStatus.RENDERING
                     request.started_at = datetime.utcnow()
-
-                    # Determine duration (10 or 15 seconds)
-                    duration = "10" if (request.duration_seconds or 10) <= 10 else "15"
+                    started = time.perf_counter()
 
                     result = await self.keyai.generate_video(
                         image_url=request.reference_image_url,
@@ -229,6 +357,14 @@ class RenderCoordinator:
                         request.status = AssetStatus.SUCCESS
                         request.result_url = result["video_url"]
                         request.completed_at = datetime.utcnow()
+                        if cache_key and result.get("video_url"):
+                            gpu_seconds = (
+                                float(result["cost_time"]) / 1000 if result.get("cost_time")
+                                else time.perf_counter() - started
+                            )
+                            await self.cache.put(
+                                cache_key, result["video_url"], gpu_seconds=gpu_seconds
+                            )
                         return
                     else:
                         request.error_message = result.get("error", "Unknown error")
@@ -252,20 +388,24 @@ class RenderCoordinator:
         job_id: str,
         user_id: str,
     ) -> None:
-        """Upload successful images to GCS and update result_url."""
-        for request in requests:
-            if request.status == AssetStatus.SUCCESS and request.local_path:
-                try:
-                    public_url = await self.gcs.upload_image(
-                        local_path=request.local_path,
-                        job_id=job_id,
-                        user_id=user_id,
-                        asset_id=request.request_id,
-                    )
-                    request.result_url = public_url
-                except Exception as e:
-                    request.error_message = f"GCS upload failed: {e}"
-                    # Keep the local path, video gen will fail gracefully
+        """Upload successful images to GCS (concurrently) and update result_url."""
+        async def upload(request: AssetRequest) -> None:
+            try:
+                public_url = await self.gcs.upload_image(
+                    local_path=request.local_path,
+                    job_id=job_id,
+                    user_id=user_id,
+                    asset_id=request.request_id,
+                )
+                request.result_url = public_url
+            except Exception as e:
+                request.error_message = f"GCS upload failed: {e}"
+                # Keep the local path, video gen will fail gracefully
+
+        await asyncio.gather(*(
+            upload(request) for request in requests
+            if request.status == AssetStatus.SUCCESS and request.local_path
+        ))
 
     def _request_to_asset(self, request: AssetRequest) -> dict[str, Any]:
         """Convert AssetRequest to GeneratedAsset dict."""
@@ -2,6 +2,10 @@
 KeyAI Sora 2 Pro Client - Image-to-Video generation API.
 
 Uses the KeyAI (kie.ai) API to convert still images into 10-15 second video clips.
+
+When the backend's shared task poller (services/task_poller.py) is importable,
+all in-flight tasks are checked by one scheduler with adaptive backoff instead
+of one fixed-interval loop per task.
 """
 
 import asyncio
@@ -13,6 +17,34 @@ import aiohttp
 from ..config import settings
 
 
+def _load_task_poller():
+    """Shared task poller, or None when running standalone."""
+    try:
+        from services import task_poller
+    except ImportError:
+        return None
+    return task_poller
+
+
+class _KeyAITaskProvider:
+    """Adapts get_task_status to the shared task poller's provider interface."""
+
+    name = "keyai-sora2"
+    batch_size = 1
+
+    def __init__(self, client: "KeyAISora2Client", expected_seconds: float):
+        self.client = client
+        self.expected_seconds = expected_seconds
+
+    async def fetch(self, task_ids: list[str]) -> dict[str, dict[str, Any]]:
+        statuses = await asyncio.gather(*(self.client.get_task_status(t) for t in task_ids))
+        return dict(zip(task_ids, statuses))
+
+    def classify(self, status: dict[str, Any]) -> str:
+        state = status.get("state")
+        return state if state in ("success", "fail") else "pending"
+
+
 class KeyAISora2Client:
     """
     Client for KeyAI Sora 2 Pro Image-to-Video API.
@@ -28,9 +60,13 @@ class KeyAISora2Client:
     API_URL = "https://api.kie.ai/api/v1"
     MODEL_NAME = "sora-2-pro-image-to-video"
 
+    # Typical Sora 2 render time; the poller refines it from finished tasks
+    EXPECTED_RENDER_SECONDS = 180.0
+
     def __init__(self, api_key: str | None = None):
         self.api_key = api_key or settings.keyai_api_key
         self._session: aiohttp.ClientSession | None = None
+        self._task_provider = _KeyAITaskProvider(self, self.EXPECTED_RENDER_SECONDS)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session with auth headers."""
@@ -190,6 +226,9 @@ class KeyAISora2Client:
         """
         Poll task status until completion or timeout.
 
+        Uses the shared task poller when available; poll_interval only
+        applies to the standalone fallback loop.
+
         Args:
             task_id: The task ID to poll
             timeout: Maximum seconds to wait (default from settings)
@@ -199,6 +238,20 @@ class KeyAISora2Client:
             Final task status dict with video_url if successful
         """
         timeout = timeout or settings.keyai_timeout
+
+        task_poller = _load_task_poller()
+        if task_poller is not None:
+            try:
+                return await task_poller.get_task_poller().wait(
+                    self._task_provider, task_id, timeout=timeout
+                )
+            except TimeoutError:
+                return {
+                    "state": "fail",
+                    "error": f"Timeout after {timeout}s",
+                    "task_id": task_id,
+                }
+
         start_time = datetime.utcnow()
 
         while True:
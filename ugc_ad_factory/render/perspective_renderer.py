@@ -4,9 +4,12 @@ Perspective Renderer - Renders perspectives and transitions.
 Coordinates the two-step process:
 1. Generate perspective images from source images (ComfyUI img2img)
 2. Animate transitions between perspectives (KeyAI I2V)
+
+Renders identical to an earlier job are served from the render cache.
 """
 
 import asyncio
+import time
 from asyncio import Semaphore
 from pathlib import Path
 import tempfile
@@ -23,6 +26,7 @@ from ..state import (
 from ..config import settings
 from .comfyui_client import ComfyUIClient
 from .keyai_client import KeyAISora2Client
+from .render_cache import RenderCacheStats, canonical_hash, file_digest, get_render_cache
 from ..storage.gcs_store import GCSAssetStore
 
 
@@ -45,6 +49,8 @@ class PerspectiveRenderer:
         self.comfyui = ComfyUIClient()
         self.keyai = KeyAISora2Client()
         self.gcs = GCSAssetStore()
+        self.cache = get_render_cache()
+        self.cache_stats = RenderCacheStats()
         self.comfyui_semaphore = Semaphore(self.COMFYUI_CONCURRENCY)
         self.keyai_semaphore = Semaphore(self.KEYAI_CONCURRENCY)
         self.output_dir = Path(tempfile.gettempdir()) / "ugc_perspectives"
@@ -54,6 +60,7 @@ class PerspectiveRenderer:
         """Close all clients."""
         await self.comfyui.close()
         await self.keyai.close()
+        self.gcs.close()
 
     async def render_perspectives(
         self,
@@ -91,6 +98,7 @@ class PerspectiveRenderer:
         state.warnings.append(
             f"Rendered {success_count}/{len(state.perspectives)} perspectives"
         )
+        self._report_cache_stats(state)
 
         return state
 
@@ -130,9 +138,22 @@ class PerspectiveRenderer:
         state.warnings.append(
             f"Rendered {success_count}/{len(state.transitions)} transitions"
         )
+        self._report_cache_stats(state)
 
         return state
 
+    def _report_cache_stats(self, state: UGCPipelineState):
+        """Add this phase's render cache stats to the job totals."""
+        if not self.cache:
+            return
+        state.render_cache = self.cache_stats.merge(state.render_cache)
+        self.cache_stats = RenderCacheStats()
+        state.warnings.append(
+            f"Render cache: {state.render_cache['hits']} hits "
+            f"({state.render_cache['hit_rate']:.0%}), "
+            f"{state.render_cache['gpu_seconds_saved']:.0f} GPU-seconds saved"
+        )
+
     async def _download_source_images(self, state: UGCPipelineState):
         """Download source images to local paths."""
         import aiohttp
@@ -159,66 +180,97 @@ class PerspectiveRenderer:
         perspective: Perspective,
     ):
         """Render a single perspective with retry logic."""
-        async with self.comfyui_semaphore:
-            # Find the generated perspective entry
-            gen_persp = next(
-                (gp for gp in state.generated_perspectives
-                 if gp.perspective_id == perspective.perspective_id),
-                None
-            )
-            if not gen_persp:
-                return
-
-            # Find source image
-            source = next(
-                (s for s in state.source_images
-                 if s.image_id == perspective.source_image_id),
-                None
+        # Find the generated perspective entry
+        gen_persp = next(
+            (gp for gp in state.generated_perspectives
+             if gp.perspective_id == perspective.perspective_id),
+            None
+        )
+        if not gen_persp:
+            return
+
+        # Find source image
+        source = next(
+            (s for s in state.source_images
+             if s.image_id == perspective.source_image_id),
+            None
+        )
+        if not source or not source.local_path:
+            gen_persp.status = AssetStatus.FAILED
+            gen_persp.error_message = "Source image not found"
+            return
+
+        # Build perspective prompt
+        prompt = self._build_perspective_prompt(perspective, state)
+
+        # Render cache: same source image + workflow = same perspective
+        cache_key = None
+        hit = None
+        if self.cache:
+            workflow = self.comfyui._build_img2img_workflow(
+                image_name=f"sha256:{await asyncio.to_thread(file_digest, source.local_path)}",
+                prompt=prompt,
+                negative_prompt="",
+                width=1080,
+                height=1920,
+                denoise=0.4,
+                seed=0,  # Unseeded: any cached seed is an equally valid result
             )
-            if not source or not source.local_path:
-                gen_persp.status = AssetStatus.FAILED
-                gen_persp.error_message = "Source image not found"
-                return
-
-            # Build perspective prompt
-            prompt = self._build_perspective_prompt(perspective, state)
-
-            for attempt in range(self.MAX_RETRIES + 1):
-                try:
-                    gen_persp.status = AssetStatus.RENDERING
+            cache_key = canonical_hash({"backend": "comfyui", "workflow": workflow})
+            hit = await self.cache.get(cache_key)
+            if hit:
+                self.cache_stats.record_hit(hit["gpu_seconds"])
+            else:
+                self.cache_stats.record_miss()
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                gen_persp.status = AssetStatus.RENDERING
+
+                if hit:
+                    result = {"success": True, "image_path": hit["path"]}
+                else:
+                    async with self.comfyui_semaphore:
+                        started = time.perf_counter()
+                        result = await asyncio.wait_for(
+                            self.comfyui.generate_perspective(
+                                source_image_path=source.local_path,
+                                perspective_prompt=prompt,
+                                denoise_strength=0.4,  # Keep product identity
+                            ),
+                            timeout=self.TIMEOUT,
+                        )
+                    if result.get("success") and cache_key:
+                        await self.cache.put(
+                            cache_key,
+                            result["image_path"],
+                            gpu_seconds=time.perf_counter() - started,
+                        )
 
-                    result = await asyncio.wait_for(
-                        self.comfyui.generate_perspective(
-                            source_image_path=source.local_path,
-                            perspective_prompt=prompt,
-                            denoise_strength=0.4,  # Keep product identity
-                        ),
-                        timeout=self.TIMEOUT,
+                if result.get("success"):
+                    # Upload to GCS
+                    gcs_url = await self.gcs.upload_image(
+                        result["image_path"],
+                        state.job_id,
+                        state.user_id,
+                        f"perspective_{perspective.perspective_id}",
                     )
+                    gen_persp.generated_url = gcs_url
+                    gen_persp.local_path = result["image_path"]
+                    gen_persp.status = AssetStatus.SUCCESS
+                    return
+                else:
+                    gen_persp.error_message = result.get("error", "Unknown error")
 
-                    if result.get("success"):
-                        # Upload to GCS
-                        gcs_url = await self.gcs.upload_image(
-                            result["image_path"],
-                            state.job_id,
-                            f"perspective_{perspective.perspective_id}",
-                        )
-                        gen_persp.generated_url = gcs_url
-                        gen_persp.local_path = result["image_path"]
-                        gen_persp.status = AssetStatus.SUCCESS
-                        return
-                    else:
-                        gen_persp.error_message = result.get("error", "Unknown error")
-
-                except asyncio.TimeoutError:
-                    gen_persp.error_message = f"Timeout after {self.TIMEOUT}s"
-                except Exception as e:
-                    gen_persp.error_message = str(e)
+            except asyncio.TimeoutError:
+                gen_persp.error_message = f"Timeout after {self.TIMEOUT}s"
+            except Exception as e:
+                gen_persp.error_message = str(e)
 
-                if attempt < self.MAX_RETRIES:
-                    await asyncio.sleep(2 ** attempt)
+            if attempt < self.MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)
 
-            gen_persp.status = AssetStatus.FAILED
+        gen_persp.status = AssetStatus.FAILED
 
     async def _render_transition_with_retry(
         self,
@@ -226,27 +278,70 @@ class PerspectiveRenderer:
         transition: Transition,
     ):
         """Render a single transition with retry logic."""
-        async with self.keyai_semaphore:
-            # Find the generated transition entry
-            gen_trans = next(
-                (gt for gt in state.generated_transitions
-                 if gt.transition_id == transition.transition_id),
-                None
-            )
-            if not gen_trans:
-                return
+        # Find the generated transition entry
+        gen_trans = next(
+            (gt for gt in state.generated_transitions
+             if gt.transition_id == transition.transition_id),
+            None
+        )
+        if not gen_trans:
+            return
 
-            # Check we have both images
-            if not gen_trans.start_image_url or not gen_trans.end_image_url:
-                gen_trans.status = AssetStatus.FAILED
-                gen_trans.error_message = "Missing start or end image"
-                return
+        # Check we have both images
+        if not gen_trans.start_image_url or not gen_trans.end_image_url:
+            gen_trans.status = AssetStatus.FAILED
+            gen_trans.error_message = "Missing start or end image"
+            return
 
-            for attempt in range(self.MAX_RETRIES + 1):
+        # Render cache: keyed on the frames' content, not their per-job URLs
+        cache_key = None
+        frame_paths = {
+            gp.perspective_id: gp.local_path
+            for gp in state.generated_perspectives
+            if gp.local_path and Path(gp.local_path).exists()
+        }
+        start_path = frame_paths.get(transition.start_perspective_id)
+        end_path = frame_paths.get(transition.end_perspective_id)
+        if self.cache and start_path and end_path:
+            cache_key = canonical_hash({
+                "backend": "keyai",
+                "model": self.keyai.MODEL_NAME,
+                "prompt": transition.motion_description,
+                "duration": str(int(transition.duration_seconds)),
+                "frames": [
+                    await asyncio.to_thread(file_digest, start_path),
+                    await asyncio.to_thread(file_digest, end_path),
+                ],
+            })
+            hit = await self.cache.get(cache_key)
+            url = hit["url"] if hit else None
+            if hit and not url:
+                # Local cache backend: video_url must still be a URL
                 try:
-                    gen_trans.status = AssetStatus.RENDERING
+                    url = await self.gcs.upload_video(
+                        local_path=hit["path"],
+                        job_id=state.job_id,
+                        user_id=state.user_id,
+                        video_id=transition.transition_id,
+                    )
+                except Exception as e:
+                    gen_trans.error_message = f"Cached clip upload failed: {e}"
+            if url:
+                gen_trans.video_url = url
+                gen_trans.local_path = hit["path"]
+                gen_trans.status = AssetStatus.SUCCESS
+                gen_trans.error_message = None
+                self.cache_stats.record_hit(hit["gpu_seconds"])
+                return
+            self.cache_stats.record_miss()
 
-                    # Use KeyAI I2V with start+end frames
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                gen_trans.status = AssetStatus.RENDERING
+
+                # Use KeyAI I2V with start+end frames
+                async with self.keyai_semaphore:
+                    started = time.perf_counter()
                     result = await asyncio.wait_for(
                         self.keyai.create_video_from_frames(
                             start_image_url=gen_trans.start_image_url,
@@ -257,22 +352,30 @@ class PerspectiveRenderer:
                         timeout=self.TIMEOUT,
                     )
 
-                    if result.get("success"):
-                        gen_trans.video_url = result["video_url"]
-                        gen_trans.status = AssetStatus.SUCCESS
-                        return
-                    else:
-                        gen_trans.error_message = result.get("error", "Unknown error")
+                if result.get("success"):
+                    gen_trans.video_url = result["video_url"]
+                    gen_trans.status = AssetStatus.SUCCESS
+                    if cache_key and result.get("video_url"):
+                        gpu_seconds = (
+                            float(result["cost_time"]) / 1000 if result.get("cost_time")
+                            else time.perf_counter() - started
+                        )
+                        await self.cache.put(
+                            cache_key, result["video_url"], gpu_seconds=gpu_seconds
+                        )
+                    return
+                else:
+                    gen_trans.error_message = result.get("error", "Unknown error")
 
-                except asyncio.TimeoutError:
-                    gen_trans.error_message = f"Timeout after {self.TIMEOUT}s"
-                except Exception as e:
-                    gen_trans.error_message = str(e)
+            except asyncio.TimeoutError:
+                gen_trans.error_message = f"Timeout after {self.TIMEOUT}s"
+            except Exception as e:
+                gen_trans.error_message = str(e)
 
-                if attempt < self.MAX_RETRIES:
-                    await asyncio.sleep(2 ** attempt)
+            if attempt < self.MAX_RETRIES:
+                await asyncio.sleep(2 ** attempt)
 
-            gen_trans.status = AssetStatus.FAILED
+        gen_trans.status = AssetStatus.FAILED
 
     async def _link_perspective_urls(self, state: UGCPipelineState):
         """Link generated perspective URLs to transitions."""
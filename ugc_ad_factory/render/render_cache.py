@@ -0,0 +1,450 @@
+"""
+Render Cache - Content-addressed cache of ComfyUI and KeyAI renders.
+
+Re-running a product with tweaked scripts resubmits many identical renders.
+Each render is keyed by a canonical hash of what determines its output: the
+workflow JSON (or KeyAI request), the prompt, and digests of any reference
+images. A hit returns the stored artifact instead of spending GPU time.
+
+Backends:
+- local: artifacts under render_cache_dir, LRU-evicted by a size cap.
+  A hit or put pins the entry for render_cache_pin_minutes, so eviction
+  never deletes a path a running job is still reading
+- gcs: artifacts in the asset bucket under render_cache_gcs_prefix, shared
+  across machines, with a local copy kept as a read-through layer. Hits
+  carry the object's URL so results stay usable off this machine. Bucket
+  eviction lists the prefix only when the tracked size passes the cap or
+  every GCS_EVICT_INTERVAL_SECONDS (other machines add objects too)
+
+Stats (hits, misses, GPU-seconds saved) are collected per renderer and
+reported on the pipeline state per job.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 * 1024 * 1024
+
+# Longest gap between full listings of the GCS cache prefix
+GCS_EVICT_INTERVAL_SECONDS = 3600
+
+
+def canonical_hash(payload: dict[str, Any]) -> str:
+    """SHA-256 of a payload serialized with sorted keys and no whitespace."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def file_digest(path: str | Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderCacheStats:
+    """Hit/miss counters and GPU time saved for one job."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.gpu_seconds_saved = 0.0
+
+    def record_hit(self, gpu_seconds: float):
+        self.hits += 1
+        self.gpu_seconds_saved += gpu_seconds
+
+    def record_miss(self):
+        self.misses += 1
+
+    def merge(self, other: dict) -> dict:
+        """Add these counters to a previously reported dict."""
+        hits = self.hits + other.get("hits", 0)
+        misses = self.misses + other.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "gpu_seconds_saved": round(
+                self.gpu_seconds_saved + other.get("gpu_seconds_saved", 0.0), 1
+            ),
+        }
+
+
+class RenderCache:
+    """
+    Content-addressed store for rendered images and videos.
+
+    Usage:
+        cache = get_render_cache()
+        key = canonical_hash({...})
+        entry = await cache.get(key)
+        if entry is None:
+            ... render ...
+            await cache.put(key, source=image_path_or_url, gpu_seconds=12.5)
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        max_bytes: int | None = None,
+        backend: str | None = None,
+    ):
+        self.root = root or Path(
+            settings.render_cache_dir or Path(tempfile.gettempdir()) / "ugc_render_cache"
+        )
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or int(settings.render_cache_max_gb * GB)
+        self.backend = backend or settings.render_cache_backend
+        self._lock = asyncio.Lock()
+        self._total_bytes: int | None = None
+        self._gcs = None
+        # Bucket prefix size as of the last listing plus this process's puts
+        self._gcs_lock = threading.Lock()
+        self._gcs_bytes: int | None = None
+        self._gcs_listed_at = 0.0
+
+    # =========================================================================
+    # Lookup / store
+    # =========================================================================
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Look up a render. A hit pins the local artifact (see _account).
+
+        Returns:
+            {"path": local artifact path, "url": GCS object URL (gcs backend,
+            else None), "gpu_seconds": float, "meta": {...}} or None on a miss
+        """
+        entry = await asyncio.to_thread(self._get_local, key)
+        if self.backend != "gcs":
+            return entry
+        if entry is None:
+            return await self._get_gcs(key)
+        entry["url"] = await self._gcs_url(key, entry["meta"].get("ext", ".bin"))
+        return entry
+
+    async def put(
+        self,
+        key: str,
+        source: str,
+        gpu_seconds: float,
+        meta: dict[str, Any] | None = None,
+    ) -> str | None:
+        """
+        Store a render.
+
+        Args:
+            key: Cache key from canonical_hash
+            source: Local artifact path or http(s) URL to download
+            gpu_seconds: Render time the artifact cost (reported on hits)
+            meta: Extra metadata to keep with the entry
+
+        Returns:
+            Local path of the cached artifact, or None if storing failed
+            (failures are logged; a failed GCS upload keeps the local entry)
+        """
+        try:
+            ext = Path(source.split("?", 1)[0]).suffix or ".bin"
+            artifact = self._artifact_path(key, ext)
+            artifact.parent.mkdir(parents=True, exist_ok=True)
+
+            if source.startswith(("http://", "https://")):
+                await self._download(source, artifact)
+            else:
+                await asyncio.to_thread(self._copy, Path(source), artifact)
+
+            record = {
+                "key": key,
+                "ext": ext,
+                "gpu_seconds": gpu_seconds,
+                "size": artifact.stat().st_size,
+                "created_at": datetime.utcnow().isoformat(),
+                **(meta or {}),
+            }
+            self._meta_path(key).write_text(json.dumps(record))
+
+            async with self._lock:
+                await asyncio.to_thread(self._account, record["size"])
+
+        except Exception as e:
+            logger.warning(f"Render cache put failed for {key[:12]}: {e}")
+            return None
+
+        if self.backend == "gcs":
+            try:
+                await self._put_gcs(key, artifact, record)
+            except Exception as e:
+                logger.warning(f"Render cache GCS upload failed for {key[:12]}: {e}")
+
+        return str(artifact)
+
+    # =========================================================================
+    # Local store (LRU by last access, capped by size)
+    # =========================================================================
+
+    def _artifact_path(self, key: str, ext: str) -> Path:
+        return self.root / key[:2] / f"{key}{ext}"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _get_local(self, key: str) -> dict[str, Any] | None:
+        meta_path = self._meta_path(key)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        artifact = self._artifact_path(key, meta.get("ext", ".bin"))
+        if not artifact.exists():
+            return None
+
+        # Touch the metadata file: its mtime is the LRU clock and the pin
+        now = time.time()
+        os.utime(meta_path, (now, now))
+        return {
+            "path": str(artifact),
+            "url": None,
+            "gpu_seconds": meta.get("gpu_seconds", 0.0),
+            "meta": meta,
+        }
+
+    @staticmethod
+    def _copy(source: Path, target: Path):
+        """Copy via a temp file so readers never see a partial artifact."""
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            with open(source, "rb") as src, open(partial, "wb") as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    dst.write(chunk)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    async def _download(self, url: str, target: Path):
+        import aiohttp
+
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"Cache download failed: HTTP {resp.status}")
+                    with open(partial, "wb") as f:
+                        async for chunk in resp.content.iter_chunked(1024 * 1024):
+                            f.write(chunk)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def _entries(self) -> list[tuple[float, Path, int]]:
+        """(last access, metadata path, artifact size) for every entry."""
+        entries = []
+        for meta_path in self.root.glob("*/*.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+                entries.append((meta_path.stat().st_mtime, meta_path, meta.get("size", 0)))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def _account(self, added_bytes: int):
+        """
+        Track total size and evict least recently used entries over the cap.
+
+        Entries accessed within render_cache_pin_minutes are pinned: jobs
+        keep using a hit's path (uploads, assembly) long after the lookup,
+        so those are skipped even if the cache stays over the cap for now.
+        """
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._total_bytes += added_bytes
+
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        pinned_after = time.time() - settings.render_cache_pin_minutes * 60
+        for accessed, meta_path, size in sorted(self._entries()):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if accessed > pinned_after:
+                logger.warning(
+                    f"Render cache over its cap by "
+                    f"{(self._total_bytes - self.max_bytes) / GB:.1f} GB; the rest is pinned"
+                )
+                break
+            try:
+                # A hit may have touched it since the listing
+                if meta_path.stat().st_mtime > pinned_after:
+                    continue
+                meta = json.loads(meta_path.read_text())
+                self._artifact_path(meta["key"], meta.get("ext", ".bin")).unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                self._total_bytes -= size
+            except (OSError, ValueError, KeyError):
+                continue
+
+    # =========================================================================
+    # GCS store (shared across machines)
+    # =========================================================================
+
+    def _get_gcs_store(self):
+        if self._gcs is None:
+            from ..storage.gcs_store import GCSAssetStore
+            self._gcs = GCSAssetStore()
+        return self._gcs
+
+    def _gcs_blob_name(self, key: str, ext: str) -> str:
+        return f"{settings.render_cache_gcs_prefix}{key}{ext}"
+
+    async def _get_gcs(self, key: str) -> dict[str, Any] | None:
+        store = self._get_gcs_store()
+
+        def _sync_get():
+            bucket = store._get_bucket()
+            blobs = list(bucket.list_blobs(
+                prefix=f"{settings.render_cache_gcs_prefix}{key}", max_results=1
+            ))
+            if not blobs:
+                return None
+            blob = blobs[0]
+            meta = dict(blob.metadata or {})
+            ext = Path(blob.name).suffix or ".bin"
+            artifact = self._artifact_path(key, ext)
+            artifact.parent.mkdir(parents=True, exist_ok=True)
+            blob.download_to_filename(str(artifact))
+
+            # customTime can only move forward, which makes it an LRU clock
+            blob.custom_time = datetime.utcnow()
+            blob.patch()
+            return artifact, ext, meta, store._blob_url(blob)
+
+        try:
+            found = await store._run(_sync_get)
+        except Exception as e:
+            logger.warning(f"Render cache GCS lookup failed for {key[:12]}: {e}")
+            return None
+        if found is None:
+            return None
+
+        artifact, ext, meta, url = found
+        record = {
+            "key": key,
+            "ext": ext,
+            "gpu_seconds": float(meta.get("gpu_seconds", 0.0)),
+            "size": artifact.stat().st_size,
+            "created_at": meta.get("created_at"),
+        }
+        self._meta_path(key).write_text(json.dumps(record))
+        async with self._lock:
+            await asyncio.to_thread(self._account, record["size"])
+
+        return {
+            "path": str(artifact),
+            "url": url,
+            "gpu_seconds": record["gpu_seconds"],
+            "meta": record,
+        }
+
+    async def _gcs_url(self, key: str, ext: str) -> str | None:
+        """URL of a cached object (public or signed, per gcs_public_access)."""
+        store = self._get_gcs_store()
+
+        def _sync_url():
+            return store._blob_url(store._get_bucket().blob(self._gcs_blob_name(key, ext)))
+
+        try:
+            return await store._run(_sync_url)
+        except Exception as e:
+            logger.warning(f"Render cache GCS URL failed for {key[:12]}: {e}")
+            return None
+
+    async def _put_gcs(self, key: str, artifact: Path, record: dict[str, Any]):
+        store = self._get_gcs_store()
+
+        def _sync_put():
+            store._sync_check_public_read()
+            blob = store._get_bucket().blob(self._gcs_blob_name(key, record["ext"]))
+            blob.metadata = {
+                "gpu_seconds": str(record["gpu_seconds"]),
+                "created_at": record["created_at"],
+            }
+            blob.custom_time = datetime.utcnow()
+            blob.upload_from_filename(str(artifact))
+            store._publish(blob)
+            self._maybe_evict_gcs(store, record["size"])
+
+        await store._run(_sync_put)
+
+    def _maybe_evict_gcs(self, store, added_bytes: int):
+        """Account for an upload; list and evict only when it's due."""
+        with self._gcs_lock:
+            if self._gcs_bytes is not None:
+                self._gcs_bytes += added_bytes
+            due = (
+                self._gcs_bytes is None
+                or self._gcs_bytes > self.max_bytes
+                or time.monotonic() - self._gcs_listed_at > GCS_EVICT_INTERVAL_SECONDS
+            )
+            if due:
+                self._gcs_bytes = self._evict_gcs(store)
+                self._gcs_listed_at = time.monotonic()
+
+    def _evict_gcs(self, store) -> int:
+        """
+        Delete least recently used cache objects over the size cap.
+
+        Returns:
+            Bytes left under the cache prefix
+        """
+        bucket = store._get_bucket()
+        blobs = list(bucket.list_blobs(prefix=settings.render_cache_gcs_prefix))
+        total = sum(b.size or 0 for b in blobs)
+        if total <= self.max_bytes:
+            return total
+
+        blobs.sort(key=lambda b: b.custom_time or b.time_created)
+        for blob in blobs:
+            if total <= self.max_bytes:
+                break
+            try:
+                blob.delete()
+            except Exception as e:
+                logger.warning(f"Render cache eviction failed for {blob.name}: {e}")
+                continue
+            total -= blob.size or 0
+        return total
+
+
+# Singleton instance
+_render_cache: RenderCache | None = None
+
+
+def get_render_cache() -> RenderCache | None:
+    """Get the render cache singleton (None when disabled)."""
+    global _render_cache
+    if not settings.render_cache_enabled:
+        return None
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
@@ -312,6 +312,8 @@ class UGCPipelineState(BaseModel):
     current_stage: str | None = None
     target_count: int = 20  # Target number of videos
     completed_count: int = 0
+    stage_progress: dict = Field(default_factory=dict)  # {stage, completed, total} for the running stage
+    render_cache: dict = Field(default_factory=dict)  # {hits, misses, hit_rate, gpu_seconds_saved}
 
     # Error handling
     error: str | None = None
@@ -2,11 +2,23 @@
 Google Cloud Storage client for asset management.
 
 Handles uploading generated images and videos to GCS with public URLs.
+
+Uploads run on a dedicated, bounded thread pool (google-cloud-storage is
+synchronous). Large files go through chunked resumable uploads, and assets
+can be uploaded straight from bytes or file-like objects. In "bucket" mode
+the bucket must already be provisioned public-read (checked once, see
+check_public_read; the store never changes bucket IAM); buckets without
+uniform bucket-level access fall back to per-object ACLs. URLs are signed
+instead when gcs_public_access is "signed".
 """
 
 import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 import uuid
 
 from google.cloud import storage
@@ -15,28 +27,57 @@ from google.cloud.exceptions import GoogleCloudError
 from ..config import settings
 
 
+# Asset folders under each job prefix
+ASSET_FOLDERS = ("images", "videos", "thumbnails")
+
+# Objects deleted per batch request (GCS batch limit is 100)
+DELETE_BATCH_SIZE = 100
+
+MB = 1024 * 1024
+
+
 class GCSAssetStore:
     """
     Google Cloud Storage client for UGC assets.
 
     Uploads images and videos to GCS and returns public URLs.
     Uses a structured path: {user_id}/{job_id}/{asset_type}/{asset_id}
+
+    For local testing, point gcs_endpoint (or STORAGE_EMULATOR_HOST) at a
+    fake GCS server such as fake-gcs-server, or pass a client directly.
     """
 
     def __init__(
         self,
         bucket_name: str | None = None,
         project: str | None = None,
+        client: storage.Client | None = None,
+        max_workers: int | None = None,
     ):
         self.bucket_name = bucket_name or settings.gcs_bucket
         self.project = project or settings.gcp_project
-        self._client: storage.Client | None = None
+        self._client: storage.Client | None = client
         self._bucket: storage.Bucket | None = None
+        self._max_workers = max_workers or settings.gcs_upload_concurrency
+        self._executor: ThreadPoolExecutor | None = None
+        # "bucket" (public-read bucket) or "object" (per-blob ACL) once checked
+        self._public_mode: str | None = None
+        self._public_lock = threading.Lock()
 
     def _get_client(self) -> storage.Client:
         """Lazily initialize GCS client."""
         if self._client is None:
-            self._client = storage.Client(project=self.project)
+            if settings.gcs_endpoint:
+                # Local fake GCS: no real credentials
+                from google.auth.credentials import AnonymousCredentials
+
+                self._client = storage.Client(
+                    project=self.project,
+                    credentials=AnonymousCredentials(),
+                    client_options={"api_endpoint": settings.gcs_endpoint},
+                )
+            else:
+                self._client = storage.Client(project=self.project)
         return self._client
 
     def _get_bucket(self) -> storage.Bucket:
@@ -45,6 +86,26 @@ class GCSAssetStore:
             self._bucket = self._get_client().bucket(self.bucket_name)
         return self._bucket
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Dedicated pool so uploads don't compete with the default executor."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="gcs-upload",
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        """Run a blocking GCS call on the upload pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def close(self):
+        """Shut down the upload pool (waits for in-flight uploads)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
     async def upload_image(
         self,
         local_path: str,
@@ -73,6 +134,33 @@ class GCSAssetStore:
 
         return await self._upload_file(local_path, blob_path, "image/png")
 
+    async def upload_image_bytes(
+        self,
+        data: bytes | BinaryIO,
+        job_id: str,
+        user_id: str,
+        asset_id: str,
+        content_type: str = "image/png",
+        ext: str = ".png",
+    ) -> str:
+        """
+        Upload an in-memory image to GCS and return public URL.
+
+        Args:
+            data: Image bytes or a readable binary stream
+            job_id: Job ID for organization
+            user_id: User ID for organization
+            asset_id: Asset ID for naming
+            content_type: MIME type of the image
+            ext: File extension for the blob name
+
+        Returns:
+            Public URL of the uploaded image
+        """
+        blob_path = f"ugc/{user_id}/{job_id}/images/{asset_id}{ext}"
+
+        return await self.upload_stream(data, blob_path, content_type)
+
     async def upload_video(
         self,
         local_path: str,
@@ -123,71 +211,187 @@ class GCSAssetStore:
         """
         Upload a file to GCS.
 
-        Uses run_in_executor since google-cloud-storage is synchronous.
+        Files above gcs_resumable_threshold_mb are sent as a chunked
+        resumable upload, so a dropped connection resumes from the last
+        chunk instead of restarting the whole video.
         """
-        loop = asyncio.get_event_loop()
-
         def _sync_upload():
-            bucket = self._get_bucket()
-            blob = bucket.blob(blob_path)
+            self._sync_check_public_read()
+            size = Path(local_path).stat().st_size
+            blob = self._new_blob(blob_path, size)
+            with open(local_path, "rb") as f:
+                blob.upload_from_file(f, size=size, content_type=content_type)
+            self._publish(blob)
+            return self._blob_url(blob)
 
-            blob.upload_from_filename(
-                local_path,
-                content_type=content_type,
-            )
+        try:
+            return await self._run(_sync_upload)
+        except GoogleCloudError as e:
+            raise RuntimeError(f"GCS upload failed: {e}")
 
-            # Make publicly accessible
-            blob.make_public()
+    async def upload_stream(
+        self,
+        data: bytes | BinaryIO,
+        blob_path: str,
+        content_type: str,
+    ) -> str:
+        """
+        Upload bytes or a binary stream to GCS without touching disk.
+
+        Args:
+            data: Bytes or a readable binary stream
+            blob_path: Destination object name
+            content_type: MIME type
 
-            return blob.public_url
+        Returns:
+            Public (or signed) URL of the uploaded object
+        """
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+
+        def _sync_upload():
+            self._sync_check_public_read()
+            size = None
+            if isinstance(stream, io.BytesIO):
+                size = stream.getbuffer().nbytes
+            blob = self._new_blob(blob_path, size)
+            blob.upload_from_file(stream, size=size, content_type=content_type, rewind=True)
+            self._publish(blob)
+            return self._blob_url(blob)
 
         try:
-            url = await loop.run_in_executor(None, _sync_upload)
-            return url
+            return await self._run(_sync_upload)
         except GoogleCloudError as e:
             raise RuntimeError(f"GCS upload failed: {e}")
 
+    def _new_blob(self, blob_path: str, size: int | None) -> storage.Blob:
+        """
+        Create a blob handle, chunked for resumable upload when large.
+
+        Unknown sizes (streams) are always chunked.
+        """
+        blob = self._get_bucket().blob(blob_path)
+        if size is None or size > settings.gcs_resumable_threshold_mb * MB:
+            # chunk_size must be a multiple of 256 KB
+            blob.chunk_size = settings.gcs_chunk_size_mb * MB
+        return blob
+
+    def _blob_url(self, blob: storage.Blob) -> str:
+        """
+        URL for an uploaded blob.
+
+        "bucket": the object is publicly readable (public-read bucket or
+        object ACL), so the plain public URL works. "signed": return a V4 signed URL.
+        """
+        if settings.gcs_public_access == "signed":
+            return blob.generate_signed_url(
+                version="v4",
+                expiration=timedelta(minutes=settings.gcs_signed_url_minutes),
+                method="GET",
+            )
+        return blob.public_url
+
+    def _publish(self, blob: storage.Blob):
+        """Per-object public read, for buckets without uniform bucket-level access."""
+        if self._public_mode == "object":
+            blob.make_public()
+
+    def _sync_check_public_read(self) -> str | None:
+        """
+        Check, once per store, that plain public URLs will be readable.
+
+        Public read is provisioned on the bucket, never granted from here:
+        with uniform bucket-level access the bucket must already give
+        allUsers roles/storage.objectViewer, and one that doesn't raises
+        instead of handing out URLs that 403 (use gcs_public_access="signed"
+        for private buckets). Without uniform access each uploaded object is
+        made public by ACL, which exposes only that object.
+
+        Returns:
+            "bucket" or "object", or None when URLs are signed (or a local
+            fake GCS is used) and nothing needs checking
+        """
+        if settings.gcs_public_access == "signed" or settings.gcs_endpoint:
+            return None
+
+        with self._public_lock:
+            if self._public_mode is not None:
+                return self._public_mode
+
+            bucket = self._get_bucket()
+            try:
+                bucket.reload(fields="iamConfiguration")
+                if not bucket.iam_configuration.uniform_bucket_level_access_enabled:
+                    self._public_mode = "object"
+                    return self._public_mode
+                policy = bucket.get_iam_policy(requested_policy_version=3)
+            except GoogleCloudError as e:
+                # No storage.buckets.getIamPolicy: trust the provisioning
+                print(f"⚠️ Could not verify public read on gs://{self.bucket_name}: {e}")
+                self._public_mode = "bucket"
+                return self._public_mode
+
+            public = any(
+                binding["role"] == "roles/storage.objectViewer" and "allUsers" in binding["members"]
+                for binding in policy.bindings
+            )
+            if not public:
+                raise RuntimeError(
+                    f"gs://{self.bucket_name} is not public-read (allUsers needs "
+                    f"roles/storage.objectViewer for gcs_public_access='bucket'); "
+                    f"provision the bucket or set gcs_public_access='signed'"
+                )
+
+            self._public_mode = "bucket"
+            return self._public_mode
+
+    async def check_public_read(self) -> str | None:
+        """
+        Check public read up front (uploads otherwise check lazily).
+
+        Run at startup to fail fast on a bucket that isn't provisioned
+        public-read.
+
+        Returns:
+            "bucket", "object" or None (see _sync_check_public_read)
+        """
+        return await self._run(self._sync_check_public_read)
+
     async def download_file(
         self,
         blob_path: str,
         local_path: str,
     ) -> str:
         """Download a file from GCS."""
-        loop = asyncio.get_event_loop()
-
         def _sync_download():
             bucket = self._get_bucket()
             blob = bucket.blob(blob_path)
             blob.download_to_filename(local_path)
             return local_path
 
-        return await loop.run_in_executor(None, _sync_download)
+        return await self._run(_sync_download)
 
     async def list_job_assets(
         self,
         user_id: str,
         job_id: str,
     ) -> dict[str, list[str]]:
-        """List all assets for a job."""
-        loop = asyncio.get_event_loop()
+        """
+        List all assets for a job.
 
-        def _sync_list():
-            prefix = f"ugc/{user_id}/{job_id}/"
+        Each asset folder is listed concurrently with its own prefix.
+        """
+        def _sync_list(folder: str) -> list[str]:
+            prefix = f"ugc/{user_id}/{job_id}/{folder}/"
             bucket = self._get_bucket()
-            blobs = bucket.list_blobs(prefix=prefix)
+            return [
+                self._blob_url(blob)
+                for blob in bucket.list_blobs(prefix=prefix, fields="items(name),nextPageToken")
+            ]
 
-            assets = {"images": [], "videos": [], "thumbnails": []}
-            for blob in blobs:
-                if "/images/" in blob.name:
-                    assets["images"].append(blob.public_url)
-                elif "/videos/" in blob.name:
-                    assets["videos"].append(blob.public_url)
-                elif "/thumbnails/" in blob.name:
-                    assets["thumbnails"].append(blob.public_url)
-
-            return assets
-
-        return await loop.run_in_executor(None, _sync_list)
+        results = await asyncio.gather(
+            *(self._run(_sync_list, folder) for folder in ASSET_FOLDERS)
+        )
+        return dict(zip(ASSET_FOLDERS, results))
 
     async def delete_job_assets(
         self,
@@ -195,19 +399,21 @@ class GCSAssetStore:
         job_id: str,
     ) -> int:
         """Delete all assets for a job. Returns count of deleted objects."""
-        loop = asyncio.get_event_loop()
-
         def _sync_delete():
             prefix = f"ugc/{user_id}/{job_id}/"
             bucket = self._get_bucket()
-            blobs = list(bucket.list_blobs(prefix=prefix))
+            blobs = list(bucket.list_blobs(prefix=prefix, fields="items(name),nextPageToken"))
 
-            for blob in blobs:
-                blob.delete()
+            # Batched deletes: one HTTP request per DELETE_BATCH_SIZE objects
+            client = self._get_client()
+            for i in range(0, len(blobs), DELETE_BATCH_SIZE):
+                with client.batch():
+                    for blob in blobs[i:i + DELETE_BATCH_SIZE]:
+                        blob.delete()
 
             return len(blobs)
 
-        return await loop.run_in_executor(None, _sync_delete)
+        return await self._run(_sync_delete)
 
     async def get_signed_url(
         self,
@@ -215,10 +421,6 @@ class GCSAssetStore:
         expiration_minutes: int = 60,
     ) -> str:
         """Get a signed URL for temporary access to a private blob."""
-        from datetime import timedelta
-
-        loop = asyncio.get_event_loop()
-
         def _sync_sign():
             bucket = self._get_bucket()
             blob = bucket.blob(blob_path)
@@ -227,4 +429,4 @@ class GCSAssetStore:
                 method="GET",
             )
 
-        return await loop.run_in_executor(None, _sync_sign)
+        return await self._run(_sync_sign)
@@ -9,6 +9,12 @@ Architecture (like Steel Browser):
 - Service scales to 0 when idle (cost efficient)
 - Service URL provides WebSocket access for VNC
 - Cookies injected at service startup
+
+Shared mode (CUA_SHARED_URL set): instead of a service per user, every user
+gets an isolated browser context on one multi-tenant stealth CUA server
+(CUA_MULTI_TENANT=1), selected by the X-CUA-Session header with the user ID
+signed with CUA_SESSION_SECRET. Shared sessions have no VNC URL ("url"
+is None): the shared browser is headless and its display isn't per user.
 """
 
 import asyncio
@@ -18,10 +24,13 @@ import uuid
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, List
+import aiohttp
 import redis.asyncio as aioredis
 from google.cloud import run_v2
 from google.api_core import exceptions as gcp_exceptions
 
+from browser_tenants import SESSION_HEADER, sign_session
+
 
 class VNCSessionManager:
     """
@@ -56,6 +65,9 @@ class VNCSessionManager:
         # Service idle timeout: 15 minutes (Cloud Run will scale to 0)
         self.service_timeout = 15 * 60
 
+        # Shared multi-tenant CUA server (no per-user services when set)
+        self.shared_cua_url = (os.getenv("CUA_SHARED_URL") or "").rstrip("/") or None
+
     async def connect(self):
         """Connect to Redis"""
         if not self.redis:
@@ -146,6 +158,9 @@ class VNCSessionManager:
         await self.connect()
 
         session_id = str(uuid.uuid4())
+        if self.shared_cua_url:
+            return await self._create_shared_session(user_id, session_id, cookies)
+
         service_name = self._get_service_name(user_id)
 
         try:
@@ -193,6 +208,44 @@ class VNCSessionManager:
             print(f"❌ Failed to create VNC session for {user_id}: {e}")
             raise
 
+    async def _shared_request(self, endpoint: str, user_id: str, data: Dict) -> Dict[str, Any]:
+        """POST to the shared CUA server in the user's session."""
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers={SESSION_HEADER: sign_session(user_id)}
+        ) as session:
+            async with session.post(f"{self.shared_cua_url}{endpoint}", json=data) as response:
+                return await response.json()
+
+    async def _create_shared_session(self, user_id: str, session_id: str, cookies: List[Dict] = None) -> Dict[str, Any]:
+        """Give the user a browser context on the shared multi-tenant server."""
+        if cookies:
+            result = await self._shared_request("/inject-cookies", user_id, {"cookies": cookies})
+            if not result.get("success"):
+                print(f"⚠️ Cookie injection failed for {user_id}: {result.get('error')}")
+
+        session_data = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "service_name": None,
+            "url": None,  # No per-user VNC view of the shared browser
+            "https_url": self.shared_cua_url,
+            "shared": True,
+            "session_key": user_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "status": "running"
+        }
+
+        if self.redis:
+            await self.redis.setex(
+                self._get_session_key(user_id),
+                self.session_ttl,
+                json.dumps(session_data)
+            )
+
+        print(f"✅ Shared browser context ready for user {user_id}: {self.shared_cua_url}")
+        return session_data
+
     async def _service_exists(self, service_name: str) -> bool:
         """Check if Cloud Run Service exists"""
         try:
@@ -412,6 +465,9 @@ class VNCSessionManager:
 
     async def _get_session_from_service(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get session info directly from Cloud Run Service"""
+        if self.shared_cua_url:
+            return None
+
         service_name = self._get_service_name(user_id)
 
         if not await self._service_exists(service_name):
@@ -455,6 +511,17 @@ class VNCSessionManager:
         """
         await self.connect()
 
+        if self.shared_cua_url:
+            # Persist and close the user's context; the server stays up
+            try:
+                await self._shared_request("/tenants/evict", user_id, {"session": user_id})
+            except Exception as e:
+                print(f"⚠️ Failed to evict shared context: {e}")
+            if self.redis:
+                await self.redis.delete(self._get_session_key(user_id))
+            print(f"✅ Destroyed shared browser session for user {user_id}")
+            return True
+
         session = await self.get_session(user_id)
         service_name = session.get("service_name") if session else self._get_service_name(user_id)
 
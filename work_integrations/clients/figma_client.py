@@ -10,7 +10,7 @@ Note: Figma webhooks are limited, so we primarily use polling.
 """
 
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Tuple
 from datetime import datetime, timedelta
 import httpx
 
@@ -29,10 +29,24 @@ class FigmaClient:
     Polling-based since Figma webhooks are limited.
     """
 
-    def __init__(self, access_token: str):
-        """Initialize with access token."""
+    def __init__(
+        self,
+        access_token: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        throttle: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize with access token.
+
+        Args:
+            access_token: OAuth access token
+            http_client: Optional shared HTTP client (connection reuse across polls)
+            throttle: Optional coroutine awaited before every request (rate budgets)
+        """
         self.access_token = access_token
         self.settings = get_work_integrations_settings()
+        self._http = http_client
+        self._throttle = throttle
         self._headers = {
             "Authorization": f"Bearer {access_token}",
         }
@@ -44,16 +58,28 @@ class FigmaClient:
         **kwargs,
     ) -> Dict[str, Any]:
         """Make a request to Figma API."""
+        response = await self._send(method, endpoint, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a raw request, applying the throttle and shared client if set."""
+        if self._throttle:
+            await self._throttle()
+
         url = f"{FIGMA_API_BASE}/{endpoint}"
+        request_headers = {**self._headers, **(headers or {})}
+        if self._http is not None:
+            return await self._http.request(method, url, headers=request_headers, **kwargs)
+
         async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method,
-                url,
-                headers=self._headers,
-                **kwargs,
-            )
-            response.raise_for_status()
-            return response.json()
+            return await client.request(method, url, headers=request_headers, **kwargs)
 
     # =========================================================================
     # User
@@ -93,6 +119,33 @@ class FigmaClient:
         data = await self._request("GET", f"projects/{project_id}/files")
         return data.get("files", [])
 
+    async def list_project_files_if_changed(
+        self,
+        project_id: str,
+        etag: Optional[str] = None,
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        List project files with a conditional request.
+
+        Each file entry includes `last_modified`, so callers can detect
+        changed files without fetching per-file metadata.
+
+        Args:
+            project_id: Project ID
+            etag: ETag from the previous listing, if any
+
+        Returns:
+            Tuple of (files, etag). Files is None when the listing is unchanged.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        response = await self._send("GET", f"projects/{project_id}/files", headers=headers)
+
+        if response.status_code == 304:
+            return None, etag
+
+        response.raise_for_status()
+        return response.json().get("files", []), response.headers.get("ETag")
+
     # =========================================================================
     # Files
     # =========================================================================
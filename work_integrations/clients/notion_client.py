@@ -10,7 +10,7 @@ Note: Notion doesn't support webhooks, so we use polling.
 """
 
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 from datetime import datetime, timedelta
 import httpx
 
@@ -30,10 +30,24 @@ class NotionClient:
     Polling-based since Notion doesn't support webhooks.
     """
 
-    def __init__(self, access_token: str):
-        """Initialize with access token."""
+    def __init__(
+        self,
+        access_token: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        throttle: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize with access token.
+
+        Args:
+            access_token: OAuth access token
+            http_client: Optional shared HTTP client (connection reuse across polls)
+            throttle: Optional coroutine awaited before every request (rate budgets)
+        """
         self.access_token = access_token
         self.settings = get_work_integrations_settings()
+        self._http = http_client
+        self._throttle = throttle
         self._headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
@@ -47,16 +61,28 @@ class NotionClient:
         **kwargs,
     ) -> Dict[str, Any]:
         """Make a request to Notion API."""
+        response = await self._send(method, endpoint, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a raw request, applying the throttle and shared client if set."""
+        if self._throttle:
+            await self._throttle()
+
         url = f"{NOTION_API_BASE}/{endpoint}"
+        request_headers = {**self._headers, **(headers or {})}
+        if self._http is not None:
+            return await self._http.request(method, url, headers=request_headers, **kwargs)
+
         async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method,
-                url,
-                headers=self._headers,
-                **kwargs,
-            )
-            response.raise_for_status()
-            return response.json()
+            return await client.request(method, url, headers=request_headers, **kwargs)
 
     # =========================================================================
     # User & Workspace
@@ -238,8 +264,16 @@ class NotionClient:
             # Query specific databases
             for db_id in database_ids[:5]:  # Limit to avoid rate limits
                 try:
+                    # Only ask Notion for pages edited since the cursor
                     pages = await self.query_database(
                         db_id,
+                        filter_obj={
+                            "timestamp": "last_edited_time",
+                            "last_edited_time": {
+                                "on_or_after": since.replace(microsecond=0).isoformat()
+                                + ("" if since.tzinfo else "Z"),
+                            },
+                        },
                         sorts=[{
                             "timestamp": "last_edited_time",
                             "direction": "descending",
@@ -266,12 +300,14 @@ class NotionClient:
                 page_size=limit,
             )
 
+            # Results are sorted newest first, so stop at the first older page
             for page in pages:
                 edited = page.get("last_edited_time", "")
                 if edited:
                     edited_dt = datetime.fromisoformat(edited.replace("Z", "+00:00"))
-                    if edited_dt >= since.replace(tzinfo=edited_dt.tzinfo):
-                        results.append(page)
+                    if edited_dt < since.replace(tzinfo=edited_dt.tzinfo):
+                        break
+                    results.append(page)
 
         return results[:limit]
 
@@ -84,6 +84,19 @@ class WorkIntegrationsSettings(BaseSettings):
     # =========================================================================
     daily_digest_hour: int = int(os.getenv("DAILY_DIGEST_HOUR", "21"))  # 9 PM
     draft_expiration_days: int = int(os.getenv("DRAFT_EXPIRATION_DAYS", "7"))
+    daily_digest_concurrency: int = int(os.getenv("DAILY_DIGEST_CONCURRENCY", "8"))  # Users in flight
+    daily_digest_email_workers: int = int(os.getenv("DAILY_DIGEST_EMAIL_WORKERS", "4"))
+
+    # =========================================================================
+    # Polling (Notion/Figma)
+    # =========================================================================
+    polling_interval_minutes: int = int(os.getenv("POLLING_INTERVAL_MINUTES", "15"))
+    polling_tick_seconds: int = int(os.getenv("POLLING_TICK_SECONDS", "60"))  # How often due integrations are picked up
+    polling_jitter_ratio: float = float(os.getenv("POLLING_JITTER_RATIO", "0.2"))
+    notion_poll_concurrency: int = int(os.getenv("NOTION_POLL_CONCURRENCY", "10"))
+    notion_requests_per_second: float = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "10"))
+    figma_poll_concurrency: int = int(os.getenv("FIGMA_POLL_CONCURRENCY", "10"))
+    figma_requests_per_second: float = float(os.getenv("FIGMA_REQUESTS_PER_SECOND", "10"))
 
     class Config:
         env_file = ".env"
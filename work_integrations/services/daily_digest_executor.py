@@ -6,18 +6,25 @@ Runs daily at a configurable time (default 9 PM) to:
 2. Aggregate their daily activities
 3. Generate draft posts
 4. Notify users of pending drafts
+
+Users are processed by a bounded pool of workers, each with its own
+database session. Email notifications are handed to a separate queue so a
+slow SendGrid call never holds a digest slot. Progress is checkpointed in
+Redis per digest date, so a crashed run resumes with the remaining users.
 """
 
 import logging
 import asyncio
+import time
+from collections import defaultdict
 from datetime import datetime, date
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy import select, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
-from database.models import WorkIntegration, User
+from database.models import WorkIntegration, User, ActivityDraft
 from .activity_aggregator import ActivityAggregator
 from .draft_generator import DraftGenerator
 from .email_notifications import get_email_notification_service
@@ -25,6 +32,62 @@ from ..config import get_work_integrations_settings
 
 logger = logging.getLogger(__name__)
 
+# Checkpoint keys outlive the run by a day so a late retry can still resume
+CHECKPOINT_EXPIRATION_SECONDS = 2 * 24 * 3600
+
+
+class DigestCheckpoint:
+    """
+    Per-date progress markers for the daily digest, stored in Redis.
+
+    Two sets are kept per digest date:
+    - processed: drafts were generated and committed for the user
+    - notified: the user's email was sent (or there was nothing to send)
+
+    If Redis is unavailable the checkpoint degrades to a no-op and the
+    run simply processes everyone.
+    """
+
+    def __init__(self, redis_url: str, redis_client=None):
+        self.redis_url = redis_url
+        self.redis = redis_client
+
+    async def _get_redis(self):
+        """Get or create Redis client."""
+        if self.redis is None:
+            import redis.asyncio as aioredis
+            self.redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self.redis
+
+    @staticmethod
+    def _key(target_date: date, stage: str) -> str:
+        return f"work_digest:{target_date.isoformat()}:{stage}"
+
+    async def members(self, target_date: date, stage: str) -> Set[str]:
+        """Get the user IDs that have completed a stage."""
+        try:
+            redis = await self._get_redis()
+            return set(await redis.smembers(self._key(target_date, stage)))
+        except Exception as e:
+            logger.warning(f"Digest checkpoint unavailable, not resuming: {e}")
+            return set()
+
+    async def mark(self, target_date: date, stage: str, user_id: str) -> None:
+        """Record that a user completed a stage."""
+        try:
+            redis = await self._get_redis()
+            key = self._key(target_date, stage)
+            await redis.sadd(key, user_id)
+            await redis.expire(key, CHECKPOINT_EXPIRATION_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint {stage} for user {user_id}: {e}")
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
 
 class DailyDigestExecutor:
     """
@@ -131,43 +194,110 @@ class DailyDigestExecutor:
             target_date: Date to process (defaults to today)
 
         Returns:
-            Number of drafts created
+            Number of drafts created (0 if generation failed)
+        """
+        try:
+            drafts = await self._generate_user_drafts(db, user_id, target_date)
+        except Exception:
+            return 0
+        return len(drafts)
+
+    async def _generate_user_drafts(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        target_date: date = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> List[ActivityDraft]:
+        """
+        Aggregate activities and generate drafts for one user.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            target_date: Date to process (defaults to today)
+            timings: Optional dict that accumulates seconds per stage
+
+        Returns:
+            Created drafts (empty if there was nothing to generate)
+
+        Raises:
+            Exception: Whatever failed, after logging and rolling back, so
+                the caller doesn't checkpoint the user as processed
         """
+        timings = timings if timings is not None else defaultdict(float)
+
         try:
             # Create aggregator and generator
             aggregator = ActivityAggregator(db)
             generator = DraftGenerator(db)
 
             # Prepare digest
+            stage_start = time.perf_counter()
             digest = await aggregator.prepare_digest(user_id, target_date)
+            timings["aggregate"] += time.perf_counter() - stage_start
 
             if not digest:
                 logger.debug(f"User {user_id}: No digest to generate")
-                return 0
+                return []
 
             # Generate and save drafts (1-2 drafts per day)
+            stage_start = time.perf_counter()
             num_drafts = 1 if digest["aggregate_score"] < 0.7 else 2
             drafts = await generator.generate_and_save_drafts(digest, num_drafts)
-
             await db.commit()
+            timings["generate"] += time.perf_counter() - stage_start
 
             logger.info(
                 f"User {user_id}: Generated {len(drafts)} drafts from "
                 f"{digest['total_activities']} activities (theme: {digest['theme']})"
             )
 
-            return len(drafts)
+            return drafts
 
         except Exception as e:
             logger.error(f"Error processing digest for user {user_id}: {e}")
             await db.rollback()
-            return 0
+            raise
+
+    async def _load_users(self, user_ids: List[str]) -> Dict[str, User]:
+        """Load User rows for all given IDs in one query."""
+        if not user_ids:
+            return {}
+        async with self.async_session() as db:
+            result = await db.execute(select(User).where(User.id.in_(user_ids)))
+            return {user.id: user for user in result.scalars().all()}
+
+    async def _load_pending_drafts(
+        self,
+        user_ids: List[str],
+        target_date: date,
+    ) -> Dict[str, List[ActivityDraft]]:
+        """Load pending drafts for the digest date, grouped by user, in one query."""
+        if not user_ids:
+            return {}
+        async with self.async_session() as db:
+            result = await db.execute(
+                select(ActivityDraft).where(
+                    and_(
+                        ActivityDraft.user_id.in_(user_ids),
+                        ActivityDraft.digest_date == target_date,
+                        ActivityDraft.status == "pending",
+                    )
+                )
+            )
+            drafts_by_user: Dict[str, List[ActivityDraft]] = defaultdict(list)
+            for draft in result.scalars().all():
+                drafts_by_user[draft.user_id].append(draft)
+            return drafts_by_user
 
     async def run_daily_digest(self, target_date: date = None):
         """
         Run the daily digest for all users.
 
-        This is called by the scheduler at the configured time.
+        This is called by the scheduler at the configured time. Users already
+        checkpointed for the date are skipped, and users whose drafts were
+        created but whose email never went out are re-queued for email only.
         """
         start_time = datetime.utcnow()
         logger.info(f"🚀 Starting daily digest run at {start_time}")
@@ -175,83 +305,127 @@ class DailyDigestExecutor:
         if target_date is None:
             target_date = datetime.utcnow().date()
 
-        total_users = 0
-        total_drafts = 0
-        errors = 0
-        emails_sent = 0
+        stats = {"drafts": 0, "emails": 0, "errors": 0}
+        timings: Dict[str, float] = defaultdict(float)
 
         email_service = get_email_notification_service()
+        checkpoint = DigestCheckpoint(self.settings.redis_url)
 
         async with self.async_session() as db:
-            # Get all users with active integrations
             user_ids = await self.get_users_with_integrations(db)
-            total_users = len(user_ids)
+        total_users = len(user_ids)
 
-            logger.info(f"Processing digest for {total_users} users")
+        processed = await checkpoint.members(target_date, "processed")
+        notified = await checkpoint.members(target_date, "notified")
+        remaining = [u for u in user_ids if u not in processed]
+        unnotified = [u for u in user_ids if u in processed and u not in notified]
 
-            # Process each user
-            for user_id in user_ids:
-                try:
-                    drafts_created = await self.process_user_digest(db, user_id, target_date)
-                    total_drafts += drafts_created
-
-                    # Send email notification if drafts were created
-                    if drafts_created > 0:
-                        try:
-                            # Get user email
-                            user_result = await db.execute(
-                                select(User).where(User.id == user_id)
-                            )
-                            user = user_result.scalar_one_or_none()
-
-                            if user and user.email:
-                                # Get created drafts for email content
-                                from database.models import ActivityDraft
-                                drafts_result = await db.execute(
-                                    select(ActivityDraft).where(
-                                        and_(
-                                            ActivityDraft.user_id == user_id,
-                                            ActivityDraft.digest_date == target_date,
-                                            ActivityDraft.status == "pending",
-                                        )
-                                    )
-                                )
-                                drafts = drafts_result.scalars().all()
-
-                                draft_info = [
-                                    {"theme": d.digest_theme, "content": d.content}
-                                    for d in drafts
-                                ]
-
-                                success = await email_service.send_new_drafts_notification(
-                                    to_email=user.email,
-                                    user_name=user.name or "there",
-                                    drafts=draft_info,
-                                )
-                                if success:
-                                    emails_sent += 1
-
-                        except Exception as email_error:
-                            logger.warning(f"Failed to send email to user {user_id}: {email_error}")
+        logger.info(
+            f"Processing digest for {len(remaining)} of {total_users} users "
+            f"({len(processed)} already done, {len(unnotified)} awaiting email)"
+        )
 
+        stage_start = time.perf_counter()
+        users = await self._load_users(remaining + unnotified)
+        resumed_drafts = await self._load_pending_drafts(unnotified, target_date)
+        timings["lookup"] += time.perf_counter() - stage_start
+
+        email_queue: asyncio.Queue = asyncio.Queue()
+
+        async def email_worker():
+            while True:
+                item = await email_queue.get()
+                if item is None:
+                    email_queue.task_done()
+                    return
+                user, drafts = item
+                stage_start = time.perf_counter()
+                try:
+                    success = await email_service.send_new_drafts_notification(
+                        to_email=user.email,
+                        user_name=user.name or "there",
+                        drafts=[
+                            {"theme": d.digest_theme, "content": d.content}
+                            for d in drafts
+                        ],
+                    )
+                    if success:
+                        stats["emails"] += 1
+                    await checkpoint.mark(target_date, "notified", user.id)
+                except Exception as email_error:
+                    logger.warning(f"Failed to send email to user {user.id}: {email_error}")
+                finally:
+                    timings["email"] += time.perf_counter() - stage_start
+                    email_queue.task_done()
+
+        async def enqueue_email(user_id: str, drafts: List[ActivityDraft]):
+            user = users.get(user_id)
+            if drafts and user and user.email:
+                await email_queue.put((user, drafts))
+            else:
+                await checkpoint.mark(target_date, "notified", user_id)
+
+        worker_slots = asyncio.Semaphore(max(1, self.settings.daily_digest_concurrency))
+
+        async def process_user(user_id: str):
+            async with worker_slots:
+                try:
+                    async with self.async_session() as db:
+                        drafts = await self._generate_user_drafts(
+                            db, user_id, target_date, timings
+                        )
+                except Exception:
+                    # Not checkpointed: the next run retries this user
+                    stats["errors"] += 1
+                    return
+
+                stats["drafts"] += len(drafts)
+                try:
+                    await checkpoint.mark(target_date, "processed", user_id)
+                    await enqueue_email(user_id, drafts)
                 except Exception as e:
                     logger.error(f"Failed to process user {user_id}: {e}")
-                    errors += 1
+                    stats["errors"] += 1
+
+        num_email_workers = max(1, self.settings.daily_digest_email_workers)
+        email_workers = [
+            asyncio.create_task(email_worker()) for _ in range(num_email_workers)
+        ]
+
+        try:
+            for user_id in unnotified:
+                await enqueue_email(user_id, resumed_drafts.get(user_id, []))
+
+            await asyncio.gather(*(process_user(user_id) for user_id in remaining))
+
+            for _ in email_workers:
+                await email_queue.put(None)
+            await asyncio.gather(*email_workers)
+        finally:
+            for worker in email_workers:
+                worker.cancel()
+            await checkpoint.close()
 
         # Log summary
         duration = (datetime.utcnow() - start_time).total_seconds()
         logger.info(
             f"✅ Daily digest complete: "
-            f"{total_users} users, {total_drafts} drafts created, "
-            f"{emails_sent} emails sent, {errors} errors, {duration:.2f}s"
+            f"{total_users} users, {stats['drafts']} drafts created, "
+            f"{stats['emails']} emails sent, {stats['errors']} errors, {duration:.2f}s"
+        )
+        logger.info(
+            "Daily digest stage timings (summed across workers): "
+            + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
         )
 
         return {
             "users_processed": total_users,
-            "drafts_created": total_drafts,
-            "emails_sent": emails_sent,
-            "errors": errors,
+            "users_resumed": len(processed),
+            "drafts_created": stats["drafts"],
+            "emails_sent": stats["emails"],
+            "errors": stats["errors"],
             "duration_seconds": duration,
+            "stage_seconds": dict(timings),
         }
 
     async def run_for_user(self, user_id: str, target_date: date = None) -> int:
@@ -4,20 +4,33 @@ Polling Service for Notion and Figma.
 These platforms don't support webhooks, so we poll
 for changes periodically using their respective APIs.
 
-Runs every 15 minutes to check for new activities.
+Each integration keeps a change cursor in `WorkIntegration.poll_cursor`
+(Notion last-edited time, Figma per-file modification times and listing
+ETags), so a poll only asks for what changed since the previous one.
+Integrations are spread across the polling interval with a jittered
+`next_poll_at`; a short tick claims whichever are due and polls them
+concurrently under per-provider concurrency and request-rate budgets.
+Decrypted tokens are cached in memory until they expire, and Figma tokens
+are refreshed shortly before expiry.
 """
 
+import asyncio
 import logging
+import random
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
+import httpx
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
+from sqlalchemy import select, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from database.models import WorkIntegration, WorkIntegrationCredential, WorkActivity
+from services.cookie_encryption import encrypt_data, decrypt_data
 from ..config import (
     get_work_integrations_settings,
     ACTIVITY_SIGNIFICANCE,
@@ -28,179 +41,449 @@ from ..clients.figma_client import FigmaClient
 
 logger = logging.getLogger(__name__)
 
+POLLED_PLATFORMS = ["notion", "figma"]
+
+# First poll of an integration (no cursor yet) looks back this far
+INITIAL_LOOKBACK = timedelta(hours=1)
+
+# Refresh OAuth tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Tokens without an expiry are re-decrypted after this long
+TOKEN_CACHE_TTL = timedelta(hours=1)
+
+# Max integrations claimed per tick
+MAX_INTEGRATIONS_PER_TICK = 500
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp from Notion/Figma into a naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+class ProviderBudget:
+    """
+    Concurrency and request-rate budget shared by all polls of one provider.
+
+    `slots` bounds how many integrations are polled at once; `throttle` is a
+    token bucket awaited before every API request.
+    """
+
+    def __init__(self, concurrency: int, requests_per_second: float):
+        self.slots = asyncio.Semaphore(max(1, concurrency))
+        self.rate = max(requests_per_second, 0.001)
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def throttle(self):
+        """Wait until the provider budget allows another request."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class TokenCache:
+    """
+    In-memory cache of decrypted access tokens.
+
+    Entries are keyed by integration and invalidated when the credential row
+    changes (updated_at) or the token is about to expire.
+    """
+
+    def __init__(self):
+        self._tokens: Dict[int, Tuple[str, datetime, Optional[datetime]]] = {}
+
+    def get(self, integration_id: int, credential: WorkIntegrationCredential) -> Optional[str]:
+        """Get a cached token if it is still valid for this credential."""
+        entry = self._tokens.get(integration_id)
+        if not entry:
+            return None
+
+        token, valid_until, version = entry
+        if version != credential.updated_at or datetime.utcnow() >= valid_until:
+            self._tokens.pop(integration_id, None)
+            return None
+        return token
+
+    def put(self, integration_id: int, credential: WorkIntegrationCredential, token: str):
+        """Cache a token until its expiry (minus the refresh margin)."""
+        valid_until = datetime.utcnow() + TOKEN_CACHE_TTL
+        if credential.token_expires_at:
+            valid_until = min(valid_until, credential.token_expires_at - TOKEN_REFRESH_MARGIN)
+        self._tokens[integration_id] = (token, valid_until, credential.updated_at)
+
+    def invalidate(self, integration_id: int):
+        """Drop a cached token (e.g. after a 401)."""
+        self._tokens.pop(integration_id, None)
+
 
 class PollingService:
     """
     Service that polls Notion and Figma for activities.
 
-    Runs on a schedule to fetch recent changes and
-    create WorkActivity records.
+    Runs a short scheduler tick that polls integrations whose
+    `next_poll_at` is due and creates WorkActivity records for changes.
     """
 
     def __init__(self):
         self.settings = get_work_integrations_settings()
         self.scheduler = AsyncIOScheduler()
         self._initialized = False
+        self._http: Optional[httpx.AsyncClient] = None
+        self.token_cache = TokenCache()
+        self.budgets = {
+            "notion": ProviderBudget(
+                self.settings.notion_poll_concurrency,
+                self.settings.notion_requests_per_second,
+            ),
+            "figma": ProviderBudget(
+                self.settings.figma_poll_concurrency,
+                self.settings.figma_requests_per_second,
+            ),
+        }
 
     async def initialize(self):
         """Start the polling scheduler."""
         if self._initialized:
             return
 
-        # Poll every 15 minutes
+        self._http = httpx.AsyncClient(timeout=30.0)
+
+        # Short tick; each integration is only polled when its slot is due
         self.scheduler.add_job(
-            self.poll_all_integrations,
-            IntervalTrigger(minutes=15),
+            self.poll_due_integrations,
+            IntervalTrigger(seconds=self.settings.polling_tick_seconds),
             id='work_integrations_polling',
-            name='Poll Notion and Figma for activities',
+            name='Poll due Notion and Figma integrations',
             replace_existing=True,
+            max_instances=1,
+            coalesce=True,
         )
 
         self.scheduler.start()
         self._initialized = True
-        logger.info("Work integrations polling service started (every 15 minutes)")
+        logger.info(
+            f"Work integrations polling service started "
+            f"(every {self.settings.polling_interval_minutes} minutes per integration, "
+            f"tick {self.settings.polling_tick_seconds}s)"
+        )
 
     async def shutdown(self):
         """Stop the polling scheduler."""
         if self._initialized:
             self.scheduler.shutdown(wait=False)
             self._initialized = False
+            if self._http:
+                await self._http.aclose()
+                self._http = None
             logger.info("Work integrations polling service stopped")
 
-    async def poll_all_integrations(self):
-        """Poll all active Notion and Figma integrations."""
-        logger.info("Starting work integrations poll cycle")
-
-        # Create database session
-        from database.database import ASYNC_DATABASE_URL
-        engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
-        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-
-        async with async_session() as db:
+    def _session(self) -> AsyncSession:
+        """Create a database session."""
+        from database.database import AsyncSessionLocal
+        return AsyncSessionLocal()
+
+    def _next_poll_time(self, now: datetime) -> datetime:
+        """Next poll time: one interval away, jittered to avoid synchronized polls."""
+        interval = self.settings.polling_interval_minutes * 60
+        jitter = interval * self.settings.polling_jitter_ratio
+        return now + timedelta(seconds=interval + random.uniform(-jitter, jitter))
+
+    # =========================================================================
+    # Scheduling
+    # =========================================================================
+
+    async def poll_due_integrations(self) -> Dict[str, int]:
+        """
+        Claim and poll integrations whose next poll time has passed.
+
+        Rows are claimed with SKIP LOCKED and rescheduled in the same
+        transaction, so several backend replicas can run the tick without
+        polling the same integration twice. Integrations that have never
+        been scheduled get a random slot within the interval instead of
+        all being polled at once.
+        """
+        now = datetime.utcnow()
+        due: List[Tuple[int, str]] = []
+        newly_scheduled = 0
+
+        async with self._session() as db:
             try:
-                # Get all active Notion and Figma integrations
                 result = await db.execute(
-                    select(WorkIntegration).where(
-                        WorkIntegration.platform.in_(["notion", "figma"]),
+                    select(WorkIntegration)
+                    .where(
+                        WorkIntegration.platform.in_(POLLED_PLATFORMS),
                         WorkIntegration.is_active == True,
                         WorkIntegration.is_connected == True,
+                        or_(
+                            WorkIntegration.next_poll_at.is_(None),
+                            WorkIntegration.next_poll_at <= now,
+                        ),
                     )
+                    .order_by(WorkIntegration.next_poll_at.asc().nulls_first())
+                    .limit(MAX_INTEGRATIONS_PER_TICK)
+                    .with_for_update(skip_locked=True)
                 )
-                integrations = result.scalars().all()
-
-                logger.info(f"Found {len(integrations)} polling integrations")
-
-                for integration in integrations:
-                    try:
-                        if integration.platform == "notion":
-                            await self._poll_notion(integration, db)
-                        elif integration.platform == "figma":
-                            await self._poll_figma(integration, db)
-                    except Exception as e:
-                        logger.error(
-                            f"Error polling {integration.platform} integration "
-                            f"{integration.id}: {e}"
+
+                interval = self.settings.polling_interval_minutes * 60
+                for integration in result.scalars().all():
+                    if integration.next_poll_at is None:
+                        integration.next_poll_at = now + timedelta(
+                            seconds=random.uniform(0, interval)
                         )
-                        continue
+                        newly_scheduled += 1
+                    else:
+                        integration.next_poll_at = self._next_poll_time(now)
+                        due.append((integration.id, integration.platform))
+
+                await db.commit()
 
             except Exception as e:
-                logger.error(f"Error in polling cycle: {e}")
-            finally:
-                await engine.dispose()
+                logger.error(f"Error claiming due integrations: {e}")
+                await db.rollback()
+                return {"polled": 0, "activities": 0, "errors": 1}
+
+        if newly_scheduled:
+            logger.info(f"Scheduled first poll for {newly_scheduled} integrations")
+
+        return await self._poll_integrations(due)
+
+    async def poll_all_integrations(self) -> Dict[str, int]:
+        """Poll every active Notion and Figma integration now (manual trigger)."""
+        async with self._session() as db:
+            result = await db.execute(
+                select(WorkIntegration.id, WorkIntegration.platform).where(
+                    WorkIntegration.platform.in_(POLLED_PLATFORMS),
+                    WorkIntegration.is_active == True,
+                    WorkIntegration.is_connected == True,
+                )
+            )
+            integrations = [(row[0], row[1]) for row in result.fetchall()]
+
+        return await self._poll_integrations(integrations)
+
+    async def _poll_integrations(self, integrations: List[Tuple[int, str]]) -> Dict[str, int]:
+        """Poll the given integrations concurrently under provider budgets."""
+        if not integrations:
+            return {"polled": 0, "activities": 0, "errors": 0}
 
-        logger.info("Completed work integrations poll cycle")
+        start = time.perf_counter()
+        logger.info(f"Polling {len(integrations)} work integrations")
+
+        results = await asyncio.gather(
+            *(self._poll_integration(integration_id, platform)
+              for integration_id, platform in integrations)
+        )
+
+        activities = sum(r for r in results if r is not None)
+        errors = sum(1 for r in results if r is None)
+
+        logger.info(
+            f"Completed work integrations poll: {len(integrations)} integrations, "
+            f"{activities} new activities, {errors} errors, "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+        return {"polled": len(integrations), "activities": activities, "errors": errors}
+
+    async def _poll_integration(self, integration_id: int, platform: str) -> Optional[int]:
+        """
+        Poll one integration in its own session.
+
+        Returns:
+            Number of new activities, or None on error
+        """
+        budget = self.budgets[platform]
+
+        async with budget.slots:
+            async with self._session() as db:
+                try:
+                    result = await db.execute(
+                        select(WorkIntegration)
+                        .options(selectinload(WorkIntegration.credentials))
+                        .where(WorkIntegration.id == integration_id)
+                    )
+                    integration = result.scalar_one_or_none()
+                    if not integration:
+                        return 0
+
+                    access_token = await self._get_access_token(integration, db)
+                    if not access_token:
+                        logger.warning(
+                            f"No access token for {platform} integration {integration_id}"
+                        )
+                        return 0
+
+                    if platform == "notion":
+                        rows, cursor = await self._poll_notion(integration, access_token, budget)
+                    else:
+                        rows, cursor = await self._poll_figma(integration, access_token, budget)
+
+                    inserted = await self._save_activities(rows, db)
+
+                    now = datetime.utcnow()
+                    integration.poll_cursor = cursor
+                    integration.last_synced_at = now
+                    if inserted:
+                        integration.last_activity_at = now
+
+                    await db.commit()
+                    return inserted
+
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 401:
+                        self.token_cache.invalidate(integration_id)
+                    logger.error(
+                        f"Error polling {platform} integration {integration_id}: {e}"
+                    )
+                    await db.rollback()
+                    return None
+
+                except Exception as e:
+                    logger.error(
+                        f"Error polling {platform} integration {integration_id}: {e}"
+                    )
+                    await db.rollback()
+                    return None
+
+    # =========================================================================
+    # Tokens
+    # =========================================================================
 
     async def _get_access_token(
         self,
         integration: WorkIntegration,
         db: AsyncSession,
     ) -> Optional[str]:
-        """Get decrypted access token for integration."""
-        from cryptography.fernet import Fernet
-        import os
-
-        result = await db.execute(
-            select(WorkIntegrationCredential).where(
-                WorkIntegrationCredential.integration_id == integration.id
-            )
-        )
-        credential = result.scalar_one_or_none()
+        """Get decrypted access token for integration, refreshing if near expiry."""
+        credential = integration.credentials
 
         if not credential or not credential.encrypted_access_token:
             return None
 
-        # Decrypt token
-        encryption_key = os.environ.get("WORK_INTEGRATION_ENCRYPTION_KEY")
-        if not encryption_key:
-            logger.error("WORK_INTEGRATION_ENCRYPTION_KEY not set")
-            return None
+        cached = self.token_cache.get(integration.id, credential)
+        if cached:
+            return cached
+
+        expires_at = credential.token_expires_at
+        if expires_at and expires_at - TOKEN_REFRESH_MARGIN <= datetime.utcnow():
+            token = await self._refresh_access_token(integration, credential)
+            if token:
+                self.token_cache.put(integration.id, credential, token)
+                return token
 
         try:
-            fernet = Fernet(encryption_key.encode())
-            return fernet.decrypt(credential.encrypted_access_token.encode()).decode()
+            token = decrypt_data(credential.encrypted_access_token)
         except Exception as e:
             logger.error(f"Failed to decrypt token: {e}")
             return None
 
-    async def _poll_notion(
+        self.token_cache.put(integration.id, credential, token)
+        return token
+
+    async def _refresh_access_token(
         self,
         integration: WorkIntegration,
-        db: AsyncSession,
-    ):
-        """Poll Notion for recent page updates."""
-        logger.info(f"Polling Notion integration {integration.id}")
+        credential: WorkIntegrationCredential,
+    ) -> Optional[str]:
+        """
+        Refresh an expiring OAuth token and store it on the credential.
+
+        Only Figma issues expiring tokens among the polled platforms; the
+        credential is committed together with the poll results.
+        """
+        if integration.platform != "figma" or not credential.encrypted_refresh_token:
+            return None
 
-        access_token = await self._get_access_token(integration, db)
+        from .oauth_manager import get_work_oauth_manager
+
+        try:
+            refresh_token = decrypt_data(credential.encrypted_refresh_token)
+            token_data = await get_work_oauth_manager().refresh_figma_token(refresh_token)
+        except Exception as e:
+            logger.error(f"Failed to refresh Figma token for integration {integration.id}: {e}")
+            return None
+
+        access_token = token_data.get("access_token")
         if not access_token:
-            logger.warning(f"No access token for Notion integration {integration.id}")
-            return
+            return None
+
+        now = datetime.utcnow()
+        credential.encrypted_access_token = encrypt_data(access_token)
+        if token_data.get("refresh_token"):
+            credential.encrypted_refresh_token = encrypt_data(token_data["refresh_token"])
+        if token_data.get("expires_in"):
+            credential.token_expires_at = now + timedelta(seconds=int(token_data["expires_in"]))
+        credential.updated_at = now
+
+        logger.info(f"Refreshed Figma token for integration {integration.id}")
+        return access_token
 
-        client = NotionClient(access_token)
+    # =========================================================================
+    # Notion
+    # =========================================================================
 
-        # Get pages edited in the last hour (overlap with poll interval)
-        since = datetime.utcnow() - timedelta(hours=1)
+    async def _poll_notion(
+        self,
+        integration: WorkIntegration,
+        access_token: str,
+        budget: ProviderBudget,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Poll Notion for pages edited since the cursor.
+
+        Returns:
+            Tuple of (activity rows, updated cursor)
+        """
+        logger.debug(f"Polling Notion integration {integration.id}")
+
+        client = NotionClient(access_token, http_client=self._http, throttle=budget.throttle)
+
+        cursor = dict(integration.poll_cursor or {})
+        since = (
+            _parse_timestamp(cursor.get("last_edited_time"))
+            or datetime.utcnow() - INITIAL_LOOKBACK
+        )
         database_ids = integration.notion_database_ids or []
 
-        try:
-            pages = await client.get_recently_edited_pages(
-                since=since,
-                database_ids=database_ids if database_ids else None,
-                limit=20,
-            )
+        pages = await client.get_recently_edited_pages(
+            since=since,
+            database_ids=database_ids if database_ids else None,
+            limit=20,
+        )
 
-            for page in pages:
-                await self._create_notion_activity(page, integration, client, db)
+        rows = [self._notion_activity_row(page, integration, client) for page in pages]
 
-        except Exception as e:
-            logger.error(f"Error polling Notion: {e}")
-            raise
+        edited_times = [p.get("last_edited_time") for p in pages if p.get("last_edited_time")]
+        if edited_times:
+            cursor["last_edited_time"] = max(edited_times, key=_parse_timestamp)
 
-    async def _create_notion_activity(
+        return rows, cursor
+
+    def _notion_activity_row(
         self,
         page: Dict[str, Any],
         integration: WorkIntegration,
         client: NotionClient,
-        db: AsyncSession,
-    ):
-        """Create activity from Notion page update."""
+    ) -> Dict[str, Any]:
+        """Build an activity row from a Notion page update."""
         page_id = page.get("id", "").replace("-", "")
         last_edited = page.get("last_edited_time", "")
 
-        # Check if we already have this activity
-        result = await db.execute(
-            select(WorkActivity).where(
-                WorkActivity.integration_id == integration.id,
-                WorkActivity.platform == "notion",
-                WorkActivity.metadata.contains({"page_id": page_id}),
-                WorkActivity.activity_at >= datetime.utcnow() - timedelta(hours=2),
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            # Already tracked this update
-            return
-
         # Extract page info
         title = client.extract_page_title(page)
         url = page.get("url", "")
@@ -215,270 +498,299 @@ class PollingService:
         base_score = ACTIVITY_SIGNIFICANCE.get("comment_added", 0.2)
         category = "progress"
         multiplier = CATEGORY_MULTIPLIERS.get(category, 1.0)
-        significance = base_score * multiplier
-
-        # Create activity
-        activity = WorkActivity(
-            integration_id=integration.id,
-            user_id=integration.user_id,
-            platform="notion",
-            activity_type="page_updated",
-            category=category,
-            title=f"Updated page: {title}",
-            description=f"Edited Notion page",
-            url=url,
-            repo_or_project=project,
-            significance_score=significance,
-            metadata={
+
+        return {
+            "integration_id": integration.id,
+            "user_id": integration.user_id,
+            "platform": "notion",
+            # One activity per page edit; Notion edit times are minute-granular
+            "external_id": f"page:{page_id}:{last_edited}"[:100],
+            "activity_type": "page_updated",
+            "category": category,
+            "title": f"Updated page: {title}",
+            "description": "Edited Notion page",
+            "url": url,
+            "repo_or_project": project,
+            "significance_score": base_score * multiplier,
+            "raw_payload": {
                 "page_id": page_id,
                 "title": title,
                 "parent_type": parent.get("type"),
             },
-            activity_at=datetime.fromisoformat(
-                last_edited.replace("Z", "+00:00")
-            ).replace(tzinfo=None) if last_edited else datetime.utcnow(),
-        )
+            "activity_at": _parse_timestamp(last_edited) or datetime.utcnow(),
+        }
 
-        db.add(activity)
-        await db.commit()
-        logger.info(f"Created Notion page activity for: {title}")
+    # =========================================================================
+    # Figma
+    # =========================================================================
 
     async def _poll_figma(
         self,
         integration: WorkIntegration,
-        db: AsyncSession,
-    ):
-        """Poll Figma for recent file updates and comments."""
-        logger.info(f"Polling Figma integration {integration.id}")
-
-        access_token = await self._get_access_token(integration, db)
-        if not access_token:
-            logger.warning(f"No access token for Figma integration {integration.id}")
-            return
-
-        client = FigmaClient(access_token)
-
-        # Get recently modified files
-        since = datetime.utcnow() - timedelta(hours=1)
+        access_token: str,
+        budget: ProviderBudget,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Poll Figma for files changed since the cursor.
+
+        Project listings are fetched with If-None-Match, and comments and
+        versions are only fetched for files whose `last_modified` moved.
+        Files past the per-poll limit are left out of the cursor (and their
+        project keeps its old ETag) so the next poll picks them up.
+
+        Returns:
+            Tuple of (activity rows, updated cursor)
+        """
+        logger.debug(f"Polling Figma integration {integration.id}")
+
+        cursor = dict(integration.poll_cursor or {})
         project_ids = integration.figma_project_ids or []
 
         if not project_ids:
             logger.debug(f"No Figma projects configured for integration {integration.id}")
-            return
+            return [], cursor
 
-        try:
-            # Get recently modified files
-            files = await client.get_recently_modified_files(
-                project_ids=project_ids,
-                since=since,
-                limit=10,
-            )
+        client = FigmaClient(access_token, http_client=self._http, throttle=budget.throttle)
+
+        etags = dict(cursor.get("etags", {}))
+        known_files = dict(cursor.get("files", {}))
+        lookback = datetime.utcnow() - INITIAL_LOOKBACK
 
-            for file in files:
-                await self._create_figma_file_activity(file, integration, db)
+        changed: List[Tuple[Dict[str, Any], datetime]] = []
+        new_etags: Dict[str, str] = {}
 
-            # Get recent comments
-            file_keys = [f.get("key") for f in files if f.get("key")]
-            if file_keys:
-                comments = await client.get_recent_comments(
-                    file_keys=file_keys,
-                    since=since,
-                    limit=20,
+        for project_id in project_ids[:5]:  # Limit to avoid rate limits
+            try:
+                files, etag = await client.list_project_files_if_changed(
+                    project_id, etags.get(project_id)
                 )
+            except Exception as e:
+                logger.warning(f"Failed to list files for project {project_id}: {e}")
+                continue
+
+            if etag:
+                new_etags[project_id] = etag
+            if files is None:
+                continue
+
+            for file_info in files:
+                file_key = file_info.get("key")
+                modified_dt = _parse_timestamp(file_info.get("last_modified"))
+                if not file_key or not modified_dt:
+                    continue
+
+                previous = _parse_timestamp(known_files.get(file_key))
+
+                if previous is not None and modified_dt <= previous:
+                    continue
+                if previous is None and modified_dt < lookback:
+                    known_files[file_key] = file_info["last_modified"]
+                    continue
+
+                changed.append((
+                    {
+                        **file_info,
+                        "lastModified": file_info["last_modified"],
+                        "project_id": project_id,
+                    },
+                    previous or lookback,
+                ))
+
+        changed.sort(key=lambda item: item[0]["lastModified"], reverse=True)
+        changed, deferred = changed[:10], changed[10:]
+
+        # Only advance the cursor for files processed this poll
+        for file_info, _ in changed:
+            known_files[file_info["key"]] = file_info["last_modified"]
+        deferred_projects = {file_info["project_id"] for file_info, _ in deferred}
+        for project_id, etag in new_etags.items():
+            if project_id not in deferred_projects:
+                etags[project_id] = etag
+
+        rows = [self._figma_file_activity_row(f, integration) for f, _ in changed]
+
+        file_results = await asyncio.gather(
+            *(self._fetch_figma_file_changes(client, f["key"], since) for f, since in changed)
+        )
+        for comments, versions in file_results:
+            rows.extend(self._figma_comment_activity_row(c, integration) for c in comments)
+            rows.extend(
+                self._figma_version_activity_row(v, integration)
+                for v in versions
+                if v.get("label")  # Only track labeled versions (intentional saves)
+            )
 
-                for comment in comments:
-                    await self._create_figma_comment_activity(comment, integration, db)
+        cursor["etags"] = etags
+        cursor["files"] = known_files
+        return rows, cursor
 
-            # Get recent versions (saves)
-            if file_keys:
-                versions = await client.get_recent_versions(
-                    file_keys=file_keys,
-                    since=since,
-                    limit=10,
-                )
+    async def _fetch_figma_file_changes(
+        self,
+        client: FigmaClient,
+        file_key: str,
+        since: datetime,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Fetch comments and versions created on a file after `since`."""
+
+        def after_since(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            recent = []
+            for item in items:
+                created = _parse_timestamp(item.get("created_at"))
+                if created and created > since:
+                    recent.append({**item, "file_key": file_key})
+            return recent
+
+        comments, versions = await asyncio.gather(
+            client.get_file_comments(file_key),
+            client.get_file_versions(file_key, limit=10),
+            return_exceptions=True,
+        )
 
-                for version in versions:
-                    await self._create_figma_version_activity(version, integration, db)
+        if isinstance(comments, Exception):
+            logger.warning(f"Failed to get comments for file {file_key}: {comments}")
+            comments = []
+        if isinstance(versions, Exception):
+            logger.warning(f"Failed to get versions for file {file_key}: {versions}")
+            versions = []
 
-        except Exception as e:
-            logger.error(f"Error polling Figma: {e}")
-            raise
+        return after_since(comments), after_since(versions)
 
-    async def _create_figma_file_activity(
+    def _figma_file_activity_row(
         self,
         file: Dict[str, Any],
         integration: WorkIntegration,
-        db: AsyncSession,
-    ):
-        """Create activity from Figma file update."""
+    ) -> Dict[str, Any]:
+        """Build an activity row from a Figma file update."""
         file_key = file.get("key", "")
         name = file.get("name", "")
         last_modified = file.get("lastModified", "")
 
-        # Check if we already have this activity
-        result = await db.execute(
-            select(WorkActivity).where(
-                WorkActivity.integration_id == integration.id,
-                WorkActivity.platform == "figma",
-                WorkActivity.activity_type == "file_updated",
-                WorkActivity.metadata.contains({"file_key": file_key}),
-                WorkActivity.activity_at >= datetime.utcnow() - timedelta(hours=2),
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            return
-
         # Calculate significance
         base_score = ACTIVITY_SIGNIFICANCE.get("comment_added", 0.2)
         category = "progress"
         multiplier = CATEGORY_MULTIPLIERS.get(category, 1.0)
-        significance = base_score * multiplier
-
-        # Create activity
-        activity = WorkActivity(
-            integration_id=integration.id,
-            user_id=integration.user_id,
-            platform="figma",
-            activity_type="file_updated",
-            category=category,
-            title=f"Updated design: {name}",
-            description=f"Made changes to Figma file",
-            url=f"https://www.figma.com/file/{file_key}",
-            repo_or_project=file.get("project_id", ""),
-            significance_score=significance,
-            metadata={
+
+        return {
+            "integration_id": integration.id,
+            "user_id": integration.user_id,
+            "platform": "figma",
+            "external_id": f"file:{file_key}:{last_modified}"[:100],
+            "activity_type": "file_updated",
+            "category": category,
+            "title": f"Updated design: {name}",
+            "description": "Made changes to Figma file",
+            "url": f"https://www.figma.com/file/{file_key}",
+            "repo_or_project": file.get("project_id", ""),
+            "significance_score": base_score * multiplier,
+            "raw_payload": {
                 "file_key": file_key,
                 "name": name,
-                "thumbnail_url": file.get("thumbnailUrl"),
+                "thumbnail_url": file.get("thumbnail_url") or file.get("thumbnailUrl"),
             },
-            activity_at=datetime.fromisoformat(
-                last_modified.replace("Z", "+00:00")
-            ).replace(tzinfo=None) if last_modified else datetime.utcnow(),
-        )
+            "activity_at": _parse_timestamp(last_modified) or datetime.utcnow(),
+        }
 
-        db.add(activity)
-        await db.commit()
-        logger.info(f"Created Figma file activity for: {name}")
-
-    async def _create_figma_comment_activity(
+    def _figma_comment_activity_row(
         self,
         comment: Dict[str, Any],
         integration: WorkIntegration,
-        db: AsyncSession,
-    ):
-        """Create activity from Figma comment."""
+    ) -> Dict[str, Any]:
+        """Build an activity row from a Figma comment."""
         comment_id = comment.get("id", "")
         message = comment.get("message", "")
         file_key = comment.get("file_key", "")
-        created_at = comment.get("created_at", "")
-
-        # Check if we already have this
-        result = await db.execute(
-            select(WorkActivity).where(
-                WorkActivity.integration_id == integration.id,
-                WorkActivity.platform == "figma",
-                WorkActivity.metadata.contains({"comment_id": comment_id}),
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            return
 
         # Calculate significance
         base_score = ACTIVITY_SIGNIFICANCE.get("comment_added", 0.2)
         category = "collaboration"
         multiplier = CATEGORY_MULTIPLIERS.get(category, 1.0)
-        significance = base_score * multiplier
-
-        # Create activity
-        activity = WorkActivity(
-            integration_id=integration.id,
-            user_id=integration.user_id,
-            platform="figma",
-            activity_type="comment_added",
-            category=category,
-            title="Added design feedback",
-            description=message[:500] if len(message) > 500 else message,
-            url=f"https://www.figma.com/file/{file_key}",
-            repo_or_project=file_key,
-            significance_score=significance,
-            metadata={
+
+        return {
+            "integration_id": integration.id,
+            "user_id": integration.user_id,
+            "platform": "figma",
+            "external_id": f"comment:{comment_id}",
+            "activity_type": "comment_added",
+            "category": category,
+            "title": "Added design feedback",
+            "description": message[:500],
+            "url": f"https://www.figma.com/file/{file_key}",
+            "repo_or_project": file_key,
+            "significance_score": base_score * multiplier,
+            "raw_payload": {
                 "comment_id": comment_id,
                 "file_key": file_key,
             },
-            activity_at=datetime.fromisoformat(
-                created_at.replace("Z", "+00:00")
-            ).replace(tzinfo=None) if created_at else datetime.utcnow(),
-        )
-
-        db.add(activity)
-        await db.commit()
-        logger.info(f"Created Figma comment activity")
+            "activity_at": _parse_timestamp(comment.get("created_at")) or datetime.utcnow(),
+        }
 
-    async def _create_figma_version_activity(
+    def _figma_version_activity_row(
         self,
         version: Dict[str, Any],
         integration: WorkIntegration,
-        db: AsyncSession,
-    ):
-        """Create activity from Figma version save."""
+    ) -> Dict[str, Any]:
+        """Build an activity row from a Figma version save."""
         version_id = version.get("id", "")
         label = version.get("label", "")
         description = version.get("description", "")
         file_key = version.get("file_key", "")
-        created_at = version.get("created_at", "")
-
-        # Only track labeled versions (intentional saves)
-        if not label:
-            return
-
-        # Check if we already have this
-        result = await db.execute(
-            select(WorkActivity).where(
-                WorkActivity.integration_id == integration.id,
-                WorkActivity.platform == "figma",
-                WorkActivity.metadata.contains({"version_id": version_id}),
-            )
-        )
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            return
 
         # Calculate significance - version saves are more significant
         base_score = ACTIVITY_SIGNIFICANCE.get("commits_pushed", 0.3)
         category = "progress"
         multiplier = CATEGORY_MULTIPLIERS.get(category, 1.0)
-        significance = base_score * multiplier
-
-        # Create activity
-        activity = WorkActivity(
-            integration_id=integration.id,
-            user_id=integration.user_id,
-            platform="figma",
-            activity_type="version_saved",
-            category=category,
-            title=f"Saved version: {label}",
-            description=description or f"Created design checkpoint: {label}",
-            url=f"https://www.figma.com/file/{file_key}",
-            repo_or_project=file_key,
-            significance_score=significance,
-            metadata={
+
+        return {
+            "integration_id": integration.id,
+            "user_id": integration.user_id,
+            "platform": "figma",
+            "external_id": f"version:{version_id}",
+            "activity_type": "version_saved",
+            "category": category,
+            "title": f"Saved version: {label}",
+            "description": description or f"Created design checkpoint: {label}",
+            "url": f"https://www.figma.com/file/{file_key}",
+            "repo_or_project": file_key,
+            "significance_score": base_score * multiplier,
+            "raw_payload": {
                 "version_id": version_id,
                 "label": label,
                 "file_key": file_key,
             },
-            activity_at=datetime.fromisoformat(
-                created_at.replace("Z", "+00:00")
-            ).replace(tzinfo=None) if created_at else datetime.utcnow(),
+            "activity_at": _parse_timestamp(version.get("created_at")) or datetime.utcnow(),
+        }
+
+    # =========================================================================
+    # Persistence
+    # =========================================================================
+
+    async def _save_activities(
+        self,
+        rows: List[Dict[str, Any]],
+        db: AsyncSession,
+    ) -> int:
+        """
+        Insert activity rows in one statement, skipping ones already captured.
+
+        Relies on the UNIQUE(integration_id, external_id) constraint.
+
+        Returns:
+            Number of rows actually inserted
+        """
+        if not rows:
+            return 0
+
+        result = await db.execute(
+            insert(WorkActivity)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["integration_id", "external_id"])
+            .returning(WorkActivity.id)
         )
+        inserted = len(result.fetchall())
 
-        db.add(activity)
-        await db.commit()
-        logger.info(f"Created Figma version activity: {label}")
+        if inserted:
+            logger.info(f"Created {inserted} polled activities for integration {rows[0]['integration_id']}")
+        return inserted
 
 
 # Singleton instance
@@ -0,0 +1,196 @@
+"""
+X11 Input
+
+Non-blocking xdotool input and screenshots for the CUA servers.
+
+- xdotool runs through asyncio.create_subprocess_exec (no shell), so a slow
+  `type` no longer stalls the event loop: /status and /screenshot keep
+  answering while it runs; commands time out after COMMAND_TIMEOUT_SECONDS,
+  plus the keystroke time for `type`
+- Input is serialized per display: clicks and keystrokes from concurrent
+  requests on one X display would interleave, so every input command (or
+  sequence of commands) holds that display's lock; reads never take it
+- Screenshots are grabbed in-process with mss when it is installed, on one
+  worker thread that keeps its X connection open between calls; otherwise
+  `scrot -` runs as a subprocess
+
+The locks are per process: run one server process per display.
+
+Usage:
+    ok, output = await xdotool("mousemove", "100", "200", "click", "1")
+
+    # Several commands without other input in between
+    ok, output = await xdotool_sequence(["key", "ctrl+l"], 0.5, ["type", "--", url])
+
+    png = await screenshot_png()
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+try:
+    import mss
+    import mss.tools
+except ImportError:
+    mss = None
+
+COMMAND_TIMEOUT_SECONDS = 15
+
+# xdotool's default delay between typed keystrokes
+TYPE_DELAY_MS = 12
+
+_input_locks: Dict[str, asyncio.Lock] = {}
+
+# Single grab thread: the mss instance (X connection) is reused and never
+# shared between threads
+_grab_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="x11-grab")
+_grabbers: Dict[str, "mss.base.MSSBase"] = {}
+
+
+def current_display() -> str:
+    return os.environ.get("DISPLAY", ":0")
+
+
+def input_lock(display: Optional[str] = None) -> asyncio.Lock:
+    """Lock serializing input on a display (defaults to $DISPLAY)."""
+    display = display or current_display()
+    if display not in _input_locks:
+        _input_locks[display] = asyncio.Lock()
+    return _input_locks[display]
+
+
+async def run(*args: str, timeout: float = COMMAND_TIMEOUT_SECONDS) -> Tuple[int, bytes, bytes]:
+    """
+    Run a command without blocking the event loop.
+
+    Returns:
+        (return code, stdout, stderr); -1 if it couldn't start or timed out
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        return -1, b"", str(e).encode()
+
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return -1, b"", f"{args[0]} timed out after {timeout}s".encode()
+    return proc.returncode, stdout, stderr
+
+
+def command_timeout(args) -> float:
+    """
+    Timeout for an xdotool command.
+
+    `type` takes len(text) x --delay to finish, so long text gets the
+    keystroke time on top of COMMAND_TIMEOUT_SECONDS.
+    """
+    args = [str(arg) for arg in args]
+    if not args or args[0] != "type":
+        return COMMAND_TIMEOUT_SECONDS
+    delay_ms = TYPE_DELAY_MS
+    if "--delay" in args:
+        try:
+            delay_ms = float(args[args.index("--delay") + 1])
+        except (IndexError, ValueError):
+            pass
+    text = args[args.index("--") + 1:] if "--" in args else args[1:]
+    return COMMAND_TIMEOUT_SECONDS + sum(len(t) for t in text) * delay_ms / 1000
+
+
+async def _xdotool(args, timeout: Optional[float] = None) -> Tuple[bool, str]:
+    timeout = timeout if timeout is not None else command_timeout(args)
+    code, stdout, stderr = await run("xdotool", *[str(arg) for arg in args], timeout=timeout)
+    return code == 0, (stdout + stderr).decode(errors="replace").strip()
+
+
+async def xdotool(
+    *args,
+    display: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> Tuple[bool, str]:
+    """
+    Run one xdotool command while holding the display's input lock.
+
+    Args:
+        timeout: Seconds before the command is killed (default: see
+            command_timeout, which scales with the text for `type`)
+    """
+    async with input_lock(display):
+        return await _xdotool(args, timeout)
+
+
+async def xdotool_sequence(
+    *steps: Union[list, float],
+    stop_on_error: bool = True,
+    display: Optional[str] = None
+) -> Tuple[bool, str]:
+    """
+    Run xdotool commands back to back under one hold of the input lock.
+
+    Args:
+        steps: xdotool argument lists, or a number of seconds to pause
+        stop_on_error: Skip the remaining steps after a failed command
+
+    Returns:
+        (True if every command succeeded, output of the first failure or
+        of the last command)
+    """
+    all_ok, last_output = True, ""
+    async with input_lock(display):
+        for step in steps:
+            if isinstance(step, (int, float)):
+                await asyncio.sleep(step)
+                continue
+            ok, output = await _xdotool(step)
+            if not ok:
+                if all_ok:
+                    all_ok, last_output = False, output
+                if stop_on_error:
+                    break
+            elif all_ok:
+                last_output = output
+    return all_ok, last_output
+
+
+def _grab_png(display: str) -> bytes:
+    """Capture the root window as PNG (runs on the grab thread)."""
+    grabber = _grabbers.get(display)
+    if grabber is None:
+        grabber = _grabbers[display] = mss.mss(display=display)
+    try:
+        shot = grabber.grab(grabber.monitors[0])
+    except Exception:
+        # Reconnect next time (e.g. the X server restarted)
+        _grabbers.pop(display, None)
+        raise
+    return mss.tools.to_png(shot.rgb, shot.size)
+
+
+async def screenshot_png(display: Optional[str] = None) -> Optional[bytes]:
+    """
+    PNG of the whole display, or None if it couldn't be captured.
+
+    Doesn't take the input lock, so it runs alongside input commands.
+    """
+    display = display or current_display()
+    if mss is not None:
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_grab_executor, _grab_png, display)
+        except Exception as e:
+            print(f"⚠️ In-process screenshot failed, falling back to scrot: {e}")
+
+    code, stdout, stderr = await run("scrot", "-")
+    if code != 0 or not stdout:
+        print(f"Screenshot error: {stderr.decode(errors='replace').strip()}")
+        return None
+    return stdout
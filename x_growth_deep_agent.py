@@ -1087,8 +1087,8 @@ def get_atomic_subagents(store=None, user_id=None, model=None, model_provider="a
                 return "Error: No CUA URL available. Make sure you have an active browser session."
 
             # Create async CUA client
-            from async_playwright_tools import AsyncPlaywrightClient
-            client = AsyncPlaywrightClient(cua_url)
+            from async_playwright_tools import get_client_for_url
+            client = get_client_for_url(cua_url, session_key=runtime_user_id)
 
             try:
                 importer = HistoricalDataImporter(client, runtime_user_id)
@@ -33,6 +33,8 @@ from datetime import datetime
 from typing import List, Dict, Set, Optional
 from langgraph.store.base import BaseStore
 
+from x_tweet_parser import scrape_job
+
 
 class XNativeCommonFollowersDiscovery:
     """
@@ -111,7 +113,7 @@ class XNativeCommonFollowersDiscovery:
         Returns True if successful, False if blocked.
         """
         for attempt in range(max_retries):
-            result = await self.client._request("POST", "/navigate", {"url": url})
+            result = await self.client._request("POST", "/navigate", {"url": url, "profile": "scrape"})
 
             if not result.get("success"):
                 self.consecutive_failures += 1
@@ -137,6 +139,7 @@ class XNativeCommonFollowersDiscovery:
 
         return False
 
+    @scrape_job
     async def get_followers_list(
         self,
         username: str,
@@ -219,6 +222,7 @@ class XNativeCommonFollowersDiscovery:
 
         return list(set(usernames))
 
+    @scrape_job
     async def get_common_followers_count(self, username: str) -> Optional[Dict]:
         """
         Use X's "Followers you know" tab to get mutual followers.
@@ -0,0 +1,281 @@
+"""
+X Tweet Parser
+
+Shared parsing for the structured tweet records returned by the CUA
+server's /dom/tweets endpoint. The server walks article[data-testid="tweet"]
+once in the page and returns one record per tweet with raw metric labels;
+this module turns those into TweetRecord objects.
+
+Used by the timeline, social graph, historical import and comment
+engagement scrapers instead of each rebuilding tweets from /dom/elements
+with its own metric and timestamp parsing.
+
+Usage:
+    tweets = await fetch_tweets(client, author="elonmusk")
+    for tweet in tweets:
+        print(tweet.url, tweet.likes, tweet.hours_ago())
+
+    # Scroll until 100 unique tweets (or the feed runs dry)
+    async for batch in collect_tweets(client, target=100):
+        ...
+
+    # Scraper methods that navigate with profile="scrape"
+    @scrape_job
+    async def scrape_feed(self): ...
+"""
+
+import functools
+import re
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# "1,234", "1.2K", "12K Likes. Like" -> number plus optional K/M/B suffix
+# (the suffix must not start a word, so "1 Bookmark" isn't a billion)
+METRIC_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)([KkMmBb](?![A-Za-z]))?')
+METRIC_MULTIPLIERS = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+RELATIVE_TIME_PATTERN = re.compile(r'^(\d+)([hdms])$')
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# Default age when a timestamp can't be parsed (assume recent)
+DEFAULT_HOURS_AGO = 12.0
+
+
+def parse_metric(value: Optional[str]) -> int:
+    """
+    Parse the first engagement number in a label or metric string.
+
+    Examples:
+    - "123" -> 123
+    - "1.2K" -> 1200
+    - "1,234 Likes. Like" -> 1234
+    - "" -> 0
+    """
+    if not value:
+        return 0
+    match = METRIC_PATTERN.search(value)
+    if not match:
+        return 0
+    try:
+        number = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return 0
+    suffix = (match.group(2) or '').upper()
+    return int(number * METRIC_MULTIPLIERS.get(suffix, 1))
+
+
+def looks_like_timestamp(text: str) -> bool:
+    """
+    Check if text looks like a displayed tweet time.
+    Examples: "2h", "1d", "5m", "Jan 5", "Dec 30"
+    """
+    text = text.strip().lower()
+    if RELATIVE_TIME_PATTERN.match(text):
+        return True
+    return any(text.startswith(month) for month in MONTHS)
+
+
+def parse_hours_ago(timestamp: Optional[str] = None, time_text: str = "") -> float:
+    """
+    Age of a tweet in hours.
+
+    Prefers the ISO datetime from the <time> element; falls back to the
+    displayed text ("2h", "1d", "5m", "Jan 5").
+    """
+    now = datetime.now(timezone.utc)
+
+    if timestamp:
+        try:
+            posted = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            if posted.tzinfo is None:
+                posted = posted.replace(tzinfo=timezone.utc)
+            return max(0.0, (now - posted).total_seconds() / 3600)
+        except ValueError:
+            pass
+
+    text = time_text.strip().lower()
+
+    # Relative: "2h", "1d", "5m", "30s"
+    match = RELATIVE_TIME_PATTERN.match(text)
+    if match:
+        value = int(match.group(1))
+        unit = match.group(2)
+        if unit == 'h':
+            return float(value)
+        elif unit == 'd':
+            return float(value * 24)
+        elif unit == 'm':
+            return float(value) / 60
+        return float(value) / 3600
+
+    # Date format: "Jan 5"
+    for month_name, month_num in MONTHS.items():
+        if text.startswith(month_name):
+            day = re.search(r'\d+', text)
+            if not day:
+                break
+            try:
+                post_date = datetime(now.year, month_num, int(day.group()), tzinfo=timezone.utc)
+                # Handle year rollover
+                if post_date > now:
+                    post_date = post_date.replace(year=now.year - 1)
+                return (now - post_date).total_seconds() / 3600
+            except ValueError:
+                break
+
+    return DEFAULT_HOURS_AGO
+
+
+@dataclass
+class TweetRecord:
+    """One tweet as extracted in the page by /dom/tweets."""
+    id: str
+    url: str
+    author: str
+    display_name: str
+    text: str
+    timestamp: Optional[str]
+    time_text: str
+    likes: int
+    retweets: int
+    replies: int
+    views: int
+    bookmarks: int
+    social_context: str = ""
+    replying_to: Optional[str] = None
+    promoted: bool = False
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "TweetRecord":
+        metrics = raw.get("metrics") or {}
+        return cls(
+            id=str(raw.get("id", "")),
+            url=raw.get("url", ""),
+            author=raw.get("author", ""),
+            display_name=raw.get("display_name") or raw.get("author", ""),
+            text=(raw.get("text") or "").strip(),
+            timestamp=raw.get("timestamp"),
+            time_text=raw.get("time_text", ""),
+            likes=parse_metric(metrics.get("likes")),
+            retweets=parse_metric(metrics.get("retweets")),
+            replies=parse_metric(metrics.get("replies")),
+            views=parse_metric(metrics.get("views")),
+            bookmarks=parse_metric(metrics.get("bookmarks")),
+            social_context=raw.get("social_context", ""),
+            replying_to=raw.get("replying_to"),
+            promoted=bool(raw.get("promoted")),
+        )
+
+    @property
+    def is_repost(self) -> bool:
+        context = self.social_context.lower()
+        return "reposted" in context or "retweeted" in context or self.text.startswith("RT @")
+
+    @property
+    def engagement(self) -> int:
+        return self.likes + self.retweets + self.replies
+
+    def hours_ago(self) -> float:
+        return parse_hours_ago(self.timestamp, self.time_text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def parse_tweets(raw_records: List[Dict[str, Any]]) -> List[TweetRecord]:
+    """Parse /dom/tweets records, skipping malformed ones."""
+    tweets = []
+    for raw in raw_records or []:
+        try:
+            tweet = TweetRecord.from_raw(raw)
+        except (AttributeError, TypeError):
+            continue
+        if tweet.id and tweet.url:
+            tweets.append(tweet)
+    return tweets
+
+
+async def fetch_tweets(
+    client,
+    author: Optional[str] = None,
+    limit: int = 0,
+) -> List[TweetRecord]:
+    """
+    Get the tweets currently rendered on the page.
+
+    Args:
+        client: CUA client with an async _request(method, endpoint, data)
+        author: Only tweets whose status URL belongs to this handle
+            (case-insensitive, without @)
+        limit: Maximum tweets to return (0 = all), in page order
+
+    Returns:
+        List of TweetRecord (empty if the page couldn't be read)
+    """
+    result = await client._request("POST", "/dom/tweets", {
+        "author": author,
+        "limit": limit,
+    })
+    if not result.get("success"):
+        print(f"   ⚠️ Failed to extract tweets: {result.get('error') or result.get('detail')}")
+        return []
+    return parse_tweets(result.get("tweets", []))
+
+
+async def collect_tweets(
+    client,
+    target: int = 50,
+    author: Optional[str] = None,
+    max_scrolls: int = 30,
+    stall_scrolls: int = 3,
+):
+    """
+    Scroll the current page and yield batches of newly seen tweets.
+
+    Wraps the client's /dom/collect stream: each batch holds tweets first
+    rendered on one scroll pass, deduped across the whole collection.
+
+    Args:
+        client: AsyncPlaywrightClient (needs collect())
+        target: Stop after this many unique tweets
+        author: Only tweets whose status URL belongs to this handle
+        max_scrolls: Hard cap on scroll passes
+        stall_scrolls: Stop after this many passes with nothing new
+
+    Yields:
+        List of TweetRecord per scroll pass
+    """
+    async for items in client.collect(
+        "tweets",
+        target=target,
+        author=author,
+        max_scrolls=max_scrolls,
+        stall_scrolls=stall_scrolls,
+    ):
+        tweets = parse_tweets(items)
+        if tweets:
+            yield tweets
+
+
+def scrape_job(method):
+    """
+    Decorate a scraper method that navigates with profile="scrape".
+
+    The scrape profile (media and third-party requests blocked) stays on for
+    the browser session until something switches it back, so when the method
+    returns or raises, self.client's session is restored to "interactive".
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            try:
+                await self.client._request("POST", "/navigate/profile", {"profile": "interactive"})
+            except Exception as e:
+                print(f"   ⚠️ Failed to restore interactive navigation profile: {e}")
+    return wrapper
@@ -17,9 +17,14 @@ Features:
 
 import uuid
 import re
+import json
 import math
+import heapq
+import hashlib
+import threading
+import time
 from typing import List, Optional, Dict, Union, Tuple
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime, timedelta
 from collections import Counter
 from pydantic import BaseModel, Field
@@ -36,7 +41,6 @@ except ImportError:
 
 try:
     import nltk
-    from nltk.util import ngrams
     from nltk.corpus import stopwords
     NLTK_AVAILABLE = True
 except ImportError:
@@ -239,6 +243,494 @@ class DeepStyleProfile:
         )
 
 
+# ============================================================================
+# INCREMENTAL STYLE STATISTICS
+# ============================================================================
+
+# Bump when StyleStats fields or their definitions change (forces a rebuild)
+STYLE_STATS_SCHEMA_VERSION = 2
+STYLE_STATS_KEY = "style_stats"
+
+# Namespace of per-save stats deltas not yet folded into STYLE_STATS_KEY
+STYLE_STATS_DELTAS = "style_stats_deltas"
+
+# Page size when reading every sample for a full rebuild
+SAMPLE_PAGE_SIZE = 500
+
+# Open-vocabulary counters keep their top entries once they outgrow these
+# limits by a quarter (entries below STYLE_COUNTER_MIN_COUNT go first), so
+# the stored document stays bounded however many samples a user has
+STYLE_COUNTER_LIMITS = {
+    "word_counts": 20000,
+    "bigrams": 5000,
+    "trigrams": 5000,
+    "term_freq": 10000,
+    "doc_freq": 10000,
+    "emojis": 1000,
+}
+STYLE_COUNTER_MIN_COUNT = 2
+
+# Pending deltas that make a read fold them into the stored document
+STYLE_STATS_COMPACT_AFTER = 20
+
+# Folded deltas are deleted only once they're older than this, so a
+# compaction running concurrently elsewhere still finds what it hasn't folded
+STYLE_STATS_DELTA_GRACE_SECONDS = 3600
+
+# Serializes rebuilds and compactions of a user's stats in this process.
+# It doesn't span processes or replicas, so correctness doesn't rest on it:
+# saves only append delta items (no read-modify-write), compactions skip
+# deltas the stored document lists as applied and delete a delta only after
+# STYLE_STATS_DELTA_GRACE_SECONDS, and the nightly recompute in
+# style_batch_analyzer corrects any drift left by a racing write.
+_style_stats_locks: Dict[str, threading.RLock] = {}
+_style_stats_locks_guard = threading.Lock()
+
+
+def style_stats_lock(user_id: str) -> threading.RLock:
+    """Lock held while a user's stored StyleStats are rebuilt or compacted"""
+    with _style_stats_locks_guard:
+        lock = _style_stats_locks.get(user_id)
+        if lock is None:
+            lock = _style_stats_locks[user_id] = threading.RLock()
+        return lock
+
+# Common internet/social media colloquialisms
+COLLOQUIAL_PATTERNS = [
+    'tbh', 'ngl', 'imo', 'imho', 'fwiw', 'afaik', 'tl;dr', 'ftfy',
+    'lol', 'lmao', 'rofl', 'omg', 'wtf', 'smh', 'fomo', 'yolo',
+    'gonna', 'wanna', 'gotta', 'kinda', 'sorta', 'prolly', 'ya',
+    'yeah', 'yep', 'nope', 'nah', 'haha', 'hehe', 'meh', 'ugh',
+    'bruh', 'bro', 'dude', 'fam', 'lowkey', 'highkey', 'vibe',
+    'slay', 'bet', 'cap', 'no cap', 'sus', 'lit', 'fire',
+    'deadass', 'fr', 'rn', 'idk', 'idc', 'idgaf', 'fyi',
+    'btw', 'jk', 'pls', 'plz', 'thx', 'ty', 'np', 'yw',
+    "y'all", 'ain\'t', 'lemme', 'gimme', 'dunno'
+]
+
+# Filler words/phrases that indicate personal style
+FILLER_PATTERNS = [
+    'like', 'basically', 'honestly', 'actually', 'literally',
+    'obviously', 'clearly', 'definitely', 'essentially', 'probably',
+    'maybe', 'perhaps', 'kind of', 'sort of', 'i mean', 'you know',
+    'i think', 'i feel', 'i guess', 'i suppose', 'in my opinion',
+    'to be honest', 'to be fair', 'at the end of the day',
+    'at this point', 'the thing is', 'the fact is'
+]
+
+# Common English words excluded from domain vocabulary (expanded stopwords)
+DOMAIN_COMMON_WORDS = {
+    'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
+    'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
+    'this', 'but', 'his', 'by', 'from', 'they', 'we', 'say', 'her',
+    'she', 'or', 'an', 'will', 'my', 'one', 'all', 'would', 'there',
+    'their', 'what', 'so', 'up', 'out', 'if', 'about', 'who', 'get',
+    'which', 'go', 'me', 'when', 'make', 'can', 'like', 'time', 'no',
+    'just', 'him', 'know', 'take', 'people', 'into', 'year', 'your',
+    'good', 'some', 'could', 'them', 'see', 'other', 'than', 'then',
+    'now', 'look', 'only', 'come', 'its', 'over', 'think', 'also',
+    'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first',
+    'well', 'way', 'even', 'new', 'want', 'because', 'any', 'these',
+    'give', 'day', 'most', 'us', 'very', 'really', 'been', 'being',
+    'much', 'more', 'here', 'still', 'many', 'thing', 'things'
+}
+
+# Keyword-based tone detection
+TONE_KEYWORDS = {
+    "professional": ["accordingly", "furthermore", "implementation", "strategic", "optimize", "leverage"],
+    "casual": ["lol", "haha", "gonna", "wanna", "tbh", "ngl", "dude", "bro", "yeah", "cool"],
+    "technical": ["api", "algorithm", "framework", "architecture", "implementation", "deploy", "code"],
+    "sarcastic": ["obviously", "clearly", "sure", "right", "totally", "wow", "great"],
+    "enthusiastic": ["amazing", "awesome", "incredible", "love", "excited", "fantastic", "!"],
+    "analytical": ["however", "therefore", "analysis", "data", "suggests", "indicates", "compared"],
+    "friendly": ["thanks", "appreciate", "hope", "glad", "happy", "welcome", "please"]
+}
+
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"
+    "]+",
+    flags=re.UNICODE
+)
+
+_COLLOQUIAL_RES = [
+    (p, re.compile(r'\b' + re.escape(p) + r'\b')) for p in COLLOQUIAL_PATTERNS
+]
+_FILLER_RES = [
+    (p, re.compile(r'\b' + re.escape(p) + r'\b')) for p in FILLER_PATTERNS
+]
+
+_stop_words: Optional[set] = None
+
+
+def get_stop_words() -> set:
+    """English stopwords from NLTK (loaded once), or an empty set"""
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = set()
+        if NLTK_AVAILABLE:
+            try:
+                _stop_words = set(stopwords.words('english'))
+            except:
+                # Download if not available
+                try:
+                    nltk.download('stopwords', quiet=True)
+                    _stop_words = set(stopwords.words('english'))
+                except:
+                    pass
+    return _stop_words
+
+
+def _add_counts(target: Dict[str, int], other: Dict[str, int], sign: int = 1):
+    """Add (or subtract) counts in place, dropping keys that reach zero"""
+    for key, value in other.items():
+        total = target.get(key, 0) + sign * value
+        if total > 0:
+            target[key] = total
+        else:
+            target.pop(key, None)
+
+
+@dataclass
+class StyleStats:
+    """
+    Mergeable sufficient statistics behind a DeepStyleProfile.
+
+    Every field is a sum (or a counter of sums) over samples, so stats for
+    new samples are computed on their own and merged in; removing a sample
+    subtracts its stats. The profile is derived from these totals without
+    re-reading the samples. Counters in STYLE_COUNTER_LIMITS are pruned to
+    their top entries on merge, which makes them approximate for large
+    histories (see prune).
+    """
+    schema_version: int = STYLE_STATS_SCHEMA_VERSION
+
+    # Lengths
+    sample_count: int = 0
+    post_count: int = 0
+    post_chars: int = 0
+    comment_count: int = 0
+    comment_chars: int = 0
+    total_chars: int = 0
+
+    # Vocabulary
+    word_tokens: int = 0
+    word_chars: int = 0
+    word_counts: Dict[str, int] = field(default_factory=dict)
+    pruned_words: int = 0  # Distinct words pruned from word_counts
+    readability: Dict[str, int] = field(default_factory=lambda: {
+        "words": 0, "sentences": 0, "syllables": 0
+    })
+
+    # Phrases and terms
+    bigrams: Dict[str, int] = field(default_factory=dict)
+    trigrams: Dict[str, int] = field(default_factory=dict)
+    doc_freq: Dict[str, int] = field(default_factory=dict)
+    term_freq: Dict[str, int] = field(default_factory=dict)
+    colloquialisms: Dict[str, int] = field(default_factory=dict)
+    fillers: Dict[str, int] = field(default_factory=dict)
+
+    # Sentence moments
+    sentence_count: int = 0
+    sentence_chars: int = 0
+    sentence_chars_sq: int = 0
+    sentence_words: int = 0
+
+    # Formatting
+    punctuation: Dict[str, int] = field(default_factory=dict)
+    capitalization: Dict[str, int] = field(default_factory=dict)
+    emojis: Dict[str, int] = field(default_factory=dict)
+    emoji_total: int = 0
+    hashtags: int = 0
+
+    # Engagement and tone
+    engagement_total: int = 0
+    tone_keywords: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_sample(cls, sample: "WritingSample") -> "StyleStats":
+        """Compute the statistics of a single sample"""
+        text = sample.content or ""
+        lower = text.lower()
+        stats = cls(sample_count=1, total_chars=len(text))
+
+        if sample.content_type == "post":
+            stats.post_count, stats.post_chars = 1, len(text)
+        elif sample.content_type == "comment":
+            stats.comment_count, stats.comment_chars = 1, len(text)
+
+        # Vocabulary
+        tokens = lower.split()
+        stats.word_tokens = len(tokens)
+        stats.word_chars = sum(len(t) for t in text.split())
+        stats.word_counts = dict(Counter(tokens))
+        if TEXTSTAT_AVAILABLE and text.strip():
+            stats.readability = {
+                "words": textstat.lexicon_count(text),
+                "sentences": textstat.sentence_count(text),
+                "syllables": textstat.syllable_count(text),
+            }
+
+        # N-grams over stopword-filtered words
+        stop_words = get_stop_words()
+        words = [
+            w for w in re.findall(r'\b[a-zA-Z]+\b', lower)
+            if w not in stop_words and len(w) > 2
+        ]
+        stats.bigrams = dict(Counter(
+            " ".join(words[i:i + 2]) for i in range(len(words) - 1)
+        ))
+        stats.trigrams = dict(Counter(
+            " ".join(words[i:i + 3]) for i in range(len(words) - 2)
+        ))
+
+        # Domain term frequencies
+        terms = [
+            w for w in re.findall(r'\b[a-zA-Z]{3,}\b', lower)
+            if w not in DOMAIN_COMMON_WORDS
+        ]
+        stats.term_freq = dict(Counter(terms))
+        stats.doc_freq = {w: 1 for w in stats.term_freq}
+
+        # Colloquialisms (samples containing) and fillers (occurrences)
+        stats.colloquialisms = {p: 1 for p, rx in _COLLOQUIAL_RES if rx.search(lower)}
+        stats.fillers = {
+            p: n for p, rx in _FILLER_RES if (n := len(rx.findall(lower)))
+        }
+
+        # Sentences
+        sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+        stats.sentence_count = len(sentences)
+        stats.sentence_chars = sum(len(s) for s in sentences)
+        stats.sentence_chars_sq = sum(len(s) ** 2 for s in sentences)
+        stats.sentence_words = sum(len(s.split()) for s in sentences)
+
+        # Punctuation
+        stats.punctuation = {
+            "ellipsis": len(re.findall(r'\.{3}|…', text)),
+            "exclamation": text.count("!"),
+            "question": text.count("?"),
+            "dash": len(re.findall(r'[-–—]', text)),
+            "comma": text.count(","),
+        }
+
+        # Capitalization
+        if text == lower:
+            stats.capitalization = {"lowercase": 1}
+        elif text == text.upper() and len(text) > 10:
+            stats.capitalization = {"shouty": 1}
+        elif text and text[0].isupper():
+            stats.capitalization = {"standard": 1}
+
+        # Emojis and hashtags
+        emojis = EMOJI_PATTERN.findall(text)
+        stats.emojis = dict(Counter(emojis))
+        stats.emoji_total = len(emojis)
+        stats.hashtags = text.count("#")
+
+        # Engagement and tone keywords
+        stats.engagement_total = sample.get_total_engagement()
+        stats.tone_keywords = {
+            tone: sum(lower.count(kw) for kw in keywords)
+            for tone, keywords in TONE_KEYWORDS.items()
+        }
+
+        # Drop zero counts so stored counters stay small
+        for name in ("punctuation", "tone_keywords"):
+            setattr(stats, name, {k: v for k, v in getattr(stats, name).items() if v})
+        return stats
+
+    def merge(self, other: "StyleStats", sign: int = 1):
+        """
+        Add another StyleStats in place (sign=-1 subtracts it).
+
+        Callers make sure the samples being added aren't already counted.
+        """
+        for f in fields(self):
+            if f.name == "schema_version":
+                continue
+            mine = getattr(self, f.name)
+            theirs = getattr(other, f.name)
+            if isinstance(mine, dict):
+                _add_counts(mine, theirs, sign)
+            else:
+                setattr(self, f.name, mine + sign * theirs)
+
+        if sign > 0:
+            self.prune()
+
+    def prune(self):
+        """
+        Cap the open-vocabulary counters (STYLE_COUNTER_LIMITS).
+
+        A counter is only pruned once it's a quarter over its limit, so the
+        O(n log k) cut is amortized over many merges. Entries below
+        STYLE_COUNTER_MIN_COUNT are dropped first, then the rest cut to the
+        top `limit`. A pruned key that shows up again restarts from its new
+        count, and subtracting a sample whose keys were pruned has nothing
+        to subtract; the profile only reads the top of these counters.
+        """
+        for name, limit in STYLE_COUNTER_LIMITS.items():
+            counts = getattr(self, name)
+            if len(counts) <= limit + limit // 4:
+                continue
+            kept = {k: v for k, v in counts.items() if v >= STYLE_COUNTER_MIN_COUNT}
+            if len(kept) > limit:
+                kept = dict(heapq.nlargest(limit, kept.items(), key=lambda kv: kv[1]))
+            if name == "word_counts":
+                self.pruned_words += len(counts) - len(kept)
+            setattr(self, name, kept)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StyleStats":
+        # Copy the counters: merging must not mutate the caller's (or a store's) dicts
+        known = {f.name for f in fields(cls)}
+        return cls(**{
+            k: dict(v) if isinstance(v, dict) else v
+            for k, v in data.items() if k in known
+        })
+
+    def to_profile(self, user_id: str) -> DeepStyleProfile:
+        """Derive a DeepStyleProfile (heuristic tone) from the totals"""
+        n = self.sample_count
+        profile = DeepStyleProfile(user_id=user_id)
+        profile.sample_count = n
+        if n == 0:
+            return profile
+
+        # 1. Basic length metrics
+        profile.avg_post_length = self.post_chars // max(self.post_count, 1)
+        profile.avg_comment_length = self.comment_chars // max(self.comment_count, 1)
+
+        # 2. Vocabulary complexity and richness
+        words, sentences = self.readability.get("words", 0), self.readability.get("sentences", 0)
+        if TEXTSTAT_AVAILABLE and words and sentences:
+            # Flesch Reading Ease from summed counts, inverted to 0-1 complexity
+            flesch_score = (
+                206.835
+                - 1.015 * (words / sentences)
+                - 84.6 * (self.readability.get("syllables", 0) / words)
+            )
+            profile.vocabulary_complexity = max(0, min(1, (100 - flesch_score) / 100))
+        else:
+            avg_word_len = self.word_chars / max(self.word_tokens, 1)
+            profile.vocabulary_complexity = min(1.0, avg_word_len / 8)
+        # Pruned words still count as distinct (an overestimate if they recur)
+        distinct_words = len(self.word_counts) + self.pruned_words
+        profile.vocabulary_richness = distinct_words / max(self.word_tokens, 1)
+
+        # 3. Signature phrases
+        profile.common_bigrams = Counter(self.bigrams).most_common(20)
+        profile.common_trigrams = Counter(self.trigrams).most_common(15)
+        signature_candidates = [p for p, c in profile.common_bigrams[:10] if c >= 3]
+        signature_candidates += [p for p, c in profile.common_trigrams[:10] if c >= 2]
+        profile.signature_phrases = signature_candidates[:15]
+
+        # 4. Domain vocabulary (TF-IDF-like: frequent and spread across posts)
+        scored_words = [
+            (word, self.term_freq.get(word, 0) * math.log(doc_freq + 1))
+            for word, doc_freq in self.doc_freq.items()
+            if doc_freq >= 2
+        ]
+        scored_words.sort(key=lambda x: x[1], reverse=True)
+        profile.domain_vocabulary = [word for word, _ in scored_words[:20]]
+
+        # 5. Colloquialisms and filler words
+        profile.colloquialisms = [p for p in COLLOQUIAL_PATTERNS if self.colloquialisms.get(p)]
+        profile.filler_words = [p for p in FILLER_PATTERNS if self.fillers.get(p, 0) >= 2]
+
+        # 6. Sentence structure (std dev from first and second moments)
+        if self.sentence_count:
+            mean = self.sentence_chars / self.sentence_count
+            variance = max(0.0, self.sentence_chars_sq / self.sentence_count - mean ** 2)
+            profile.avg_sentence_length = mean
+            profile.sentence_length_variance = variance ** 0.5
+            profile.avg_words_per_sentence = self.sentence_words / self.sentence_count
+
+        # 7. Punctuation patterns
+        profile.punctuation_patterns = {
+            "ellipsis": self.punctuation.get("ellipsis", 0) / n,
+            "exclamation": self.punctuation.get("exclamation", 0) / n,
+            "question": self.punctuation.get("question", 0) / n,
+            "dash": self.punctuation.get("dash", 0) / n,
+            "comma_heavy": self.punctuation.get("comma", 0) / max(self.total_chars, 1) * 100
+        }
+
+        # 8. Capitalization style
+        if self.capitalization.get("lowercase", 0) / n > 0.6:
+            profile.capitalization_style = "lowercase"
+        elif self.capitalization.get("shouty", 0) / n > 0.3:
+            profile.capitalization_style = "shouty"
+        else:
+            profile.capitalization_style = "standard"
+
+        # 9. Emojis and 10. hashtags
+        profile.uses_emojis = self.emoji_total > 0
+        profile.emoji_frequency = self.emoji_total / n
+        profile.common_emojis = [e for e, _ in Counter(self.emojis).most_common(10)]
+        profile.uses_hashtags = self.hashtags > 0
+        profile.hashtag_frequency = self.hashtags / n
+
+        # 11. Engagement
+        profile.avg_engagement_score = self.engagement_total / n
+
+        # 12. Heuristic tone
+        scores = {
+            tone: min(1.0, self.tone_keywords.get(tone, 0) / max(self.word_tokens, 1) * 50)
+            for tone in TONE_KEYWORDS
+        }
+        total = sum(scores.values())
+        if total > 0:
+            scores = {k: v / total for k, v in scores.items()}
+        profile.tone_scores = scores
+        profile.primary_tone = max(scores, key=scores.get)
+
+        profile.style_version = "2.0"
+        profile.last_updated = datetime.now().isoformat()
+        return profile
+
+
+def _apply_style_delta(stats: StyleStats, delta: dict):
+    """Fold a stored stats delta into stats (deltas from another schema are skipped)"""
+    if delta.get("schema_version") != STYLE_STATS_SCHEMA_VERSION:
+        return
+    if delta.get("remove"):
+        stats.merge(StyleStats.from_dict(delta["remove"]), sign=-1)
+    stats.merge(StyleStats.from_dict(delta["add"]))
+
+
+def sample_fingerprint(sample: dict) -> str:
+    """Fingerprint of a sample dict, telling apart versions of a re-saved sample"""
+    payload = json.dumps(sample, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+def _style_delta_reflected(delta: dict, samples_read: Dict[str, str]) -> bool:
+    """
+    Whether stats recomputed from some samples already include a delta.
+
+    Args:
+        delta: Stored delta value
+        samples_read: sample_id -> sample_fingerprint of the samples read
+    """
+    if delta.get("schema_version") != STYLE_STATS_SCHEMA_VERSION:
+        return True  # A recompute supersedes deltas from another schema
+    added = delta.get("added", {})
+    removed = set(delta.get("removed_ids", [])) - set(added)
+    return (
+        all(samples_read.get(sample_id) == fp for sample_id, fp in added.items())
+        and not any(sample_id in samples_read for sample_id in removed)
+    )
+
+
 # ============================================================================
 # WRITING STYLE MANAGER
 # ============================================================================
@@ -268,18 +760,32 @@ class XWritingStyleManager:
     # CAPTURE WRITING SAMPLES
     # ========================================================================
     
-    def save_writing_sample(self, sample: WritingSample):
+    def save_writing_sample(self, sample: WritingSample, update_stats: bool = True):
         """
         Save a writing sample with embeddings for semantic search
         
         Args:
             sample: WritingSample to store
+            update_stats: Merge the sample into the stored style statistics
         """
         namespace = (self.user_id, "writing_samples")
-        sample_id = sample.sample_id or str(uuid.uuid4())
+
+        # Re-saving an existing sample replaces its statistics
+        replaced = []
+        if update_stats and sample.sample_id:
+            existing = self.store.get(namespace, sample.sample_id)
+            if existing:
+                try:
+                    replaced.append(WritingSample(**existing.value))
+                except:
+                    pass
+        sample.sample_id = sample.sample_id or str(uuid.uuid4())
         
         # Store with content as searchable text
-        self.store.put(namespace, sample_id, sample.to_dict())
+        self.store.put(namespace, sample.sample_id, sample.to_dict())
+
+        if update_stats:
+            self.update_style_stats([sample], removed=replaced)
     
     def bulk_import_posts(self, posts: List[Dict]):
         """
@@ -291,6 +797,7 @@ class XWritingStyleManager:
         namespace = (self.user_id, "writing_samples")
         saved_count = 0
         skipped_count = 0
+        new_samples = []
         
         for post in posts:
             content = post["content"]
@@ -321,8 +828,13 @@ class XWritingStyleManager:
                     engagement=post.get("engagement", {"likes": 0, "replies": 0, "reposts": 0}),
                     topic=post.get("topic")
                 )
-                self.save_writing_sample(sample)
+                self.save_writing_sample(sample, update_stats=False)
+                new_samples.append(sample)
                 saved_count += 1
+
+        # One stats update for the whole batch
+        if new_samples:
+            self.update_style_stats(new_samples)
         
         print(f"📊 Import complete: {saved_count} new posts saved, {skipped_count} duplicates skipped")
     
@@ -333,7 +845,7 @@ class XWritingStyleManager:
         namespace = (self.user_id, "writing_samples")
         
         # Get all items
-        all_items = list(self.store.search(namespace))
+        all_items = list(self._iter_sample_items())
         
         # Track seen content
         seen_content = set()
@@ -342,17 +854,185 @@ class XWritingStyleManager:
         for item in all_items:
             content = item.value.get("content")
             if content in seen_content:
-                duplicates_to_delete.append(item.key)
+                duplicates_to_delete.append(item)
             else:
                 seen_content.add(content)
         
         # Delete duplicates
-        for key in duplicates_to_delete:
-            self.store.delete(namespace, key)
+        removed = []
+        for item in duplicates_to_delete:
+            self.store.delete(namespace, item.key)
+            try:
+                removed.append(WritingSample(**item.value))
+            except:
+                continue
+
+        # Subtract the deleted samples from the stored statistics
+        if removed:
+            self.update_style_stats([], removed=removed)
         
         print(f"🧹 Removed {len(duplicates_to_delete)} duplicate posts from store")
         return len(duplicates_to_delete)
 
+    # ========================================================================
+    # INCREMENTAL STYLE STATISTICS
+    # ========================================================================
+
+    def _iter_items(self, namespace: Tuple[str, ...], page_size: int = SAMPLE_PAGE_SIZE):
+        """Yield every item in a namespace, paging through the store"""
+        offset = 0
+        while True:
+            items = list(self.store.search(namespace, limit=page_size, offset=offset))
+            yield from items
+            if len(items) < page_size:
+                break
+            offset += page_size
+
+    def _iter_sample_items(self, page_size: int = SAMPLE_PAGE_SIZE):
+        """Yield every stored writing sample item, paging through the store"""
+        yield from self._iter_items((self.user_id, "writing_samples"), page_size)
+
+    def iter_samples(self):
+        """Yield every stored WritingSample (skipping malformed items)"""
+        for item in self._iter_sample_items():
+            try:
+                yield WritingSample(**item.value)
+            except:
+                continue
+
+    def style_delta_keys(self) -> set:
+        """Keys of the stats deltas currently stored (applied or not)"""
+        return {item.key for item in self._iter_items((self.user_id, STYLE_STATS_DELTAS))}
+
+    def get_style_stats(self) -> Optional[StyleStats]:
+        """
+        Get style statistics: the stored document plus pending deltas.
+
+        Returns None if nothing is stored or it's from an old schema. Once
+        STYLE_STATS_COMPACT_AFTER deltas are pending they're folded into
+        the stored document; deltas folded earlier are deleted after
+        STYLE_STATS_DELTA_GRACE_SECONDS.
+        """
+        with style_stats_lock(self.user_id):
+            item = self.store.get((self.user_id, "writing_style"), STYLE_STATS_KEY)
+            if not item or item.value.get("schema_version") != STYLE_STATS_SCHEMA_VERSION:
+                return None
+            stats = StyleStats.from_dict(item.value)
+            applied = set(item.value.get("applied_deltas", []))
+
+            # Document first, deltas second: a delta is only deleted once a
+            # stored document lists it as applied
+            deltas_namespace = (self.user_id, STYLE_STATS_DELTAS)
+            deltas = list(self._iter_items(deltas_namespace))
+            pending = [d for d in deltas if d.key not in applied]
+            for delta in pending:
+                _apply_style_delta(stats, delta.value)
+
+            if len(pending) >= STYLE_STATS_COMPACT_AFTER:
+                # Only deltas the stored document already includes may go
+                cutoff = time.time() - STYLE_STATS_DELTA_GRACE_SECONDS
+                expired = {
+                    d.key for d in deltas
+                    if d.key in applied and d.value.get("created_at", 0) < cutoff
+                }
+                for key in expired:
+                    self.store.delete(deltas_namespace, key)
+                kept = {d.key for d in deltas} - expired
+                self.save_style_stats(stats, applied_deltas=kept)
+            return stats
+
+    def save_style_stats(self, stats: StyleStats, applied_deltas=()):
+        """
+        Save style statistics (not embedded: they're never searched)
+
+        Args:
+            stats: Statistics to store
+            applied_deltas: Keys of stored deltas these statistics include
+        """
+        namespace = (self.user_id, "writing_style")
+        value = stats.to_dict()
+        value["applied_deltas"] = sorted(applied_deltas)
+        self.store.put(namespace, STYLE_STATS_KEY, value, index=False)
+
+    def replace_style_stats(self, stats: StyleStats, samples_read: Dict[str, str], deltas_before: set):
+        """
+        Store statistics recomputed from samples, keeping deltas they missed.
+
+        Deltas stored before the samples were read are included in them;
+        later ones are included when the versions they added were read (and
+        the samples they removed weren't). The rest stay pending and are
+        folded in on the next read.
+
+        Args:
+            stats: Statistics over the samples that were read
+            samples_read: sample_id -> sample_fingerprint of those samples
+            deltas_before: style_delta_keys() from before the samples were read
+        """
+        with style_stats_lock(self.user_id):
+            reflected = {
+                item.key
+                for item in self._iter_items((self.user_id, STYLE_STATS_DELTAS))
+                if item.key in deltas_before or _style_delta_reflected(item.value, samples_read)
+            }
+            self.save_style_stats(stats, applied_deltas=reflected)
+
+    def rebuild_style_stats(self) -> StyleStats:
+        """
+        Recompute style statistics from every stored sample.
+
+        Only needed when no statistics exist yet or the schema changed.
+        """
+        with style_stats_lock(self.user_id):
+            deltas_before = self.style_delta_keys()
+            stats = StyleStats()
+            samples_read = {}
+            for sample in self.iter_samples():
+                stats.merge(StyleStats.from_sample(sample))
+                samples_read[sample.sample_id] = sample_fingerprint(sample.to_dict())
+            self.replace_style_stats(stats, samples_read, deltas_before)
+            return stats
+
+    def update_style_stats(self, samples: List[WritingSample], removed: List[WritingSample] = ()):
+        """
+        Record the statistics delta of samples just saved or removed.
+
+        Costs O(len(samples)): the delta is stored as its own item and
+        folded into the stored statistics by a later read (get_style_stats),
+        so a save never rewrites the statistics document and saves from
+        different processes can't overwrite each other.
+
+        Args:
+            samples: Samples that were just saved
+            removed: Samples just deleted, or the previous versions of re-saved samples
+        """
+        added, subtracted = StyleStats(), StyleStats()
+        added_ids, removed_ids = {}, []
+        for sample in samples:
+            if sample.sample_id in added_ids:
+                continue
+            added_ids[sample.sample_id] = sample_fingerprint(sample.to_dict())
+            added.merge(StyleStats.from_sample(sample))
+        for sample in removed:
+            removed_ids.append(sample.sample_id)
+            subtracted.merge(StyleStats.from_sample(sample))
+        if not added_ids and not removed_ids:
+            return
+
+        self.store.put((self.user_id, STYLE_STATS_DELTAS), str(uuid.uuid4()), {
+            "schema_version": STYLE_STATS_SCHEMA_VERSION,
+            "created_at": time.time(),
+            "added": added_ids,
+            "removed_ids": removed_ids,
+            "add": added.to_dict(),
+            "remove": subtracted.to_dict() if removed_ids else None,
+        }, index=False)
+
+    def clear_style_stats(self):
+        """Delete the stored style statistics and every pending delta"""
+        self.store.delete((self.user_id, "writing_style"), STYLE_STATS_KEY)
+        for key in self.style_delta_keys():
+            self.store.delete((self.user_id, STYLE_STATS_DELTAS), key)
+
     def get_all_posts(self) -> List[Dict]:
         """
         Get all posts from the store for this user.
@@ -661,12 +1341,15 @@ class XWritingStyleManager:
     def deep_analyze_writing_style(
         self,
         use_llm_for_tone: bool = True,
-        anthropic_client=None
+        anthropic_client=None,
+        full_recompute: bool = False
     ) -> DeepStyleProfile:
         """
         Perform deep NLP-powered analysis of user's writing style.
 
-        This method uses spaCy, NLTK, and textstat to extract:
+        The profile is derived from stored per-user StyleStats, which are
+        updated as samples are saved, so a refresh doesn't re-read samples.
+        It covers:
         - Multi-word signature phrases (bigrams/trigrams)
         - Vocabulary complexity and richness
         - Punctuation and capitalization patterns
@@ -677,273 +1360,42 @@ class XWritingStyleManager:
         Args:
             use_llm_for_tone: Whether to use Claude for tone analysis
             anthropic_client: Anthropic client for LLM tone analysis
+            full_recompute: Rebuild the statistics from every stored sample
 
         Returns:
             DeepStyleProfile with comprehensive style analysis
         """
-        namespace = (self.user_id, "writing_samples")
+        stats = None if full_recompute else self.get_style_stats()
+        if stats is None:
+            stats = self.rebuild_style_stats()
 
-        # Get all writing samples
-        items = self.store.search(namespace, limit=1000)
-        samples = []
-        for item in items:
-            try:
-                samples.append(WritingSample(**item.value))
-            except:
-                continue
-
-        if not samples:
+        if stats.sample_count == 0:
             return DeepStyleProfile(user_id=self.user_id)
 
-        # Separate posts and comments
-        posts = [s for s in samples if s.content_type == "post"]
-        comments = [s for s in samples if s.content_type == "comment"]
-        all_content = [s.content for s in samples]
-
-        # Initialize profile
-        profile = DeepStyleProfile(user_id=self.user_id)
-        profile.sample_count = len(samples)
-
-        # ============================================================
-        # 1. BASIC LENGTH METRICS
-        # ============================================================
-        profile.avg_post_length = sum(len(p.content) for p in posts) // max(len(posts), 1)
-        profile.avg_comment_length = sum(len(c.content) for c in comments) // max(len(comments), 1)
-
-        # ============================================================
-        # 2. VOCABULARY COMPLEXITY (using textstat if available)
-        # ============================================================
-        combined_text = " ".join(all_content)
-
-        if TEXTSTAT_AVAILABLE:
-            # Flesch Reading Ease: 0-30 = very difficult, 60-70 = standard, 90-100 = very easy
-            # We invert it to 0-1 complexity score
-            flesch_score = textstat.flesch_reading_ease(combined_text)
-            profile.vocabulary_complexity = max(0, min(1, (100 - flesch_score) / 100))
-
-            # Additional metrics for richness
-            try:
-                # Dale-Chall readability
-                dale_chall = textstat.dale_chall_readability_score(combined_text)
-                # SMOG index
-                smog = textstat.smog_index(combined_text)
-            except:
-                pass
-        else:
-            # Fallback: estimate complexity from average word length
-            words = combined_text.split()
-            avg_word_len = sum(len(w) for w in words) / max(len(words), 1)
-            profile.vocabulary_complexity = min(1.0, avg_word_len / 8)
-
-        # Vocabulary richness (type-token ratio)
-        words = combined_text.lower().split()
-        unique_words = set(words)
-        profile.vocabulary_richness = len(unique_words) / max(len(words), 1)
-
-        # ============================================================
-        # 3. N-GRAM EXTRACTION (Signature Phrases)
-        # ============================================================
-        profile.common_bigrams = self._extract_ngrams(all_content, n=2, top_k=20)
-        profile.common_trigrams = self._extract_ngrams(all_content, n=3, top_k=15)
-
-        # Signature phrases are frequent ngrams that appear across multiple posts
-        signature_candidates = []
-        for phrase, count in profile.common_bigrams[:10]:
-            if count >= 3:  # Used at least 3 times
-                signature_candidates.append(phrase)
-        for phrase, count in profile.common_trigrams[:10]:
-            if count >= 2:  # Used at least twice
-                signature_candidates.append(phrase)
-        profile.signature_phrases = signature_candidates[:15]
+        # Sections 1-12 (heuristic tone) come straight from the totals
+        profile = stats.to_profile(self.user_id)
 
-        # ============================================================
-        # 4. DOMAIN VOCABULARY EXTRACTION (TF-IDF style)
-        # ============================================================
-        profile.domain_vocabulary = self._extract_domain_terms(all_content)
-
-        # ============================================================
-        # 5. COLLOQUIALISMS AND FILLER WORDS
-        # ============================================================
-        profile.colloquialisms = self._detect_colloquialisms(combined_text)
-        profile.filler_words = self._detect_filler_words(combined_text)
-
-        # ============================================================
-        # 6. SENTENCE STRUCTURE ANALYSIS
-        # ============================================================
-        sentence_stats = self._analyze_sentence_structure(all_content)
-        profile.avg_sentence_length = sentence_stats["avg_length"]
-        profile.sentence_length_variance = sentence_stats["variance"]
-        profile.avg_words_per_sentence = sentence_stats["avg_words"]
-
-        # ============================================================
-        # 7. PUNCTUATION PATTERNS
-        # ============================================================
-        profile.punctuation_patterns = self._analyze_punctuation(combined_text, len(samples))
-
-        # ============================================================
-        # 8. CAPITALIZATION STYLE
-        # ============================================================
-        profile.capitalization_style = self._detect_capitalization_style(all_content)
-
-        # ============================================================
-        # 9. EMOJI ANALYSIS
-        # ============================================================
-        emoji_stats = self._analyze_emoji_usage(all_content)
-        profile.uses_emojis = emoji_stats["uses_emojis"]
-        profile.emoji_frequency = emoji_stats["frequency"]
-        profile.common_emojis = emoji_stats["common_emojis"]
-
-        # ============================================================
-        # 10. HASHTAG ANALYSIS
-        # ============================================================
-        hashtag_count = sum(content.count("#") for content in all_content)
-        profile.uses_hashtags = hashtag_count > 0
-        profile.hashtag_frequency = hashtag_count / max(len(samples), 1)
-
-        # ============================================================
-        # 11. ENGAGEMENT PATTERNS
-        # ============================================================
-        total_engagement = sum(
-            sum(s.engagement.values()) if s.engagement else 0
-            for s in samples
-        )
-        profile.avg_engagement_score = total_engagement / max(len(samples), 1)
-
-        # ============================================================
-        # 12. TONE ANALYSIS (LLM-based if enabled)
-        # ============================================================
+        # LLM tone analysis only needs a small sample of texts
         if use_llm_for_tone and anthropic_client:
-            tone_scores = self._analyze_tone_with_llm(all_content[:20], anthropic_client)
+            namespace = (self.user_id, "writing_samples")
+            sample_texts = [
+                item.value.get("content", "")
+                for item in self.store.search(namespace, limit=20)
+            ]
+            tone_scores = self._analyze_tone_with_llm(sample_texts, anthropic_client)
             profile.tone_scores = tone_scores
             profile.primary_tone = max(tone_scores, key=tone_scores.get)
-        else:
-            # Fallback to heuristic tone detection
-            profile.tone_scores = self._analyze_tone_heuristic(combined_text)
-            profile.primary_tone = max(profile.tone_scores, key=profile.tone_scores.get)
-
-        # Update version and timestamp
-        profile.style_version = "2.0"
-        profile.last_updated = datetime.now().isoformat()
 
         # Save deep profile
         self.save_deep_style_profile(profile)
 
         return profile
 
-    def _extract_ngrams(
-        self,
-        texts: List[str],
-        n: int = 2,
-        top_k: int = 20
-    ) -> List[Tuple[str, int]]:
-        """Extract top n-grams from texts"""
-        all_ngrams = []
-
-        # Get stopwords if NLTK available
-        stop_words = set()
-        if NLTK_AVAILABLE:
-            try:
-                stop_words = set(stopwords.words('english'))
-            except:
-                # Download if not available
-                try:
-                    nltk.download('stopwords', quiet=True)
-                    stop_words = set(stopwords.words('english'))
-                except:
-                    pass
-
-        for text in texts:
-            # Tokenize
-            words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
-            # Filter stopwords for better phrases
-            filtered_words = [w for w in words if w not in stop_words and len(w) > 2]
-
-            if NLTK_AVAILABLE:
-                text_ngrams = list(ngrams(filtered_words, n))
-            else:
-                # Manual ngram extraction
-                text_ngrams = [
-                    tuple(filtered_words[i:i+n])
-                    for i in range(len(filtered_words) - n + 1)
-                ]
-
-            all_ngrams.extend(text_ngrams)
-
-        # Count frequencies
-        ngram_freq = Counter(all_ngrams)
-
-        # Convert to strings and return top k
-        result = [
-            (" ".join(gram), count)
-            for gram, count in ngram_freq.most_common(top_k)
-        ]
-        return result
-
-    def _extract_domain_terms(self, texts: List[str], top_k: int = 20) -> List[str]:
-        """Extract domain-specific vocabulary using TF-IDF-like scoring"""
-        # Common English words to exclude (expanded stopwords)
-        common_words = {
-            'the', 'be', 'to', 'of', 'and', 'a', 'in', 'that', 'have', 'i',
-            'it', 'for', 'not', 'on', 'with', 'he', 'as', 'you', 'do', 'at',
-            'this', 'but', 'his', 'by', 'from', 'they', 'we', 'say', 'her',
-            'she', 'or', 'an', 'will', 'my', 'one', 'all', 'would', 'there',
-            'their', 'what', 'so', 'up', 'out', 'if', 'about', 'who', 'get',
-            'which', 'go', 'me', 'when', 'make', 'can', 'like', 'time', 'no',
-            'just', 'him', 'know', 'take', 'people', 'into', 'year', 'your',
-            'good', 'some', 'could', 'them', 'see', 'other', 'than', 'then',
-            'now', 'look', 'only', 'come', 'its', 'over', 'think', 'also',
-            'back', 'after', 'use', 'two', 'how', 'our', 'work', 'first',
-            'well', 'way', 'even', 'new', 'want', 'because', 'any', 'these',
-            'give', 'day', 'most', 'us', 'very', 'really', 'been', 'being',
-            'much', 'more', 'here', 'still', 'many', 'thing', 'things'
-        }
-
-        word_doc_freq = Counter()  # How many documents contain each word
-        word_total_freq = Counter()  # Total occurrences
-
-        for text in texts:
-            words = set(re.findall(r'\b[a-zA-Z]{3,}\b', text.lower()))
-            for word in words:
-                if word not in common_words:
-                    word_doc_freq[word] += 1
-
-            all_words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-            for word in all_words:
-                if word not in common_words:
-                    word_total_freq[word] += 1
-
-        # Calculate TF-IDF-like score
-        # High doc frequency + high total freq = domain term
-        scored_words = []
-        for word, doc_freq in word_doc_freq.items():
-            if doc_freq >= 2:  # Appears in at least 2 posts
-                total_freq = word_total_freq[word]
-                # Score: balance between appearing often and in many docs
-                score = total_freq * math.log(doc_freq + 1)
-                scored_words.append((word, score))
-
-        # Sort by score and return top k
-        scored_words.sort(key=lambda x: x[1], reverse=True)
-        return [word for word, _ in scored_words[:top_k]]
-
     def _detect_colloquialisms(self, text: str) -> List[str]:
         """Detect informal/slang expressions"""
-        # Common internet/social media colloquialisms
-        colloquial_patterns = [
-            'tbh', 'ngl', 'imo', 'imho', 'fwiw', 'afaik', 'tl;dr', 'ftfy',
-            'lol', 'lmao', 'rofl', 'omg', 'wtf', 'smh', 'fomo', 'yolo',
-            'gonna', 'wanna', 'gotta', 'kinda', 'sorta', 'prolly', 'ya',
-            'yeah', 'yep', 'nope', 'nah', 'haha', 'hehe', 'meh', 'ugh',
-            'bruh', 'bro', 'dude', 'fam', 'lowkey', 'highkey', 'vibe',
-            'slay', 'bet', 'cap', 'no cap', 'sus', 'lit', 'fire',
-            'deadass', 'fr', 'rn', 'idk', 'idc', 'idgaf', 'fyi',
-            'btw', 'jk', 'pls', 'plz', 'thx', 'ty', 'np', 'yw',
-            "y'all", 'ain\'t', 'gonna', 'lemme', 'gimme', 'dunno'
-        ]
-
         text_lower = text.lower()
         found = []
-        for pattern in colloquial_patterns:
+        for pattern in COLLOQUIAL_PATTERNS:
             if re.search(r'\b' + re.escape(pattern) + r'\b', text_lower):
                 found.append(pattern)
 
@@ -951,53 +1403,15 @@ class XWritingStyleManager:
 
     def _detect_filler_words(self, text: str) -> List[str]:
         """Detect filler words/phrases that indicate personal style"""
-        filler_patterns = [
-            'like', 'basically', 'honestly', 'actually', 'literally',
-            'obviously', 'clearly', 'definitely', 'essentially', 'probably',
-            'maybe', 'perhaps', 'kind of', 'sort of', 'i mean', 'you know',
-            'i think', 'i feel', 'i guess', 'i suppose', 'in my opinion',
-            'to be honest', 'to be fair', 'at the end of the day',
-            'at this point', 'the thing is', 'the fact is'
-        ]
-
         text_lower = text.lower()
         found = []
-        for pattern in filler_patterns:
+        for pattern in FILLER_PATTERNS:
             count = len(re.findall(r'\b' + re.escape(pattern) + r'\b', text_lower))
             if count >= 2:  # Used at least twice
                 found.append(pattern)
 
         return found
 
-    def _analyze_sentence_structure(self, texts: List[str]) -> Dict:
-        """Analyze sentence structure patterns"""
-        all_sentences = []
-
-        for text in texts:
-            # Split into sentences (simple approach)
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if s.strip()]
-            all_sentences.extend(sentences)
-
-        if not all_sentences:
-            return {"avg_length": 0, "variance": 0, "avg_words": 0}
-
-        # Calculate metrics
-        lengths = [len(s) for s in all_sentences]
-        word_counts = [len(s.split()) for s in all_sentences]
-
-        avg_length = sum(lengths) / len(lengths)
-        avg_words = sum(word_counts) / len(word_counts)
-
-        # Variance
-        variance = sum((l - avg_length) ** 2 for l in lengths) / len(lengths)
-
-        return {
-            "avg_length": avg_length,
-            "variance": variance ** 0.5,  # Standard deviation
-            "avg_words": avg_words
-        }
-
     def _analyze_punctuation(self, text: str, sample_count: int) -> Dict[str, float]:
         """Analyze punctuation usage patterns"""
         patterns = {
@@ -1036,22 +1450,9 @@ class XWritingStyleManager:
 
     def _analyze_emoji_usage(self, texts: List[str]) -> Dict:
         """Analyze emoji usage patterns"""
-        # Emoji regex pattern
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags
-            "\U00002702-\U000027B0"  # dingbats
-            "\U000024C2-\U0001F251"
-            "]+",
-            flags=re.UNICODE
-        )
-
         all_emojis = []
         for text in texts:
-            emojis = emoji_pattern.findall(text)
+            emojis = EMOJI_PATTERN.findall(text)
             all_emojis.extend(emojis)
 
         emoji_freq = Counter(all_emojis)
@@ -1066,21 +1467,10 @@ class XWritingStyleManager:
         """Heuristic-based tone analysis (fallback when LLM not available)"""
         text_lower = text.lower()
 
-        # Keyword-based tone detection
-        tone_keywords = {
-            "professional": ["accordingly", "furthermore", "implementation", "strategic", "optimize", "leverage"],
-            "casual": ["lol", "haha", "gonna", "wanna", "tbh", "ngl", "dude", "bro", "yeah", "cool"],
-            "technical": ["api", "algorithm", "framework", "architecture", "implementation", "deploy", "code"],
-            "sarcastic": ["obviously", "clearly", "sure", "right", "totally", "wow", "great"],
-            "enthusiastic": ["amazing", "awesome", "incredible", "love", "excited", "fantastic", "!"],
-            "analytical": ["however", "therefore", "analysis", "data", "suggests", "indicates", "compared"],
-            "friendly": ["thanks", "appreciate", "hope", "glad", "happy", "welcome", "please"]
-        }
-
         scores = {}
         total_words = len(text_lower.split())
 
-        for tone, keywords in tone_keywords.items():
+        for tone, keywords in TONE_KEYWORDS.items():
             count = sum(text_lower.count(kw) for kw in keywords)
             scores[tone] = min(1.0, count / max(total_words, 1) * 50)
 